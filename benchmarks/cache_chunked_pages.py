@@ -0,0 +1,159 @@
+"""Benchmark read_page and search_page on a very large cached page.
+
+Seeds two file-backed caches with the same ``--page-mb`` page (default
+20 MB of documentation prose, the size of a large ``llms-full.txt``): one
+with the page stored inline in ``page_cache.content``, one with
+``chunk_threshold_chars`` set so it is stored as line-range chunks. Each
+(storage, tool) pair then runs in a fresh subprocess that opens the cache,
+calls the real tool handler ``--repeat`` times against the cached page, and
+reports the median latency and the process's peak RSS:
+
+- ``read_page``: a 100-line window from the middle of the page;
+- ``search_page``: a literal search with a single match near the end, so the
+  whole page is scanned.
+
+Peak RSS is the process's high-water mark while the calls run: on Linux it
+is reset after imports and setup (``/proc/self/clear_refs``), so the
+``baseline`` row, a process that opens the cache and calls nothing, shows
+the resident size the calls start from. Elsewhere it falls back to
+``ru_maxrss``, which includes import-time peaks. The memory tier is
+disabled, as it is by default, so every call reads SQLite.
+
+Run from the repository root:
+
+    uv run python benchmarks/cache_chunked_pages.py --page-mb 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import suppress
+from pathlib import Path
+
+import aiosqlite
+import httpx
+
+from procontext.cache import Cache
+from procontext.config import Settings
+from procontext.fetch.service import Fetcher
+from procontext.registry.local import build_indexes
+from procontext.state import AppState
+from procontext.tools.read_page import handle as read_page_handle
+from procontext.tools.search_page import handle as search_page_handle
+
+_URL = "https://example.com/llms-full.txt"
+_THRESHOLD = 1024 * 1024
+
+
+def _reset_peak_rss() -> None:
+    with suppress(OSError):
+        Path("/proc/self/clear_refs").write_text("5")
+
+
+def _peak_rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _page(size: int) -> str:
+    line = "Documentation prose describing one option of the API in a sentence or two.\n"
+    count = size // len(line)
+    body = [f"## Section {i}\n" if i % 40 == 0 else line for i in range(count)]
+    body[-10] = "The needle appears exactly once.\n"
+    return "# Large reference\n\n" + "".join(body)
+
+
+async def _seed(db_path: Path, content: str, chunk_threshold_chars: int) -> None:
+    async with aiosqlite.connect(str(db_path)) as db:
+        cache = Cache(db, chunk_threshold_chars=chunk_threshold_chars)
+        await cache.init_db()
+        await cache.set_page(
+            url=_URL,
+            url_hash=hashlib.sha256(_URL.encode()).hexdigest(),
+            content=content,
+            outline="1:# Large reference",
+            ttl_hours=24,
+        )
+
+
+async def _child(db_path: Path, tool: str, repeat: int) -> None:
+    settings = Settings(fetcher={"ssrf_private_ip_check": False})  # type: ignore[arg-type]
+    latencies: list[float] = []
+    async with aiosqlite.connect(str(db_path)) as db, httpx.AsyncClient() as client:
+        state = AppState(
+            settings=settings,
+            indexes=build_indexes([]),
+            cache=Cache(db),
+            fetcher=Fetcher(client),
+            allowlist=frozenset({"example.com"}),
+        )
+        _reset_peak_rss()
+        for _ in range(repeat if tool != "baseline" else 0):
+            started = time.perf_counter()
+            if tool == "read_page":
+                await read_page_handle(_URL, 120_000, 100, state)
+            else:
+                result = await search_page_handle(_URL, "needle", state)
+                if not result["matches"]:
+                    raise SystemExit("search found no match")
+            latencies.append((time.perf_counter() - started) * 1000)
+        peak_mb = _peak_rss_mb()
+    median = statistics.median(latencies) if latencies else 0.0
+    sys.stdout.write(f"{median:.2f} {peak_mb:.1f}\n")
+
+
+def _measure(db_path: Path, tool: str, repeat: int) -> tuple[float, float]:
+    output = (
+        subprocess.run(
+            [sys.executable, __file__, "--child", str(db_path), tool, str(repeat)],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        .stdout.splitlines()[-1]
+        .split()
+    )  # the result follows any log lines
+    return float(output[0]), float(output[1])
+
+
+def main() -> None:
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        asyncio.run(_child(Path(sys.argv[2]), sys.argv[3], int(sys.argv[4])))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-mb", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    content = _page(args.page_mb * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"inline": Path(tmp) / "inline.db", "chunked": Path(tmp) / "chunked.db"}
+        asyncio.run(_seed(paths["inline"], content, 0))
+        asyncio.run(_seed(paths["chunked"], content, _THRESHOLD))
+        sys.stdout.write(
+            f"{len(content) / 1024 / 1024:.1f} MB page, "
+            f"{content.count(chr(10))} lines, {args.repeat} calls each\n"
+        )
+        sys.stdout.write(f"{'storage':>8} {'tool':>12} {'p50 ms':>9} {'peak RSS MB':>12}\n")
+        for storage, path in paths.items():
+            for tool in ("baseline", "read_page", "search_page"):
+                median, peak_mb = _measure(path, tool, args.repeat)
+                sys.stdout.write(f"{storage:>8} {tool:>12} {median:9.2f} {peak_mb:12.1f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark ``Cache.get_page`` latency under concurrent tool calls.
+
+Seeds a file-backed cache with documentation-sized pages, then runs rounds of
+concurrent callers against it: each caller performs ``get_page`` on a random
+page, and a fraction of calls (``--write-ratio``, default 0.1) also rewrite a
+page, as a cache miss or background refresh would. The memory tier is
+disabled so every read reaches SQLite.
+
+Run from the repository root:
+
+    uv run python benchmarks/cache_read_pool.py --pool-sizes 0 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+from procontext.cache import Cache, ReadPool
+
+
+def _url_hash(i: int) -> str:
+    return hashlib.sha256(f"https://example.com/docs/{i}".encode()).hexdigest()
+
+
+def _page(i: int, size: int) -> str:
+    line = f"Documentation line for page {i} with some representative prose.\n"
+    return f"# Page {i}\n\n" + line * (size // len(line))
+
+
+async def _seed(db_path: Path, pages: int, page_bytes: int) -> None:
+    async with aiosqlite.connect(str(db_path)) as db:
+        cache = Cache(db)
+        await cache.init_db()
+        for i in range(pages):
+            await cache.set_page(
+                url=f"https://example.com/docs/{i}",
+                url_hash=_url_hash(i),
+                content=_page(i, page_bytes),
+                outline="",
+                ttl_hours=24,
+            )
+
+
+async def _run(
+    db_path: Path,
+    *,
+    pool_size: int,
+    concurrency: int,
+    rounds: int,
+    pages: int,
+    page_bytes: int,
+    write_ratio: float,
+) -> list[float]:
+    rng = random.Random(0)
+    latencies: list[float] = []
+    async with aiosqlite.connect(str(db_path)) as db:
+        pool = await ReadPool.open(db_path, pool_size) if pool_size else None
+        cache = Cache(db, read_pool=pool)
+
+        async def tool_call() -> None:
+            i = rng.randrange(pages)
+            started = time.perf_counter()
+            await cache.get_page(_url_hash(i))
+            latencies.append((time.perf_counter() - started) * 1000)
+            if rng.random() < write_ratio:
+                await cache.set_page(
+                    url=f"https://example.com/docs/{i}",
+                    url_hash=_url_hash(i),
+                    content=_page(i, page_bytes),
+                    outline="",
+                    ttl_hours=24,
+                )
+
+        try:
+            for _ in range(rounds):
+                await asyncio.gather(*(tool_call() for _ in range(concurrency)))
+        finally:
+            if pool is not None:
+                await pool.close()
+    return latencies
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[0, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "cache.db"
+        await _seed(db_path, args.pages, args.page_bytes)
+        sys.stdout.write(
+            f"{args.concurrency} concurrent calls x {args.rounds} rounds, "
+            f"{args.pages} pages of {args.page_bytes // 1024} KiB\n"
+        )
+        sys.stdout.write(f"{'pool':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}\n")
+        for pool_size in args.pool_sizes:
+            latencies = await _run(
+                db_path,
+                pool_size=pool_size,
+                concurrency=args.concurrency,
+                rounds=args.rounds,
+                pages=args.pages,
+                page_bytes=args.page_bytes,
+                write_ratio=args.write_ratio,
+            )
+            label = str(pool_size) if pool_size else "none"
+            sys.stdout.write(
+                f"{label:>6} {statistics.median(latencies):8.2f} "
+                f"{_percentile(latencies, 99):8.2f} {max(latencies):8.2f}\n"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
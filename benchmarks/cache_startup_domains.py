@@ -0,0 +1,113 @@
+"""Benchmark the cache portion of server cold start on a large cache.
+
+Seeds a file-backed cache with ``--pages`` documentation pages (default
+50,000), each linking to a handful of external documentation hosts, then
+times what the stdio server does with the cache before it can serve the
+first request: open a fresh connection, run ``init_db``, and restore the
+discovered-domain allowlist.
+
+Two restore strategies are compared on the same database:
+
+- ``page_cache scan``: the pre-v4 query, which reads ``discovered_domains``
+  from every cached page and splits the strings in Python;
+- ``page_domains``: ``Cache.load_discovered_domains``, a ``SELECT DISTINCT``
+  over the indexed ``page_domains`` table.
+
+Each strategy runs on a new connection, so SQLite's page cache is cold; the
+OS file cache is not dropped between runs.
+
+Run from the repository root:
+
+    uv run python benchmarks/cache_startup_domains.py --pages 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+from procontext.cache import Cache
+
+_LEGACY_QUERY = "SELECT discovered_domains FROM page_cache WHERE discovered_domains != ''"
+
+
+def _page(i: int, size: int) -> str:
+    line = f"Documentation line for page {i} with some representative prose.\n"
+    return f"# Page {i}\n\n" + line * (size // len(line))
+
+
+def _domains(i: int, distinct: int) -> frozenset[str]:
+    return frozenset(f"docs{(i + offset) % distinct}.example.org" for offset in range(4))
+
+
+async def _seed(db_path: Path, pages: int, page_bytes: int, distinct: int) -> None:
+    async with aiosqlite.connect(str(db_path)) as db:
+        cache = Cache(db, write_flush_interval_ms=60_000, write_flush_max_pending=500)
+        await cache.init_db()
+        for i in range(pages):
+            url = f"https://example.com/docs/{i}"
+            await cache.set_page(
+                url=url,
+                url_hash=hashlib.sha256(url.encode()).hexdigest(),
+                content=_page(i, page_bytes),
+                outline="",
+                ttl_hours=24,
+                discovered_domains=_domains(i, distinct),
+            )
+        await cache.flush_writes()
+
+
+async def _legacy_restore(cache: Cache) -> frozenset[str]:
+    cursor = await cache._db.execute(_LEGACY_QUERY)
+    domains: set[str] = set()
+    for (value,) in await cursor.fetchall():
+        domains.update(value.split())
+    return frozenset(domains)
+
+
+async def _cold_start(db_path: Path, *, legacy: bool) -> tuple[float, int]:
+    started = time.perf_counter()
+    async with aiosqlite.connect(str(db_path)) as db:
+        cache = Cache(db)
+        await cache.init_db()
+        domains = await (_legacy_restore(cache) if legacy else cache.load_discovered_domains())
+        elapsed = (time.perf_counter() - started) * 1000
+    return elapsed, len(domains)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50_000)
+    parser.add_argument("--page-bytes", type=int, default=4 * 1024)
+    parser.add_argument("--distinct-domains", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "cache.db"
+        sys.stdout.write(f"Seeding {args.pages} pages of {args.page_bytes // 1024} KiB ...\n")
+        await _seed(db_path, args.pages, args.page_bytes, args.distinct_domains)
+        size_mb = db_path.stat().st_size / 1_048_576
+        sys.stdout.write(f"Cache database: {size_mb:.0f} MB\n")
+        sys.stdout.write(f"{'restore':>16} {'domains':>8} {'median ms':>10} {'max ms':>8}\n")
+        for label, legacy in (("page_cache scan", True), ("page_domains", False)):
+            timings: list[float] = []
+            found = 0
+            for _ in range(args.repeats):
+                elapsed, found = await _cold_start(db_path, legacy=legacy)
+                timings.append(elapsed)
+            sys.stdout.write(
+                f"{label:>16} {found:>8} {statistics.median(timings):10.1f} {max(timings):8.1f}\n"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,164 @@
+"""Benchmark event-loop lag while large pages are fetched and cached.
+
+Runs a mixed load against an in-process server state, once per page
+processing mode:
+
+- ``--misses`` concurrent cache misses on distinct ``--page-mb`` pages
+  (default 20 MB of documentation prose with headings and links, served by
+  an in-memory HTTP transport, so no network time is measured);
+- meanwhile, a stream of ``read_page`` calls on a small cached page, one
+  after another, as other agents would make;
+- and a probe that sleeps 5 ms at a time and records how late it wakes up.
+
+Each mode reports the probe's p50/p99/max lag, the p99 and max latency of
+the small ``read_page`` calls, and how long the misses took in total:
+
+- ``inline``: every page processed on the event loop (the threshold is set
+  above the page size), the behaviour before ``PageProcessor``;
+- ``thread``: pages processed with ``anyio.to_thread``;
+- ``process``: pages processed in a pool of ``--workers`` processes.
+
+Run from the repository root:
+
+    uv run python benchmarks/event_loop_lag.py --page-mb 20 --misses 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+import httpx
+
+from procontext.cache import Cache
+from procontext.config import Settings
+from procontext.fetch.service import Fetcher
+from procontext.logging_config import setup_logging
+from procontext.page import fetch_or_cached_page
+from procontext.page.processing import PageProcessor
+from procontext.registry.local import build_indexes
+from procontext.state import AppState
+from procontext.tools.read_page import handle as read_page_handle
+
+_SMALL_URL = "https://example.com/small/llms.txt"
+_PROBE_SECONDS = 0.005
+
+
+def _page(size: int) -> str:
+    line = "Documentation prose describing one option, see https://docs.example.com/api.\n"
+    count = size // len(line)
+    body = [f"## Section {i}\n" if i % 40 == 0 else line for i in range(count)]
+    return "# Large reference\n\n" + "".join(body)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _run(mode: str, big_page: str, misses: int, workers: int) -> str:
+    small_page = "# Small\n\n" + "A short page.\n" * 200
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        body = small_page if request.url.path.startswith("/small") else big_page
+        return httpx.Response(200, text=body, headers={"content-type": "text/plain"})
+
+    settings = Settings(
+        fetcher={"ssrf_private_ip_check": False},  # type: ignore[arg-type]
+        logging={"level": "WARNING"},  # type: ignore[arg-type]
+    )
+    if mode == "inline":
+        processor = PageProcessor(offload_threshold_chars=len(big_page) + 1)
+    else:
+        processor = PageProcessor(
+            executor=mode,  # type: ignore[arg-type]
+            offload_threshold_chars=settings.processing.offload_threshold_chars,
+            process_workers=workers,
+            settings=settings,
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        async with (
+            aiosqlite.connect(str(Path(tmp) / "cache.db")) as db,
+            httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client,
+        ):
+            cache = Cache(db)
+            await cache.init_db()
+            state = AppState(
+                settings=settings,
+                indexes=build_indexes([]),
+                cache=cache,
+                fetcher=Fetcher(client),
+                allowlist=frozenset({"example.com"}),
+                page_processor=processor,
+            )
+            await fetch_or_cached_page(_SMALL_URL, state)
+            # Start the worker threads or processes outside the measured window.
+            await processor.process(big_page[: settings.processing.offload_threshold_chars])
+
+            done = asyncio.Event()
+            lags: list[float] = []
+            reads: list[float] = []
+
+            async def probe() -> None:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    await asyncio.sleep(_PROBE_SECONDS)
+                    lags.append((time.perf_counter() - started - _PROBE_SECONDS) * 1000)
+
+            async def reader() -> None:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    await read_page_handle(_SMALL_URL, 1, 50, state)
+                    reads.append((time.perf_counter() - started) * 1000)
+
+            background = [asyncio.create_task(probe()), asyncio.create_task(reader())]
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    fetch_or_cached_page(f"https://example.com/big/{i}/llms-full.txt", state)
+                    for i in range(misses)
+                )
+            )
+            elapsed = time.perf_counter() - started
+            done.set()
+            await asyncio.gather(*background)
+            processor.close()
+
+    return (
+        f"{mode:>8} {statistics.median(lags):8.1f} {_percentile(lags, 0.99):8.1f} "
+        f"{max(lags):8.1f} {_percentile(reads, 0.99):9.1f} {max(reads):9.1f} "
+        f"{len(reads):6d} {elapsed:8.2f}\n"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-mb", type=int, default=20)
+    parser.add_argument("--misses", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    args = parser.parse_args()
+
+    setup_logging(Settings(logging={"level": "WARNING"}))  # type: ignore[arg-type]
+    big_page = _page(args.page_mb * 1024 * 1024)
+    sys.stdout.write(
+        f"{args.misses} misses of a {len(big_page) / 1024 / 1024:.1f} MB page "
+        f"({big_page.count(chr(10))} lines); lag and read_page latency in ms\n"
+    )
+    sys.stdout.write(
+        f"{'mode':>8} {'lag p50':>8} {'lag p99':>8} {'lag max':>8} "
+        f"{'read p99':>9} {'read max':>9} {'reads':>6} {'misses s':>8}\n"
+    )
+    for mode in args.modes:
+        sys.stdout.write(asyncio.run(_run(mode, big_page, args.misses, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
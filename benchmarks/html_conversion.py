@@ -0,0 +1,128 @@
+"""Benchmark concurrent HTML-to-Markdown conversion: threads vs. a process pool.
+
+Converts ``--pages`` large HTML pages (default 100 pages of ~256 KB of
+documentation markup: headings, prose with links and inline code, code
+blocks and tables) concurrently through ``MarkItDownHtmlProcessor``, once
+per executor:
+
+- ``thread``: conversions on ``anyio.to_thread`` worker threads, the
+  default;
+- ``process``: conversions in a ``MarkItDownPool`` of ``--workers`` warm
+  processes (default: one per CPU). The workers are started and their
+  converters built before the clock starts.
+
+For each it reports the wall time, the throughput in pages per second, the
+p50/max latency of a single conversion, and the largest event-loop lag seen
+by a probe that sleeps 5 ms at a time while the conversions run.
+
+Run from the repository root:
+
+    uv run python benchmarks/html_conversion.py --pages 100 --page-kb 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from procontext.config import Settings
+from procontext.fetch.models import FetchedContent
+from procontext.fetch.processors.markitdown import MarkItDownHtmlProcessor, MarkItDownPool
+from procontext.logging_config import setup_logging
+
+_PROBE_SECONDS = 0.005
+
+_SECTION = (
+    "<h2>Section {i}</h2>"
+    "<p>Documentation prose for option {i}, with <b>emphasis</b>, "
+    "<a href='https://docs.example.com/api/{i}'>a link</a> and <code>call_{i}()</code>.</p>"
+    "<pre><code>def example_{i}():\n    return {i}\n</code></pre>"
+    "<table><tr><th>Name</th><th>Default</th></tr><tr><td>opt_{i}</td><td>{i}</td></tr></table>\n"
+)
+
+
+def _page(index: int, size: int) -> FetchedContent:
+    sections: list[str] = []
+    total = 0
+    while total < size:
+        section = _SECTION.format(i=len(sections))
+        sections.append(section)
+        total += len(section)
+    html = f"<html><body><h1>Reference {index}</h1>{''.join(sections)}</body></html>"
+    url = f"https://docs.example.com/reference/{index}.html"
+    return FetchedContent(
+        original_url=url,
+        final_url=url,
+        body=html.encode(),
+        text_content=html,
+        content_type="text/html",
+        charset="utf-8",
+    )
+
+
+async def _run(executor: str, pages: list[FetchedContent], workers: int) -> str:
+    pool: MarkItDownPool | None = None
+    if executor == "process":
+        settings = Settings(logging={"level": "WARNING"})  # type: ignore[arg-type]
+        pool = MarkItDownPool(workers=workers, timeout_seconds=600, settings=settings)
+        # Start every worker outside the measured window.
+        await asyncio.gather(*(pool.convert(_page(-1, 1024)) for _ in range(workers)))
+    processor = MarkItDownHtmlProcessor(pool)
+
+    done = asyncio.Event()
+    lags: list[float] = []
+
+    async def probe() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(_PROBE_SECONDS)
+            lags.append((time.perf_counter() - started - _PROBE_SECONDS) * 1000)
+
+    async def convert(page: FetchedContent) -> float:
+        started = time.perf_counter()
+        await processor.transform(page)
+        return time.perf_counter() - started
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(convert(page) for page in pages))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    if pool is not None:
+        await pool.close()
+
+    label = executor if pool is None else f"process×{workers}"
+    return (
+        f"{label:>10} {elapsed:8.1f} {len(pages) / elapsed:8.2f} "
+        f"{statistics.median(latencies):8.1f} {max(latencies):8.1f} {max(lags):9.1f}\n"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--page-kb", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--executors", nargs="+", default=["thread", "process"])
+    args = parser.parse_args()
+
+    setup_logging(Settings(logging={"level": "WARNING"}))  # type: ignore[arg-type]
+    pages = [_page(index, args.page_kb * 1024) for index in range(args.pages)]
+    sys.stdout.write(
+        f"{args.pages} pages of {len(pages[0].body) / 1024:.0f} KB converted concurrently "
+        f"on {os.cpu_count()} CPUs\n"
+    )
+    sys.stdout.write(
+        f"{'executor':>10} {'wall s':>8} {'pages/s':>8} {'p50 s':>8} {'max s':>8} {'lag ms':>9}\n"
+    )
+    for executor in args.executors:
+        sys.stdout.write(asyncio.run(_run(executor, pages, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""Documentation page cache: SQLite store with an optional in-process hot tier."""
+
+from procontext.cache.memory import MemoryPageTier
+from procontext.cache.metrics import CacheMetrics
+from procontext.cache.pool import ReadPool
+from procontext.cache.shards import ShardedCache
+from procontext.cache.store import Cache
+
+__all__ = ["Cache", "CacheMetrics", "MemoryPageTier", "ReadPool", "ShardedCache"]
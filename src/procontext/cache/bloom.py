@@ -0,0 +1,46 @@
+"""Per-process Bloom filter over ``page_cache``-style 32-byte keys.
+
+``Cache`` keeps one in front of the ``negative_cache`` table, so the check
+that runs before every network fetch answers "never failed" for almost every
+URL without a SQLite query. A positive answer may be false and is confirmed
+against the table.
+
+Keys are SHA-256 digests and already uniformly distributed, so each bit
+position is read straight from four bytes of the key instead of re-hashing.
+Bits are never cleared; ``Cache`` rebuilds the filter from the table after
+expired rows are removed.
+"""
+
+from __future__ import annotations
+
+import math
+
+# A 32-byte key yields eight independent 4-byte slices.
+_MAX_HASHES = 8
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for *capacity* keys at *error_rate*."""
+
+    __slots__ = ("_bits", "_hashes", "_size")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._size = size
+        self._hashes = max(1, min(_MAX_HASHES, round(size / capacity * math.log(2))))
+        self._bits = bytearray((size + 7) // 8)
+
+    def _positions(self, key: bytes) -> list[int]:
+        return [
+            int.from_bytes(key[4 * i : 4 * i + 4], "little") % self._size
+            for i in range(self._hashes)
+        ]
+
+    def add(self, key: bytes) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, bytes):
+            return False
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
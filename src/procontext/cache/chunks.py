@@ -0,0 +1,34 @@
+"""Line-range chunks for pages too large to load whole.
+
+A page whose content reaches ``Cache``'s ``chunk_threshold_chars`` is stored
+in ``page_chunks`` instead of ``page_cache.content``: chunk *n* holds lines
+``n * chunk_lines + 1`` through ``(n + 1) * chunk_lines``, cut at the same
+boundaries as ``str.splitlines()`` and including the line breaks, so the
+chunks concatenate back to the original content exactly. A reader that
+wants lines *start*..*end* loads only the chunks ``chunk_span`` names.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from procontext.lines import LineIndex
+
+# Lines per chunk. A few hundred KiB for typical llms-full.txt prose: small
+# enough that a read_page window touches one or two chunks, large enough that
+# a search streams through a 20 MB page in a few hundred queries.
+CHUNK_LINES = 1000
+
+
+def split_chunks(content: str, line_index: LineIndex, chunk_lines: int) -> list[str]:
+    """Cut *content* into pieces of *chunk_lines* lines each (the last may be shorter)."""
+    starts = line_index.starts
+    bounds = [starts[line] for line in range(0, len(starts), chunk_lines)]
+    bounds.append(len(content))
+    return [content[lo:hi] for lo, hi in zip(bounds, bounds[1:], strict=False)]
+
+
+def chunk_span(start: int, end: int, chunk_lines: int) -> tuple[int, int]:
+    """Return the first and last chunk numbers holding 1-based lines *start*..*end*."""
+    return (max(start, 1) - 1) // chunk_lines, (max(end, 1) - 1) // chunk_lines
@@ -0,0 +1,98 @@
+"""Storage codecs for cached page content and outlines.
+
+Each ``page_cache`` row records the codec its ``content`` and ``outline``
+columns were written with, so rows written under different settings coexist
+and are decoded transparently on read.
+
+- ``none``: UTF-8 text stored as SQLite TEXT (the original format).
+- ``zlib``: UTF-8 bytes compressed with zlib, stored as a BLOB. Always available.
+- ``zstd``: UTF-8 bytes compressed with Zstandard, stored as a BLOB. Available
+  when the interpreter ships ``compression.zstd`` (Python 3.14+) or the
+  ``zstandard`` package is installed.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+CodecName = Literal["none", "zlib", "zstd"]
+
+CODEC_NAMES: tuple[CodecName, ...] = ("none", "zlib", "zstd")
+
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 9
+
+
+def _load_zstd() -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]] | None:
+    """Return ``(compress, decompress)`` for the first available zstd binding."""
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+
+        return (
+            lambda data: zstd.compress(data, level=_ZSTD_LEVEL),
+            zstd.decompress,
+        )
+    except ImportError:
+        pass
+    try:
+        import zstandard  # type: ignore[import-not-found]
+
+        compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+        decompressor = zstandard.ZstdDecompressor()
+        return compressor.compress, decompressor.decompress
+    except ImportError:
+        return None
+
+
+_ZSTD = _load_zstd()
+
+
+def is_codec_available(name: str) -> bool:
+    """Return True when *name* is a known codec usable in this interpreter."""
+    if name == "zstd":
+        return _ZSTD is not None
+    return name in CODEC_NAMES
+
+
+def encode_text(text: str, codec: str) -> str | bytes:
+    """Encode *text* for storage with *codec*.
+
+    Raises:
+        ValueError: if the codec is unknown or unavailable.
+    """
+    if codec == "none":
+        return text
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, _ZLIB_LEVEL)
+    if codec == "zstd" and _ZSTD is not None:
+        return _ZSTD[0](data)
+    raise ValueError(f"Unsupported cache codec: {codec}")
+
+
+def decode_text(value: str | bytes, codec: str) -> str:
+    """Decode a stored column value written with *codec*.
+
+    Raises:
+        ValueError: if the codec is unknown, unavailable, or the payload is corrupt.
+    """
+    if codec == "none":
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return value
+    if isinstance(value, str):
+        raise ValueError(f"Expected binary payload for codec {codec}")
+    if codec == "zlib":
+        decompress = zlib.decompress
+    elif codec == "zstd" and _ZSTD is not None:
+        decompress = _ZSTD[1]
+    else:
+        raise ValueError(f"Unsupported cache codec: {codec}")
+    try:
+        return decompress(value).decode("utf-8")
+    except Exception as exc:  # zlib.error, UnicodeDecodeError, zstd binding errors
+        raise ValueError(f"Corrupt {codec} payload: {exc}") from exc
@@ -0,0 +1,98 @@
+"""In-process hot tier for recently served page entries.
+
+Agents paginate through the same page many times per session. Serving those
+repeat reads from memory avoids a SQLite round trip, three timestamp parses,
+and a pydantic model rebuild per tool call.
+
+The tier is an LRU bounded by the approximate in-memory size of the cached
+content and outline strings. It is owned by ``Cache`` and never consulted
+directly by callers — ``CacheProtocol`` consumers see a single cache.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections import OrderedDict
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from procontext.models.cache import PageCacheEntry
+
+
+def _entry_size(entry: PageCacheEntry) -> int:
+    """Return the approximate memory footprint of an entry's text payload."""
+    size = sys.getsizeof(entry.content) + sys.getsizeof(entry.outline)
+    if entry.line_index is not None:
+        size += sys.getsizeof(entry.line_index.starts)
+    if entry.outline_index is not None:
+        size += sys.getsizeof(entry.outline_index)
+    return size
+
+
+class MemoryPageTier:
+    """Byte-budgeted LRU of ``PageCacheEntry`` objects keyed by URL hash."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[PageCacheEntry, int]] = OrderedDict()
+        self._size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Approximate bytes currently held by the tier."""
+        return self._size_bytes
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def get(self, url_hash: str) -> PageCacheEntry | None:
+        """Return the entry for *url_hash* with a freshly computed ``stale`` flag."""
+        item = self._entries.get(url_hash)
+        if item is None:
+            return None
+
+        entry, size = item
+        self._entries.move_to_end(url_hash)
+        stale = datetime.now(UTC) > entry.expires_at
+        if stale != entry.stale:
+            entry = entry.model_copy(update={"stale": stale})
+            self._entries[url_hash] = (entry, size)
+        return entry
+
+    def peek(self, url_hash: str) -> PageCacheEntry | None:
+        """Return the entry for *url_hash* as stored, without promoting it."""
+        item = self._entries.get(url_hash)
+        return item[0] if item is not None else None
+
+    def put(self, entry: PageCacheEntry) -> None:
+        """Insert or replace an entry, evicting least recently used entries as needed.
+
+        Entries larger than the whole budget are not admitted; any previous
+        version of the same page is dropped so the tier never serves it.
+        """
+        self.discard(entry.url_hash)
+        size = _entry_size(entry)
+        if size > self._max_bytes:
+            return
+
+        self._entries[entry.url_hash] = (entry, size)
+        self._size_bytes += size
+        while self._size_bytes > self._max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size_bytes -= evicted_size
+
+    def discard(self, url_hash: str) -> None:
+        """Remove an entry if present."""
+        item = self._entries.pop(url_hash, None)
+        if item is not None:
+            self._size_bytes -= item[1]
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self._size_bytes = 0
@@ -0,0 +1,180 @@
+"""In-process counters and latency histograms for the page cache.
+
+One ``CacheMetrics`` instance is shared by ``Cache`` (storage-level numbers:
+bytes read and written, per-operation latency) and ``page/service.py``
+(lookup outcomes and background refreshes); the write-behind and refresh
+queues record their depth in gauges. Counters and gauges cover the current
+server process only; ``Cache.save_metrics`` stores a snapshot in
+``server_metadata`` so ``procontext db stats`` can report on the last session.
+"""
+
+from __future__ import annotations
+
+import bisect
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Upper bounds (ms) of the latency buckets; a final overflow bucket catches the rest.
+LATENCY_BUCKETS_MS: tuple[float, ...] = (
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+)
+
+COUNTER_NAMES: tuple[str, ...] = (
+    "hits",
+    "stale_hits",
+    "misses",
+    "refreshes_started",
+    "refreshes_ahead",
+    "refreshes_skipped",
+    "refreshes_dropped",
+    "refreshes_completed",
+    "refreshes_unchanged",
+    "refreshes_not_modified",
+    "refreshes_failed",
+    "refreshes_deferred",
+    "negative_hits",
+    "negatives_stored",
+    "bytes_read",
+    "bytes_written",
+)
+
+# Queue depths: ``<queue>_depth`` is the latest value, ``<queue>_max_depth`` the
+# session high-water mark. Both are set through ``CacheMetrics.track_depth``.
+GAUGE_NAMES: tuple[str, ...] = (
+    "write_queue_depth",
+    "write_queue_max_depth",
+    "refresh_queue_depth",
+    "refresh_queue_max_depth",
+)
+
+
+@dataclass
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds."""
+
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, duration_ms: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding quantile *q* (``max_ms`` if overflow)."""
+        total = self.count
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index == len(LATENCY_BUCKETS_MS):
+                    return self.max_ms
+                return min(LATENCY_BUCKETS_MS[index], self.max_ms)
+        return self.max_ms
+
+
+@dataclass
+class CacheMetrics:
+    """Counters and per-operation latency for one server process."""
+
+    started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    counters: dict[str, int] = field(default_factory=lambda: dict.fromkeys(COUNTER_NAMES, 0))
+    gauges: dict[str, int] = field(default_factory=lambda: dict.fromkeys(GAUGE_NAMES, 0))
+    latency: dict[str, LatencyHistogram] = field(default_factory=dict)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def track_depth(self, queue: str, depth: int) -> None:
+        """Record the current *depth* of *queue* and raise its session maximum."""
+        self.gauges[f"{queue}_depth"] = depth
+        max_name = f"{queue}_max_depth"
+        self.gauges[max_name] = max(self.gauges.get(max_name, 0), depth)
+
+    def observe(self, operation: str, duration_ms: float) -> None:
+        histogram = self.latency.get(operation)
+        if histogram is None:
+            histogram = self.latency[operation] = LatencyHistogram()
+        histogram.observe(duration_ms)
+
+    @contextmanager
+    def timed(self, operation: str) -> Iterator[None]:
+        """Record the duration of the enclosed block under *operation*."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(operation, (time.perf_counter() - started) * 1000)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a JSON-serialisable snapshot."""
+        return {
+            "started_at": self.started_at.isoformat(),
+            "saved_at": datetime.now(UTC).isoformat(),
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "latency": {
+                operation: {
+                    "counts": list(histogram.counts),
+                    "total_ms": histogram.total_ms,
+                    "max_ms": histogram.max_ms,
+                }
+                for operation, histogram in self.latency.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> CacheMetrics:
+        """Rebuild metrics from a ``to_dict`` snapshot.
+
+        Raises:
+            AttributeError, KeyError, TypeError, ValueError: if *data* is not a
+                valid snapshot.
+        """
+        latency: dict[str, LatencyHistogram] = {}
+        for operation, raw in data.get("latency", {}).items():
+            counts = [int(count) for count in raw["counts"]]
+            if len(counts) != len(LATENCY_BUCKETS_MS) + 1:
+                raise ValueError(f"histogram {operation!r} has {len(counts)} buckets")
+            latency[operation] = LatencyHistogram(
+                counts=counts, total_ms=float(raw["total_ms"]), max_ms=float(raw["max_ms"])
+            )
+        counters = dict.fromkeys(COUNTER_NAMES, 0)
+        counters.update({name: int(value) for name, value in data["counters"].items()})
+        # Snapshots saved before gauges were recorded have none.
+        gauges = dict.fromkeys(GAUGE_NAMES, 0)
+        gauges.update({name: int(value) for name, value in data.get("gauges", {}).items()})
+        return cls(
+            started_at=datetime.fromisoformat(data["started_at"]),
+            counters=counters,
+            gauges=gauges,
+            latency=latency,
+        )
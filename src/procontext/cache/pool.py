@@ -0,0 +1,81 @@
+"""Pool of read-only SQLite connections for concurrent cache reads.
+
+aiosqlite runs every operation of a connection on that connection's single
+worker thread, so with one shared connection concurrent ``get_page`` calls
+queue behind one another and behind writes. In WAL mode readers never block
+the writer or each other, so ``Cache`` can serve reads from a few extra
+read-only connections while its main connection stays the dedicated writer.
+
+A pool needs a file-backed database: each ``:memory:`` connection is a
+separate database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import aiosqlite
+
+from procontext.cache.schema import apply_connection_pragmas
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+
+class ReadPool:
+    """Fixed-size set of read-only connections handed out one caller at a time."""
+
+    def __init__(self, connections: list[aiosqlite.Connection]) -> None:
+        self._connections = connections
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        for connection in connections:
+            self._idle.put_nowait(connection)
+
+    @classmethod
+    async def open(cls, db_path: str | Path, size: int) -> ReadPool:
+        """Open *size* read-only connections to an existing database file.
+
+        Raises:
+            ValueError: if *size* is not positive.
+            aiosqlite.Error: if a connection cannot be opened.
+        """
+        if size < 1:
+            raise ValueError("Read pool size must be at least 1")
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        connections: list[aiosqlite.Connection] = []
+        try:
+            for _ in range(size):
+                connection = await aiosqlite.connect(uri, uri=True)
+                connections.append(connection)
+                await apply_connection_pragmas(connection)
+        except BaseException:
+            for connection in connections:
+                await connection.close()
+            raise
+        return cls(connections)
+
+    @property
+    def size(self) -> int:
+        return len(self._connections)
+
+    @property
+    def idle(self) -> int:
+        """Number of connections not currently checked out."""
+        return self._idle.qsize()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out a connection, waiting for one to become idle if necessary."""
+        connection = await self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def close(self) -> None:
+        """Close every connection in the pool."""
+        for connection in self._connections:
+            await connection.close()
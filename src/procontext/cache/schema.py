@@ -0,0 +1,537 @@
+"""Cache database schema, connection pragmas, and forward migrations.
+
+The schema version is stored as ``schema_version`` in ``server_metadata``.
+Databases created before versioning existed have no such row and are treated
+as version 1. ``migrate`` brings any older database up to ``SCHEMA_VERSION``
+one step at a time; each step runs in its own transaction and records the new
+version in that transaction, so an interrupted upgrade resumes cleanly.
+
+Version history:
+
+1. ``url_hash`` stored as 64-char hex TEXT with a UNIQUE ``url`` column and
+   ISO 8601 TEXT timestamps. Columns added during v1's life (``outline``
+   through ``last_accessed_at``) may be missing from older files.
+2. 32-byte BLOB ``url_hash`` key in a ``WITHOUT ROWID`` table, no separate
+   ``url`` index, and integer epoch-millisecond timestamps.
+3. ``etag`` and ``last_modified`` response validators for conditional
+   revalidation.
+4. ``page_domains``: one ``(domain, url_hash)`` row per discovered domain of
+   each page, so the allowlist is restored without scanning ``page_cache``.
+   Writers replace a page's rows alongside the page (``write_page_domains``);
+   a trigger removes them when the page is deleted.
+5. ``outline_index``: the parsed outline packed as columns (``OutlineIndex``),
+   so tool calls do not re-parse the outline string. Older rows are indexed
+   when read.
+6. ``negative_cache``: URLs whose last fetch failed permanently (404,
+   redirect loops), with the error to replay and an expiry.
+7. ``ttl_ms``: the TTL each page was last stored with, adapted by background
+   refreshes. ``NULL`` on older rows means the configured base TTL.
+8. ``content_hash``, ``line_count``, ``char_count`` and ``token_estimate``:
+   computed once when a page is written, so cache hits do not re-hash the
+   content and ``Cache.get_page_metadata`` never loads it. ``NULL`` on older
+   rows until the page is next written; readers compute them instead.
+9. ``page_chunks`` and ``chunk_lines``: content of very large pages stored
+   as fixed line-range chunks (``cache/chunks.py``) so reads load only the
+   lines they need. ``chunk_lines`` is ``NULL`` for pages stored inline.
+   Writers replace a page's chunks alongside the page (``write_page_chunks``);
+   a trigger removes them when the page is deleted.
+
+Adding a version means appending a DDL-changing coroutine to ``_MIGRATIONS``,
+updating ``CREATE_PAGE_TABLE`` and bumping ``SCHEMA_VERSION``; ``procontext
+doctor`` reads the same constants. ``CREATE_PAGE_TABLE`` always describes the
+newest version, so earlier steps must use their own frozen DDL.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+    import aiosqlite
+
+log = structlog.get_logger()
+
+SCHEMA_VERSION = 9
+
+# Applied to every connection (writer and read pool). WAL makes
+# synchronous=NORMAL durable against application crashes; only an OS crash or
+# power loss can roll back the most recent commits, which a cache tolerates.
+CONNECTION_PRAGMAS: tuple[tuple[str, str | int], ...] = (
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16 * 1024),  # KiB when negative: 16 MiB page cache
+    ("mmap_size", 256 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+)
+
+CREATE_PAGE_TABLE = """
+CREATE TABLE IF NOT EXISTS page_cache (
+    url_hash           BLOB PRIMARY KEY,
+    url                TEXT NOT NULL,
+    content            TEXT NOT NULL,
+    outline            TEXT NOT NULL DEFAULT '',
+    discovered_domains TEXT NOT NULL DEFAULT '',
+    fetched_at         INTEGER NOT NULL,
+    expires_at         INTEGER NOT NULL,
+    last_checked_at    INTEGER,
+    codec              TEXT NOT NULL DEFAULT 'none',
+    line_index         BLOB,
+    size_bytes         INTEGER NOT NULL DEFAULT 0,
+    last_accessed_at   INTEGER NOT NULL DEFAULT 0,
+    etag               TEXT,
+    last_modified      TEXT,
+    outline_index      BLOB,
+    ttl_ms             INTEGER,
+    content_hash       TEXT,
+    line_count         INTEGER,
+    char_count         INTEGER,
+    token_estimate     INTEGER,
+    chunk_lines        INTEGER
+) WITHOUT ROWID
+"""
+
+CREATE_PAGE_INDEXES: tuple[str, ...] = (
+    "CREATE INDEX IF NOT EXISTS idx_page_expires ON page_cache(expires_at)",
+    "CREATE INDEX IF NOT EXISTS idx_page_last_accessed ON page_cache(last_accessed_at)",
+)
+
+CREATE_PAGE_DOMAINS_TABLE = """
+CREATE TABLE IF NOT EXISTS page_domains (
+    domain   TEXT NOT NULL,
+    url_hash BLOB NOT NULL,
+    PRIMARY KEY (domain, url_hash)
+) WITHOUT ROWID
+"""
+
+CREATE_PAGE_DOMAINS_INDEXES: tuple[str, ...] = (
+    "CREATE INDEX IF NOT EXISTS idx_page_domains_url_hash ON page_domains(url_hash)",
+    "CREATE TRIGGER IF NOT EXISTS page_cache_delete_domains AFTER DELETE ON page_cache "
+    "BEGIN DELETE FROM page_domains WHERE url_hash = OLD.url_hash; END",
+)
+
+CREATE_PAGE_CHUNKS_TABLE = """
+CREATE TABLE IF NOT EXISTS page_chunks (
+    url_hash BLOB NOT NULL,
+    chunk_no INTEGER NOT NULL,
+    content  TEXT NOT NULL,
+    PRIMARY KEY (url_hash, chunk_no)
+) WITHOUT ROWID
+"""
+
+# INSERT OR REPLACE on page_cache does not fire delete triggers, so writers
+# replace chunks themselves; the trigger covers cleanup and eviction.
+CREATE_PAGE_CHUNKS_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS page_cache_delete_chunks AFTER DELETE ON page_cache "
+    "BEGIN DELETE FROM page_chunks WHERE url_hash = OLD.url_hash; END"
+)
+
+CREATE_NEGATIVE_TABLE = """
+CREATE TABLE IF NOT EXISTS negative_cache (
+    url_hash   BLOB PRIMARY KEY,
+    error_code TEXT NOT NULL,
+    message    TEXT NOT NULL,
+    suggestion TEXT NOT NULL DEFAULT '',
+    expires_at INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+CREATE_METADATA_TABLE = """
+CREATE TABLE IF NOT EXISTS server_metadata (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+"""
+
+_BATCH_SIZE = 100
+
+
+def to_epoch_ms(value: datetime) -> int:
+    """Convert an aware datetime to integer epoch milliseconds."""
+    return round(value.timestamp() * 1000)
+
+
+def from_epoch_ms(value: int) -> datetime:
+    """Convert integer epoch milliseconds to an aware UTC datetime."""
+    return datetime.fromtimestamp(value / 1000, UTC)
+
+
+async def apply_connection_pragmas(db: aiosqlite.Connection) -> None:
+    """Apply the per-connection tuning pragmas."""
+    for name, value in CONNECTION_PRAGMAS:
+        await db.execute(f"PRAGMA {name} = {value}")
+
+
+async def _table_exists(db: aiosqlite.Connection, name: str) -> bool:
+    cursor = await db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    )
+    return await cursor.fetchone() is not None
+
+
+async def read_schema_version(db: aiosqlite.Connection) -> int:
+    """Return the database's schema version, or ``0`` for an empty database.
+
+    Files without a ``schema_version`` row predate versioning and are v1.
+
+    Raises:
+        ValueError: if the stored version is not an integer.
+    """
+    if await _table_exists(db, "server_metadata"):
+        cursor = await db.execute("SELECT value FROM server_metadata WHERE key = 'schema_version'")
+        row = await cursor.fetchone()
+        if row is not None:
+            return int(row[0])
+    if not await _table_exists(db, "page_cache"):
+        return 0
+    # No version row: a pre-versioning file, unless the row was lost after a
+    # v2 table was created — the key's declared type tells them apart.
+    cursor = await db.execute("PRAGMA table_info(page_cache)")
+    key_type = next((row[2] for row in await cursor.fetchall() if row[1] == "url_hash"), "")
+    return 2 if key_type.upper() == "BLOB" else 1
+
+
+async def _write_schema_version(db: aiosqlite.Connection, version: int) -> None:
+    await db.execute(CREATE_METADATA_TABLE)
+    await db.execute(
+        "INSERT OR REPLACE INTO server_metadata (key, value) VALUES ('schema_version', ?)",
+        (str(version),),
+    )
+
+
+async def write_page_domains(
+    db: aiosqlite.Connection, pages: Iterable[tuple[bytes, Iterable[str]]]
+) -> None:
+    """Replace the ``page_domains`` rows of each ``(key, domains)`` page.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    pages = list(pages)
+    if not pages:
+        return
+    await db.executemany("DELETE FROM page_domains WHERE url_hash = ?", [(k,) for k, _ in pages])
+    await db.executemany(
+        "INSERT OR IGNORE INTO page_domains (domain, url_hash) VALUES (?, ?)",
+        [(domain, key) for key, domains in pages for domain in domains],
+    )
+
+
+async def write_page_chunks(
+    db: aiosqlite.Connection, keys: Iterable[bytes], chunks: Iterable[tuple[bytes, int, Any]]
+) -> None:
+    """Replace the ``page_chunks`` rows of every page in *keys* with *chunks*.
+
+    *chunks* are ``(key, chunk_no, encoded content)`` rows; pages stored
+    inline pass none. Runs inside the caller's transaction; the caller commits.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    await db.executemany("DELETE FROM page_chunks WHERE url_hash = ?", [(key,) for key in keys])
+    await db.executemany(
+        "INSERT INTO page_chunks (url_hash, chunk_no, content) VALUES (?, ?, ?)", chunks
+    )
+
+
+async def _create_page_chunks(db: aiosqlite.Connection) -> None:
+    await db.execute(CREATE_PAGE_CHUNKS_TABLE)
+    await db.execute(CREATE_PAGE_CHUNKS_TRIGGER)
+
+
+async def _create_page_domains(db: aiosqlite.Connection) -> None:
+    """Create ``page_domains`` if missing and fill it from ``page_cache``."""
+    existed = await _table_exists(db, "page_domains")
+    await db.execute(CREATE_PAGE_DOMAINS_TABLE)
+    for statement in CREATE_PAGE_DOMAINS_INDEXES:
+        await db.execute(statement)
+    if existed:
+        return
+    rows = 0
+    cursor = await db.execute(
+        "SELECT url_hash, discovered_domains FROM page_cache WHERE discovered_domains != ''"
+    )
+    while batch := list(await cursor.fetchmany(_BATCH_SIZE)):
+        await write_page_domains(db, ((key, domains.split()) for key, domains in batch))
+        rows += len(batch)
+    if rows:
+        log.info("cache_page_domains_backfilled", pages=rows)
+
+
+async def _create_current_schema(db: aiosqlite.Connection) -> None:
+    await db.execute(CREATE_PAGE_TABLE)
+    for statement in CREATE_PAGE_INDEXES:
+        await db.execute(statement)
+    await _create_page_domains(db)
+    await _create_page_chunks(db)
+    await db.execute(CREATE_NEGATIVE_TABLE)
+    await db.execute(CREATE_METADATA_TABLE)
+
+
+# ---------------------------------------------------------------------------
+# v1 -> v2
+# ---------------------------------------------------------------------------
+
+# Columns v1 databases gained over time; older v1 files may lack some.
+_V1_LATE_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("outline", "TEXT NOT NULL DEFAULT ''"),
+    ("discovered_domains", "TEXT NOT NULL DEFAULT ''"),
+    ("last_checked_at", "TEXT"),
+    ("codec", "TEXT NOT NULL DEFAULT 'none'"),
+    ("line_index", "BLOB"),
+    ("size_bytes", "INTEGER NOT NULL DEFAULT 0"),
+    ("last_accessed_at", "TEXT"),
+)
+
+
+# The v2 table as the v1 -> v2 step creates it; later steps alter it further.
+_PAGE_TABLE_V2 = """
+CREATE TABLE page_cache_v2 (
+    url_hash           BLOB PRIMARY KEY,
+    url                TEXT NOT NULL,
+    content            TEXT NOT NULL,
+    outline            TEXT NOT NULL DEFAULT '',
+    discovered_domains TEXT NOT NULL DEFAULT '',
+    fetched_at         INTEGER NOT NULL,
+    expires_at         INTEGER NOT NULL,
+    last_checked_at    INTEGER,
+    codec              TEXT NOT NULL DEFAULT 'none',
+    line_index         BLOB,
+    size_bytes         INTEGER NOT NULL DEFAULT 0,
+    last_accessed_at   INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+
+
+def _iso_to_epoch_ms(value: str | None) -> int | None:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return to_epoch_ms(parsed)
+
+
+def _stored_size(value: str | bytes | None) -> int:
+    if value is None:
+        return 0
+    return len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
+
+
+async def _migrate_v1_to_v2(db: aiosqlite.Connection) -> None:
+    cursor = await db.execute("PRAGMA table_info(page_cache)")
+    existing = {row[1] for row in await cursor.fetchall()}
+    for name, definition in _V1_LATE_COLUMNS:
+        if name not in existing:
+            await db.execute(f"ALTER TABLE page_cache ADD COLUMN {name} {definition}")
+
+    await db.execute(_PAGE_TABLE_V2)
+
+    copied = skipped = 0
+    source = await db.execute(
+        "SELECT url_hash, url, content, outline, discovered_domains, fetched_at, expires_at, "
+        "last_checked_at, codec, line_index, size_bytes, last_accessed_at FROM page_cache"
+    )
+    while rows := await source.fetchmany(_BATCH_SIZE):
+        converted: list[tuple[object, ...]] = []
+        for row in rows:
+            try:
+                key = bytes.fromhex(row[0])
+                fetched_at = _iso_to_epoch_ms(row[5])
+                expires_at = _iso_to_epoch_ms(row[6])
+                last_checked_at = _iso_to_epoch_ms(row[7])
+                last_accessed_at = _iso_to_epoch_ms(row[11]) or fetched_at
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            if len(key) != 32 or fetched_at is None or expires_at is None:
+                skipped += 1
+                continue
+            size_bytes = row[10] or (
+                _stored_size(row[2]) + _stored_size(row[3]) + _stored_size(row[9])
+            )
+            converted.append(
+                (
+                    key,
+                    row[1],
+                    row[2],
+                    row[3],
+                    row[4],
+                    fetched_at,
+                    expires_at,
+                    last_checked_at,
+                    row[8],
+                    row[9],
+                    size_bytes,
+                    last_accessed_at,
+                )
+            )
+        await db.executemany(
+            "INSERT OR REPLACE INTO page_cache_v2 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            converted,
+        )
+        copied += len(converted)
+
+    await db.execute("DROP TABLE page_cache")
+    await db.execute("ALTER TABLE page_cache_v2 RENAME TO page_cache")
+    for statement in CREATE_PAGE_INDEXES:
+        await db.execute(statement)
+    log.info("cache_schema_migrated", to_version=2, rows=copied, skipped_rows=skipped)
+
+
+# ---------------------------------------------------------------------------
+# v2 -> v3
+# ---------------------------------------------------------------------------
+
+
+async def _migrate_v2_to_v3(db: aiosqlite.Connection) -> None:
+    cursor = await db.execute("PRAGMA table_info(page_cache)")
+    existing = {row[1] for row in await cursor.fetchall()}
+    # Guarded: doctor --fix may already have added the columns.
+    for name in ("etag", "last_modified"):
+        if name not in existing:
+            await db.execute(f"ALTER TABLE page_cache ADD COLUMN {name} TEXT")
+    log.info("cache_schema_migrated", to_version=3)
+
+
+# ---------------------------------------------------------------------------
+# v3 -> v4
+# ---------------------------------------------------------------------------
+
+
+async def _migrate_v3_to_v4(db: aiosqlite.Connection) -> None:
+    await _create_page_domains(db)
+    log.info("cache_schema_migrated", to_version=4)
+
+
+# ---------------------------------------------------------------------------
+# v4 -> v5
+# ---------------------------------------------------------------------------
+
+
+async def _migrate_v4_to_v5(db: aiosqlite.Connection) -> None:
+    cursor = await db.execute("PRAGMA table_info(page_cache)")
+    existing = {row[1] for row in await cursor.fetchall()}
+    # Guarded: doctor --fix may already have added the column.
+    if "outline_index" not in existing:
+        await db.execute("ALTER TABLE page_cache ADD COLUMN outline_index BLOB")
+    log.info("cache_schema_migrated", to_version=5)
+
+
+# ---------------------------------------------------------------------------
+# v5 -> v6
+# ---------------------------------------------------------------------------
+
+
+async def _migrate_v5_to_v6(db: aiosqlite.Connection) -> None:
+    await db.execute(CREATE_NEGATIVE_TABLE)
+    log.info("cache_schema_migrated", to_version=6)
+
+
+# ---------------------------------------------------------------------------
+# v6 -> v7
+# ---------------------------------------------------------------------------
+
+
+async def _migrate_v6_to_v7(db: aiosqlite.Connection) -> None:
+    cursor = await db.execute("PRAGMA table_info(page_cache)")
+    existing = {row[1] for row in await cursor.fetchall()}
+    # Guarded: doctor --fix may already have added the column.
+    if "ttl_ms" not in existing:
+        await db.execute("ALTER TABLE page_cache ADD COLUMN ttl_ms INTEGER")
+    log.info("cache_schema_migrated", to_version=7)
+
+
+# ---------------------------------------------------------------------------
+# v7 -> v8
+# ---------------------------------------------------------------------------
+
+_V8_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("content_hash", "TEXT"),
+    ("line_count", "INTEGER"),
+    ("char_count", "INTEGER"),
+    ("token_estimate", "INTEGER"),
+)
+
+
+async def _migrate_v7_to_v8(db: aiosqlite.Connection) -> None:
+    cursor = await db.execute("PRAGMA table_info(page_cache)")
+    existing = {row[1] for row in await cursor.fetchall()}
+    # Guarded: doctor --fix may already have added some of the columns.
+    for name, column_type in _V8_COLUMNS:
+        if name not in existing:
+            await db.execute(f"ALTER TABLE page_cache ADD COLUMN {name} {column_type}")
+    log.info("cache_schema_migrated", to_version=8)
+
+
+# ---------------------------------------------------------------------------
+# v8 -> v9
+# ---------------------------------------------------------------------------
+
+
+async def _migrate_v8_to_v9(db: aiosqlite.Connection) -> None:
+    cursor = await db.execute("PRAGMA table_info(page_cache)")
+    existing = {row[1] for row in await cursor.fetchall()}
+    # Guarded: doctor --fix may already have added the column.
+    if "chunk_lines" not in existing:
+        await db.execute("ALTER TABLE page_cache ADD COLUMN chunk_lines INTEGER")
+    await _create_page_chunks(db)
+    log.info("cache_schema_migrated", to_version=9)
+
+
+# Keyed by the version each migration produces.
+_MIGRATIONS: dict[int, Callable[[aiosqlite.Connection], Awaitable[None]]] = {
+    2: _migrate_v1_to_v2,
+    3: _migrate_v2_to_v3,
+    4: _migrate_v3_to_v4,
+    5: _migrate_v4_to_v5,
+    6: _migrate_v5_to_v6,
+    7: _migrate_v6_to_v7,
+    8: _migrate_v7_to_v8,
+    9: _migrate_v8_to_v9,
+}
+
+
+async def migrate(db: aiosqlite.Connection) -> int:
+    """Create or upgrade the cache schema to ``SCHEMA_VERSION``.
+
+    Returns the version the database had before migrating (``0`` if empty).
+
+    Raises:
+        RuntimeError: if the database was written by a newer ProContext.
+        aiosqlite.Error: if a migration step fails; that step is rolled back.
+    """
+    start = await read_schema_version(db)
+    if start > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Cache database schema v{start} is newer than this ProContext supports "
+            f"(v{SCHEMA_VERSION}); upgrade ProContext or run 'procontext db recreate'"
+        )
+
+    if start == 0:
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await _create_current_schema(db)
+            await _write_schema_version(db, SCHEMA_VERSION)
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+        return start
+
+    for version in range(start + 1, SCHEMA_VERSION + 1):
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await _MIGRATIONS[version](db)
+            await _write_schema_version(db, version)
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+
+    # Recreate anything missing at the current version (e.g. a dropped index).
+    await _create_current_schema(db)
+    await db.commit()
+    return start
@@ -0,0 +1,311 @@
+"""Spread the page cache across several SQLite files for write concurrency.
+
+SQLite allows one writer per database file, so with a single ``cache.db`` a
+burst of ``set_page`` calls (``procontext cache warm``, a refresh storm on a
+busy HTTP server) commits one transaction at a time. With ``cache.shards``
+above 1, pages are assigned to one of N files by the leading bytes of their
+``url_hash``, and each file gets its own ``Cache`` with its own writer
+connection, write-behind queue, and read pool, so writes to different shards
+commit in parallel.
+
+Shard 0 is the configured ``db_path`` and is the primary: it keeps the
+``server_metadata`` rows that describe the whole cache (saved metrics, last
+cleanup time). Shard *i* lives next to it as ``<stem>-shard<i><suffix>``
+(``cache-shard1.db``, ...). Every shard has the full schema, including its
+own ``schema_version``.
+
+Changing the shard count reassigns URLs to different files. Pages left in
+their old shard are no longer found; they are re-fetched on demand and the
+orphaned rows age out through cleanup, or ``procontext db recreate`` clears
+everything at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+import aiosqlite
+
+from procontext.cache.metrics import CacheMetrics
+from procontext.cache.pool import ReadPool
+from procontext.cache.store import Cache
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from datetime import datetime
+    from pathlib import Path
+
+    from procontext.errors import ErrorCode
+    from procontext.lines import LineIndex
+    from procontext.models.cache import NegativeCacheEntry, PageCacheEntry, PageMetadata
+    from procontext.outline import OutlineIndex
+
+
+def shard_paths(db_path: Path, shards: int) -> list[Path]:
+    """Return the database file of every shard, primary first."""
+    return [db_path] + [
+        db_path.with_name(f"{db_path.stem}-shard{index}{db_path.suffix}")
+        for index in range(1, shards)
+    ]
+
+
+def shard_index(url_hash: str, shards: int) -> int:
+    """Return the shard that stores *url_hash*, from its first four bytes.
+
+    A malformed hash maps to the primary, whose ``Cache`` rejects it as usual.
+    """
+    try:
+        return int(url_hash[:8], 16) % shards
+    except ValueError:
+        return 0
+
+
+def _split_budget(total: int, shards: int) -> int:
+    """Return each shard's share of a size budget (``0`` stays unbounded)."""
+    return -(-total // shards) if total > 0 else 0
+
+
+class ShardedCache:
+    """``CacheProtocol`` over several ``Cache`` shards, routed by ``url_hash``.
+
+    Page and negative-cache operations go to the URL's shard. Allowlist
+    restoration merges every shard. Cleanup, maintenance, and write flushes
+    run on every shard; the primary alone decides when cleanup is due and
+    stores metrics. All shards share one ``CacheMetrics``.
+
+    ``open`` connects the shard files and owns the connections and read
+    pools it creates; ``close`` releases them.
+    """
+
+    def __init__(
+        self,
+        shards: Sequence[Cache],
+        *,
+        owned: Sequence[ReadPool | aiosqlite.Connection] = (),
+    ) -> None:
+        if not shards:
+            raise ValueError("ShardedCache needs at least one shard")
+        self._shards = tuple(shards)
+        self._owned = tuple(owned)
+        self.metrics = self._shards[0].metrics
+
+    @classmethod
+    async def open(
+        cls,
+        db_path: Path,
+        shards: int,
+        *,
+        read_pool_size: int = 0,
+        memory_max_bytes: int = 0,
+        codec: str = "none",
+        write_flush_interval_ms: int = 0,
+        write_flush_max_pending: int = 64,
+        max_bytes: int = 0,
+        max_entries: int = 0,
+        metrics: CacheMetrics | None = None,
+        ttl_jitter: float = 0.0,
+        chunk_threshold_chars: int = 0,
+    ) -> ShardedCache:
+        """Open (creating or migrating) every shard file under *db_path*.
+
+        ``memory_max_bytes``, ``max_bytes`` and ``max_entries`` are totals,
+        split evenly between shards; ``read_pool_size`` is per shard.
+
+        Raises:
+            RuntimeError: if a shard was written by a newer ProContext.
+            aiosqlite.Error: if a shard cannot be opened.
+        """
+        shared_metrics = metrics if metrics is not None else CacheMetrics()
+        owned: list[ReadPool | aiosqlite.Connection] = []
+        caches: list[Cache] = []
+        try:
+            for index, path in enumerate(shard_paths(db_path, shards)):
+                db = await aiosqlite.connect(str(path))
+                owned.append(db)
+                cache = Cache(
+                    db,
+                    memory_max_bytes=_split_budget(memory_max_bytes, shards),
+                    codec=codec,
+                    write_flush_interval_ms=write_flush_interval_ms,
+                    write_flush_max_pending=write_flush_max_pending,
+                    max_bytes=_split_budget(max_bytes, shards),
+                    max_entries=_split_budget(max_entries, shards),
+                    metrics=shared_metrics,
+                    ttl_jitter=ttl_jitter,
+                    primary=index == 0,
+                    chunk_threshold_chars=chunk_threshold_chars,
+                )
+                # The writer creates the schema and switches the file to WAL
+                # before any read-only pool connection is opened against it.
+                await cache.init_db()
+                if read_pool_size > 0:
+                    pool = await ReadPool.open(path, read_pool_size)
+                    owned.insert(0, pool)  # pools close before the writers
+                    cache.attach_read_pool(pool)
+                caches.append(cache)
+        except BaseException:
+            for resource in owned:
+                with suppress(aiosqlite.Error):
+                    await resource.close()
+            raise
+        return cls(caches, owned=owned)
+
+    async def close(self) -> None:
+        """Close the read pools and connections opened by ``open``."""
+        for resource in self._owned:
+            await resource.close()
+
+    @property
+    def shards(self) -> tuple[Cache, ...]:
+        return self._shards
+
+    @property
+    def primary(self) -> Cache:
+        return self._shards[0]
+
+    def shard_for(self, url_hash: str) -> Cache:
+        """Return the shard that stores *url_hash*."""
+        return self._shards[shard_index(url_hash, len(self._shards))]
+
+    async def init_db(self) -> None:
+        """Create or migrate the schema of every shard."""
+        for shard in self._shards:
+            await shard.init_db()
+
+    # ------------------------------------------------------------------
+    # Routed by url_hash
+    # ------------------------------------------------------------------
+
+    async def get_page(self, url_hash: str) -> PageCacheEntry | None:
+        return await self.shard_for(url_hash).get_page(url_hash)
+
+    async def get_page_metadata(self, url_hash: str) -> PageMetadata | None:
+        return await self.shard_for(url_hash).get_page_metadata(url_hash)
+
+    async def get_chunks(
+        self, url_hash: str, first: int, last: int, *, content_hash: str
+    ) -> list[str] | None:
+        return await self.shard_for(url_hash).get_chunks(
+            url_hash, first, last, content_hash=content_hash
+        )
+
+    async def set_page(
+        self,
+        url: str,
+        url_hash: str,
+        content: str,
+        outline: str,
+        ttl_hours: float,
+        *,
+        discovered_domains: frozenset[str] = frozenset(),
+        line_index: LineIndex | None = None,
+        outline_index: OutlineIndex | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        content_hash: str | None = None,
+    ) -> None:
+        await self.shard_for(url_hash).set_page(
+            url,
+            url_hash,
+            content,
+            outline,
+            ttl_hours,
+            discovered_domains=discovered_domains,
+            line_index=line_index,
+            outline_index=outline_index,
+            etag=etag,
+            last_modified=last_modified,
+            content_hash=content_hash,
+        )
+
+    async def revalidate_page(
+        self,
+        url_hash: str,
+        ttl_hours: float,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        await self.shard_for(url_hash).revalidate_page(
+            url_hash, ttl_hours, etag=etag, last_modified=last_modified
+        )
+
+    async def update_last_checked(self, url_hash: str) -> None:
+        await self.shard_for(url_hash).update_last_checked(url_hash)
+
+    async def get_negative(self, url_hash: str) -> NegativeCacheEntry | None:
+        return await self.shard_for(url_hash).get_negative(url_hash)
+
+    async def set_negative(
+        self,
+        url_hash: str,
+        *,
+        code: ErrorCode,
+        message: str,
+        suggestion: str,
+        ttl_minutes: int,
+    ) -> None:
+        await self.shard_for(url_hash).set_negative(
+            url_hash, code=code, message=message, suggestion=suggestion, ttl_minutes=ttl_minutes
+        )
+
+    # ------------------------------------------------------------------
+    # Every shard
+    # ------------------------------------------------------------------
+
+    async def get_refresh_candidates(
+        self,
+        *,
+        expires_before: datetime,
+        accessed_since: datetime,
+        checked_before: datetime,
+        limit: int,
+    ) -> list[PageMetadata]:
+        """Merge every shard's candidates, soonest expiry first, up to *limit*."""
+        results = await asyncio.gather(
+            *(
+                shard.get_refresh_candidates(
+                    expires_before=expires_before,
+                    accessed_since=accessed_since,
+                    checked_before=checked_before,
+                    limit=limit,
+                )
+                for shard in self._shards
+            )
+        )
+        merged = sorted(
+            (page for pages in results for page in pages), key=lambda page: page.expires_at
+        )
+        return merged[:limit]
+
+    async def load_discovered_domains(self) -> frozenset[str]:
+        results = await asyncio.gather(*(shard.load_discovered_domains() for shard in self._shards))
+        return frozenset().union(*results)
+
+    async def run_write_flusher(self) -> None:
+        """Run every shard's write flusher concurrently. Runs until cancelled."""
+        await asyncio.gather(*(shard.run_write_flusher() for shard in self._shards))
+
+    async def flush_writes(self) -> None:
+        await asyncio.gather(*(shard.flush_writes() for shard in self._shards))
+
+    async def cleanup_if_due(self, interval_hours: int) -> bool:
+        """Clean every shard if the primary's last cleanup is *interval_hours* old."""
+        if not await self.primary.cleanup_if_due(interval_hours):
+            return False
+        for shard in self._shards[1:]:
+            await shard.cleanup_expired()
+        return True
+
+    async def cleanup_expired(self) -> None:
+        for shard in self._shards:
+            await shard.cleanup_expired()
+
+    async def run_maintenance(self) -> None:
+        for shard in self._shards:
+            await shard.run_maintenance()
+
+    async def save_metrics(self) -> None:
+        await self.primary.save_metrics()
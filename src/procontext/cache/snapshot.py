@@ -0,0 +1,437 @@
+"""Portable ``page_cache`` snapshots for seeding other cache databases.
+
+A snapshot is a gzip-compressed NDJSON file:
+
+- a header line: ``{"format": "procontext-cache-snapshot", "version": 1, ...}``;
+- one line per page, with ``content`` and ``outline`` as plain text (rows are
+  re-encoded with the importing cache's codec), timestamps in epoch ms, and the
+  page's stored TTL (``ttl_ms``, absent in older snapshots);
+- a trailer line: ``{"rows": N, "sha256": ...}``, the digest covering every
+  line before it.
+
+Export and import both stream rows in batches, so neither holds the whole
+cache or archive in memory. Import reads the file twice: once to verify the
+trailer checksum, then again to insert. Rows merge by ``fetched_at``: an
+incoming row replaces a local one only when it was fetched later.
+
+Pages stored as line-range chunks (``cache/chunks.py``) are exported as one
+``content`` string like any other page; import chunks incoming content again
+when it reaches the importing cache's ``chunk_threshold_chars``.
+
+Both functions take one connection or, for a sharded cache, the connection of
+every shard in ``shard_paths`` order: export concatenates the shards and import
+routes each row to its shard with ``shard_index``.
+
+Both functions raise on failure (``aiosqlite.Error``, ``OSError``,
+``SnapshotError``); callers decide how to report it.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+import aiosqlite
+
+from procontext.cache.chunks import CHUNK_LINES, split_chunks
+from procontext.cache.codec import decode_text, encode_text
+from procontext.cache.schema import SCHEMA_VERSION, write_page_chunks, write_page_domains
+from procontext.cache.shards import shard_index
+from procontext.content_stats import estimate_tokens, hash_content
+from procontext.lines import LineIndex
+from procontext.outline import OutlineIndex
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+    from pathlib import Path
+
+SNAPSHOT_FORMAT = "procontext-cache-snapshot"
+SNAPSHOT_VERSION = 1
+
+_BATCH_SIZE = 500
+
+_SELECT_BATCH = (
+    "SELECT url_hash, url, content, outline, discovered_domains, fetched_at, expires_at, "
+    "last_checked_at, codec, etag, last_modified, chunk_lines, ttl_ms FROM page_cache "
+    "WHERE url_hash > ? ORDER BY url_hash LIMIT ?"
+)
+
+_SELECT_CHUNKS = "SELECT content FROM page_chunks WHERE url_hash = ? ORDER BY chunk_no"
+
+_MERGE_PAGE = (
+    "INSERT INTO page_cache "
+    "(url_hash, url, content, outline, discovered_domains, "
+    "fetched_at, expires_at, last_checked_at, codec, line_index, size_bytes, last_accessed_at, "
+    "etag, last_modified, outline_index, content_hash, line_count, char_count, token_estimate, "
+    "chunk_lines, ttl_ms) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(url_hash) DO UPDATE SET "
+    "url = excluded.url, content = excluded.content, outline = excluded.outline, "
+    "discovered_domains = excluded.discovered_domains, fetched_at = excluded.fetched_at, "
+    "expires_at = excluded.expires_at, last_checked_at = excluded.last_checked_at, "
+    "codec = excluded.codec, line_index = excluded.line_index, "
+    "size_bytes = excluded.size_bytes, "
+    "last_accessed_at = MAX(page_cache.last_accessed_at, excluded.last_accessed_at), "
+    "etag = excluded.etag, last_modified = excluded.last_modified, "
+    "outline_index = excluded.outline_index, content_hash = excluded.content_hash, "
+    "line_count = excluded.line_count, char_count = excluded.char_count, "
+    "token_estimate = excluded.token_estimate, chunk_lines = excluded.chunk_lines, "
+    "ttl_ms = excluded.ttl_ms "
+    "WHERE excluded.fetched_at > page_cache.fetched_at"
+)
+
+
+class SnapshotError(ValueError):
+    """The snapshot file is malformed, truncated, or fails its checksum."""
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    rows: int
+    skipped: int
+    file_bytes: int
+    sha256: str
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    rows: int
+    inserted: int
+    replaced: int
+    kept_local: int
+    invalid: int
+
+
+def _stored_size(value: str | bytes) -> int:
+    return len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
+
+
+def _connections(
+    db: aiosqlite.Connection | Sequence[aiosqlite.Connection],
+) -> list[aiosqlite.Connection]:
+    return [db] if isinstance(db, aiosqlite.Connection) else list(db)
+
+
+async def _read_content(shard: aiosqlite.Connection, row: Any) -> str:
+    """Return the decoded content of a ``_SELECT_BATCH`` row, joining its chunks if any.
+
+    Raises:
+        ValueError: if the content cannot be decoded.
+    """
+    if row[11] is None:
+        return decode_text(row[2], row[8])
+    cursor = await shard.execute(_SELECT_CHUNKS, (row[0],))
+    return "".join(decode_text(chunk, row[8]) for (chunk,) in await cursor.fetchall())
+
+
+def _dump_line(record: dict[str, Any]) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def export_snapshot(
+    db: aiosqlite.Connection | Sequence[aiosqlite.Connection], path: Path
+) -> ExportResult:
+    """Write every ``page_cache`` row of *db* (every shard) to a snapshot at *path*.
+
+    Rows that cannot be decoded (corrupt or written with an unavailable
+    codec) are skipped and counted.
+    The file is written next to *path* and renamed into place, so a failed
+    export never leaves a partial snapshot behind.
+    """
+    digest = hashlib.sha256()
+    rows = skipped = 0
+    partial = path.with_name(path.name + ".partial")
+    try:
+        with gzip.open(partial, "wb") as out:
+
+            def write(line: bytes) -> None:
+                digest.update(line)
+                out.write(line)
+
+            write(
+                _dump_line(
+                    {
+                        "format": SNAPSHOT_FORMAT,
+                        "version": SNAPSHOT_VERSION,
+                        "schema_version": SCHEMA_VERSION,
+                        "exported_at": datetime.now(UTC).isoformat(),
+                    }
+                )
+            )
+            for shard in _connections(db):
+                last_key = b""
+                while True:
+                    cursor = await shard.execute(_SELECT_BATCH, (last_key, _BATCH_SIZE))
+                    batch = list(await cursor.fetchall())
+                    if not batch:
+                        break
+                    for row in batch:
+                        try:
+                            content = await _read_content(shard, row)
+                            outline = decode_text(row[3], row[8])
+                        except ValueError:
+                            skipped += 1
+                            continue
+                        write(
+                            _dump_line(
+                                {
+                                    "url_hash": row[0].hex(),
+                                    "url": row[1],
+                                    "content": content,
+                                    "outline": outline,
+                                    "discovered_domains": row[4].split(),
+                                    "fetched_at": row[5],
+                                    "expires_at": row[6],
+                                    "last_checked_at": row[7],
+                                    "etag": row[9],
+                                    "last_modified": row[10],
+                                    "ttl_ms": row[12],
+                                }
+                            )
+                        )
+                        rows += 1
+                    last_key = batch[-1][0]
+            out.write(_dump_line({"rows": rows, "sha256": digest.hexdigest()}))
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+    return ExportResult(
+        rows=rows, skipped=skipped, file_bytes=path.stat().st_size, sha256=digest.hexdigest()
+    )
+
+
+def _read_lines(path: Path) -> Iterator[bytes]:
+    """Yield the header and row lines of a snapshot, verifying the trailer at the end.
+
+    Raises:
+        SnapshotError: if the header, trailer, row count, or checksum is wrong.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    try:
+        with gzip.open(path, "rb") as source:
+            previous: bytes | None = None
+            for line in source:
+                if previous is not None:
+                    digest.update(previous)
+                    if count == 0:
+                        _check_header(previous)
+                    count += 1
+                    yield previous
+                previous = line
+            if previous is None or count == 0:
+                raise SnapshotError("snapshot is empty or has no header")
+            trailer = json.loads(previous)
+    except (OSError, EOFError, json.JSONDecodeError) as exc:
+        raise SnapshotError(f"snapshot is unreadable: {exc}") from exc
+
+    if not isinstance(trailer, dict) or "sha256" not in trailer:
+        raise SnapshotError("snapshot is truncated (missing trailer)")
+    if trailer.get("rows") != count - 1:
+        raise SnapshotError(
+            f"snapshot declares {trailer.get('rows')} rows but contains {count - 1}"
+        )
+    if trailer["sha256"] != digest.hexdigest():
+        raise SnapshotError("snapshot checksum mismatch")
+
+
+def _check_header(line: bytes) -> None:
+    try:
+        header = json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise SnapshotError(f"snapshot header is not JSON: {exc}") from exc
+    if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError("not a ProContext cache snapshot")
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"unsupported snapshot version {header.get('version')!r}")
+
+
+def verify_snapshot(path: Path) -> int:
+    """Check *path* end to end and return its row count.
+
+    Raises:
+        SnapshotError: if the snapshot is malformed or fails its checksum.
+    """
+    return sum(1 for _ in _read_lines(path)) - 1
+
+
+_ChunkRows = list[tuple[bytes, int, Any]]
+
+
+def _encode_row(
+    record: dict[str, Any], codec: str, chunk_threshold_chars: int
+) -> tuple[tuple[Any, ...], _ChunkRows] | None:
+    """Return ``_MERGE_PAGE`` parameters and chunk rows for a snapshot row.
+
+    Returns None if the row is invalid.
+    """
+    try:
+        url = record["url"]
+        key = bytes.fromhex(record["url_hash"])
+        if key != hashlib.sha256(url.encode()).digest():
+            return None
+        content_text = record["content"]
+        outline_text = record["outline"]
+        lines = LineIndex.build(content_text)
+        chunks: _ChunkRows = []
+        line_index: bytes | None = None
+        if 0 < chunk_threshold_chars <= len(content_text):
+            chunks = [
+                (key, number, encode_text(chunk, codec))
+                for number, chunk in enumerate(split_chunks(content_text, lines, CHUNK_LINES))
+            ]
+            content = encode_text("", codec)
+        else:
+            content = encode_text(content_text, codec)
+            line_index = lines.to_bytes()
+        outline = encode_text(outline_text, codec)
+        outline_index = OutlineIndex.build(outline_text).to_bytes()
+        fetched_at = int(record["fetched_at"])
+        last_checked_at = record["last_checked_at"]
+        # Snapshots exported before per-page TTLs were stored have no ttl_ms.
+        ttl_ms = record.get("ttl_ms")
+        row = (
+            key,
+            url,
+            content,
+            outline,
+            " ".join(sorted(record["discovered_domains"])),
+            fetched_at,
+            int(record["expires_at"]),
+            int(last_checked_at) if last_checked_at is not None else None,
+            codec,
+            line_index,
+            _stored_size(content)
+            + _stored_size(outline)
+            + len(line_index or b"")
+            + len(outline_index)
+            + sum(_stored_size(chunk[2]) for chunk in chunks),
+            fetched_at,
+            record["etag"],
+            record["last_modified"],
+            outline_index,
+            hash_content(content_text),
+            lines.total_lines,
+            len(content_text),
+            estimate_tokens(len(content_text)),
+            CHUNK_LINES if chunks else None,
+            int(ttl_ms) if ttl_ms is not None else None,
+        )
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+    return row, chunks
+
+
+async def _merge_batch(
+    db: aiosqlite.Connection,
+    batch: list[tuple[tuple[Any, ...], _ChunkRows]],
+    tally: Counter[str],
+) -> None:
+    """Merge *batch* in one transaction, counting outcomes into *tally*."""
+    keys = [row[0] for row, _ in batch]
+    cursor = await db.execute(
+        f"SELECT url_hash, fetched_at FROM page_cache "
+        f"WHERE url_hash IN ({', '.join('?' * len(keys))})",
+        keys,
+    )
+    local: dict[bytes, int] = {key: fetched_at for key, fetched_at in await cursor.fetchall()}
+    winners: dict[bytes, list[str]] = {}
+    winner_chunks: dict[bytes, _ChunkRows] = {}
+    for row, chunks in batch:
+        key, fetched_at = row[0], row[5]
+        local_fetched_at = local.get(key)
+        if local_fetched_at is None:
+            tally["inserted"] += 1
+        elif fetched_at > local_fetched_at:
+            tally["replaced"] += 1
+        else:
+            tally["kept_local"] += 1
+            continue
+        local[key] = fetched_at
+        winners[key] = row[4].split()
+        winner_chunks[key] = chunks
+    await db.executemany(_MERGE_PAGE, [row for row, _ in batch])
+    await write_page_domains(db, winners.items())
+    await write_page_chunks(
+        db, winners, (chunk for chunks in winner_chunks.values() for chunk in chunks)
+    )
+    await db.commit()
+
+
+async def _merge_sharded(
+    shards: list[aiosqlite.Connection],
+    batch: list[tuple[tuple[Any, ...], _ChunkRows]],
+    tally: Counter[str],
+) -> None:
+    """Split *batch* by shard and merge each part into its shard."""
+    if len(shards) == 1:
+        await _merge_batch(shards[0], batch, tally)
+        return
+    parts: dict[int, list[tuple[tuple[Any, ...], _ChunkRows]]] = {}
+    for entry in batch:
+        parts.setdefault(shard_index(entry[0][0].hex(), len(shards)), []).append(entry)
+    for index, part in parts.items():
+        await _merge_batch(shards[index], part, tally)
+
+
+async def import_snapshot(
+    db: aiosqlite.Connection | Sequence[aiosqlite.Connection],
+    path: Path,
+    *,
+    codec: str,
+    chunk_threshold_chars: int = 0,
+) -> ImportResult:
+    """Merge the rows of the snapshot at *path* into *db*, encoding them with *codec*.
+
+    Pages of at least *chunk_threshold_chars* characters are stored as chunks
+    (``0`` stores every page inline).
+
+    *db* (every shard) must already have the current schema (``Cache.init_db``).
+    The snapshot is verified before anything is written. Rows are committed
+    in batches; an incoming row replaces a local one only if its
+    ``fetched_at`` is newer. Rows whose ``url_hash`` does not match their URL
+    or that are otherwise malformed are skipped and counted as invalid.
+
+    Raises:
+        SnapshotError: if the snapshot is malformed or fails its checksum.
+    """
+    verify_snapshot(path)
+
+    shards = _connections(db)
+    rows = invalid = 0
+    tally: Counter[str] = Counter()
+    batch: list[tuple[tuple[Any, ...], _ChunkRows]] = []
+    lines = _read_lines(path)
+    next(lines)  # header
+    for line in lines:
+        rows += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        encoded = (
+            _encode_row(record, codec, chunk_threshold_chars) if isinstance(record, dict) else None
+        )
+        if encoded is None:
+            invalid += 1
+            continue
+        batch.append(encoded)
+        if len(batch) >= _BATCH_SIZE:
+            await _merge_sharded(shards, batch, tally)
+            batch = []
+    if batch:
+        await _merge_sharded(shards, batch, tally)
+
+    return ImportResult(
+        rows=rows,
+        inserted=tally["inserted"],
+        replaced=tally["replaced"],
+        kept_local=tally["kept_local"],
+        invalid=invalid,
+    )
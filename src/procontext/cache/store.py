@@ -0,0 +1,1258 @@
+"""SQLite documentation cache with stale-while-revalidate.
+
+All cache operations catch ``aiosqlite.Error`` internally and degrade
+gracefully: read failures return ``None`` (treated as cache miss by callers),
+write failures are logged and ignored (fetched content is still returned).
+Infrastructure errors never cross the Cache class boundary.
+
+Note on coding guideline #8 ("Never swallow errors in library code"): That
+guideline targets public API surfaces where swallowing errors steals the
+decision from the consumer. Cache is an internal infrastructure component —
+the design decision (per 02-technical-spec §6.3) is that cache failures must
+never prevent the agent from receiving a response. Errors are still logged
+with ``exc_info=True`` so they remain observable via stderr.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from contextlib import asynccontextmanager, suppress
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import aiosqlite
+import structlog
+
+from procontext.cache.bloom import BloomFilter
+from procontext.cache.chunks import CHUNK_LINES, split_chunks
+from procontext.cache.codec import decode_text, encode_text
+from procontext.cache.memory import MemoryPageTier
+from procontext.cache.metrics import CacheMetrics
+from procontext.cache.schema import (
+    apply_connection_pragmas,
+    from_epoch_ms,
+    migrate,
+    to_epoch_ms,
+    write_page_chunks,
+    write_page_domains,
+)
+from procontext.cache.writer import WriteBehindQueue
+from procontext.content_stats import estimate_tokens, hash_content
+from procontext.lines import LineIndex
+from procontext.models.cache import NegativeCacheEntry, PageCacheEntry, PageMetadata
+from procontext.outline import OutlineIndex
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Sequence
+
+    from procontext.cache.pool import ReadPool
+    from procontext.cache.writer import WriteQueueStats
+    from procontext.errors import ErrorCode
+
+log = structlog.get_logger()
+
+_UPSERT_PAGE = (
+    "INSERT OR REPLACE INTO page_cache "
+    "(url_hash, url, content, outline, discovered_domains, "
+    "fetched_at, expires_at, last_checked_at, codec, line_index, size_bytes, last_accessed_at, "
+    "etag, last_modified, outline_index, ttl_ms, "
+    "content_hash, line_count, char_count, token_estimate, chunk_lines) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_METADATA_COLUMNS = (
+    "url, fetched_at, expires_at, last_checked_at, ttl_ms, "
+    "content_hash, line_count, char_count, token_estimate, etag, last_modified"
+)
+
+_SELECT_METADATA = f"SELECT {_METADATA_COLUMNS} FROM page_cache WHERE url_hash = ?"
+
+# Pages expiring within the lead time that were read since they were fetched,
+# recently, and not checked within the cooldown, soonest expiry first.
+_SELECT_REFRESH_CANDIDATES = (
+    f"SELECT url_hash, {_METADATA_COLUMNS} FROM page_cache "
+    "WHERE expires_at BETWEEN ? AND ? "
+    "AND last_accessed_at > fetched_at AND last_accessed_at >= ? "
+    "AND (last_checked_at IS NULL OR last_checked_at < ?) AND content_hash IS NOT NULL "
+    "ORDER BY expires_at LIMIT ?"
+)
+
+# Chunks are read only while the page still has the content the caller saw,
+# checked in the same statement so a concurrent rewrite cannot mix versions.
+_SELECT_CHUNKS = (
+    "SELECT c.content, p.codec FROM page_chunks AS c "
+    "JOIN page_cache AS p ON p.url_hash = c.url_hash "
+    "WHERE c.url_hash = ? AND c.chunk_no BETWEEN ? AND ? AND p.content_hash = ? "
+    "ORDER BY c.chunk_no"
+)
+
+_UPDATE_LAST_CHECKED = "UPDATE page_cache SET last_checked_at = ? WHERE url_hash = ?"
+
+_UPDATE_LAST_ACCESSED = "UPDATE page_cache SET last_accessed_at = ? WHERE url_hash = ?"
+
+_REVALIDATE_PAGE = (
+    "UPDATE page_cache SET expires_at = ?, last_checked_at = ?, ttl_ms = ?, "
+    "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url_hash = ?"
+)
+
+# Rows deleted per transaction when evicting down to the size budget.
+_EVICTION_BATCH_SIZE = 100
+
+# Rows deleted per transaction when removing long-expired entries.
+_CLEANUP_BATCH_SIZE = 500
+
+# Free pages returned to the filesystem per ``incremental_vacuum`` step.
+_VACUUM_STEP_PAGES = 1024
+
+_DELETE_EXPIRED_BATCH = (
+    "DELETE FROM page_cache WHERE url_hash IN ("
+    "SELECT url_hash FROM page_cache WHERE expires_at < ? AND last_accessed_at < ? LIMIT ?)"
+)
+
+# Keys the negative-cache filter is sized for (about 12 KiB at 1% false
+# positives); more keys only raise the false-positive rate.
+_NEGATIVE_FILTER_CAPACITY = 10_000
+
+_MS_PER_HOUR = 3_600_000
+
+# Minimum time between metrics snapshots written by ``flush_writes``.
+_METRICS_SAVE_INTERVAL_SECONDS = 60.0
+
+
+def _key(url_hash: str) -> bytes:
+    """Return the 32-byte ``page_cache`` key for a hex SHA-256 ``url_hash``.
+
+    Raises:
+        ValueError: if *url_hash* is not a 64-character hex digest.
+    """
+    key = bytes.fromhex(url_hash)
+    if len(key) != 32:
+        raise ValueError(f"url_hash must be a SHA-256 hex digest, got {len(key)} bytes")
+    return key
+
+
+class Cache:
+    """SQLite-backed documentation cache implementing CacheProtocol.
+
+    When ``memory_max_bytes`` is positive, recently read and written pages are
+    also kept in an in-process LRU (``MemoryPageTier``) so repeat reads skip
+    SQLite entirely. Writes go through to both tiers; ``update_last_checked``
+    and cleanup invalidate the memory copy.
+
+    ``codec`` selects how new rows store ``content`` and ``outline`` (see
+    ``cache/codec.py``). Reads decode each row with the codec it was written
+    with, so rows in different formats coexist.
+
+    When ``write_flush_interval_ms`` is positive, page writes are write-behind:
+    ``set_page`` and ``update_last_checked`` queue the write and return, and
+    ``run_write_flusher`` persists queued writes in one transaction per flush
+    (see ``cache/writer.py``). Owners must call ``flush_writes`` before closing
+    the connection. With the default of ``0`` every write commits immediately.
+
+    ``max_bytes`` and ``max_entries`` bound the size of ``page_cache`` (``0``
+    means unbounded). Page reads record an access time, persisted in batches
+    by ``flush_writes``; ``cleanup_expired`` evicts the least recently
+    accessed rows until the cache is back under budget.
+
+    Each page row also stores its content hash, line and character counts and
+    a token estimate, computed once by ``set_page``. ``get_page_metadata``
+    returns those without reading or decoding the content.
+
+    Pages of ``chunk_threshold_chars`` characters or more (``0`` disables)
+    are stored as line-range chunks (``cache/chunks.py``): ``get_page``
+    returns them without content, with ``chunk_lines`` set, and callers read
+    the lines they need through ``get_chunks``. Chunked pages are not kept in
+    the memory tier.
+
+    Each page row records the TTL it was stored with (``ttl_hours`` on the
+    entry), so callers can adapt it on the next refresh. ``ttl_jitter`` spreads
+    ``expires_at`` by up to that fraction of the TTL either way, so pages
+    cached together do not all expire together.
+
+    URLs whose last fetch failed permanently are recorded in
+    ``negative_cache`` (``set_negative``) with an expiry. ``get_negative``
+    consults an in-process ``BloomFilter`` of those keys first, so looking up
+    a URL that never failed costs no query.
+
+    When a ``read_pool`` is supplied, ``get_page`` runs on the pool's read-only
+    connections and ``db`` is used only for writes and maintenance, so reads
+    no longer queue behind each other or behind writes. The owner closes the
+    pool.
+
+    Operation latency and bytes moved are recorded on ``metrics`` (shared with
+    the page service when passed in). ``save_metrics`` persists a snapshot to
+    ``server_metadata``; ``flush_writes`` does so at most once a minute unless
+    ``primary`` is false (the non-primary shards of a ``ShardedCache``).
+    """
+
+    def __init__(
+        self,
+        db: aiosqlite.Connection,
+        *,
+        memory_max_bytes: int = 0,
+        codec: str = "none",
+        write_flush_interval_ms: int = 0,
+        write_flush_max_pending: int = 64,
+        read_pool: ReadPool | None = None,
+        max_bytes: int = 0,
+        max_entries: int = 0,
+        metrics: CacheMetrics | None = None,
+        ttl_jitter: float = 0.0,
+        primary: bool = True,
+        chunk_threshold_chars: int = 0,
+    ) -> None:
+        self._db = db
+        self._chunk_threshold_chars = chunk_threshold_chars
+        self._primary = primary
+        self._ttl_jitter = ttl_jitter
+        self.metrics = metrics if metrics is not None else CacheMetrics()
+        self._metrics_saved_at = time.monotonic()
+        self._read_pool = read_pool
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._accessed: dict[str, datetime] = {}
+        # Bumped whenever a write invalidates memory-tier entries, so a read
+        # that raced with the write does not repopulate the tier with old data.
+        self._write_generation = 0
+        self._memory = MemoryPageTier(memory_max_bytes) if memory_max_bytes > 0 else None
+        self._codec = codec
+        self._write_queue = (
+            WriteBehindQueue(
+                flush_interval_seconds=write_flush_interval_ms / 1000,
+                max_pending=write_flush_max_pending,
+            )
+            if write_flush_interval_ms > 0
+            else None
+        )
+        self._flush_lock = asyncio.Lock()
+        self._negative_filter = BloomFilter(_NEGATIVE_FILTER_CAPACITY)
+
+    @property
+    def write_queue_stats(self) -> WriteQueueStats | None:
+        """Depth and flush latency of the write-behind queue, if enabled."""
+        return self._write_queue.stats if self._write_queue is not None else None
+
+    async def init_db(self) -> None:
+        """Set WAL mode and connection pragmas, then create or migrate the schema.
+
+        Called once at startup. Older databases are upgraded in place by the
+        forward migrations in ``cache/schema.py``.
+
+        Raises:
+            RuntimeError: if the database was written by a newer ProContext.
+        """
+        # Only takes effect on a new, empty file; ``procontext db vacuum``
+        # converts an existing one.
+        await self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await self._db.execute("PRAGMA journal_mode = WAL")
+        await self._db.execute("PRAGMA foreign_keys = ON")
+        await apply_connection_pragmas(self._db)
+        await migrate(self._db)
+        await self._load_negative_filter()
+
+    def attach_read_pool(self, read_pool: ReadPool) -> None:
+        """Serve reads from *read_pool* from now on.
+
+        Pool connections should be opened after ``init_db`` has created the
+        schema and switched the file to WAL, so a cache that owns its file
+        runs ``init_db`` first and attaches the pool afterwards.
+        """
+        self._read_pool = read_pool
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Yield a connection for a read: a pooled one if available, else the writer."""
+        if self._read_pool is None:
+            yield self._db
+            return
+        async with self._read_pool.connection() as connection:
+            yield connection
+
+    # ------------------------------------------------------------------
+    # Page cache
+    # ------------------------------------------------------------------
+
+    async def get_page(self, url_hash: str) -> PageCacheEntry | None:
+        """Read a page entry. Returns ``None`` on cache miss or read failure."""
+        with self.metrics.timed("get_page"):
+            return await self._get_page(url_hash)
+
+    async def _get_page(self, url_hash: str) -> PageCacheEntry | None:
+        if self._write_queue is not None:
+            entry = self._write_queue.get_page(url_hash)
+            if entry is not None:
+                self._accessed[url_hash] = datetime.now(UTC)
+                return entry
+
+        if self._memory is not None:
+            entry = self._memory.get(url_hash)
+            if entry is not None:
+                self._accessed[url_hash] = datetime.now(UTC)
+                return entry
+
+        generation = self._write_generation
+        try:
+            async with self._reader() as db:
+                cursor = await db.execute(
+                    "SELECT url_hash, url, content, outline, discovered_domains, "
+                    "fetched_at, expires_at, last_checked_at, codec, line_index, "
+                    "etag, last_modified, outline_index, ttl_ms, content_hash, "
+                    "chunk_lines, line_count FROM page_cache "
+                    "WHERE url_hash = ?",
+                    (_key(url_hash),),
+                )
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+            self.metrics.increment(
+                "bytes_read",
+                _stored_size(row[2])
+                + _stored_size(row[3])
+                + len(row[9] or b"")
+                + len(row[12] or b""),
+            )
+
+            expires_at = from_epoch_ms(row[6])
+            stale = datetime.now(UTC) > expires_at
+            content = decode_text(row[2], row[8])
+            outline = decode_text(row[3], row[8])
+            chunk_lines = row[15]
+            # Rows written before the indexes existed are indexed on first read.
+            line_index = (
+                None
+                if chunk_lines is not None
+                else LineIndex.from_bytes(row[9])
+                if row[9]
+                else LineIndex.build(content)
+            )
+            outline_index = (
+                OutlineIndex.from_bytes(row[12]) if row[12] else OutlineIndex.build(outline)
+            )
+
+            entry = PageCacheEntry(
+                url_hash=url_hash,
+                url=row[1],
+                content=content,
+                outline=outline,
+                line_index=line_index,
+                outline_index=outline_index,
+                discovered_domains=frozenset(row[4].split()),
+                fetched_at=from_epoch_ms(row[5]),
+                expires_at=expires_at,
+                last_checked_at=from_epoch_ms(row[7]) if row[7] is not None else None,
+                etag=row[10],
+                last_modified=row[11],
+                ttl_hours=row[13] / _MS_PER_HOUR if row[13] is not None else None,
+                content_hash=row[14] if row[14] is not None else hash_content(content),
+                chunk_lines=chunk_lines,
+                line_count=row[16] if chunk_lines is not None else None,
+                stale=stale,
+            )
+        except (aiosqlite.Error, TypeError, ValueError):
+            log.warning("cache_read_error", key=f"page:{url_hash}", exc_info=True)
+            return None
+
+        if self._write_queue is not None:
+            checked_at = self._write_queue.pending_check(url_hash)
+            if checked_at is not None:
+                entry = entry.model_copy(update={"last_checked_at": checked_at})
+
+        self._accessed[url_hash] = datetime.now(UTC)
+        if (
+            self._memory is not None
+            and entry.chunk_lines is None
+            and generation == self._write_generation
+        ):
+            self._memory.put(entry)
+        return entry
+
+    async def get_chunks(
+        self, url_hash: str, first: int, last: int, *, content_hash: str
+    ) -> list[str] | None:
+        """Read chunks *first*..*last* of a chunked page, in order.
+
+        Returns ``None`` if the page no longer has *content_hash* (it was
+        rewritten or evicted since the caller read it), if any chunk in the
+        range is missing, or on read failure.
+        """
+        with self.metrics.timed("get_chunks"):
+            try:
+                async with self._reader() as db:
+                    cursor = await db.execute(
+                        _SELECT_CHUNKS, (_key(url_hash), first, last, content_hash)
+                    )
+                    rows = list(await cursor.fetchall())
+                if len(rows) != last - first + 1:
+                    return None
+                self.metrics.increment("bytes_read", sum(_stored_size(row[0]) for row in rows))
+                return [decode_text(content, codec) for content, codec in rows]
+            except (aiosqlite.Error, ValueError):
+                log.warning("cache_read_error", key=f"chunks:{url_hash}", exc_info=True)
+                return None
+
+    async def get_page_metadata(self, url_hash: str) -> PageMetadata | None:
+        """Read a page's hash, counts and freshness without its content.
+
+        Does not record an access, so it neither keeps the page from eviction
+        nor promotes it in the memory tier. Rows written before the figures
+        were stored fall back to a full ``get_page``. Returns ``None`` on cache
+        miss or read failure.
+        """
+        with self.metrics.timed("get_page_metadata"):
+            if self._write_queue is not None:
+                entry = self._write_queue.get_page(url_hash)
+                if entry is not None:
+                    return _entry_metadata(entry)
+            if self._memory is not None:
+                entry = self._memory.peek(url_hash)
+                if entry is not None:
+                    return _entry_metadata(entry)
+
+            try:
+                async with self._reader() as db:
+                    cursor = await db.execute(_SELECT_METADATA, (_key(url_hash),))
+                    row = await cursor.fetchone()
+            except (aiosqlite.Error, ValueError):
+                log.warning("cache_read_error", key=f"page:{url_hash}", exc_info=True)
+                return None
+            if row is None:
+                return None
+            if row[5] is None:
+                entry = await self._get_page(url_hash)
+                return _entry_metadata(entry) if entry is not None else None
+            return self._row_metadata(url_hash, row)
+
+    async def get_refresh_candidates(
+        self,
+        *,
+        expires_before: datetime,
+        accessed_since: datetime,
+        checked_before: datetime,
+        limit: int,
+    ) -> list[PageMetadata]:
+        """Return unexpired pages worth refreshing before they go stale.
+
+        A candidate expires before *expires_before*, was read after it was
+        fetched (the write itself counts as an access), most recently at or
+        after *accessed_since*, and was not checked by a background refresh
+        since *checked_before*. At most *limit* pages are returned, soonest
+        expiry first. Access times still held in memory are persisted first
+        so recent reads count; rows written before page hashes were stored
+        are never returned. Returns ``[]`` on read failure.
+        """
+        async with self._flush_lock:
+            await self._flush_accesses()
+        now = datetime.now(UTC)
+        with self.metrics.timed("get_refresh_candidates"):
+            try:
+                async with self._reader() as db:
+                    cursor = await db.execute(
+                        _SELECT_REFRESH_CANDIDATES,
+                        (
+                            to_epoch_ms(now),
+                            to_epoch_ms(expires_before),
+                            to_epoch_ms(accessed_since),
+                            to_epoch_ms(checked_before),
+                            limit,
+                        ),
+                    )
+                    rows = list(await cursor.fetchall())
+            except aiosqlite.Error:
+                log.warning("cache_read_error", key="refresh_candidates", exc_info=True)
+                return []
+        candidates = [self._row_metadata(row[0].hex(), row[1:]) for row in rows]
+        # A refresh that failed since the last write flush is still in cooldown.
+        return [
+            page
+            for page in candidates
+            if page.last_checked_at is None or page.last_checked_at < checked_before
+        ]
+
+    def _row_metadata(self, url_hash: str, row: Sequence[Any]) -> PageMetadata:
+        """Build a ``PageMetadata`` from ``_METADATA_COLUMNS`` values."""
+        expires_at = from_epoch_ms(row[2])
+        checked_at = (
+            self._write_queue.pending_check(url_hash) if self._write_queue is not None else None
+        )
+        if checked_at is None and row[3] is not None:
+            checked_at = from_epoch_ms(row[3])
+        return PageMetadata(
+            url=row[0],
+            url_hash=url_hash,
+            content_hash=row[5],
+            line_count=row[6],
+            char_count=row[7],
+            token_estimate=row[8],
+            fetched_at=from_epoch_ms(row[1]),
+            expires_at=expires_at,
+            last_checked_at=checked_at,
+            ttl_hours=row[4] / _MS_PER_HOUR if row[4] is not None else None,
+            etag=row[9],
+            last_modified=row[10],
+            stale=datetime.now(UTC) > expires_at,
+        )
+
+    async def set_page(
+        self,
+        url: str,
+        url_hash: str,
+        content: str,
+        outline: str,
+        ttl_hours: float,
+        *,
+        discovered_domains: frozenset[str] = frozenset(),
+        line_index: LineIndex | None = None,
+        outline_index: OutlineIndex | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        content_hash: str | None = None,
+    ) -> None:
+        """Write a page entry. Non-fatal on failure.
+
+        *line_index*, *outline_index* and *content_hash* (the SHA-256 hex of
+        *content*) are computed when the caller has not already built them. *etag* and
+        *last_modified* are the response's validators, replayed by
+        ``revalidate_page`` callers. With write-behind enabled the entry is
+        queued and becomes visible to ``get_page`` immediately.
+        """
+        with self.metrics.timed("set_page"):
+            await self._set_page(
+                url,
+                url_hash,
+                content,
+                outline,
+                ttl_hours,
+                discovered_domains=discovered_domains,
+                line_index=line_index,
+                outline_index=outline_index,
+                etag=etag,
+                last_modified=last_modified,
+                content_hash=content_hash,
+            )
+
+    async def _set_page(
+        self,
+        url: str,
+        url_hash: str,
+        content: str,
+        outline: str,
+        ttl_hours: float,
+        *,
+        discovered_domains: frozenset[str],
+        line_index: LineIndex | None,
+        outline_index: OutlineIndex | None,
+        etag: str | None,
+        last_modified: str | None,
+        content_hash: str | None,
+    ) -> None:
+        self._write_generation += 1
+        if self._memory is not None:
+            self._memory.discard(url_hash)
+
+        try:
+            _key(url_hash)
+        except ValueError:
+            log.warning("cache_write_error", key=f"page:{url_hash}", exc_info=True)
+            return
+
+        now = datetime.now(UTC)
+        entry = PageCacheEntry(
+            url_hash=url_hash,
+            url=url,
+            content=content,
+            outline=outline,
+            line_index=line_index if line_index is not None else LineIndex.build(content),
+            outline_index=(
+                outline_index if outline_index is not None else OutlineIndex.build(outline)
+            ),
+            discovered_domains=discovered_domains,
+            fetched_at=now,
+            expires_at=self._expiry(now, ttl_hours),
+            last_checked_at=now,
+            etag=etag,
+            last_modified=last_modified,
+            ttl_hours=ttl_hours,
+            content_hash=content_hash if content_hash is not None else hash_content(content),
+        )
+
+        if self._write_queue is not None:
+            self._write_queue.put_page(entry)
+        else:
+            row, chunks = self._page_row(entry)
+            try:
+                await self._db.execute(_UPSERT_PAGE, row)
+                await write_page_domains(self._db, [(row[0], discovered_domains)])
+                await write_page_chunks(self._db, [row[0]], chunks)
+                await self._db.commit()
+            except aiosqlite.Error:
+                log.warning("cache_write_error", key=f"page:{url_hash}", exc_info=True)
+                with suppress(aiosqlite.Error):
+                    await self._db.rollback()
+                return
+            self.metrics.increment("bytes_written", _row_size(row))
+
+        if self._memory is not None and not self._chunked(content):
+            self._memory.put(entry)
+
+    def _chunked(self, content: str) -> bool:
+        """Whether *content* is large enough to be stored in chunks."""
+        return 0 < self._chunk_threshold_chars <= len(content)
+
+    def _page_row(
+        self, entry: PageCacheEntry
+    ) -> tuple[tuple[Any, ...], list[tuple[bytes, int, Any]]]:
+        """Encode an entry as ``_UPSERT_PAGE`` parameters and its ``page_chunks`` rows.
+
+        Chunked pages store an empty ``content`` and no line index; the
+        stored size includes the chunks.
+        """
+        key = _key(entry.url_hash)
+        lines = entry.line_index or LineIndex.build(entry.content)
+        outline_index = (entry.outline_index or OutlineIndex.build(entry.outline)).to_bytes()
+        outline = encode_text(entry.outline, self._codec)
+        chunks: list[tuple[bytes, int, Any]] = []
+        if self._chunked(entry.content):
+            chunk_lines: int | None = CHUNK_LINES
+            line_index: bytes | None = None
+            content = encode_text("", self._codec)
+            chunks = [
+                (key, number, encode_text(text, self._codec))
+                for number, text in enumerate(split_chunks(entry.content, lines, CHUNK_LINES))
+            ]
+        else:
+            chunk_lines = None
+            line_index = lines.to_bytes()
+            content = encode_text(entry.content, self._codec)
+        stored = sum(_stored_size(chunk[2]) for chunk in chunks)
+        row = (
+            key,
+            entry.url,
+            content,
+            outline,
+            " ".join(sorted(entry.discovered_domains)),
+            to_epoch_ms(entry.fetched_at),
+            to_epoch_ms(entry.expires_at),
+            to_epoch_ms(entry.last_checked_at) if entry.last_checked_at else None,
+            self._codec,
+            line_index,
+            stored
+            + _stored_size(content)
+            + _stored_size(outline)
+            + len(line_index or b"")
+            + len(outline_index),
+            to_epoch_ms(entry.fetched_at),
+            entry.etag,
+            entry.last_modified,
+            outline_index,
+            round(entry.ttl_hours * _MS_PER_HOUR) if entry.ttl_hours is not None else None,
+            entry.content_hash or hash_content(entry.content),
+            lines.total_lines,
+            len(entry.content),
+            estimate_tokens(len(entry.content)),
+            chunk_lines,
+        )
+        return row, chunks
+
+    async def update_last_checked(self, url_hash: str) -> None:
+        """Update only the last_checked_at timestamp. Non-fatal on failure."""
+        self._write_generation += 1
+        if self._memory is not None:
+            self._memory.discard(url_hash)
+
+        try:
+            key = _key(url_hash)
+        except ValueError:
+            log.warning("cache_update_last_checked_error", key=f"page:{url_hash}", exc_info=True)
+            return
+
+        checked_at = datetime.now(UTC)
+        if self._write_queue is not None:
+            self._write_queue.mark_checked(url_hash, checked_at)
+            return
+
+        try:
+            await self._db.execute(_UPDATE_LAST_CHECKED, (to_epoch_ms(checked_at), key))
+            await self._db.commit()
+        except aiosqlite.Error:
+            log.warning("cache_update_last_checked_error", key=f"page:{url_hash}", exc_info=True)
+
+    async def revalidate_page(
+        self,
+        url_hash: str,
+        ttl_hours: float,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Extend a page's expiry after the origin confirmed it unchanged.
+
+        Sets ``expires_at`` to *ttl_hours* from now (jittered like ``set_page``)
+        and ``last_checked_at`` to now, records *ttl_hours* as the page's TTL,
+        and replaces the stored validators with any the origin sent back.
+        Content is untouched. Non-fatal on failure.
+        """
+        self._write_generation += 1
+        if self._memory is not None:
+            self._memory.discard(url_hash)
+
+        try:
+            key = _key(url_hash)
+        except ValueError:
+            log.warning("cache_revalidate_error", key=f"page:{url_hash}", exc_info=True)
+            return
+
+        now = datetime.now(UTC)
+        expires_at = self._expiry(now, ttl_hours)
+        if self._write_queue is not None:
+            pending = self._write_queue.get_page(url_hash)
+            if pending is not None:
+                self._write_queue.put_page(
+                    pending.model_copy(
+                        update={
+                            "expires_at": expires_at,
+                            "last_checked_at": now,
+                            "etag": etag or pending.etag,
+                            "last_modified": last_modified or pending.last_modified,
+                            "ttl_hours": ttl_hours,
+                            "stale": False,
+                        }
+                    )
+                )
+                return
+
+        # Under the flush lock no batch is in flight, so a queued (older)
+        # last_checked_at can be dropped before it overwrites this one.
+        async with self._flush_lock:
+            if self._write_queue is not None:
+                self._write_queue.discard_check(url_hash)
+            try:
+                await self._db.execute(
+                    _REVALIDATE_PAGE,
+                    (
+                        to_epoch_ms(expires_at),
+                        to_epoch_ms(now),
+                        round(ttl_hours * _MS_PER_HOUR),
+                        etag,
+                        last_modified,
+                        key,
+                    ),
+                )
+                await self._db.commit()
+            except aiosqlite.Error:
+                log.warning("cache_revalidate_error", key=f"page:{url_hash}", exc_info=True)
+
+    def _expiry(self, now: datetime, ttl_hours: float) -> datetime:
+        """Return *now* plus *ttl_hours*, spread by up to ``ttl_jitter`` either way."""
+        if self._ttl_jitter > 0:
+            ttl_hours *= 1 + random.uniform(-self._ttl_jitter, self._ttl_jitter)
+        return now + timedelta(hours=ttl_hours)
+
+    # ------------------------------------------------------------------
+    # Write-behind
+    # ------------------------------------------------------------------
+
+    async def run_write_flusher(self) -> None:
+        """Flush queued writes whenever a flush is due. Runs until cancelled.
+
+        Returns immediately when write-behind is disabled.
+        """
+        if self._write_queue is None:
+            return
+        while True:
+            await self._write_queue.wait_until_due()
+            await self.flush_writes()
+
+    async def flush_writes(self) -> None:
+        """Persist queued writes and recorded page accesses. Non-fatal on failure.
+
+        Also saves a metrics snapshot if the last one is more than a minute old
+        (primary caches only).
+        """
+        async with self._flush_lock:
+            if self._write_queue is not None:
+                await self._flush_write_queue(self._write_queue)
+            await self._flush_accesses()
+        if (
+            self._primary
+            and time.monotonic() - self._metrics_saved_at >= _METRICS_SAVE_INTERVAL_SECONDS
+        ):
+            await self.save_metrics()
+
+    async def _flush_write_queue(self, queue: WriteBehindQueue) -> None:
+        """Persist one snapshot of the write-behind queue in a single transaction."""
+        # The queue only grows between flushes, so its depth here is the peak
+        # since the last one.
+        self.metrics.track_depth("write_queue", len(queue))
+        batch = queue.snapshot()
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        ok = True
+        encoded = [self._page_row(entry) for entry in batch.pages.values()]
+        rows = [row for row, _ in encoded]
+        try:
+            if rows:
+                await self._db.executemany(_UPSERT_PAGE, rows)
+                await write_page_domains(
+                    self._db,
+                    (
+                        (_key(entry.url_hash), entry.discovered_domains)
+                        for entry in batch.pages.values()
+                    ),
+                )
+                await write_page_chunks(
+                    self._db,
+                    (row[0] for row in rows),
+                    (chunk for _, chunks in encoded for chunk in chunks),
+                )
+            if batch.checks:
+                await self._db.executemany(
+                    _UPDATE_LAST_CHECKED,
+                    [(to_epoch_ms(at), _key(url_hash)) for url_hash, at in batch.checks.items()],
+                )
+            await self._db.commit()
+        except aiosqlite.Error:
+            ok = False
+            log.warning("cache_write_flush_error", rows=len(batch), exc_info=True)
+            with suppress(aiosqlite.Error):
+                await self._db.rollback()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        queue.complete(batch, duration_ms=duration_ms, ok=ok)
+        self.metrics.observe("flush", duration_ms)
+        self.metrics.track_depth("write_queue", len(queue))
+        if ok:
+            self.metrics.increment("bytes_written", sum(_row_size(row) for row in rows))
+            log.debug(
+                "cache_write_flush",
+                rows=len(batch),
+                duration_ms=round(duration_ms, 2),
+                depth=len(queue),
+            )
+
+    async def _flush_accesses(self) -> None:
+        """Persist access times recorded by ``get_page`` since the last flush."""
+        if not self._accessed:
+            return
+        accessed, self._accessed = self._accessed, {}
+        try:
+            await self._db.executemany(
+                _UPDATE_LAST_ACCESSED,
+                [(to_epoch_ms(at), _key(url_hash)) for url_hash, at in accessed.items()],
+            )
+            await self._db.commit()
+        except aiosqlite.Error:
+            log.warning("cache_access_flush_error", rows=len(accessed), exc_info=True)
+            with suppress(aiosqlite.Error):
+                await self._db.rollback()
+
+    # ------------------------------------------------------------------
+    # Negative cache
+    # ------------------------------------------------------------------
+
+    async def get_negative(self, url_hash: str) -> NegativeCacheEntry | None:
+        """Return the unexpired failure recorded for *url_hash*, if any.
+
+        Returns ``None`` without a query when the in-process filter has never
+        seen the key. Non-fatal on failure — returns ``None``.
+        """
+        try:
+            key = _key(url_hash)
+        except ValueError:
+            return None
+        if key not in self._negative_filter:
+            return None
+
+        try:
+            async with self._reader() as db:
+                cursor = await db.execute(
+                    "SELECT error_code, message, suggestion, expires_at FROM negative_cache "
+                    "WHERE url_hash = ? AND expires_at > ?",
+                    (key, to_epoch_ms(datetime.now(UTC))),
+                )
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+            return NegativeCacheEntry(
+                url_hash=url_hash,
+                code=row[0],
+                message=row[1],
+                suggestion=row[2],
+                expires_at=from_epoch_ms(row[3]),
+            )
+        except (aiosqlite.Error, TypeError, ValueError):
+            log.warning("cache_read_error", key=f"negative:{url_hash}", exc_info=True)
+            return None
+
+    async def set_negative(
+        self,
+        url_hash: str,
+        *,
+        code: ErrorCode,
+        message: str,
+        suggestion: str,
+        ttl_minutes: int,
+    ) -> None:
+        """Record a permanent fetch failure for *ttl_minutes*. Non-fatal on failure.
+
+        Written immediately rather than through the write-behind queue: failures
+        are rare and the next lookup should see them.
+        """
+        try:
+            key = _key(url_hash)
+        except ValueError:
+            log.warning("cache_write_error", key=f"negative:{url_hash}", exc_info=True)
+            return
+
+        expires_at = datetime.now(UTC) + timedelta(minutes=ttl_minutes)
+        try:
+            await self._db.execute(
+                "INSERT OR REPLACE INTO negative_cache "
+                "(url_hash, error_code, message, suggestion, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, str(code), message, suggestion, to_epoch_ms(expires_at)),
+            )
+            await self._db.commit()
+        except aiosqlite.Error:
+            log.warning("cache_write_error", key=f"negative:{url_hash}", exc_info=True)
+            return
+        self._negative_filter.add(key)
+
+    async def _load_negative_filter(self) -> None:
+        """Rebuild the negative-cache filter from unexpired rows. Non-fatal on failure."""
+        negative_filter = BloomFilter(_NEGATIVE_FILTER_CAPACITY)
+        try:
+            cursor = await self._db.execute(
+                "SELECT url_hash FROM negative_cache WHERE expires_at > ?",
+                (to_epoch_ms(datetime.now(UTC)),),
+            )
+            for (key,) in await cursor.fetchall():
+                negative_filter.add(key)
+        except aiosqlite.Error:
+            log.warning("cache_negative_filter_error", exc_info=True)
+            return
+        self._negative_filter = negative_filter
+
+    # ------------------------------------------------------------------
+    # Allowlist restoration
+    # ------------------------------------------------------------------
+
+    async def load_discovered_domains(self) -> frozenset[str]:
+        """Collect all discovered domains from cached page entries.
+
+        Used at startup to restore the in-memory allowlist from the previous
+        session. Reads the ``page_domains`` index, so the cost grows with the
+        number of distinct domains rather than the number of cached pages.
+        Non-fatal on database failure — returns empty frozenset.
+        """
+        try:
+            cursor = await self._db.execute("SELECT DISTINCT domain FROM page_domains")
+            return frozenset(row[0] for row in await cursor.fetchall())
+        except aiosqlite.Error:
+            log.warning("cache_load_discovered_domains_error", exc_info=True)
+            return frozenset()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    async def save_metrics(self) -> None:
+        """Store a snapshot of ``metrics`` in ``server_metadata``. Non-fatal on failure."""
+        self._metrics_saved_at = time.monotonic()
+        try:
+            await self._db.execute(
+                "INSERT OR REPLACE INTO server_metadata (key, value) VALUES ('cache_metrics', ?)",
+                (json.dumps(self.metrics.to_dict()),),
+            )
+            await self._db.commit()
+        except aiosqlite.Error:
+            log.warning("cache_metadata_write_error", key="cache_metrics", exc_info=True)
+
+    async def load_saved_metrics(self) -> tuple[CacheMetrics, datetime] | None:
+        """Return the last saved metrics snapshot and when it was saved.
+
+        Returns ``None`` if no snapshot exists or it cannot be read.
+        """
+        try:
+            cursor = await self._db.execute(
+                "SELECT value FROM server_metadata WHERE key = 'cache_metrics'"
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            return CacheMetrics.from_dict(data), datetime.fromisoformat(data["saved_at"])
+        except (aiosqlite.Error, AttributeError, KeyError, TypeError, ValueError):
+            log.warning("cache_metadata_read_error", key="cache_metrics", exc_info=True)
+            return None
+
+    # ------------------------------------------------------------------
+    # Cleanup and eviction
+    # ------------------------------------------------------------------
+
+    async def cleanup_if_due(self, interval_hours: int) -> bool:
+        """Run cleanup only if interval_hours have elapsed since the last run.
+
+        Reads and writes ``last_cleanup_at`` from the ``server_metadata`` table.
+        Falls through to run cleanup if the metadata row is missing or unreadable.
+        Returns whether cleanup ran. Non-fatal on failure.
+        """
+        try:
+            cursor = await self._db.execute(
+                "SELECT value FROM server_metadata WHERE key = 'last_cleanup_at'"
+            )
+            row = await cursor.fetchone()
+            if row is not None:
+                last_run = datetime.fromisoformat(row[0])
+                if datetime.now(UTC) - last_run < timedelta(hours=interval_hours):
+                    log.debug("cache_cleanup_skipped", reason="not_due")
+                    return False
+        except (aiosqlite.Error, ValueError):
+            log.warning("cache_metadata_read_error", exc_info=True)
+
+        await self.cleanup_expired()
+
+        try:
+            await self._db.execute(
+                "INSERT OR REPLACE INTO server_metadata (key, value) VALUES ('last_cleanup_at', ?)",
+                (datetime.now(UTC).isoformat(),),
+            )
+            await self._db.commit()
+        except aiosqlite.Error:
+            log.warning("cache_metadata_write_error", exc_info=True)
+        return True
+
+    async def cleanup_expired(self) -> None:
+        """Delete long-expired entries, then evict down to the size budget.
+
+        Entries expired more than 7 days ago are deleted unless they were read
+        within that window, so pages that are still in use survive while their
+        refresh keeps failing. Rows are deleted ``_CLEANUP_BATCH_SIZE`` at a
+        time, one transaction per batch, yielding to the event loop in between
+        so foreground writes are not stalled behind a large cleanup.
+        Non-fatal on failure.
+        """
+        with self.metrics.timed("cleanup"):
+            await self._cleanup_expired()
+
+    async def _cleanup_expired(self) -> None:
+        await self.flush_writes()
+        self._write_generation += 1
+        if self._memory is not None:
+            self._memory.clear()
+
+        page_deleted = 0
+        batches = 0
+        held_seconds = 0.0
+        try:
+            cutoff = to_epoch_ms(datetime.now(UTC) - timedelta(days=7))
+            while True:
+                started = time.perf_counter()
+                cursor = await self._db.execute(
+                    _DELETE_EXPIRED_BATCH, (cutoff, cutoff, _CLEANUP_BATCH_SIZE)
+                )
+                await self._db.commit()
+                held_seconds += time.perf_counter() - started
+                batches += 1
+                page_deleted += cursor.rowcount
+                if cursor.rowcount < _CLEANUP_BATCH_SIZE:
+                    break
+                await asyncio.sleep(0)
+            cursor = await self._db.execute(
+                "DELETE FROM negative_cache WHERE expires_at < ?",
+                (to_epoch_ms(datetime.now(UTC)),),
+            )
+            await self._db.commit()
+            negative_deleted = cursor.rowcount
+            log.info(
+                "cache_cleanup_complete",
+                page_deleted=page_deleted,
+                negative_deleted=negative_deleted,
+                batches=batches,
+                writer_held_ms=round(held_seconds * 1000, 1),
+            )
+        except aiosqlite.Error:
+            log.warning("cache_cleanup_error", page_deleted=page_deleted, exc_info=True)
+            return
+
+        if negative_deleted:
+            await self._load_negative_filter()
+        await self._evict_to_budget()
+
+    async def _evict_to_budget(self) -> None:
+        """Delete least recently accessed rows until within ``max_bytes``/``max_entries``.
+
+        Rows are deleted in batches of ``_EVICTION_BATCH_SIZE``, one transaction
+        per batch. Non-fatal on failure.
+        """
+        if self._max_bytes <= 0 and self._max_entries <= 0:
+            return
+
+        def over_budget(entries: int, size: int) -> bool:
+            return (0 < self._max_entries < entries) or (0 < self._max_bytes < size)
+
+        evicted = 0
+        freed_bytes = 0
+        held_seconds = 0.0
+        try:
+            cursor = await self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM page_cache"
+            )
+            row = await cursor.fetchone()
+            entries, size = (row[0], row[1]) if row else (0, 0)
+
+            while over_budget(entries, size):
+                cursor = await self._db.execute(
+                    "SELECT url_hash, size_bytes FROM page_cache ORDER BY last_accessed_at LIMIT ?",
+                    (_EVICTION_BATCH_SIZE,),
+                )
+                candidates = await cursor.fetchall()
+                if not candidates:
+                    break
+
+                victims: list[tuple[bytes]] = []
+                for url_hash, row_size in candidates:
+                    if not over_budget(entries, size):
+                        break
+                    victims.append((url_hash,))
+                    entries -= 1
+                    size -= row_size
+                    freed_bytes += row_size
+
+                started = time.perf_counter()
+                await self._db.executemany("DELETE FROM page_cache WHERE url_hash = ?", victims)
+                await self._db.commit()
+                held_seconds += time.perf_counter() - started
+                evicted += len(victims)
+                await asyncio.sleep(0)
+        except aiosqlite.Error:
+            log.warning("cache_eviction_error", evicted=evicted, exc_info=True)
+            return
+
+        if evicted:
+            log.info(
+                "cache_eviction_complete",
+                evicted=evicted,
+                freed_bytes=freed_bytes,
+                entries=entries,
+                size_bytes=size,
+                writer_held_ms=round(held_seconds * 1000, 1),
+            )
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    async def run_maintenance(self) -> None:
+        """Reclaim free pages, truncate the WAL, and refresh planner statistics.
+
+        Runs ``incremental_vacuum`` in steps of ``_VACUUM_STEP_PAGES`` pages
+        (only when the file uses ``auto_vacuum = INCREMENTAL``), then
+        ``PRAGMA optimize``, then ``wal_checkpoint(TRUNCATE)`` last so the WAL
+        ends up empty. Each pass logs how long it held the writer connection.
+        Non-fatal on failure.
+        """
+        await self._incremental_vacuum()
+        await self._optimize()
+        await self._checkpoint_wal()
+
+    async def _incremental_vacuum(self) -> None:
+        freed_pages = 0
+        held_seconds = 0.0
+        try:
+            cursor = await self._db.execute("PRAGMA auto_vacuum")
+            mode = await cursor.fetchone()
+            if mode is None or mode[0] != 2:  # 2 = INCREMENTAL
+                log.debug("cache_vacuum_skipped", reason="auto_vacuum_not_incremental")
+                return
+            free_pages = await self._freelist_count()
+            while free_pages > 0:
+                started = time.perf_counter()
+                cursor = await self._db.execute(f"PRAGMA incremental_vacuum({_VACUUM_STEP_PAGES})")
+                await cursor.fetchall()  # the pragma frees one page per result row
+                await self._db.commit()
+                held_seconds += time.perf_counter() - started
+                remaining = await self._freelist_count()
+                if remaining >= free_pages:
+                    break
+                freed_pages += free_pages - remaining
+                free_pages = remaining
+                await asyncio.sleep(0)
+        except aiosqlite.Error:
+            log.warning("cache_vacuum_error", freed_pages=freed_pages, exc_info=True)
+            return
+        log.info(
+            "cache_maintenance",
+            operation="incremental_vacuum",
+            freed_pages=freed_pages,
+            writer_held_ms=round(held_seconds * 1000, 1),
+        )
+
+    async def _freelist_count(self) -> int:
+        cursor = await self._db.execute("PRAGMA freelist_count")
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def _checkpoint_wal(self) -> None:
+        started = time.perf_counter()
+        try:
+            cursor = await self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            row = await cursor.fetchone()
+        except aiosqlite.Error:
+            log.warning("cache_checkpoint_error", exc_info=True)
+            return
+        busy, wal_frames, checkpointed = row if row else (0, 0, 0)
+        log.info(
+            "cache_maintenance",
+            operation="wal_checkpoint",
+            busy=bool(busy),
+            wal_frames=wal_frames,
+            checkpointed_frames=checkpointed,
+            writer_held_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+
+    async def _optimize(self) -> None:
+        started = time.perf_counter()
+        try:
+            await self._db.execute("PRAGMA optimize")
+        except aiosqlite.Error:
+            log.warning("cache_optimize_error", exc_info=True)
+            return
+        log.info(
+            "cache_maintenance",
+            operation="optimize",
+            writer_held_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+
+
+def _entry_metadata(entry: PageCacheEntry) -> PageMetadata:
+    """Derive ``get_page_metadata``'s result from an entry already in memory."""
+    line_index = entry.line_index or LineIndex.build(entry.content)
+    return PageMetadata(
+        url=entry.url,
+        url_hash=entry.url_hash,
+        content_hash=entry.content_hash or hash_content(entry.content),
+        line_count=line_index.total_lines,
+        char_count=len(entry.content),
+        token_estimate=estimate_tokens(len(entry.content)),
+        fetched_at=entry.fetched_at,
+        expires_at=entry.expires_at,
+        last_checked_at=entry.last_checked_at,
+        ttl_hours=entry.ttl_hours,
+        etag=entry.etag,
+        last_modified=entry.last_modified,
+        stale=datetime.now(UTC) > entry.expires_at,
+    )
+
+
+def _stored_size(value: str | bytes) -> int:
+    """Return the number of bytes SQLite stores for a TEXT or BLOB value."""
+    return len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
+
+
+def _row_size(row: tuple[Any, ...]) -> int:
+    """Return the ``size_bytes`` column of a ``_page_row`` tuple."""
+    return row[10]
@@ -0,0 +1,151 @@
+"""Write-behind queue for page cache writes.
+
+With write-through caching every ``set_page`` and ``update_last_checked``
+commits its own transaction, so an agent waits on an fsync before it sees
+freshly fetched content. The write-behind queue lets ``Cache`` accept those
+writes immediately and persist them later in one batched transaction.
+
+Pending writes are keyed by URL hash: a later write to the same page replaces
+the earlier one, and ``Cache.get_page`` consults the queue first so callers
+always read their own writes. Entries stay visible in the queue until the
+transaction that persists them has committed.
+
+The queue only holds state and timing; ``Cache`` owns the database work.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import anyio
+
+if TYPE_CHECKING:
+    from procontext.models.cache import PageCacheEntry
+
+
+@dataclass
+class WriteQueueStats:
+    """Observable state of a ``WriteBehindQueue``."""
+
+    depth: int = 0
+    max_depth: int = 0
+    flushes: int = 0
+    failed_flushes: int = 0
+    rows_flushed: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+
+
+@dataclass(frozen=True)
+class PendingBatch:
+    """Snapshot of queued writes handed to a flush."""
+
+    pages: dict[str, PageCacheEntry]
+    checks: dict[str, datetime]
+
+    def __len__(self) -> int:
+        return len(self.pages) + len(self.checks)
+
+
+class WriteBehindQueue:
+    """Coalescing buffer of page writes awaiting a batched flush."""
+
+    def __init__(self, *, flush_interval_seconds: float, max_pending: int) -> None:
+        self._flush_interval_seconds = flush_interval_seconds
+        self._max_pending = max_pending
+        self._pages: dict[str, PageCacheEntry] = {}
+        self._checks: dict[str, datetime] = {}
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._stats = WriteQueueStats()
+
+    def __len__(self) -> int:
+        return len(self._pages) + len(self._checks)
+
+    @property
+    def stats(self) -> WriteQueueStats:
+        """Return a copy of the queue's counters with the current depth."""
+        stats = WriteQueueStats(**vars(self._stats))
+        stats.depth = len(self)
+        return stats
+
+    def put_page(self, entry: PageCacheEntry) -> None:
+        """Queue a full page write, superseding any pending write for the page."""
+        self._checks.pop(entry.url_hash, None)
+        self._pages[entry.url_hash] = entry
+        self._notify()
+
+    def mark_checked(self, url_hash: str, checked_at: datetime) -> None:
+        """Queue a ``last_checked_at`` update for a page."""
+        entry = self._pages.get(url_hash)
+        if entry is not None:
+            self._pages[url_hash] = entry.model_copy(update={"last_checked_at": checked_at})
+        else:
+            self._checks[url_hash] = checked_at
+        self._notify()
+
+    def discard_check(self, url_hash: str) -> None:
+        """Drop a pending ``last_checked_at`` update superseded by a direct write."""
+        self._checks.pop(url_hash, None)
+
+    def get_page(self, url_hash: str) -> PageCacheEntry | None:
+        """Return a pending page write with a freshly computed ``stale`` flag."""
+        entry = self._pages.get(url_hash)
+        if entry is None:
+            return None
+        stale = datetime.now(UTC) > entry.expires_at
+        if stale != entry.stale:
+            entry = entry.model_copy(update={"stale": stale})
+        return entry
+
+    def pending_check(self, url_hash: str) -> datetime | None:
+        """Return a pending ``last_checked_at`` update for a page, if any."""
+        return self._checks.get(url_hash)
+
+    def snapshot(self) -> PendingBatch:
+        """Return the writes to persist in the next flush."""
+        self._has_pending.clear()
+        self._full.clear()
+        return PendingBatch(pages=dict(self._pages), checks=dict(self._checks))
+
+    def complete(self, batch: PendingBatch, *, duration_ms: float, ok: bool) -> None:
+        """Drop flushed writes that have not been superseded and record timing.
+
+        Writes from a failed flush are dropped as well: cache writes are
+        best-effort, and retrying against a broken database would only grow
+        the queue.
+        """
+        for url_hash, entry in batch.pages.items():
+            if self._pages.get(url_hash) is entry:
+                del self._pages[url_hash]
+        for url_hash, checked_at in batch.checks.items():
+            if self._checks.get(url_hash) == checked_at:
+                del self._checks[url_hash]
+
+        stats = self._stats
+        stats.flushes += 1
+        if ok:
+            stats.rows_flushed += len(batch)
+        else:
+            stats.failed_flushes += 1
+        stats.last_flush_ms = duration_ms
+        stats.max_flush_ms = max(stats.max_flush_ms, duration_ms)
+
+    async def wait_until_due(self) -> None:
+        """Block until there are pending writes and a flush is due.
+
+        A flush is due ``flush_interval_seconds`` after the first pending
+        write arrives, or immediately once ``max_pending`` writes are queued.
+        """
+        await self._has_pending.wait()
+        with anyio.move_on_after(self._flush_interval_seconds):
+            await self._full.wait()
+
+    def _notify(self) -> None:
+        self._has_pending.set()
+        self._stats.max_depth = max(self._stats.max_depth, len(self))
+        if len(self) >= self._max_pending:
+            self._full.set()
@@ -0,0 +1,313 @@
+"""CLI commands: procontext cache — cache population.
+
+- ``cache warm``: prefetch registry documentation into the page cache so the
+  first agent to ask for a library does not pay the fetch and conversion cost.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from collections import defaultdict, deque
+from contextlib import suppress
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from procontext.cache import ShardedCache
+from procontext.config import registry_paths
+from procontext.errors import ProContextError
+from procontext.fetch.client import build_http_client
+from procontext.fetch.processors import build_html_processor_pipeline, build_markitdown_pool
+from procontext.fetch.security import build_allowlist
+from procontext.fetch.service import Fetcher
+from procontext.page.service import warm_page
+from procontext.registry import build_indexes, load_registry
+from procontext.state import AppState
+
+if TYPE_CHECKING:
+    from procontext.config import Settings
+    from procontext.models.registry import RegistryEntry
+
+
+@dataclass(frozen=True)
+class WarmFailure:
+    """A page that could not be prefetched."""
+
+    url: str
+    error: str
+
+
+@dataclass
+class WarmReport:
+    """Outcome of a ``cache warm`` run."""
+
+    targets: int = 0
+    fetched: int = 0
+    already_cached: int = 0
+    chars_fetched: int = 0
+    elapsed_seconds: float = 0.0
+    failures: list[WarmFailure] = field(default_factory=list)
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.fetched / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def select_warm_urls(
+    entries: list[RegistryEntry],
+    *,
+    library_ids: list[str] | None = None,
+    top: int | None = None,
+    include_full: bool = False,
+) -> list[str]:
+    """Return the documentation URLs to prefetch, in registry order, without duplicates.
+
+    *library_ids* picks specific libraries, *top* the first N registry
+    entries; with neither, every entry is selected.
+
+    Raises:
+        ValueError: if a requested library ID is not in the registry.
+    """
+    if library_ids:
+        by_id = {entry.id: entry for entry in entries}
+        unknown = [library_id for library_id in library_ids if library_id not in by_id]
+        if unknown:
+            raise ValueError(f"Unknown library ID(s): {', '.join(unknown)}")
+        selected = [by_id[library_id] for library_id in library_ids]
+    elif top is not None:
+        selected = entries[:top]
+    else:
+        selected = entries
+
+    urls: dict[str, None] = {}
+    for entry in selected:
+        urls[entry.llms_txt_url] = None
+        if include_full and entry.llms_full_txt_url:
+            urls[entry.llms_full_txt_url] = None
+    return list(urls)
+
+
+class _HostQueue:
+    """URLs waiting to be warmed, handed out only for hosts below their limit.
+
+    A worker never holds a slot while waiting for a busy host: it takes the
+    next URL whose host has fewer than *per_host* fetches in flight, and only
+    waits when every host with URLs left is at its limit.
+    """
+
+    def __init__(self, urls: list[str], per_host: int) -> None:
+        self._per_host = per_host
+        self._pending: dict[str, deque[str]] = {}
+        for url in urls:
+            self._pending.setdefault(urlparse(url).netloc, deque()).append(url)
+        # Hosts with URLs left and a free slot, in registry order.
+        self._ready: dict[str, None] = dict.fromkeys(self._pending)
+        self._in_flight: defaultdict[str, int] = defaultdict(int)
+        self._changed = asyncio.Condition()
+
+    async def take(self) -> str | None:
+        """Return the next URL to fetch, or ``None`` once every URL has been taken."""
+        async with self._changed:
+            while not self._ready:
+                if not self._pending:
+                    return None
+                await self._changed.wait()
+            host = next(iter(self._ready))
+            urls = self._pending[host]
+            url = urls.popleft()
+            self._in_flight[host] += 1
+            if not urls:
+                del self._pending[host]
+                del self._ready[host]
+            elif self._in_flight[host] >= self._per_host:
+                del self._ready[host]
+            return url
+
+    async def release(self, url: str) -> None:
+        """Free the host slot taken for *url*."""
+        host = urlparse(url).netloc
+        async with self._changed:
+            self._in_flight[host] -= 1
+            if host in self._pending:
+                self._ready[host] = None
+            self._changed.notify_all()
+
+
+async def _warm_urls(
+    state: AppState,
+    urls: list[str],
+    *,
+    concurrency: int,
+    per_host: int,
+    force: bool,
+) -> WarmReport:
+    """Prefetch *urls* with *concurrency* workers and at most *per_host* requests per host."""
+    report = WarmReport(targets=len(urls))
+    hosts = _HostQueue(urls, per_host)
+
+    async def worker() -> None:
+        while (url := await hosts.take()) is not None:
+            try:
+                result = await warm_page(url, state, force=force)
+            except ProContextError as exc:
+                report.failures.append(WarmFailure(url, f"{exc.code}: {exc.message}"))
+                continue
+            except Exception as exc:
+                report.failures.append(WarmFailure(url, repr(exc)))
+                continue
+            finally:
+                await hosts.release(url)
+            if result is None:
+                report.already_cached += 1
+            else:
+                report.fetched += 1
+                # A fresh fetch is held inline, so this is a length lookup, not a copy.
+                report.chars_fetched += len(await result.text.read())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(urls)))))
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+async def _warm_cache(
+    settings: Settings,
+    entries: list[RegistryEntry],
+    urls: list[str],
+    *,
+    concurrency: int,
+    per_host: int,
+    force: bool,
+) -> WarmReport:
+    """Open the cache and fetcher as the server does, then prefetch *urls*."""
+    db_path = Path(settings.cache.db_path).expanduser()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    http_client = build_http_client(settings.fetcher, max_connections=max(concurrency, 10))
+    try:
+        cache = await ShardedCache.open(
+            db_path,
+            settings.cache.shards,
+            codec=settings.cache.compression,
+            write_flush_interval_ms=settings.cache.write_flush_interval_ms,
+            write_flush_max_pending=settings.cache.write_flush_max_pending,
+            max_bytes=settings.cache.max_bytes,
+            max_entries=settings.cache.max_entries,
+            ttl_jitter=settings.cache.ttl_jitter,
+            chunk_threshold_chars=settings.cache.chunk_threshold_chars,
+        )
+        try:
+            allowlist = build_allowlist(
+                entries, extra_domains=settings.fetcher.extra_allowed_domains
+            )
+            if settings.fetcher.allowlist_expansion == "discovered":
+                allowlist = allowlist | await cache.load_discovered_domains()
+            markitdown_pool = build_markitdown_pool(settings)
+            state = AppState(
+                settings=settings,
+                indexes=build_indexes(entries),
+                http_client=http_client,
+                cache=cache,
+                fetcher=Fetcher(
+                    http_client,
+                    settings.fetcher,
+                    html_processor_pipeline=build_html_processor_pipeline(
+                        settings.fetcher.html_processors, markitdown_pool=markitdown_pool
+                    ),
+                ),
+                allowlist=allowlist,
+            )
+            flusher = asyncio.create_task(cache.run_write_flusher())
+            try:
+                return await _warm_urls(
+                    state, urls, concurrency=concurrency, per_host=per_host, force=force
+                )
+            finally:
+                flusher.cancel()
+                with suppress(asyncio.CancelledError):
+                    await flusher
+                if markitdown_pool is not None:
+                    await markitdown_pool.close()
+                if state.page_processor is not None:
+                    state.page_processor.close()
+                await cache.flush_writes()
+        finally:
+            await cache.close()
+    finally:
+        await http_client.aclose()
+
+
+def format_warm_report(report: WarmReport, db_path: Path) -> str:
+    """Render a warm report for terminal output."""
+    lines = [
+        f"Warmed {db_path}: {report.fetched} fetched, {report.already_cached} already cached, "
+        f"{len(report.failures)} failed ({report.targets} pages)",
+        f"  Elapsed:    {report.elapsed_seconds:.1f} s",
+        f"  Throughput: {report.pages_per_second:.2f} pages/s, "
+        f"{report.chars_fetched / 1_000_000:.1f}M characters fetched",
+    ]
+    if report.failures:
+        lines.append("  Failures:")
+        lines.extend(f"    {failure.url}: {failure.error}" for failure in report.failures)
+    return "\n".join(lines)
+
+
+async def run_cache_warm(
+    settings: Settings,
+    *,
+    library_ids: list[str] | None = None,
+    top: int | None = None,
+    include_full: bool = False,
+    concurrency: int = 8,
+    per_host: int = 2,
+    force: bool = False,
+) -> None:
+    """Prefetch registry documentation into the cache and report throughput.
+
+    Exits non-zero when the registry is missing, a library ID is unknown, or
+    no selected page could be warmed. Individual page failures are reported
+    but do not fail the run on their own.
+    """
+    registry_path, registry_state_path = registry_paths(settings)
+    registry = load_registry(
+        local_registry_path=registry_path, local_state_path=registry_state_path
+    )
+    if registry is None:
+        print(  # noqa: T201
+            "Registry not initialised. Run 'procontext setup' first.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    entries, _ = registry
+    try:
+        urls = select_warm_urls(
+            entries, library_ids=library_ids, top=top, include_full=include_full
+        )
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    db_path = Path(settings.cache.db_path).expanduser()
+    print(  # noqa: T201
+        f"Warming {len(urls)} pages with {concurrency} workers ({per_host} per host) ...",
+        flush=True,
+    )
+    try:
+        report = await _warm_cache(
+            settings,
+            entries,
+            urls,
+            concurrency=concurrency,
+            per_host=per_host,
+            force=force,
+        )
+    except Exception as exc:
+        print(f"Failed to warm cache database at {db_path}: {exc}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    print(format_warm_report(report, db_path))  # noqa: T201
+    if report.targets and len(report.failures) == report.targets:
+        sys.exit(1)
@@ -1,16 +1,37 @@
-"""CLI command: procontext db recreate — destructive cache DB reset."""
+"""CLI commands: procontext db — cache DB maintenance.
+
+- ``db recreate``: destructive cache DB reset.
+- ``db compress``: re-encode existing rows with a storage codec.
+- ``db vacuum``: rebuild the file and switch it to incremental auto-vacuum.
+- ``db stats``: on-disk cache summary plus the last server session's metrics.
+- ``db export`` / ``db import``: portable cache snapshots for seeding other nodes.
+
+With ``cache.shards`` above 1 every command covers all shard files (see
+``cache/shards.py``); reports add the shards up.
+"""
 
 from __future__ import annotations
 
 import sys
+import time
+from collections import Counter
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import UTC, datetime
 from pathlib import Path
 from typing import TYPE_CHECKING
+from urllib.parse import urlparse
 
 import aiosqlite
 
 from procontext.cache import Cache
+from procontext.cache.codec import decode_text, encode_text, is_codec_available
+from procontext.cache.schema import SCHEMA_VERSION, read_schema_version, to_epoch_ms
+from procontext.cache.shards import shard_paths
+from procontext.cache.snapshot import export_snapshot, import_snapshot
 
 if TYPE_CHECKING:
+    from procontext.cache.metrics import CacheMetrics
     from procontext.config import Settings
 
 
@@ -22,20 +43,36 @@ def _delete_cache_files(db_path: Path) -> None:
             path.unlink()
 
 
-async def _recreate_cache(db_path: Path) -> None:
-    """Delete and recreate the cache database with a fresh schema."""
-    _delete_cache_files(db_path)
+def _existing_shards(settings: Settings) -> list[Path]:
+    """Return the configured shard files that exist, primary first."""
+    db_path = Path(settings.cache.db_path).expanduser()
+    return [path for path in shard_paths(db_path, settings.cache.shards) if path.exists()]
+
+
+def _shard_note(shards: int) -> str:
+    return f" ({shards} shards)" if shards > 1 else ""
+
+
+async def _recreate_cache(db_path: Path, shards: int = 1) -> None:
+    """Delete and recreate the cache database with a fresh schema.
+
+    Shard files left over from a larger ``cache.shards`` are deleted too.
+    """
+    stale_shards = db_path.parent.glob(f"{db_path.stem}-shard*{db_path.suffix}")
+    for path in {db_path, *stale_shards}:
+        _delete_cache_files(path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    async with aiosqlite.connect(str(db_path)) as db:
-        cache = Cache(db)
-        await cache.init_db()
+    for path in shard_paths(db_path, shards):
+        async with aiosqlite.connect(str(path)) as db:
+            cache = Cache(db)
+            await cache.init_db()
 
 
 async def run_db_recreate(settings: Settings) -> None:
     """Delete and recreate the configured cache DB."""
     db_path = Path(settings.cache.db_path).expanduser()
     try:
-        await _recreate_cache(db_path)
+        await _recreate_cache(db_path, settings.cache.shards)
     except Exception as exc:
         print(  # noqa: T201
             f"Failed to recreate cache database at {db_path}: {exc}",
@@ -43,4 +80,548 @@ async def run_db_recreate(settings: Settings) -> None:
         )
         sys.exit(1)
 
-    print(f"Recreated cache database at {db_path}")  # noqa: T201
+    print(f"Recreated cache database at {db_path}{_shard_note(settings.cache.shards)}")  # noqa: T201
+
+
+# ---------------------------------------------------------------------------
+# db compress
+# ---------------------------------------------------------------------------
+
+_COMPRESS_BATCH_SIZE = 100
+_READ_SAMPLE_SIZE = 200
+
+
+@dataclass(frozen=True)
+class CompressionReport:
+    """Outcome of re-encoding the cache with a storage codec."""
+
+    codec: str
+    total_rows: int
+    converted_rows: int
+    failed_rows: int
+    bytes_before: int
+    bytes_after: int
+    write_seconds: float
+    read_samples: int
+    read_seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.bytes_before / self.bytes_after if self.bytes_after else 1.0
+
+
+def _stored_size(value: str | bytes) -> int:
+    return len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
+
+
+async def _compress_cache(db_path: Path, codec: str) -> CompressionReport:
+    """Re-encode every ``page_cache`` row (and its ``page_chunks``) with *codec*, in batches."""
+    total = converted = failed = 0
+    bytes_before = bytes_after = 0
+    write_seconds = 0.0
+
+    async with aiosqlite.connect(str(db_path)) as db:
+        cache = Cache(db, codec=codec)
+        await cache.init_db()
+
+        last_hash = b""
+        while True:
+            cursor = await db.execute(
+                "SELECT url_hash, content, outline, codec FROM page_cache "
+                "WHERE url_hash > ? ORDER BY url_hash LIMIT ?",
+                (last_hash, _COMPRESS_BATCH_SIZE),
+            )
+            rows = list(await cursor.fetchall())
+            if not rows:
+                break
+
+            batch_start = time.perf_counter()
+            for url_hash, content, outline, row_codec in rows:
+                total += 1
+                chunk_cursor = await db.execute(
+                    "SELECT chunk_no, content FROM page_chunks WHERE url_hash = ?", (url_hash,)
+                )
+                chunks = list(await chunk_cursor.fetchall())
+                size_before = (
+                    _stored_size(content)
+                    + _stored_size(outline)
+                    + sum(_stored_size(chunk) for _, chunk in chunks)
+                )
+                bytes_before += size_before
+                if row_codec == codec:
+                    bytes_after += size_before
+                    continue
+                try:
+                    new_content = encode_text(decode_text(content, row_codec), codec)
+                    new_outline = encode_text(decode_text(outline, row_codec), codec)
+                    new_chunks = [
+                        (encode_text(decode_text(chunk, row_codec), codec), url_hash, chunk_no)
+                        for chunk_no, chunk in chunks
+                    ]
+                except ValueError as exc:
+                    print(  # noqa: T201
+                        f"Skipping unreadable row {url_hash.hex()[:12]}: {exc}",
+                        file=sys.stderr,
+                    )
+                    failed += 1
+                    bytes_after += size_before
+                    continue
+                size_after = (
+                    _stored_size(new_content)
+                    + _stored_size(new_outline)
+                    + sum(_stored_size(chunk) for chunk, _, _ in new_chunks)
+                )
+                await db.executemany(
+                    "UPDATE page_chunks SET content = ? WHERE url_hash = ? AND chunk_no = ?",
+                    new_chunks,
+                )
+                await db.execute(
+                    "UPDATE page_cache SET content = ?, outline = ?, codec = ?, "
+                    "size_bytes = ? + COALESCE(length(line_index), 0) "
+                    "+ COALESCE(length(outline_index), 0) WHERE url_hash = ?",
+                    (new_content, new_outline, codec, size_after, url_hash),
+                )
+                converted += 1
+                bytes_after += size_after
+            await db.commit()
+            write_seconds += time.perf_counter() - batch_start
+            last_hash = rows[-1][0]
+
+        cursor = await db.execute(
+            "SELECT url_hash FROM page_cache ORDER BY random() LIMIT ?", (_READ_SAMPLE_SIZE,)
+        )
+        sample = [row[0].hex() for row in await cursor.fetchall()]
+        read_start = time.perf_counter()
+        for url_hash in sample:
+            await cache.get_page(url_hash)
+        read_seconds = time.perf_counter() - read_start
+
+    return CompressionReport(
+        codec=codec,
+        total_rows=total,
+        converted_rows=converted,
+        failed_rows=failed,
+        bytes_before=bytes_before,
+        bytes_after=bytes_after,
+        write_seconds=write_seconds,
+        read_samples=len(sample),
+        read_seconds=read_seconds,
+    )
+
+
+def _combine_compression_reports(reports: list[CompressionReport]) -> CompressionReport:
+    """Add up the per-shard reports of one ``db compress`` run."""
+    return CompressionReport(
+        codec=reports[0].codec,
+        total_rows=sum(report.total_rows for report in reports),
+        converted_rows=sum(report.converted_rows for report in reports),
+        failed_rows=sum(report.failed_rows for report in reports),
+        bytes_before=sum(report.bytes_before for report in reports),
+        bytes_after=sum(report.bytes_after for report in reports),
+        write_seconds=sum(report.write_seconds for report in reports),
+        read_samples=sum(report.read_samples for report in reports),
+        read_seconds=sum(report.read_seconds for report in reports),
+    )
+
+
+def _format_bytes(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    value = size / 1024
+    for unit in ("KB", "MB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def format_compression_report(report: CompressionReport, db_path: Path) -> str:
+    """Render a compression report for terminal output."""
+    lines = [
+        f"Re-encoded {report.converted_rows} of {report.total_rows} cached pages "
+        f"as '{report.codec}' in {db_path}",
+        f"  Stored size:   {_format_bytes(report.bytes_before)} -> "
+        f"{_format_bytes(report.bytes_after)} ({report.ratio:.2f}x)",
+    ]
+    if report.total_rows:
+        per_row_ms = report.write_seconds / report.total_rows * 1000
+        lines.append(f"  Write latency: {per_row_ms:.2f} ms/page (decode, encode, update)")
+    if report.read_samples:
+        per_read_ms = report.read_seconds / report.read_samples * 1000
+        lines.append(
+            f"  Read latency:  {per_read_ms:.2f} ms/page "
+            f"(get_page over {report.read_samples} sampled pages)"
+        )
+    if report.failed_rows:
+        lines.append(f"  Skipped {report.failed_rows} unreadable rows")
+    lines.append("Freed pages are reused by later writes; the file shrinks only after VACUUM.")
+    return "\n".join(lines)
+
+
+async def run_db_compress(settings: Settings, *, codec: str | None = None) -> None:
+    """Re-encode existing cache rows with *codec* (default: ``cache.compression``)."""
+    db_path = Path(settings.cache.db_path).expanduser()
+    target = codec or settings.cache.compression
+    if not is_codec_available(target):
+        print(f"Cache codec '{target}' is not available in this environment", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+    if not db_path.exists():
+        print(f"Cache database not found at {db_path}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    try:
+        report = _combine_compression_reports(
+            [await _compress_cache(path, target) for path in _existing_shards(settings)]
+        )
+    except Exception as exc:
+        print(  # noqa: T201
+            f"Failed to compress cache database at {db_path}: {exc}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    print(format_compression_report(report, db_path))  # noqa: T201
+
+
+# ---------------------------------------------------------------------------
+# db vacuum
+# ---------------------------------------------------------------------------
+
+
+def _file_bytes(db_path: Path) -> int:
+    """Return the size of the database file plus its WAL."""
+    wal_path = db_path.with_name(db_path.name + "-wal")
+    return db_path.stat().st_size + (wal_path.stat().st_size if wal_path.exists() else 0)
+
+
+async def _vacuum_cache(db_path: Path) -> None:
+    """Switch *db_path* to incremental auto-vacuum and rebuild it."""
+    async with aiosqlite.connect(str(db_path)) as db:
+        await Cache(db).init_db()
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await db.execute("VACUUM")
+        await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+async def run_db_vacuum(settings: Settings) -> None:
+    """Rebuild the configured cache DB so freed pages can be reclaimed incrementally."""
+    db_path = Path(settings.cache.db_path).expanduser()
+    if not db_path.exists():
+        print(f"Cache database not found at {db_path}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    paths = _existing_shards(settings)
+    size_before = sum(_file_bytes(path) for path in paths)
+    started = time.perf_counter()
+    try:
+        for path in paths:
+            await _vacuum_cache(path)
+    except Exception as exc:
+        print(f"Failed to vacuum cache database at {db_path}: {exc}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    size_after = sum(_file_bytes(path) for path in paths)
+    print(  # noqa: T201
+        f"Vacuumed {db_path}{_shard_note(len(paths))} in {time.perf_counter() - started:.1f} s: "
+        f"{_format_bytes(size_before)} -> {_format_bytes(size_after)}\n"
+        "Incremental auto-vacuum is enabled; the server now returns freed pages "
+        "to the filesystem after each cleanup."
+    )
+
+
+# ---------------------------------------------------------------------------
+# db stats
+# ---------------------------------------------------------------------------
+
+_STATS_TOP_N = 10
+_STATS_SCAN_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class DomainUsage:
+    domain: str
+    entries: int
+    size_bytes: int
+
+
+@dataclass(frozen=True)
+class StatsReport:
+    """On-disk cache summary plus the last saved session metrics."""
+
+    file_bytes: int
+    wal_bytes: int
+    free_bytes: int
+    entries: int
+    stored_bytes: int
+    expired_entries: int
+    expired_bytes: int
+    domains: list[DomainUsage]
+    largest_pages: list[tuple[str, int]]
+    metrics: CacheMetrics | None
+    metrics_saved_at: datetime | None
+    shards: int = 1
+    # Oldest shard schema; below SCHEMA_VERSION only file sizes and row counts are read.
+    schema_version: int = SCHEMA_VERSION
+
+
+async def _collect_stats(db_paths: list[Path]) -> StatsReport:
+    """Summarise the shard files *db_paths* (primary first) without writing to them.
+
+    Shards are opened read-only and never migrated. A shard on an older
+    schema only contributes its file sizes and row count, and the report
+    notes that it migrates on the next server start.
+
+    Raises:
+        RuntimeError: if a shard was written by a newer ProContext.
+    """
+    file_bytes = wal_bytes = free_bytes = 0
+    entries = stored_bytes = expired_entries = expired_bytes = 0
+    domain_entries: Counter[str] = Counter()
+    domain_bytes: Counter[str] = Counter()
+    largest_pages: list[tuple[str, int]] = []
+    saved = None
+    schema_version = SCHEMA_VERSION
+    for index, db_path in enumerate(db_paths):
+        file_bytes += db_path.stat().st_size
+        wal_path = db_path.with_name(db_path.name + "-wal")
+        wal_bytes += wal_path.stat().st_size if wal_path.exists() else 0
+        # Read-only: no schema creation or migration, and closing never checkpoints.
+        uri = f"{db_path.resolve().as_uri()}?mode=ro"
+        async with aiosqlite.connect(uri, uri=True) as db:
+            version = await read_schema_version(db)
+            if version > SCHEMA_VERSION:
+                raise RuntimeError(
+                    f"{db_path} has schema v{version}, newer than this ProContext "
+                    f"supports (v{SCHEMA_VERSION})"
+                )
+
+            cursor = await db.execute("PRAGMA freelist_count")
+            freelist = (await cursor.fetchone() or (0,))[0]
+            cursor = await db.execute("PRAGMA page_size")
+            page_size = (await cursor.fetchone() or (0,))[0]
+            free_bytes += freelist * page_size
+            if index == 0 and version > 0:
+                saved = await Cache(db).load_saved_metrics()
+
+            if version < SCHEMA_VERSION:
+                if version > 0:
+                    schema_version = min(schema_version, version)
+                    cursor = await db.execute("SELECT COUNT(*) FROM page_cache")
+                    entries += (await cursor.fetchone() or (0,))[0]
+                continue
+
+            cursor = await db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), "
+                "COALESCE(SUM(expires_at < ?), 0), "
+                "COALESCE(SUM(CASE WHEN expires_at < ? THEN size_bytes END), 0) "
+                "FROM page_cache",
+                (to_epoch_ms(datetime.now(UTC)),) * 2,
+            )
+            row = await cursor.fetchone()
+            if row:
+                entries += row[0]
+                stored_bytes += row[1]
+                expired_entries += row[2]
+                expired_bytes += row[3]
+
+            cursor = await db.execute("SELECT url, size_bytes FROM page_cache")
+            while rows := await cursor.fetchmany(_STATS_SCAN_BATCH_SIZE):
+                for url, size in rows:
+                    domain = urlparse(url).hostname or "<unknown>"
+                    domain_entries[domain] += 1
+                    domain_bytes[domain] += size
+
+            cursor = await db.execute(
+                "SELECT url, size_bytes FROM page_cache ORDER BY size_bytes DESC LIMIT ?",
+                (_STATS_TOP_N,),
+            )
+            largest_pages.extend((url, size) for url, size in await cursor.fetchall())
+
+    return StatsReport(
+        file_bytes=file_bytes,
+        wal_bytes=wal_bytes,
+        free_bytes=free_bytes,
+        entries=entries,
+        stored_bytes=stored_bytes,
+        expired_entries=expired_entries,
+        expired_bytes=expired_bytes,
+        domains=[
+            DomainUsage(domain, count, domain_bytes[domain])
+            for domain, count in domain_entries.most_common(_STATS_TOP_N)
+        ],
+        largest_pages=sorted(largest_pages, key=lambda page: page[1], reverse=True)[:_STATS_TOP_N],
+        metrics=saved[0] if saved else None,
+        metrics_saved_at=saved[1] if saved else None,
+        shards=len(db_paths),
+        schema_version=schema_version,
+    )
+
+
+def _format_metrics(metrics: CacheMetrics, saved_at: datetime | None) -> list[str]:
+    counters = metrics.counters
+    lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+    hit_ratio = (counters["hits"] + counters["stale_hits"]) / lookups if lookups else 0.0
+    saved = f", saved {saved_at:%Y-%m-%d %H:%M:%S} UTC" if saved_at else ""
+    lines = [
+        f"Last server session (started {metrics.started_at:%Y-%m-%d %H:%M:%S} UTC{saved}):",
+        f"  Lookups:   {lookups} ({counters['hits']} hits, {counters['stale_hits']} stale, "
+        f"{counters['misses']} misses; hit ratio {hit_ratio:.1%})",
+        f"  Refreshes: {counters['refreshes_started']} started "
+        f"({counters['refreshes_ahead']} ahead of expiry), "
+        f"{counters['refreshes_completed']} completed "
+        f"({counters['refreshes_unchanged']} unchanged), "
+        f"{counters['refreshes_not_modified']} not modified, "
+        f"{counters['refreshes_failed']} failed, {counters['refreshes_skipped']} skipped, "
+        f"{counters['refreshes_dropped']} dropped",
+        f"  Queues:    write-behind {metrics.gauges['write_queue_depth']} pending "
+        f"(max {metrics.gauges['write_queue_max_depth']}); "
+        f"refresh {metrics.gauges['refresh_queue_depth']} waiting "
+        f"(max {metrics.gauges['refresh_queue_max_depth']}), "
+        f"{counters['refreshes_deferred']} budget waits",
+        f"  Negative:  {counters['negative_hits']} hits, "
+        f"{counters['negatives_stored']} failures recorded",
+        f"  Bytes:     {_format_bytes(counters['bytes_read'])} read, "
+        f"{_format_bytes(counters['bytes_written'])} written",
+    ]
+    if metrics.latency:
+        lines.append("  Latency (ms)      count      p50      p95      p99      max")
+        for operation, histogram in sorted(metrics.latency.items()):
+            lines.append(
+                f"    {operation:<14}{histogram.count:>8} "
+                f"{histogram.quantile(0.5):>8.2f} {histogram.quantile(0.95):>8.2f} "
+                f"{histogram.quantile(0.99):>8.2f} {histogram.max_ms:>8.2f}"
+            )
+    return lines
+
+
+def format_stats_report(report: StatsReport, db_path: Path) -> str:
+    """Render a cache stats report for terminal output."""
+    lines = [
+        f"Cache database {db_path}{_shard_note(report.shards)}",
+        f"  File size:  {_format_bytes(report.file_bytes)} "
+        f"(WAL {_format_bytes(report.wal_bytes)}, free pages {_format_bytes(report.free_bytes)})",
+    ]
+    if report.schema_version < SCHEMA_VERSION:
+        lines += [
+            f"  Schema:     v{report.schema_version}, migrates on next start "
+            "(page sizes and expiry are reported after that)",
+            f"  Pages:      {report.entries}",
+        ]
+    else:
+        lines += [
+            f"  Pages:      {report.entries} ({_format_bytes(report.stored_bytes)} stored)",
+            f"  Expired:    {report.expired_entries} retained past expiry "
+            f"({_format_bytes(report.expired_bytes)})",
+        ]
+    if report.domains:
+        lines.append("  Top domains:")
+        lines.extend(
+            f"    {usage.domain:<40}{usage.entries:>6} pages {_format_bytes(usage.size_bytes):>10}"
+            for usage in report.domains
+        )
+    if report.largest_pages:
+        lines.append("  Largest pages:")
+        lines.extend(f"    {_format_bytes(size):>10}  {url}" for url, size in report.largest_pages)
+    if report.metrics is None:
+        lines.append("No server metrics saved yet; they are recorded while the server runs.")
+    else:
+        lines.extend(_format_metrics(report.metrics, report.metrics_saved_at))
+    return "\n".join(lines)
+
+
+async def run_db_stats(settings: Settings) -> None:
+    """Print a summary of the configured cache DB and the last session's metrics."""
+    db_path = Path(settings.cache.db_path).expanduser()
+    if not db_path.exists():
+        print(f"Cache database not found at {db_path}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    try:
+        report = await _collect_stats(_existing_shards(settings))
+    except Exception as exc:
+        print(  # noqa: T201
+            f"Failed to read cache database at {db_path}: {exc}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    print(format_stats_report(report, db_path))  # noqa: T201
+
+
+# ---------------------------------------------------------------------------
+# db export / db import
+# ---------------------------------------------------------------------------
+
+
+async def run_db_export(settings: Settings, output: Path) -> None:
+    """Write a snapshot of the configured cache DB to *output*."""
+    db_path = Path(settings.cache.db_path).expanduser()
+    if not db_path.exists():
+        print(f"Cache database not found at {db_path}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    started = time.perf_counter()
+    try:
+        async with AsyncExitStack() as stack:
+            shards = [
+                await stack.enter_async_context(aiosqlite.connect(str(path)))
+                for path in _existing_shards(settings)
+            ]
+            for db in shards:
+                await Cache(db).init_db()
+            result = await export_snapshot(shards, output)
+    except Exception as exc:
+        print(f"Failed to export cache database at {db_path}: {exc}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    print(  # noqa: T201
+        f"Exported {result.rows} cached pages from {db_path} to {output} "
+        f"({_format_bytes(result.file_bytes)}, {elapsed:.1f} s)\n"
+        f"  sha256: {result.sha256}"
+    )
+    if result.skipped:
+        print(f"  Skipped {result.skipped} unreadable rows")  # noqa: T201
+
+
+async def run_db_import(settings: Settings, source: Path) -> None:
+    """Merge the snapshot at *source* into the configured cache DB."""
+    db_path = Path(settings.cache.db_path).expanduser()
+    if not source.exists():
+        print(f"Snapshot not found at {source}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+    if not is_codec_available(settings.cache.compression):
+        print(  # noqa: T201
+            f"Cache codec '{settings.cache.compression}' is not available in this environment",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    started = time.perf_counter()
+    try:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        async with AsyncExitStack() as stack:
+            shards = [
+                await stack.enter_async_context(aiosqlite.connect(str(path)))
+                for path in shard_paths(db_path, settings.cache.shards)
+            ]
+            for db in shards:
+                await Cache(db).init_db()
+            result = await import_snapshot(
+                shards,
+                source,
+                codec=settings.cache.compression,
+                chunk_threshold_chars=settings.cache.chunk_threshold_chars,
+            )
+    except Exception as exc:
+        print(f"Failed to import {source} into {db_path}: {exc}", file=sys.stderr)  # noqa: T201
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    print(  # noqa: T201
+        f"Imported {source} into {db_path} in {elapsed:.1f} s: {result.rows} pages, "
+        f"{result.inserted} new, {result.replaced} replaced, "
+        f"{result.kept_local} kept (local copy is as new or newer)"
+    )
+    if result.invalid:
+        print(f"  Skipped {result.invalid} invalid rows")  # noqa: T201
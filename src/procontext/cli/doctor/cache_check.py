@@ -9,12 +9,23 @@ from typing import TYPE_CHECKING
 import aiosqlite
 
 from procontext.cache import Cache
+from procontext.cache.schema import SCHEMA_VERSION, migrate, read_schema_version
+from procontext.cache.shards import shard_paths
 from procontext.cli.doctor.models import CheckResult, ColumnSpec
 
 if TYPE_CHECKING:
     from procontext.config import Settings
 
 
+_TRACKED_TABLES: tuple[str, ...] = (
+    "page_cache",
+    "page_domains",
+    "page_chunks",
+    "negative_cache",
+    "server_metadata",
+)
+
+
 def cache_recreate_command() -> str:
     """Return the CLI command that force-recreates the cache DB."""
     return "procontext db recreate"
@@ -26,7 +37,7 @@ async def expected_schema() -> dict[str, dict[str, ColumnSpec]]:
         cache = Cache(db)
         await cache.init_db()
         schema: dict[str, dict[str, ColumnSpec]] = {}
-        for table in ("page_cache", "server_metadata"):
+        for table in _TRACKED_TABLES:
             cursor = await db.execute(f"PRAGMA table_info({table})")  # noqa: S608
             rows = await cursor.fetchall()
             schema[table] = {
@@ -44,7 +55,7 @@ async def expected_schema() -> dict[str, dict[str, ColumnSpec]]:
 
 async def _load_schema(
     db: aiosqlite.Connection,
-    tables: tuple[str, ...] = ("page_cache", "server_metadata"),
+    tables: tuple[str, ...] = _TRACKED_TABLES,
 ) -> dict[str, dict[str, ColumnSpec]]:
     """Load the current on-disk schema for the tracked cache tables."""
     schema: dict[str, dict[str, ColumnSpec]] = {}
@@ -148,6 +159,11 @@ async def _repair_cache_schema(
     """Attempt non-destructive cache DB repair in place."""
     fixes: list[str] = []
 
+    version = await read_schema_version(db)
+    if 0 < version < SCHEMA_VERSION:
+        await migrate(db)
+        fixes.append(f"migrated schema v{version} to v{SCHEMA_VERSION}")
+
     if journal_mode != "wal":
         cursor = await db.execute("PRAGMA journal_mode = WAL")
         row = await cursor.fetchone()
@@ -185,13 +201,13 @@ async def _repair_cache_schema(
 
 
 async def check_cache(settings: Settings, *, fix: bool = False) -> CheckResult:
-    """Validate cache database: existence, integrity, and schema."""
+    """Validate cache database: existence, integrity, and schema.
+
+    With ``cache.shards`` above 1 every shard file is checked (and repaired
+    with *fix*) and the results are combined.
+    """
     db_path = Path(settings.cache.db_path).expanduser()
     recreate_hint = f"run '{cache_recreate_command()}' to replace the cache database"
-    fix_or_recreate_hint = (
-        "run 'procontext doctor --fix' to attempt in-place repair; "
-        f"if that cannot fix it, {recreate_hint}"
-    )
 
     if not db_path.parent.exists():
         if fix:
@@ -222,6 +238,39 @@ async def check_cache(settings: Settings, *, fix: bool = False) -> CheckResult:
             ),
         )
 
+    paths = shard_paths(db_path, settings.cache.shards)
+    if len(paths) == 1:
+        return await _check_cache_file(db_path, fix=fix)
+    return _combine_shard_results(
+        db_path, [(path, await _check_cache_file(path, fix=fix)) for path in paths]
+    )
+
+
+_STATUS_RANK = {"ok": 0, "warn": 1, "fail": 2}
+
+
+def _combine_shard_results(db_path: Path, results: list[tuple[Path, CheckResult]]) -> CheckResult:
+    """Fold per-shard results into one: the worst status, listing shards that need attention."""
+    status = max((result for _, result in results), key=lambda r: _STATUS_RANK[r.status]).status
+    notes = [
+        f"{path.name}: {result.detail}"
+        for path, result in results
+        if result.status != "ok" or result.fixed
+    ]
+    detail = "; ".join(notes) or f"{db_path}, {len(results)} shards, schema valid"
+    fix_hint = next((result.fix_hint for _, result in results if result.fix_hint), "")
+    fixed = any(result.fixed for _, result in results)
+    return CheckResult("Cache", status, detail, fix_hint=fix_hint, fixed=fixed)
+
+
+async def _check_cache_file(db_path: Path, *, fix: bool) -> CheckResult:
+    """Validate one cache database file (the whole cache, or one shard)."""
+    recreate_hint = f"run '{cache_recreate_command()}' to replace the cache database"
+    fix_or_recreate_hint = (
+        "run 'procontext doctor --fix' to attempt in-place repair; "
+        f"if that cannot fix it, {recreate_hint}"
+    )
+
     if not db_path.exists():
         return CheckResult(
             "Cache",
@@ -234,6 +283,31 @@ async def check_cache(settings: Settings, *, fix: bool = False) -> CheckResult:
             cursor = await db.execute("PRAGMA journal_mode")
             row = await cursor.fetchone()
             journal_mode = (row[0] if row else "unknown").lower()
+            try:
+                version = await read_schema_version(db)
+            except ValueError:
+                return CheckResult(
+                    "Cache",
+                    "fail",
+                    "Stored schema_version is not an integer",
+                    fix_hint=recreate_hint,
+                )
+            if version > SCHEMA_VERSION:
+                return CheckResult(
+                    "Cache",
+                    "fail",
+                    f"Schema v{version} is newer than this ProContext supports (v{SCHEMA_VERSION})",
+                    fix_hint=f"upgrade ProContext, or {recreate_hint}",
+                )
+            if 0 < version < SCHEMA_VERSION and not fix:
+                return CheckResult(
+                    "Cache",
+                    "warn",
+                    f"{db_path}, schema v{version} will be migrated to v{SCHEMA_VERSION} "
+                    "on next start",
+                    fix_hint="run 'procontext doctor --fix' to migrate now",
+                )
+
             expected = await expected_schema()
             actual = await _load_schema(db)
 
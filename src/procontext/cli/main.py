@@ -5,6 +5,7 @@ from __future__ import annotations
 import argparse
 import asyncio
 import sys
+from pathlib import Path
 
 from pydantic import ValidationError
 
@@ -35,8 +36,92 @@ def main() -> None:
     db_sub = db_parser.add_subparsers(dest="db_command")
     db_sub.required = True
     db_sub.add_parser("recreate", help="Delete and recreate the cache database")
+    compress_parser = db_sub.add_parser(
+        "compress",
+        help="Re-encode cached pages with a storage codec and report savings",
+    )
+    compress_parser.add_argument(
+        "--codec",
+        choices=["none", "zlib", "zstd"],
+        default=None,
+        help="Target codec (default: cache.compression from the configuration)",
+    )
+    db_sub.add_parser(
+        "vacuum",
+        help="Rebuild the cache database and enable incremental space reclamation",
+    )
+    db_sub.add_parser(
+        "stats",
+        help="Summarise the cache database (read-only) and the last server session's metrics",
+    )
+    export_parser = db_sub.add_parser(
+        "export",
+        help="Write a compressed, checksummed snapshot of the cache",
+    )
+    export_parser.add_argument("path", type=Path, help="Snapshot file to write (.ndjson.gz)")
+    import_parser = db_sub.add_parser(
+        "import",
+        help="Merge a cache snapshot, keeping whichever copy of a page is newer",
+    )
+    import_parser.add_argument("path", type=Path, help="Snapshot file to read")
+    cache_parser = sub.add_parser("cache", help="Cache population commands")
+    cache_sub = cache_parser.add_subparsers(dest="cache_command")
+    cache_sub.required = True
+    warm_parser = cache_sub.add_parser(
+        "warm",
+        help="Prefetch registry documentation into the cache",
+    )
+    warm_parser.add_argument(
+        "library_ids",
+        nargs="*",
+        metavar="LIBRARY_ID",
+        help="Library IDs to prefetch",
+    )
+    warm_selection = warm_parser.add_mutually_exclusive_group()
+    warm_selection.add_argument(
+        "--top",
+        type=int,
+        metavar="N",
+        help="Prefetch the first N libraries in registry order",
+    )
+    warm_selection.add_argument(
+        "--all",
+        action="store_true",
+        dest="warm_all",
+        help="Prefetch every library in the registry",
+    )
+    warm_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Also prefetch llms-full.txt where the registry lists one",
+    )
+    warm_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum concurrent fetches (default: 8)",
+    )
+    warm_parser.add_argument(
+        "--per-host",
+        type=int,
+        default=2,
+        help="Maximum concurrent fetches per host (default: 2)",
+    )
+    warm_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-fetch pages that are already cached and fresh",
+    )
 
     args = parser.parse_args()
+    if args.command == "cache" and args.cache_command == "warm":
+        selections = sum((bool(args.library_ids), args.top is not None, args.warm_all))
+        if selections != 1:
+            warm_parser.error("pass library IDs, --top N, or --all (exactly one)")
+        if args.top is not None and args.top < 1:
+            warm_parser.error("--top must be at least 1")
+        if args.concurrency < 1 or args.per_host < 1:
+            warm_parser.error("--concurrency and --per-host must be at least 1")
 
     try:
         settings = Settings()
@@ -62,6 +147,41 @@ def main() -> None:
             from procontext.cli.cmd_db import run_db_recreate
 
             asyncio.run(run_db_recreate(settings))
+        elif args.db_command == "compress":
+            from procontext.cli.cmd_db import run_db_compress
+
+            asyncio.run(run_db_compress(settings, codec=args.codec))
+        elif args.db_command == "vacuum":
+            from procontext.cli.cmd_db import run_db_vacuum
+
+            asyncio.run(run_db_vacuum(settings))
+        elif args.db_command == "stats":
+            from procontext.cli.cmd_db import run_db_stats
+
+            asyncio.run(run_db_stats(settings))
+        elif args.db_command == "export":
+            from procontext.cli.cmd_db import run_db_export
+
+            asyncio.run(run_db_export(settings, args.path))
+        elif args.db_command == "import":
+            from procontext.cli.cmd_db import run_db_import
+
+            asyncio.run(run_db_import(settings, args.path))
+    elif args.command == "cache":
+        if args.cache_command == "warm":
+            from procontext.cli.cmd_cache import run_cache_warm
+
+            asyncio.run(
+                run_cache_warm(
+                    settings,
+                    library_ids=args.library_ids or None,
+                    top=args.top,
+                    include_full=args.full,
+                    concurrency=args.concurrency,
+                    per_host=args.per_host,
+                    force=args.force,
+                )
+            )
     else:
         from procontext.cli.cmd_serve import run_server
 
@@ -22,6 +22,7 @@ from pydantic_settings import (
     YamlConfigSettingsSource,
 )
 
+from procontext.cache.codec import is_codec_available
 from procontext.fetch.processors import is_supported_html_processor
 
 _DEFAULT_DATA_DIR = platformdirs.user_data_dir("procontext")
@@ -61,6 +62,58 @@ class CacheSettings(BaseModel):
     ttl_hours: int = Field(default=24, gt=0)
     db_path: str = _DEFAULT_DB_PATH
     cleanup_interval_hours: int = Field(default=6, gt=0)
+    memory_max_bytes: int = Field(default=64 * 1024 * 1024, ge=0)
+    compression: Literal["none", "zlib", "zstd"] = "none"
+    chunk_threshold_chars: int = Field(default=1024 * 1024, ge=0)
+    write_flush_interval_ms: int = Field(default=250, ge=0)
+    write_flush_max_pending: int = Field(default=64, gt=0)
+    read_pool_size: int = Field(default=4, ge=0)
+    shards: int = Field(default=1, ge=1, le=16)
+    max_bytes: int = Field(default=0, ge=0)
+    max_entries: int = Field(default=0, ge=0)
+    not_found_ttl_minutes: int = Field(default=10, ge=0)
+    failure_ttl_minutes: int = Field(default=60, ge=0)
+    adaptive_ttl: bool = True
+    min_ttl_hours: int = Field(default=6, gt=0)
+    max_ttl_hours: int = Field(default=168, gt=0)
+    ttl_jitter: float = Field(default=0.1, ge=0, lt=1)
+    refresh_workers: int = Field(default=4, ge=1)
+    refresh_queue_size: int = Field(default=256, ge=1)
+    refresh_max_requests_per_hour: int = Field(default=0, ge=0)
+    refresh_max_bytes_per_hour: int = Field(default=0, ge=0)
+    refresh_ahead_minutes: int = Field(default=30, ge=0)
+    refresh_ahead_accessed_hours: int = Field(default=6, gt=0)
+    refresh_ahead_concurrency: int = Field(default=2, ge=1)
+    domain_ttl_hours: dict[str, int] = Field(default_factory=dict)
+
+    @field_validator("domain_ttl_hours")
+    @classmethod
+    def validate_domain_ttl_hours(cls, value: dict[str, int]) -> dict[str, int]:
+        normalized: dict[str, int] = {}
+        for domain, hours in value.items():
+            name = domain.strip().strip(".").lower()
+            if not name:
+                raise ValueError("domain_ttl_hours keys must be non-empty domain names")
+            if hours <= 0:
+                raise ValueError(f"domain_ttl_hours['{domain}'] must be greater than 0")
+            normalized[name] = hours
+        return normalized
+
+    @model_validator(mode="after")
+    def validate_ttl_bounds(self) -> CacheSettings:
+        if self.min_ttl_hours > self.max_ttl_hours:
+            raise ValueError("cache.min_ttl_hours must not exceed cache.max_ttl_hours")
+        return self
+
+    @field_validator("compression")
+    @classmethod
+    def validate_compression(cls, value: str) -> str:
+        if not is_codec_available(value):
+            raise ValueError(
+                f"Cache compression codec '{value}' is not available in this environment "
+                "(zstd requires Python 3.14+ or the 'zstandard' package)"
+            )
+        return value
 
 
 class FetcherSettings(BaseModel):
@@ -113,10 +166,21 @@ class OutlineSettings(BaseModel):
         return normalized
 
 
+class ProcessingSettings(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    executor: Literal["thread", "process"] = "thread"
+    offload_threshold_chars: int = Field(default=256 * 1024, ge=0)
+    process_workers: int = Field(default=2, ge=1)
+    html_executor: Literal["thread", "process"] = "thread"
+    html_process_workers: int = Field(default=2, ge=1)
+    html_timeout_seconds: float = Field(default=30.0, gt=0)
+
+
 class LoggingSettings(BaseModel):
     model_config = ConfigDict(extra="forbid")
     level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
     format: Literal["json", "text"] = "text"
+    tool_timing: Literal["off", "log", "response"] = "off"
 
 
 class Settings(BaseSettings):
@@ -135,6 +199,7 @@ class Settings(BaseSettings):
     fetcher: FetcherSettings = FetcherSettings()
     resolver: ResolverSettings = ResolverSettings()
     outline: OutlineSettings = OutlineSettings()
+    processing: ProcessingSettings = ProcessingSettings()
     logging: LoggingSettings = LoggingSettings()
 
     @classmethod
@@ -0,0 +1,24 @@
+"""Identity and size figures for page content, computed once per cache write.
+
+``Cache`` stores these next to each page so a cache hit can report the
+content hash without hashing a multi-megabyte page again, and callers that
+only need the numbers (``Cache.get_page_metadata``) never load the content.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+# Rough characters-per-token ratio of English prose and code for current
+# LLM tokenizers; good enough to budget context, not to bill by.
+_CHARS_PER_TOKEN = 4
+
+
+def hash_content(content: str) -> str:
+    """Return the SHA-256 hex digest of *content*."""
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def estimate_tokens(char_count: int) -> int:
+    """Return an approximate token count for *char_count* characters."""
+    return -(-char_count // _CHARS_PER_TOKEN)
@@ -12,7 +12,9 @@ if TYPE_CHECKING:
     from procontext.config import FetcherSettings
 
 
-def build_http_client(settings: FetcherSettings | None = None) -> httpx.AsyncClient:
+def build_http_client(
+    settings: FetcherSettings | None = None, *, max_connections: int = 10
+) -> httpx.AsyncClient:
     """Create the shared httpx client. Called once at startup."""
     read_timeout = settings.request_timeout_seconds if settings is not None else 30.0
     connect_timeout = settings.connect_timeout_seconds if settings is not None else 5.0
@@ -21,7 +23,7 @@ def build_http_client(settings: FetcherSettings | None = None) -> httpx.AsyncCli
         timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
         headers={"User-Agent": f"procontext/{__version__}"},
         limits=httpx.Limits(
-            max_connections=10,
-            max_keepalive_connections=5,
+            max_connections=max_connections,
+            max_keepalive_connections=min(5, max_connections),
         ),
     )
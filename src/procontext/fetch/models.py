@@ -29,3 +29,40 @@ class FetchedContent:
             return False
         path = urlparse(self.final_url).path.lower()
         return path.endswith((".html", ".htm"))
+
+
+@dataclass(frozen=True)
+class CacheValidators:
+    """HTTP validators from a response, replayed on conditional requests."""
+
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def __bool__(self) -> bool:
+        return self.etag is not None or self.last_modified is not None
+
+    def request_headers(self) -> dict[str, str]:
+        """Return the ``If-None-Match``/``If-Modified-Since`` headers to send."""
+        headers: dict[str, str] = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass(frozen=True)
+class ConditionalFetch:
+    """Outcome of a fetch that may be answered with ``304 Not Modified``.
+
+    ``content`` is ``None`` when the server confirmed the caller's copy is
+    current; ``validators`` are those to store with the (possibly unchanged)
+    content.
+    """
+
+    content: str | None
+    validators: CacheValidators = CacheValidators()
+
+    @property
+    def not_modified(self) -> bool:
+        return self.content is None
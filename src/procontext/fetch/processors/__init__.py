@@ -7,6 +7,7 @@ from .builtins import (
     SUPPORTED_HTML_PROCESSORS,
     build_html_processor,
     build_html_processor_pipeline,
+    build_markitdown_pool,
     is_supported_html_processor,
 )
 from .pipeline import HtmlProcessorPipeline
@@ -18,5 +19,6 @@ __all__ = [
     "SUPPORTED_HTML_PROCESSORS",
     "build_html_processor",
     "build_html_processor_pipeline",
+    "build_markitdown_pool",
     "is_supported_html_processor",
 ]
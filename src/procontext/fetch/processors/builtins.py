@@ -7,7 +7,10 @@ from typing import TYPE_CHECKING
 from .pipeline import HtmlProcessorPipeline
 
 if TYPE_CHECKING:
+    from procontext.config import Settings
+
     from .base import HtmlProcessor
+    from .markitdown import MarkItDownPool
 
 SUPPORTED_HTML_PROCESSORS = frozenset({"markitdown"})
 
@@ -17,15 +20,37 @@ def is_supported_html_processor(name: str) -> bool:
     return name in SUPPORTED_HTML_PROCESSORS
 
 
-def build_html_processor(name: str) -> HtmlProcessor:
-    """Instantiate a built-in HTML processor by name."""
+def build_html_processor(
+    name: str, *, markitdown_pool: MarkItDownPool | None = None
+) -> HtmlProcessor:
+    """Instantiate a built-in HTML processor by name.
+
+    With *markitdown_pool*, MarkItDown conversions run in its worker
+    processes instead of on a thread.
+    """
     if name == "markitdown":
         from .markitdown import MarkItDownHtmlProcessor
 
-        return MarkItDownHtmlProcessor()
+        return MarkItDownHtmlProcessor(markitdown_pool)
     raise ValueError(f"Unsupported HTML processor: {name}")
 
 
-def build_html_processor_pipeline(names: list[str]) -> HtmlProcessorPipeline:
+def build_markitdown_pool(settings: Settings) -> MarkItDownPool | None:
+    """Return a MarkItDown process pool when ``processing.html_executor`` is ``process``."""
+    if (
+        settings.processing.html_executor != "process"
+        or "markitdown" not in settings.fetcher.html_processors
+    ):
+        return None
+    from .markitdown import MarkItDownPool
+
+    return MarkItDownPool.from_settings(settings)
+
+
+def build_html_processor_pipeline(
+    names: list[str], *, markitdown_pool: MarkItDownPool | None = None
+) -> HtmlProcessorPipeline:
     """Build a processor pipeline from configured processor names."""
-    return HtmlProcessorPipeline([build_html_processor(name) for name in names])
+    return HtmlProcessorPipeline(
+        [build_html_processor(name, markitdown_pool=markitdown_pool) for name in names]
+    )
@@ -1,39 +1,228 @@
-"""MarkItDown-backed HTML processor."""
+"""MarkItDown-backed HTML processor.
+
+By default conversions run on a worker thread. MarkItDown and BeautifulSoup
+are pure Python and hold the GIL, though, so concurrent conversions on the
+HTTP server take turns with each other and with the event loop. With
+``processing.html_executor: process`` they run in a ``MarkItDownPool``
+instead: up to ``processing.html_process_workers`` warm worker processes,
+each of which builds its ``MarkItDown`` converter once and then serves
+conversions over a pipe. A conversion that takes longer than
+``processing.html_timeout_seconds`` kills its worker, which is replaced on
+the next conversion, and fails like any other processor error: the page is
+kept as fetched.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import multiprocessing
+from contextlib import suppress
 from io import BytesIO
 from typing import TYPE_CHECKING
 
+import structlog
 from anyio import to_thread
 from markitdown import MarkItDown
 from markitdown._stream_info import StreamInfo
 
+from procontext.logging_config import setup_logging
+
 if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+
+    from procontext.config import Settings
     from procontext.fetch.models import FetchedContent
 
+log = structlog.get_logger()
+
+# Spawned workers import the package and build a converter before their first
+# conversion; that start-up is not charged to the conversion timeout.
+_WORKER_START_TIMEOUT_SECONDS = 60.0
+_WORKER_STOP_TIMEOUT_SECONDS = 1.0
+
+# (body, content_type, charset, final_url)
+_Request = tuple[bytes, str | None, str | None, str]
+
+
+def _convert(converter: MarkItDown, request: _Request) -> str:
+    body, content_type, charset, url = request
+    result = converter.convert(
+        BytesIO(body),
+        stream_info=StreamInfo(mimetype=content_type, charset=charset, url=url),
+    )
+    return result.text_content
+
+
+def _request(payload: FetchedContent) -> _Request:
+    return (payload.body, payload.content_type, payload.charset, payload.final_url)
+
+
+def _serve(conn: Connection, settings: Settings | None) -> None:
+    """Worker process main loop: build one converter, then convert until told to stop."""
+    if settings is not None:
+        setup_logging(settings)
+    converter = MarkItDown(enable_plugins=False)
+    conn.send(("ready", None))
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        try:
+            conn.send(("ok", _convert(converter, request)))
+        except Exception as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+
+
+class _Worker:
+    """One warm conversion process and the parent's end of its pipe.
+
+    ``start`` and ``convert`` block, and are called on a worker thread.
+    """
+
+    def __init__(self, settings: Settings | None) -> None:
+        self._settings = settings
+        self._process: BaseProcess | None = None
+        self._conn: Connection | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        # "spawn", not fork: the server process has SQLite and HTTP client
+        # threads that a forked child should not inherit.
+        context = multiprocessing.get_context("spawn")
+        parent, child = context.Pipe()
+        process = context.Process(
+            target=_serve, args=(child, self._settings), name="procontext-markitdown", daemon=True
+        )
+        process.start()
+        child.close()
+        self._process, self._conn = process, parent
+        if not parent.poll(_WORKER_START_TIMEOUT_SECONDS):
+            self.kill()
+            raise TimeoutError("MarkItDown worker did not start")
+        parent.recv()
+
+    def convert(self, request: _Request, timeout: float) -> str:
+        if not self.alive:
+            self.start()
+        conn = self._conn
+        if conn is None:
+            raise RuntimeError("MarkItDown worker has no connection")
+        try:
+            conn.send(request)
+            reply: tuple[str, str] | None = conn.recv() if conn.poll(timeout) else None
+        except (EOFError, OSError):
+            self.kill()
+            raise RuntimeError("MarkItDown worker exited during conversion") from None
+        if reply is None:
+            self.kill()
+            raise TimeoutError(f"HTML conversion exceeded {timeout:g}s")
+        status, value = reply
+        if status != "ok":
+            raise RuntimeError(value)
+        return value
+
+    def interrupt(self) -> None:
+        """Kill the process under a running ``convert``, which then fails and cleans up."""
+        if self._process is not None:
+            self._process.kill()
+
+    def stop(self) -> None:
+        """Ask the worker to exit, killing it if it does not."""
+        if self._conn is not None and self.alive:
+            with suppress(OSError):
+                self._conn.send(None)
+            if self._process is not None:
+                self._process.join(_WORKER_STOP_TIMEOUT_SECONDS)
+        self.kill()
+
+    def kill(self) -> None:
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join()
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class MarkItDownPool:
+    """Warm MarkItDown worker processes, started as conversions need them."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        timeout_seconds: float = 30.0,
+        settings: Settings | None = None,
+    ) -> None:
+        self._timeout = timeout_seconds
+        self._settings = settings
+        self._slots = asyncio.Semaphore(workers)
+        self._idle: list[_Worker] = []
+        self._busy: set[_Worker] = set()
+        self._closed = False
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> MarkItDownPool:
+        return cls(
+            workers=settings.processing.html_process_workers,
+            timeout_seconds=settings.processing.html_timeout_seconds,
+            settings=settings,
+        )
+
+    async def convert(self, payload: FetchedContent) -> str:
+        """Convert *payload* on an idle worker, waiting for one if all are busy."""
+        async with self._slots:
+            if self._closed:
+                raise RuntimeError("MarkItDown pool is closed")
+            worker = self._idle.pop() if self._idle else _Worker(self._settings)
+            self._busy.add(worker)
+            try:
+                # Not abandoned on cancellation: the worker goes back to the
+                # pool only once its conversion has finished or been killed.
+                return await to_thread.run_sync(worker.convert, _request(payload), self._timeout)
+            finally:
+                self._busy.discard(worker)
+                if worker.alive:
+                    self._idle.append(worker)
+
+    async def close(self) -> None:
+        """Stop idle workers and kill busy ones; later conversions fail."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        busy = set(self._busy)
+        for worker in busy:
+            worker.interrupt()
+        for worker in idle:
+            await to_thread.run_sync(worker.stop)
+        log.info("markitdown_pool_closed", stopped=len(idle), killed=len(busy))
+
 
 class MarkItDownHtmlProcessor:
     """Convert fetched HTML into Markdown using MarkItDown."""
 
     name = "markitdown"
 
-    def __init__(self) -> None:
-        self._converter = MarkItDown(enable_plugins=False)
+    def __init__(self, pool: MarkItDownPool | None = None) -> None:
+        self._pool = pool
+        # With a pool the converters live in the worker processes.
+        self._converter = MarkItDown(enable_plugins=False) if pool is None else None
 
     def applies_to(self, payload: FetchedContent) -> bool:
         return payload.is_html()
 
     async def transform(self, payload: FetchedContent) -> FetchedContent:
-        def _convert() -> str:
-            result = self._converter.convert(
-                BytesIO(payload.body),
-                stream_info=StreamInfo(
-                    mimetype=payload.content_type,
-                    charset=payload.charset,
-                    url=payload.final_url,
-                ),
-            )
-            return result.text_content
-
-        return payload.with_text_content(await to_thread.run_sync(_convert))
+        if self._pool is not None:
+            return payload.with_text_content(await self._pool.convert(payload))
+        if self._converter is None:
+            self._converter = MarkItDown(enable_plugins=False)
+        text = await to_thread.run_sync(_convert, self._converter, _request(payload))
+        return payload.with_text_content(text)
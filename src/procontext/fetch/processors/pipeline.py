@@ -6,6 +6,8 @@ from typing import TYPE_CHECKING
 
 import structlog
 
+from procontext.timing import phase
+
 if TYPE_CHECKING:
     from collections.abc import Sequence
 
@@ -29,7 +31,8 @@ class HtmlProcessorPipeline:
             if not processor.applies_to(current):
                 continue
             try:
-                current = await processor.transform(current)
+                with phase(f"process_{processor.name}"):
+                    current = await processor.transform(current)
             except Exception:
                 log.warning(
                     "html_processor_failed",
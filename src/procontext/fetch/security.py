@@ -124,7 +124,11 @@ def expand_allowlist_from_content(
     state: AppState,
 ) -> frozenset[str]:
     """Extract discovered domains from content and optionally expand the live allowlist."""
-    discovered_domains = extract_base_domains_from_content(content)
+    return expand_allowlist(extract_base_domains_from_content(content), state)
+
+
+def expand_allowlist(discovered_domains: frozenset[str], state: AppState) -> frozenset[str]:
+    """Add already-extracted domains to the live allowlist when expansion is enabled."""
     if state.settings.fetcher.allowlist_expansion == "discovered":
         new_domains = discovered_domains - state.allowlist
         if new_domains:
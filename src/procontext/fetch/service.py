@@ -3,16 +3,17 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 
 import httpx
 import structlog
 
 from procontext.config import FetcherSettings
 from procontext.errors import ErrorCode, ProContextError
-from procontext.fetch.models import FetchedContent
+from procontext.fetch.models import CacheValidators, ConditionalFetch, FetchedContent
 from procontext.fetch.processors import HtmlProcessorPipeline, build_html_processor_pipeline
 from procontext.fetch.security import is_url_allowed
+from procontext.timing import phase
 
 if TYPE_CHECKING:
     from httpx import Response
@@ -42,17 +43,76 @@ class Fetcher:
         max_redirects: int = 3,
     ) -> str:
         """Fetch a URL with per-hop SSRF validation."""
+        response, final_url = await self._get(url, allowlist, max_redirects=max_redirects)
+        return await self._process(response, original_url=url, final_url=final_url)
+
+    async def fetch_conditional(
+        self,
+        url: str,
+        allowlist: frozenset[str],
+        validators: CacheValidators | None = None,
+        max_redirects: int = 3,
+    ) -> ConditionalFetch:
+        """Fetch a URL, revalidating a cached copy when *validators* are given.
+
+        Sends ``If-None-Match``/``If-Modified-Since`` from *validators*. On
+        ``304 Not Modified`` the body is neither downloaded nor processed and
+        the result has no content. Otherwise the result carries the processed
+        content and the response's own validators.
+        """
+        validators = validators or CacheValidators()
+        response, final_url = await self._get(
+            url,
+            allowlist,
+            headers=validators.request_headers(),
+            max_redirects=max_redirects,
+        )
+        if response.status_code == 304:
+            log.info("fetch_not_modified", url=url, final_url=final_url)
+            return ConditionalFetch(
+                content=None,
+                validators=CacheValidators(
+                    etag=response.headers.get("etag", validators.etag),
+                    last_modified=response.headers.get("last-modified", validators.last_modified),
+                ),
+            )
+        content = await self._process(response, original_url=url, final_url=final_url)
+        return ConditionalFetch(
+            content=content,
+            validators=CacheValidators(
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            ),
+        )
+
+    async def _get(
+        self,
+        url: str,
+        allowlist: frozenset[str],
+        *,
+        headers: dict[str, str] | None = None,
+        max_redirects: int = 3,
+    ) -> tuple[Response, str]:
+        """Follow redirects with per-hop SSRF validation; return the final response and URL.
+
+        *headers* (the validators of the cached copy) are sent only while the
+        hops stay on *url*'s host: another origin could match them by accident.
+        A ``304`` is returned as-is when the request that got it was conditional.
+        """
         current_url = url
+        origin = urlparse(url).netloc
 
         try:
             for hop in range(max_redirects + 1):
                 check_domain = self._settings.ssrf_domain_check and hop == 0
-                if not is_url_allowed(
-                    current_url,
-                    allowlist,
-                    check_private_ips=self._settings.ssrf_private_ip_check,
-                    check_domain=check_domain,
-                ):
+                with phase("ssrf_check"):
+                    allowed = is_url_allowed(
+                        current_url,
+                        allowlist,
+                        check_private_ips=self._settings.ssrf_private_ip_check,
+                        check_domain=check_domain,
+                    )
+                if not allowed:
                     log.warning("ssrf_blocked", url=current_url, reason="not_in_allowlist")
                     raise ProContextError(
                         code=ErrorCode.URL_NOT_ALLOWED,
@@ -61,7 +121,10 @@ class Fetcher:
                         recoverable=False,
                     )
 
-                response = await self._client.get(current_url)
+                if headers and urlparse(current_url).netloc != origin:
+                    headers = None
+                with phase("network"):
+                    response = await self._client.get(current_url, headers=headers)
 
                 if response.is_redirect and "location" in response.headers:
                     if hop == max_redirects:
@@ -76,6 +139,9 @@ class Fetcher:
                     current_url = urljoin(current_url, response.headers["location"])
                     continue
 
+                if response.status_code == 304 and headers:
+                    return response, current_url
+
                 if not response.is_success:
                     if response.status_code == 404:
                         raise ProContextError(
@@ -93,21 +159,7 @@ class Fetcher:
                         recoverable=True,
                     )
 
-                fetched_content = _build_fetched_content(
-                    response=response,
-                    original_url=url,
-                    final_url=current_url,
-                )
-                processed_content = await self._html_processor_pipeline.process(fetched_content)
-                log.info(
-                    "fetch_complete",
-                    url=url,
-                    status_code=response.status_code,
-                    content_length=len(processed_content.text_content),
-                    final_url=current_url,
-                    content_type=processed_content.content_type,
-                )
-                return processed_content.text_content
+                return response, current_url
 
         except ProContextError:
             raise
@@ -126,6 +178,25 @@ class Fetcher:
             recoverable=False,
         )
 
+    async def _process(self, response: Response, *, original_url: str, final_url: str) -> str:
+        """Run a successful response through the HTML processor pipeline."""
+        with phase("decode"):
+            fetched_content = _build_fetched_content(
+                response=response,
+                original_url=original_url,
+                final_url=final_url,
+            )
+        processed_content = await self._html_processor_pipeline.process(fetched_content)
+        log.info(
+            "fetch_complete",
+            url=original_url,
+            status_code=response.status_code,
+            content_length=len(processed_content.text_content),
+            final_url=final_url,
+            content_type=processed_content.content_type,
+        )
+        return processed_content.text_content
+
 
 def _build_fetched_content(
     *,
@@ -0,0 +1,96 @@
+"""Line-start offset index for windowed access to page content.
+
+``read_page`` windows and ``search_page`` offsets address content by 1-based
+line number, using the same line boundaries as ``str.splitlines()`` (which
+``parser.py`` also uses to number outline entries). Splitting a multi-megabyte
+page on every call allocates one string per line; this index is computed once
+when a page is cached and lets callers slice out just the lines they need.
+
+The index is persisted next to the content as a compact array of unsigned
+32-bit little-endian offsets.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from array import array
+
+# The exact set of boundaries recognised by str.splitlines(). "\r\n" is listed
+# first so it is consumed as a single boundary.
+_LINE_BREAK_RE = re.compile(r"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+_OFFSET_TYPECODE = "I"
+
+
+class LineIndex:
+    """Start offset of every line in a piece of content."""
+
+    __slots__ = ("starts",)
+
+    def __init__(self, starts: array[int]) -> None:
+        self.starts = starts
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LineIndex):
+            return NotImplemented
+        return self.starts == other.starts
+
+    __hash__ = None  # type: ignore[assignment]
+
+    @classmethod
+    def build(cls, content: str) -> LineIndex:
+        """Index *content* so that ``total_lines == len(content.splitlines())``."""
+        starts = array(_OFFSET_TYPECODE)
+        if content:
+            starts.append(0)
+            end = len(content)
+            starts.extend(m.end() for m in _LINE_BREAK_RE.finditer(content) if m.end() < end)
+        return cls(starts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> LineIndex:
+        """Decode an index produced by ``to_bytes``.
+
+        Raises:
+            ValueError: if *data* is not a whole number of offsets.
+        """
+        starts = array(_OFFSET_TYPECODE)
+        if len(data) % starts.itemsize:
+            raise ValueError("Line index payload has a partial offset")
+        starts.frombytes(data)
+        if sys.byteorder == "big":
+            starts.byteswap()
+        return cls(starts)
+
+    def to_bytes(self) -> bytes:
+        """Encode the index for storage."""
+        if sys.byteorder == "big":
+            swapped = array(_OFFSET_TYPECODE, self.starts)
+            swapped.byteswap()
+            return swapped.tobytes()
+        return self.starts.tobytes()
+
+    @property
+    def total_lines(self) -> int:
+        return len(self.starts)
+
+    def suffix(self, content: str, start: int) -> str:
+        """Return *content* from the beginning of 1-based line *start* onwards."""
+        if start > len(self.starts):
+            return ""
+        return content[self.starts[max(start, 1) - 1] :]
+
+    def window(self, content: str, start: int, end: int) -> str:
+        """Return lines *start*..*end* (1-based, inclusive) joined with ``"\\n"``.
+
+        Equivalent to ``"\\n".join(content.splitlines()[start - 1 : end])`` but
+        only touches the requested range.
+        """
+        start = max(start, 1)
+        end = min(end, len(self.starts))
+        if start > end:
+            return ""
+        lo = self.starts[start - 1]
+        hi = self.starts[end] if end < len(self.starts) else len(content)
+        return "\n".join(content[lo:hi].splitlines())
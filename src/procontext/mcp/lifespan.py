@@ -8,16 +8,18 @@ from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-import aiosqlite
 import structlog
 
 from procontext import __version__
-from procontext.cache import Cache
+from procontext.cache import CacheMetrics, ShardedCache
 from procontext.config import Settings, registry_additional_info_path, registry_paths
 from procontext.fetch.client import build_http_client
-from procontext.fetch.processors import build_html_processor_pipeline
+from procontext.fetch.processors import build_html_processor_pipeline, build_markitdown_pool
 from procontext.fetch.security import build_allowlist
 from procontext.fetch.service import Fetcher
+from procontext.page.processing import PageProcessor
+from procontext.page.refresh import RefreshQueue
+from procontext.page.service import close_refresh_queue
 from procontext.registry import (
     build_indexes,
     load_registry,
@@ -27,6 +29,7 @@ from procontext.registry import (
 from procontext.schedulers import (
     run_cache_cleanup_scheduler,
     run_cache_startup_cleanup,
+    run_refresh_ahead_scheduler,
     run_registry_startup_check,
     run_registry_update_scheduler,
 )
@@ -39,6 +42,9 @@ if TYPE_CHECKING:
 
 log = structlog.get_logger()
 
+# Grace period for running background refreshes at shutdown; queued ones are dropped.
+_REFRESH_DRAIN_SECONDS = 5.0
+
 
 class _StdoutGuard:
     """Drop-in replacement for ``sys.stdout`` that blocks writes.
@@ -112,9 +118,22 @@ async def lifespan(server: FastMCP) -> AsyncGenerator[AppState, None]:
 
     db_path = Path(settings.cache.db_path).expanduser()
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    db = await aiosqlite.connect(str(db_path))
-    cache = Cache(db)
-    await cache.init_db()
+    cache_metrics = CacheMetrics()
+    # One file unless cache.shards > 1; each shard gets its own writer and read pool.
+    cache = await ShardedCache.open(
+        db_path,
+        settings.cache.shards,
+        read_pool_size=settings.cache.read_pool_size,
+        memory_max_bytes=settings.cache.memory_max_bytes,
+        codec=settings.cache.compression,
+        write_flush_interval_ms=settings.cache.write_flush_interval_ms,
+        write_flush_max_pending=settings.cache.write_flush_max_pending,
+        max_bytes=settings.cache.max_bytes,
+        max_entries=settings.cache.max_entries,
+        metrics=cache_metrics,
+        ttl_jitter=settings.cache.ttl_jitter,
+        chunk_threshold_chars=settings.cache.chunk_threshold_chars,
+    )
 
     # Restore domains discovered in previous sessions so cache hits remain
     # reachable across restarts when allowlist_expansion is "discovered".
@@ -124,7 +143,11 @@ async def lifespan(server: FastMCP) -> AsyncGenerator[AppState, None]:
             allowlist = allowlist | cached_domains
             log.info("allowlist_restored_from_cache", domain_count=len(cached_domains))
 
-    html_processor_pipeline = build_html_processor_pipeline(settings.fetcher.html_processors)
+    # None unless processing.html_executor is "process"; workers start on first use.
+    markitdown_pool = build_markitdown_pool(settings)
+    html_processor_pipeline = build_html_processor_pipeline(
+        settings.fetcher.html_processors, markitdown_pool=markitdown_pool
+    )
     fetcher = Fetcher(
         http_client,
         settings.fetcher,
@@ -151,6 +174,9 @@ async def lifespan(server: FastMCP) -> AsyncGenerator[AppState, None]:
         md_probe_base_urls=frozenset(
             additional_info.useful_md_probe_base_urls if additional_info is not None else []
         ),
+        cache_metrics=cache_metrics,
+        refresh_queue=RefreshQueue.from_settings(settings.cache, cache_metrics),
+        page_processor=PageProcessor.from_settings(settings),
     )
 
     # In stdio mode, install the stdout guard to prevent accidental writes
@@ -163,9 +189,14 @@ async def lifespan(server: FastMCP) -> AsyncGenerator[AppState, None]:
     if settings.server.transport == "http":
         registry_update_task = asyncio.create_task(run_registry_update_scheduler(state))
         cache_cleanup_task = asyncio.create_task(run_cache_cleanup_scheduler(state))
+        refresh_ahead_task: asyncio.Task[None] | None = asyncio.create_task(
+            run_refresh_ahead_scheduler(state)
+        )
     else:
         registry_update_task = asyncio.create_task(run_registry_startup_check(state))
         cache_cleanup_task = asyncio.create_task(run_cache_startup_cleanup(state))
+        refresh_ahead_task = None
+    cache_flush_task = asyncio.create_task(cache.run_write_flusher())
 
     log.info(
         "server_started",
@@ -185,6 +216,22 @@ async def lifespan(server: FastMCP) -> AsyncGenerator[AppState, None]:
             await registry_update_task
         with suppress(asyncio.CancelledError):
             await cache_cleanup_task
+        if refresh_ahead_task is not None:
+            refresh_ahead_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await refresh_ahead_task
+        # Let running refreshes finish writing before the queue is flushed.
+        await close_refresh_queue(state, _REFRESH_DRAIN_SECONDS)
+        if state.page_processor is not None:
+            state.page_processor.close()
+        if markitdown_pool is not None:
+            await markitdown_pool.close()
+        cache_flush_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await cache_flush_task
+        # Persist writes still queued by the write-behind cache.
+        await cache.flush_writes()
+        await cache.save_metrics()
         await http_client.aclose()
-        await db.close()
+        await cache.close()
         log.info("server_stopping")
@@ -2,18 +2,62 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+from procontext.errors import ErrorCode
+from procontext.lines import LineIndex
+from procontext.outline import OutlineIndex
 
 
 class PageCacheEntry(BaseModel):
     """Cached content for a single documentation page."""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     url: str
     url_hash: str  # SHA-256 of url (primary key)
     content: str  # Full page markdown
     outline: str  # Plain-text outline: "<line>:<original line>\n..."
+    line_index: LineIndex | None = None  # Line-start offsets into content
+    outline_index: OutlineIndex | None = None  # Parsed, fence-stripped outline entries
     discovered_domains: frozenset[str] = frozenset()  # Base domains found in content
     fetched_at: datetime
     expires_at: datetime
     last_checked_at: datetime | None = None  # Last time a background refresh was attempted
+    etag: str | None = None  # ETag response header, for conditional refresh
+    last_modified: str | None = None  # Last-Modified response header
+    ttl_hours: float | None = None  # TTL the entry was stored with; adapted on refresh
+    content_hash: str | None = None  # SHA-256 hex of content, computed at write time
+    # Set when content is stored in line-range chunks (Cache.get_chunks); content
+    # is then "" and line_index None, and line_count gives the page's length.
+    chunk_lines: int | None = None
+    line_count: int | None = None
     stale: bool = False
+
+
+class PageMetadata(BaseModel):
+    """Identity, size and freshness of a cached page, read without its content."""
+
+    url: str
+    url_hash: str
+    content_hash: str  # SHA-256 hex of content
+    line_count: int  # Lines as counted by str.splitlines()
+    char_count: int
+    token_estimate: int  # Approximate LLM tokens (see content_stats.estimate_tokens)
+    fetched_at: datetime
+    expires_at: datetime
+    last_checked_at: datetime | None = None
+    ttl_hours: float | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    stale: bool = False
+
+
+class NegativeCacheEntry(BaseModel):
+    """A recent permanent fetch failure, replayed instead of re-fetching the URL."""
+
+    url_hash: str
+    code: ErrorCode
+    message: str
+    suggestion: str
+    expires_at: datetime
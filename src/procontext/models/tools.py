@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import Any, Literal
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, SerializerFunctionWrapHandler, field_validator, model_serializer
 
 from procontext.models.registry import LibraryMatch
 from procontext.normalization import normalize_doc_url
@@ -45,12 +45,31 @@ class ResolveLibraryInput(BaseModel):
         return v
 
 
+class ToolOutput(BaseModel):
+    """Base of the tool outputs: adds the optional per-call ``timing`` breakdown.
+
+    ``timing`` maps each phase of the call, and ``total``, to milliseconds.
+    It is set only with ``logging.tool_timing: response``, serialized last, and
+    omitted otherwise.
+    """
+
+    timing: dict[str, float] | None = None
+
+    @model_serializer(mode="wrap")
+    def _omit_unset_timing(self, handler: SerializerFunctionWrapHandler) -> dict[str, Any]:
+        data = handler(self)
+        timing = data.pop("timing", None)
+        if timing is not None:
+            data["timing"] = timing  # after the tool's own fields
+        return data
+
+
 class ResolveHint(BaseModel):
     code: Literal["UNSUPPORTED_QUERY_SYNTAX", "FUZZY_FALLBACK_USED"]
     message: str
 
 
-class ResolveLibraryOutput(BaseModel):
+class ResolveLibraryOutput(ToolOutput):
     matches: list[LibraryMatch]
     hint: ResolveHint | None = None
 
@@ -94,7 +113,7 @@ class OutlineSummary(BaseModel):
     total_entries: int
 
 
-class ReadPageOutput(BaseModel):
+class ReadPageOutput(ToolOutput):
     url: str
     content: str
     outline: OutlineSummary | None
@@ -139,7 +158,7 @@ class ReadOutlineInput(BaseModel):
         return v
 
 
-class ReadOutlineOutput(BaseModel):
+class ReadOutlineOutput(ToolOutput):
     url: str
     outline: str
     total_entries: int
@@ -188,7 +207,7 @@ class SearchPageInput(BaseModel):
         return v
 
 
-class SearchPageOutput(BaseModel):
+class SearchPageOutput(ToolOutput):
     url: str
     query: str
     matches: str
@@ -4,19 +4,27 @@ Parses the raw outline string (cached alongside page content) into structured
 entries, applies intelligent compaction for token-efficient responses, and
 formats entries back to the wire format.
 
-The raw outline is produced by ``parser.py`` and stored as-is in the cache.
-This module operates on that cached string at response time.
+The raw outline is produced by ``parser.py`` and stored as-is in the cache,
+next to an ``OutlineIndex``: the parsed, fence-stripped entries packed as
+columns, so tool calls skip re-parsing and materialise only the entries they
+return.
 """
 
 from __future__ import annotations
 
+import sys
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 import structlog
 
 from procontext.parser import _FENCE_RE, _is_matching_fence_closer, _match_heading
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
 log = structlog.get_logger()
 
 OutlineReductionStage = Literal["none", "drop_h6", "drop_h5", "drop_fenced", "drop_h4", "drop_h3"]
@@ -45,17 +53,23 @@ def parse_outline_entries(outline_string: str) -> list[OutlineEntry]:
     split on the first ``:``, then classified as a heading or fence line with
     CommonMark-compliant fence state tracking.
     """
-    if not outline_string:
-        return []
+    return [entry for _, entry in _iter_outline_entries(outline_string)]
 
-    entries: list[OutlineEntry] = []
+
+def _iter_outline_entries(outline_string: str) -> Iterator[tuple[int, OutlineEntry]]:
+    """Yield each parsed entry with the offset of its text in *outline_string*."""
+    if not outline_string:
+        return
 
     # Fence state tracking (CommonMark rules)
     in_fence = False
     fence_char: str = ""
     fence_len: int = 0
 
+    line_start = 0
     for raw_line in outline_string.split("\n"):
+        text_start = line_start
+        line_start += len(raw_line) + 1
         if not raw_line:
             continue
 
@@ -66,6 +80,7 @@ def parse_outline_entries(outline_string: str) -> list[OutlineEntry]:
             continue
         line_number = int(raw_line[:colon_idx])
         text = raw_line[colon_idx + 1 :]
+        text_start += colon_idx + 1
 
         # Determine if this is a fence line
         fence_match = _FENCE_RE.match(text)
@@ -77,14 +92,15 @@ def parse_outline_entries(outline_string: str) -> list[OutlineEntry]:
             in_fence = True
             fence_char = char
             fence_len = length
-            entries.append(
+            yield (
+                text_start,
                 OutlineEntry(
                     line_number=line_number,
                     text=text,
                     depth=None,
                     is_fence=True,
                     in_fence=False,  # The opener itself is not "inside" the fence
-                )
+                ),
             )
         elif in_fence and _is_matching_fence_closer(
             text,
@@ -94,29 +110,29 @@ def parse_outline_entries(outline_string: str) -> list[OutlineEntry]:
             in_fence = False
             fence_char = ""
             fence_len = 0
-            entries.append(
+            yield (
+                text_start,
                 OutlineEntry(
                     line_number=line_number,
                     text=text,
                     depth=None,
                     is_fence=True,
                     in_fence=False,  # The closer itself is not "inside" the fence
-                )
+                ),
             )
         else:
             depth = _extract_depth(text, in_fence=in_fence)
-            entries.append(
+            yield (
+                text_start,
                 OutlineEntry(
                     line_number=line_number,
                     text=text,
                     depth=depth,
                     is_fence=False,
                     in_fence=in_fence,
-                )
+                ),
             )
 
-    return entries
-
 
 def _extract_depth(text: str, *, in_fence: bool) -> int | None:
     """Extract heading depth (1-6) from a line, or None if not a heading."""
@@ -138,7 +154,12 @@ def strip_empty_fences(entries: list[OutlineEntry]) -> list[OutlineEntry]:
     blocks from structural headings.  Fence pairs with zero heading entries
     add no navigational value and are removed.
     """
-    # Identify indices to remove
+    remove = _empty_fence_indices(entries)
+    return [e for i, e in enumerate(entries) if i not in remove]
+
+
+def _empty_fence_indices(entries: list[OutlineEntry]) -> set[int]:
+    """Return the positions of empty fence pairs and everything between them."""
     remove: set[int] = set()
     opener_idx: int | None = None
 
@@ -156,7 +177,147 @@ def strip_empty_fences(entries: list[OutlineEntry]) -> list[OutlineEntry]:
                         remove.add(j)
                 opener_idx = None
 
-    return [e for i, e in enumerate(entries) if i not in remove]
+    return remove
+
+
+# ---------------------------------------------------------------------------
+# Packed index
+# ---------------------------------------------------------------------------
+
+_POSITION_TYPECODE = "I"
+
+# Low three bits of an entry's kind byte hold the heading depth (0 = none).
+_DEPTH_MASK = 0x07
+_FENCE_FLAG = 0x08
+_IN_FENCE_FLAG = 0x10
+
+# Line number, text start and text end (uint32 each) plus the kind byte.
+_RECORD_BYTES = 13
+
+
+class OutlineIndex:
+    """Parsed, fence-stripped outline entries stored as parallel columns.
+
+    Each entry is its 1-based source line number, the span of its text in
+    the raw outline string, and a kind byte packing heading depth with the
+    fence flags. ``entries`` rebuilds ``OutlineEntry`` objects for a range of
+    positions without re-running the fence and heading regexes, and
+    ``position`` finds the first entry at or after a source line by bisection.
+
+    The index is persisted next to the outline as the three columns of
+    unsigned 32-bit little-endian integers followed by the kind bytes.
+    """
+
+    __slots__ = ("line_numbers", "text_starts", "text_ends", "kinds")
+
+    def __init__(
+        self,
+        line_numbers: array[int],
+        text_starts: array[int],
+        text_ends: array[int],
+        kinds: bytes,
+    ) -> None:
+        self.line_numbers = line_numbers
+        self.text_starts = text_starts
+        self.text_ends = text_ends
+        self.kinds = kinds
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OutlineIndex):
+            return NotImplemented
+        return self.to_bytes() == other.to_bytes()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __sizeof__(self) -> int:
+        return (
+            object.__sizeof__(self)
+            + sys.getsizeof(self.line_numbers)
+            + sys.getsizeof(self.text_starts)
+            + sys.getsizeof(self.text_ends)
+            + sys.getsizeof(self.kinds)
+        )
+
+    @classmethod
+    def build(cls, outline_string: str) -> OutlineIndex:
+        """Parse *outline_string* and strip empty fences, as the tool handlers expect."""
+        parsed = list(_iter_outline_entries(outline_string))
+        remove = _empty_fence_indices([entry for _, entry in parsed])
+        line_numbers = array(_POSITION_TYPECODE)
+        text_starts = array(_POSITION_TYPECODE)
+        text_ends = array(_POSITION_TYPECODE)
+        kinds = bytearray()
+        for i, (text_start, entry) in enumerate(parsed):
+            if i in remove:
+                continue
+            line_numbers.append(entry.line_number)
+            text_starts.append(text_start)
+            text_ends.append(text_start + len(entry.text))
+            kinds.append(
+                (entry.depth or 0)
+                | (_FENCE_FLAG if entry.is_fence else 0)
+                | (_IN_FENCE_FLAG if entry.in_fence else 0)
+            )
+        return cls(line_numbers, text_starts, text_ends, bytes(kinds))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> OutlineIndex:
+        """Decode an index produced by ``to_bytes``.
+
+        Raises:
+            ValueError: if *data* is not a whole number of entries.
+        """
+        count, remainder = divmod(len(data), _RECORD_BYTES)
+        if remainder:
+            raise ValueError("Outline index payload has a partial entry")
+        columns: list[array[int]] = []
+        for column in range(3):
+            values = array(_POSITION_TYPECODE)
+            values.frombytes(data[column * 4 * count : (column + 1) * 4 * count])
+            if sys.byteorder == "big":
+                values.byteswap()
+            columns.append(values)
+        return cls(columns[0], columns[1], columns[2], bytes(data[12 * count :]))
+
+    def to_bytes(self) -> bytes:
+        """Encode the index for storage."""
+        parts: list[bytes] = []
+        for values in (self.line_numbers, self.text_starts, self.text_ends):
+            if sys.byteorder == "big":
+                values = array(_POSITION_TYPECODE, values)
+                values.byteswap()
+            parts.append(values.tobytes())
+        parts.append(self.kinds)
+        return b"".join(parts)
+
+    def position(self, line_number: int) -> int:
+        """Return the position of the first entry at or after *line_number*."""
+        return bisect_left(self.line_numbers, line_number)
+
+    def entries(
+        self, outline_string: str, start: int = 0, stop: int | None = None
+    ) -> list[OutlineEntry]:
+        """Return the entries at positions *start* to *stop* (exclusive).
+
+        *outline_string* must be the outline the index was built from.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        entries: list[OutlineEntry] = []
+        for i in range(max(start, 0), stop):
+            kind = self.kinds[i]
+            entries.append(
+                OutlineEntry(
+                    line_number=self.line_numbers[i],
+                    text=outline_string[self.text_starts[i] : self.text_ends[i]],
+                    depth=(kind & _DEPTH_MASK) or None,
+                    is_fence=bool(kind & _FENCE_FLAG),
+                    in_fence=bool(kind & _IN_FENCE_FLAG),
+                )
+            )
+        return entries
 
 
 # ---------------------------------------------------------------------------
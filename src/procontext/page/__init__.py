@@ -1,5 +1,5 @@
 """Page services for documentation retrieval and caching."""
 
-from procontext.page.service import FetchResult, fetch_or_cached_page
+from procontext.page.service import FetchResult, fetch_or_cached_page, warm_page
 
-__all__ = ["FetchResult", "fetch_or_cached_page"]
+__all__ = ["FetchResult", "fetch_or_cached_page", "warm_page"]
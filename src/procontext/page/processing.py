@@ -0,0 +1,158 @@
+"""Post-processing of fetched pages, off the event loop for large ones.
+
+Before a fetched page is cached it is parsed for its outline, indexed by
+line and by outline entry, hashed, and scanned for the domains it links to.
+On a multi-megabyte ``llms-full.txt`` that is hundreds of milliseconds of
+pure-Python work, and on the event loop it would stall every other tool
+call for as long. ``PageProcessor`` runs pages of at least
+``processing.offload_threshold_chars`` in a worker instead:
+
+- ``thread`` (default) runs them with ``anyio.to_thread``. The work still
+  holds the GIL, but the interpreter hands it back to the event loop every
+  switch interval (5 ms), so other calls keep being served while it runs.
+- ``process`` runs them in a pool of ``processing.process_workers``
+  processes, started on first use, so large pages are processed in
+  parallel with the loop and with each other, at the cost of copying the
+  content to the worker.
+
+Smaller pages are processed inline, where the hop to a worker would cost
+more than it saves. Allowlist expansion itself (a set union on
+``AppState``) always happens on the loop, with the domains the worker found.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
+
+import structlog
+from anyio import to_thread
+
+from procontext.content_stats import hash_content
+from procontext.fetch.security import extract_base_domains_from_content
+from procontext.lines import LineIndex
+from procontext.logging_config import setup_logging
+from procontext.outline import OutlineIndex
+from procontext.parser import parse_outline
+from procontext.timing import record
+
+if TYPE_CHECKING:
+    from procontext.config import Settings
+
+log = structlog.get_logger()
+
+
+@dataclass(frozen=True)
+class ProcessedPage:
+    """Everything derived from a page's content that is cached alongside it."""
+
+    outline: str
+    line_index: LineIndex
+    outline_index: OutlineIndex
+    content_hash: str
+    discovered_domains: frozenset[str]
+    # Milliseconds spent in each step, reported to the caller's phase timer.
+    phases: dict[str, float]
+
+
+def process_page(content: str) -> ProcessedPage:
+    """Derive the outline, indexes, hash and linked domains of *content*."""
+    phases: dict[str, float] = {}
+    started = time.perf_counter()
+    outline = parse_outline(content)
+    parsed = time.perf_counter()
+    line_index = LineIndex.build(content)
+    outline_index = OutlineIndex.build(outline)
+    content_hash = hash_content(content)
+    indexed = time.perf_counter()
+    discovered_domains = extract_base_domains_from_content(content)
+    scanned = time.perf_counter()
+    phases["parse_outline"] = (parsed - started) * 1000
+    phases["index"] = (indexed - parsed) * 1000
+    phases["allowlist_expansion"] = (scanned - indexed) * 1000
+    return ProcessedPage(
+        outline=outline,
+        line_index=line_index,
+        outline_index=outline_index,
+        content_hash=content_hash,
+        discovered_domains=discovered_domains,
+        phases=phases,
+    )
+
+
+def _init_worker(settings: Settings | None) -> None:
+    """Configure logging in a pool process, which starts with structlog's defaults."""
+    if settings is not None:
+        setup_logging(settings)
+
+
+class PageProcessor:
+    """Run ``process_page`` inline, on a thread, or in a process pool by page size."""
+
+    def __init__(
+        self,
+        *,
+        executor: Literal["thread", "process"] = "thread",
+        offload_threshold_chars: int = 256 * 1024,
+        process_workers: int = 2,
+        settings: Settings | None = None,
+    ) -> None:
+        self._executor = executor
+        self._threshold = offload_threshold_chars
+        self._process_workers = process_workers
+        self._settings = settings
+        self._pool: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> PageProcessor:
+        return cls(
+            executor=settings.processing.executor,
+            offload_threshold_chars=settings.processing.offload_threshold_chars,
+            process_workers=settings.processing.process_workers,
+            settings=settings,
+        )
+
+    async def process(self, content: str) -> ProcessedPage:
+        """Process *content*, in a worker when it is at least the offload threshold."""
+        if len(content) < self._threshold:
+            processed = process_page(content)
+        elif self._executor == "process":
+            processed = await self._process_in_pool(content)
+        else:
+            processed = await to_thread.run_sync(process_page, content)
+        record(processed.phases)
+        return processed
+
+    def close(self) -> None:
+        """Shut the process pool down, if one was started, without waiting for it."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _process_in_pool(self, content: str) -> ProcessedPage:
+        if self._pool is None:
+            # "spawn", not fork: the server process has the cache's SQLite
+            # threads and the HTTP client's sockets, none of which a forked
+            # child should inherit.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._settings,),
+            )
+        pool = self._pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, process_page, content)
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory). Start a fresh pool for
+            # the next page and process this one on a thread.
+            log.warning("page_processor_pool_broken", exc_info=True)
+            if self._pool is pool:
+                self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            return await to_thread.run_sync(process_page, content)
@@ -0,0 +1,244 @@
+"""Bounded, prioritised queue for background refreshes of stale pages.
+
+A stale cache hit is served immediately and its refresh is queued here
+rather than started as a task of its own. At most ``cache.refresh_workers``
+refreshes run at once (default 4), so a burst of stale hits after an idle
+period cannot take over the HTTP connection pool that foreground fetches
+share. Workers are started as refreshes arrive and exit when the queue is
+empty.
+
+Priority is how hot the page is: every further stale hit on a page that is
+still waiting raises its priority by one, so the pages agents keep asking
+for are refreshed first; ties go to the page queued earliest. Refresh-ahead
+jobs for pages that have not expired yet are queued at priority 0, behind
+every stale page. The queue holds at most ``cache.refresh_queue_size``
+pages. A stale hit that finds it full is dropped: the page keeps being
+served stale and is queued again on a later hit.
+
+``cache.refresh_max_requests_per_hour`` and
+``cache.refresh_max_bytes_per_hour`` cap what refreshes fetch in each hour
+(``0`` = unlimited). Once either is spent, workers hold the queue until the
+hour rolls over.
+
+``close`` drops waiting refreshes and gives running ones a grace period
+before cancelling them; the server lifespan calls it (through
+``page.service.close_refresh_queue``) before the HTTP client and the cache
+are closed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import structlog
+
+if TYPE_CHECKING:
+    from procontext.cache.metrics import CacheMetrics
+    from procontext.config import CacheSettings
+
+log = structlog.get_logger()
+
+# A refresh returns the number of content bytes it downloaded.
+RefreshJob = Callable[[], Awaitable[int]]
+
+_HOUR_SECONDS = 3600.0
+
+
+@dataclass
+class RefreshQueueStats:
+    """Observable state of a ``RefreshQueue``."""
+
+    depth: int = 0
+    max_depth: int = 0
+    running: int = 0
+    dropped: int = 0
+    deferred: int = 0
+    requests_this_window: int = 0
+    bytes_this_window: int = 0
+
+
+@dataclass
+class _Pending:
+    job: RefreshJob
+    priority: int
+    order: int
+    queued_at: float
+
+
+class RefreshQueue:
+    """Run refresh jobs keyed by ``url_hash`` on a fixed number of workers."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 4,
+        max_pending: int = 256,
+        max_requests_per_hour: int = 0,
+        max_bytes_per_hour: int = 0,
+        metrics: CacheMetrics | None = None,
+        window_seconds: float = _HOUR_SECONDS,
+    ) -> None:
+        self._max_workers = workers
+        self._max_pending = max_pending
+        self._max_requests = max_requests_per_hour
+        self._max_bytes = max_bytes_per_hour
+        self._metrics = metrics
+        self._window_seconds = window_seconds
+        self._pending: dict[str, _Pending] = {}
+        # (-priority, order, url_hash); entries superseded by a bump are skipped on pop.
+        self._heap: list[tuple[int, int, str]] = []
+        self._order = itertools.count()
+        self._workers: set[asyncio.Task[None]] = set()
+        self._closed = asyncio.Event()
+        self._window_start = time.monotonic()
+        self._stats = RefreshQueueStats()
+
+    @classmethod
+    def from_settings(
+        cls, settings: CacheSettings, metrics: CacheMetrics | None = None
+    ) -> RefreshQueue:
+        return cls(
+            workers=settings.refresh_workers,
+            max_pending=settings.refresh_queue_size,
+            max_requests_per_hour=settings.refresh_max_requests_per_hour,
+            max_bytes_per_hour=settings.refresh_max_bytes_per_hour,
+            metrics=metrics,
+        )
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def stats(self) -> RefreshQueueStats:
+        self._stats.depth = len(self._pending)
+        return self._stats
+
+    def submit(self, url_hash: str, job: RefreshJob, *, priority: int = 1) -> bool:
+        """Queue *job* as the refresh of *url_hash* at *priority*.
+
+        Returns ``False`` if the queue is full or closed. A page that is
+        already waiting is bumped instead and *job* is discarded.
+        """
+        if self._closed.is_set():
+            return False
+        if self.bump(url_hash):
+            return True
+        if len(self._pending) >= self._max_pending:
+            self._stats.dropped += 1
+            return False
+        pending = _Pending(
+            job=job, priority=priority, order=next(self._order), queued_at=time.monotonic()
+        )
+        self._pending[url_hash] = pending
+        heapq.heappush(self._heap, (-pending.priority, pending.order, url_hash))
+        self._stats.max_depth = max(self._stats.max_depth, len(self._pending))
+        self._record_depth()
+        if len(self._workers) < self._max_workers:
+            # Workers outlive the tool call that started them, so they must not
+            # inherit its context (its phase timer, for one).
+            worker = asyncio.create_task(self._work(), context=contextvars.Context())
+            self._workers.add(worker)
+        return True
+
+    def bump(self, url_hash: str) -> bool:
+        """Raise the priority of a waiting refresh; return ``False`` if it is not waiting."""
+        pending = self._pending.get(url_hash)
+        if pending is None:
+            return False
+        pending.priority += 1
+        heapq.heappush(self._heap, (-pending.priority, pending.order, url_hash))
+        return True
+
+    async def close(self, timeout: float) -> list[str]:
+        """Stop accepting refreshes, drop waiting ones, and let running ones finish.
+
+        Refreshes still running after *timeout* seconds are cancelled.
+        Returns the ``url_hash`` of every dropped refresh, whose jobs never ran.
+        """
+        self._closed.set()
+        dropped = list(self._pending)
+        self._pending.clear()
+        self._heap.clear()
+        self._record_depth()
+        workers = set(self._workers)
+        unfinished: set[asyncio.Task[None]] = set()
+        if workers:
+            _, unfinished = await asyncio.wait(workers, timeout=timeout)
+            for worker in unfinished:
+                worker.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        log.info("refresh_queue_closed", dropped=len(dropped), cancelled=len(unfinished))
+        return dropped
+
+    def _pop(self) -> _Pending | None:
+        while self._heap:
+            negative_priority, _, url_hash = heapq.heappop(self._heap)
+            pending = self._pending.get(url_hash)
+            if pending is not None and pending.priority == -negative_priority:
+                del self._pending[url_hash]
+                self._record_depth()
+                return pending
+        return None
+
+    def _record_depth(self) -> None:
+        if self._metrics is not None:
+            self._metrics.track_depth("refresh_queue", len(self._pending))
+
+    def _budget_spent(self) -> bool:
+        return (0 < self._max_requests <= self._stats.requests_this_window) or (
+            0 < self._max_bytes <= self._stats.bytes_this_window
+        )
+
+    async def _wait_for_budget(self) -> None:
+        """Return once the current window has budget left (or the queue is closed)."""
+        deferred = False
+        while not self._closed.is_set():
+            now = time.monotonic()
+            if now - self._window_start >= self._window_seconds:
+                self._window_start = now
+                self._stats.requests_this_window = 0
+                self._stats.bytes_this_window = 0
+            if not self._budget_spent():
+                return
+            if not deferred:
+                deferred = True
+                self._stats.deferred += 1
+                if self._metrics is not None:
+                    self._metrics.increment("refreshes_deferred")
+                log.info("refresh_budget_exhausted", waiting=len(self._pending))
+            remaining = self._window_start + self._window_seconds - now
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._closed.wait(), timeout=remaining)
+
+    async def _work(self) -> None:
+        try:
+            while self._pending and not self._closed.is_set():
+                await self._wait_for_budget()
+                pending = self._pop()
+                if pending is None:
+                    break
+                if self._metrics is not None:
+                    waited_ms = (time.monotonic() - pending.queued_at) * 1000
+                    self._metrics.observe("refresh_wait", waited_ms)
+                self._stats.requests_this_window += 1
+                self._stats.running += 1
+                try:
+                    self._stats.bytes_this_window += await pending.job()
+                except Exception:
+                    log.warning("refresh_job_failed", exc_info=True)
+                finally:
+                    self._stats.running -= 1
+        finally:
+            # Leave the pool before the task finishes, so a submit that runs
+            # in between starts a new worker rather than counting this one.
+            task = asyncio.current_task()
+            if task is not None:
+                self._workers.discard(task)
@@ -9,18 +9,31 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
+import time
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
+from functools import partial
 from typing import TYPE_CHECKING
 
 import structlog
 
+from procontext.content_stats import hash_content
 from procontext.errors import ErrorCode, ProContextError
-from procontext.fetch.security import expand_allowlist_from_content, is_url_allowed
-from procontext.parser import parse_outline
+from procontext.fetch.models import CacheValidators
+from procontext.fetch.security import expand_allowlist, is_url_allowed
+from procontext.lines import LineIndex
+from procontext.outline import OutlineIndex
+from procontext.page.processing import PageProcessor
+from procontext.page.refresh import RefreshQueue
+from procontext.page.text import ChunkedText, InlineText
+from procontext.page.ttl import base_ttl_hours, next_ttl_hours
+from procontext.timing import phase
 
 if TYPE_CHECKING:
+    from procontext.fetch.models import ConditionalFetch
     from procontext.models.cache import PageCacheEntry
+    from procontext.page.text import PageText
+    from procontext.protocols import CacheProtocol
     from procontext.state import AppState
 
 log = structlog.get_logger()
@@ -34,17 +47,49 @@ class FetchResult:
     """Immutable result from ``fetch_or_cached_page``."""
 
     url: str
-    content: str
+    text: PageText
     outline: str
+    outline_index: OutlineIndex
     content_hash: str
     cached: bool
     cached_at: datetime | None
     stale: bool
 
 
-def _content_hash(content: str) -> str:
-    """Return a truncated SHA-256 hex digest of the content (12 chars)."""
-    return hashlib.sha256(content.encode()).hexdigest()[:12]
+def _entry_text(entry: PageCacheEntry, cache: CacheProtocol) -> PageText:
+    """Return a reader over the entry's content, chunked or inline.
+
+    The inline line index is built if the backend did not supply one.
+    """
+    if entry.chunk_lines is not None:
+        return ChunkedText(
+            cache=cache,
+            url_hash=entry.url_hash,
+            content_hash=_entry_content_hash(entry),
+            chunk_lines=entry.chunk_lines,
+            total_lines=entry.line_count or 0,
+        )
+    line_index = entry.line_index
+    if line_index is None:
+        line_index = LineIndex.build(entry.content)
+    return InlineText(content=entry.content, line_index=line_index)
+
+
+def _entry_outline_index(entry: PageCacheEntry) -> OutlineIndex:
+    """Return the cached outline index, building it if the backend did not supply one."""
+    if entry.outline_index is not None:
+        return entry.outline_index
+    return OutlineIndex.build(entry.outline)
+
+
+def _entry_content_hash(entry: PageCacheEntry) -> str:
+    """Return the stored content hash, hashing the content if the backend did not supply one."""
+    return entry.content_hash if entry.content_hash is not None else hash_content(entry.content)
+
+
+def _short_hash(content_hash: str) -> str:
+    """Return the 12-character prefix of a content hash reported by the tools."""
+    return content_hash[:12]
 
 
 async def fetch_or_cached_page(url: str, state: AppState) -> FetchResult:
@@ -54,9 +99,15 @@ async def fetch_or_cached_page(url: str, state: AppState) -> FetchResult:
     allowlist expansion, cache write, and stale background refresh.
 
     When a cached entry has expired, stale content is returned immediately
-    and a background task is spawned to refresh the cache. Duplicate
-    background tasks for the same URL are prevented by an in-memory set,
-    and recently-checked URLs are not re-fetched for a cooldown period.
+    and a refresh is queued on the state's ``RefreshQueue``. A URL whose
+    refresh is already queued or running is not queued twice (a queued one
+    moves up instead), and recently-checked URLs are not re-fetched for a
+    cooldown period.
+
+    Concurrent cache misses for the same URL share a single in-flight fetch.
+    A URL whose last fetch failed permanently (see ``_remember_failure``)
+    fails again with the recorded error until the negative entry expires,
+    without a network request.
 
     Raises:
         RuntimeError: if cache or fetcher are not initialised.
@@ -67,12 +118,14 @@ async def fetch_or_cached_page(url: str, state: AppState) -> FetchResult:
 
     # SSRF check — must happen before cache lookup so that pages from
     # domains removed from the allowlist are not served from cache.
-    if not is_url_allowed(
-        url,
-        state.allowlist,
-        check_private_ips=state.settings.fetcher.ssrf_private_ip_check,
-        check_domain=state.settings.fetcher.ssrf_domain_check,
-    ):
+    with phase("ssrf_check"):
+        allowed = is_url_allowed(
+            url,
+            state.allowlist,
+            check_private_ips=state.settings.fetcher.ssrf_private_ip_check,
+            check_domain=state.settings.fetcher.ssrf_domain_check,
+        )
+    if not allowed:
         log.warning("ssrf_blocked", url=url, reason="not_in_allowlist")
         raise ProContextError(
             code=ErrorCode.URL_NOT_ALLOWED,
@@ -84,15 +137,18 @@ async def fetch_or_cached_page(url: str, state: AppState) -> FetchResult:
     url_hash = hashlib.sha256(url.encode()).hexdigest()
 
     # Cache check
-    cached_entry = await state.cache.get_page(url_hash)
+    with phase("cache_read"):
+        cached_entry = await state.cache.get_page(url_hash)
 
     if cached_entry is not None and not cached_entry.stale:
         log.info("cache_hit", stale=False, url=url)
+        state.cache_metrics.increment("hits")
         return FetchResult(
             url=cached_entry.url,
-            content=cached_entry.content,
+            text=_entry_text(cached_entry, state.cache),
             outline=cached_entry.outline,
-            content_hash=_content_hash(cached_entry.content),
+            outline_index=_entry_outline_index(cached_entry),
+            content_hash=_short_hash(_entry_content_hash(cached_entry)),
             cached=True,
             cached_at=cached_entry.fetched_at,
             stale=False,
@@ -100,6 +156,7 @@ async def fetch_or_cached_page(url: str, state: AppState) -> FetchResult:
 
     if cached_entry is not None and cached_entry.stale:
         log.info("cache_hit", stale=True, url=url)
+        state.cache_metrics.increment("stale_hits")
         _maybe_spawn_refresh(
             url=cached_entry.url,
             url_hash=url_hash,
@@ -108,16 +165,134 @@ async def fetch_or_cached_page(url: str, state: AppState) -> FetchResult:
         )
         return FetchResult(
             url=cached_entry.url,
-            content=cached_entry.content,
+            text=_entry_text(cached_entry, state.cache),
             outline=cached_entry.outline,
-            content_hash=_content_hash(cached_entry.content),
+            outline_index=_entry_outline_index(cached_entry),
+            content_hash=_short_hash(_entry_content_hash(cached_entry)),
             cached=True,
             cached_at=cached_entry.fetched_at,
             stale=True,
         )
 
-    # Cache miss — fetch from network.
-    return await _fetch_and_cache(url, url_hash, state)
+    # Cache miss — fetch from network unless the URL recently failed for good.
+    await _raise_if_known_failure(url, url_hash, state)
+    state.cache_metrics.increment("misses")
+    return await _fetch_and_cache_once(url, url_hash, state)
+
+
+async def warm_page(url: str, state: AppState, *, force: bool = False) -> FetchResult | None:
+    """Fetch and cache *url* unless a fresh copy is already cached.
+
+    Used by ``procontext cache warm``. Runs the same SSRF check, fetch,
+    outline parsing, allowlist expansion and cache write as a cache miss in
+    ``fetch_or_cached_page``, but never serves stale content or spawns a
+    background refresh: a stale entry is simply re-fetched.
+
+    Returns:
+        The fetched page, or ``None`` when a fresh entry was already cached
+        and *force* is false.
+
+    Raises:
+        RuntimeError: if cache or fetcher are not initialised.
+        ProContextError: for SSRF violations and network fetch failures.
+    """
+    if state.cache is None or state.fetcher is None:
+        raise RuntimeError("Cache and fetcher must be initialized")
+
+    if not is_url_allowed(
+        url,
+        state.allowlist,
+        check_private_ips=state.settings.fetcher.ssrf_private_ip_check,
+        check_domain=state.settings.fetcher.ssrf_domain_check,
+    ):
+        raise ProContextError(
+            code=ErrorCode.URL_NOT_ALLOWED,
+            message=f"URL not in allowlist: {url}",
+            suggestion="Only URLs from known documentation domains are permitted.",
+            recoverable=False,
+        )
+
+    url_hash = hashlib.sha256(url.encode()).hexdigest()
+    if not force:
+        # Only freshness matters here, so skip loading and decoding the content.
+        metadata = await state.cache.get_page_metadata(url_hash)
+        if metadata is not None and not metadata.stale:
+            return None
+        await _raise_if_known_failure(url, url_hash, state)
+    return await _fetch_and_cache_once(url, url_hash, state)
+
+
+async def _raise_if_known_failure(url: str, url_hash: str, state: AppState) -> None:
+    """Re-raise the recorded error if *url* is in the negative cache."""
+    if state.cache is None:
+        return
+    with phase("negative_cache_read"):
+        negative = await state.cache.get_negative(url_hash)
+    if negative is None:
+        return
+    log.info("negative_cache_hit", url=url, code=negative.code)
+    state.cache_metrics.increment("negative_hits")
+    raise ProContextError(
+        code=negative.code,
+        message=negative.message,
+        suggestion=negative.suggestion,
+        recoverable=False,
+    )
+
+
+async def _remember_failure(url: str, url_hash: str, exc: ProContextError, state: AppState) -> None:
+    """Record a permanent fetch failure in the negative cache.
+
+    404s are kept for ``cache.not_found_ttl_minutes`` and other
+    non-recoverable errors (redirect loops) for ``cache.failure_ttl_minutes``.
+    ``URL_NOT_ALLOWED`` is never recorded: the allowlist grows during a
+    session, so a blocked redirect may succeed later.
+    """
+    if state.cache is None or exc.recoverable or exc.code == ErrorCode.URL_NOT_ALLOWED:
+        return
+    settings = state.settings.cache
+    ttl_minutes = (
+        settings.not_found_ttl_minutes
+        if exc.code == ErrorCode.PAGE_NOT_FOUND
+        else settings.failure_ttl_minutes
+    )
+    if ttl_minutes <= 0:
+        return
+    await state.cache.set_negative(
+        url_hash,
+        code=exc.code,
+        message=exc.message,
+        suggestion=exc.suggestion,
+        ttl_minutes=ttl_minutes,
+    )
+    state.cache_metrics.increment("negatives_stored")
+    log.info("negative_cache_stored", url=url, code=exc.code, ttl_minutes=ttl_minutes)
+
+
+def _refresh_queue(state: AppState) -> RefreshQueue:
+    """Return the state's refresh queue, creating one from settings on first use."""
+    if state.refresh_queue is None:
+        state.refresh_queue = RefreshQueue.from_settings(state.settings.cache, state.cache_metrics)
+    return state.refresh_queue
+
+
+async def close_refresh_queue(state: AppState, timeout: float) -> None:
+    """Close the state's refresh queue, if any (see ``RefreshQueue.close``).
+
+    Dropped refreshes never run their job, so they are cleared from
+    ``_refreshing`` here rather than by ``_background_refresh``.
+    """
+    if state.refresh_queue is None:
+        return
+    for url_hash in await state.refresh_queue.close(timeout):
+        state._refreshing.discard(url_hash)
+
+
+def _page_processor(state: AppState) -> PageProcessor:
+    """Return the state's page processor, creating one from settings on first use."""
+    if state.page_processor is None:
+        state.page_processor = PageProcessor.from_settings(state.settings)
+    return state.page_processor
 
 
 def _maybe_spawn_refresh(
@@ -126,9 +301,13 @@ def _maybe_spawn_refresh(
     state: AppState,
     cached_entry: PageCacheEntry | None,
 ) -> None:
-    """Spawn a background refresh task if appropriate."""
+    """Queue a background refresh if appropriate."""
+    queue = _refresh_queue(state)
     if url_hash in state._refreshing:
+        # Another stale hit while the refresh waits: the page is hot, so move it up.
+        queue.bump(url_hash)
         log.debug("stale_refresh_skipped", reason="already_in_flight", url=url)
+        state.cache_metrics.increment("refreshes_skipped")
         return
 
     from procontext.models.cache import PageCacheEntry
@@ -142,45 +321,210 @@ def _maybe_spawn_refresh(
                 url=url,
                 elapsed_s=elapsed.total_seconds(),
             )
+            state.cache_metrics.increment("refreshes_skipped")
             return
 
+    validators = None
+    previous_hash = previous_ttl_hours = None
+    if isinstance(cached_entry, PageCacheEntry):
+        validators = CacheValidators(
+            etag=cached_entry.etag, last_modified=cached_entry.last_modified
+        )
+        previous_hash = _entry_content_hash(cached_entry)
+        previous_ttl_hours = cached_entry.ttl_hours
+    _submit_refresh(
+        url,
+        url_hash,
+        state,
+        validators=validators,
+        previous_hash=previous_hash,
+        previous_ttl_hours=previous_ttl_hours,
+    )
+
+
+async def queue_refresh_ahead(state: AppState, *, limit: int) -> list[str]:
+    """Queue refreshes for recently read pages that are about to expire.
+
+    Candidates expire within ``cache.refresh_ahead_minutes``, were read in
+    the last ``cache.refresh_ahead_accessed_hours``, are outside the
+    background-refresh cooldown, and have no refresh queued or running. Their
+    refreshes are queued at priority 0, behind stale pages, and run exactly
+    like a stale refresh, so a successful one pushes ``expires_at`` out before
+    any reader sees the page stale.
+
+    Returns the ``url_hash`` of each page queued, at most *limit*.
+    """
+    if state.cache is None or limit <= 0:
+        return []
+    settings = state.settings.cache
+    now = datetime.now(UTC)
+    candidates = await state.cache.get_refresh_candidates(
+        expires_before=now + timedelta(minutes=settings.refresh_ahead_minutes),
+        accessed_since=now - timedelta(hours=settings.refresh_ahead_accessed_hours),
+        checked_before=now - _RECHECK_COOLDOWN,
+        # Pages already being refreshed are skipped below, so look past them.
+        limit=limit + len(state._refreshing),
+    )
+    queued: list[str] = []
+    for page in candidates:
+        if len(queued) >= limit:
+            break
+        if page.url_hash in state._refreshing:
+            continue
+        if not _submit_refresh(
+            page.url,
+            page.url_hash,
+            state,
+            validators=CacheValidators(etag=page.etag, last_modified=page.last_modified),
+            previous_hash=page.content_hash,
+            previous_ttl_hours=page.ttl_hours,
+            priority=0,
+        ):
+            break
+        state.cache_metrics.increment("refreshes_ahead")
+        queued.append(page.url_hash)
+    return queued
+
+
+def _submit_refresh(
+    url: str,
+    url_hash: str,
+    state: AppState,
+    *,
+    validators: CacheValidators | None,
+    previous_hash: str | None,
+    previous_ttl_hours: float | None,
+    priority: int = 1,
+) -> bool:
+    """Queue ``_background_refresh`` for *url*; return ``False`` if the queue is full."""
+    queue = _refresh_queue(state)
+    job = partial(
+        _background_refresh,
+        url=url,
+        url_hash=url_hash,
+        state=state,
+        validators=validators,
+        previous_hash=previous_hash,
+        previous_ttl_hours=previous_ttl_hours,
+    )
+    if not queue.submit(url_hash, job, priority=priority):
+        log.info("stale_refresh_dropped", url=url, queue_depth=len(queue))
+        state.cache_metrics.increment("refreshes_dropped")
+        return False
     state._refreshing.add(url_hash)
-    asyncio.create_task(_background_refresh(url=url, url_hash=url_hash, state=state))
+    state.cache_metrics.increment("refreshes_started")
+    log.debug("stale_refresh_queued", url=url, queue_depth=len(queue), priority=priority)
+    return True
 
 
 async def _background_refresh(
     url: str,
     url_hash: str,
     state: AppState,
-) -> None:
-    """Re-fetch a page in the background for stale cache entries."""
+    validators: CacheValidators | None = None,
+    previous_hash: str | None = None,
+    previous_ttl_hours: float | None = None,
+) -> int:
+    """Re-fetch a page in the background for stale cache entries.
+
+    When the cached copy has validators the request is conditional; a
+    ``304 Not Modified`` only extends the entry's expiry, skipping content
+    processing, outline parsing and allowlist expansion.
+
+    The new TTL comes from ``next_ttl_hours``: a 304, or a body whose hash
+    matches *previous_hash*, counts as unchanged and lengthens
+    *previous_ttl_hours*; different content shortens it.
+
+    Returns the UTF-8 size of the downloaded content (``0`` for a 304 or a
+    failure), which ``RefreshQueue`` charges to its byte budget.
+    """
     log.info("stale_refresh_started", url=url)
+    metrics = state.cache_metrics
+    started = time.perf_counter()
     try:
         if state.fetcher is None or state.cache is None:
             log.warning("stale_refresh_skipped", reason="fetcher_or_cache_not_initialized")
-            return
-
-        content = await _fetch_page_content(url, state)
-        outline = parse_outline(content)
+            return 0
+
+        fetched = await _fetch_page(url, state, validators)
+        settings = state.settings.cache
+        if fetched.content is None:
+            ttl_hours = next_ttl_hours(url, settings, previous=previous_ttl_hours, changed=False)
+            await state.cache.revalidate_page(
+                url_hash,
+                ttl_hours,
+                etag=fetched.validators.etag,
+                last_modified=fetched.validators.last_modified,
+            )
+            log.info("stale_refresh_not_modified", url=url, ttl_hours=ttl_hours)
+            metrics.increment("refreshes_not_modified")
+            return 0
 
-        discovered_domains = expand_allowlist_from_content(content, state)
+        content = fetched.content
+        processed = await _page_processor(state).process(content)
+        changed = processed.content_hash != previous_hash
+        ttl_hours = next_ttl_hours(url, settings, previous=previous_ttl_hours, changed=changed)
 
         await state.cache.set_page(
             url=url,
             url_hash=url_hash,
             content=content,
-            outline=outline,
-            ttl_hours=state.settings.cache.ttl_hours,
-            discovered_domains=discovered_domains,
+            outline=processed.outline,
+            ttl_hours=ttl_hours,
+            discovered_domains=expand_allowlist(processed.discovered_domains, state),
+            line_index=processed.line_index,
+            outline_index=processed.outline_index,
+            etag=fetched.validators.etag,
+            last_modified=fetched.validators.last_modified,
+            content_hash=processed.content_hash,
         )
-        log.info("stale_refresh_complete", url=url)
+        log.info("stale_refresh_complete", url=url, changed=changed, ttl_hours=ttl_hours)
+        metrics.increment("refreshes_completed")
+        if not changed:
+            metrics.increment("refreshes_unchanged")
+        return len(content.encode("utf-8"))
     except Exception:
         log.warning("stale_refresh_failed", url=url, exc_info=True)
+        metrics.increment("refreshes_failed")
         # Update last_checked_at even on failure to prevent immediate retry
         if state.cache is not None:
             await state.cache.update_last_checked(url_hash)
+        return 0
     finally:
         state._refreshing.discard(url_hash)
+        metrics.observe("refresh", (time.perf_counter() - started) * 1000)
+
+
+async def _fetch_and_cache_once(url: str, url_hash: str, state: AppState) -> FetchResult:
+    """Coalesce concurrent cache misses for the same URL into one shared fetch.
+
+    The first caller starts the fetch as a task registered in
+    ``state._inflight``; later callers await the same task. Every waiter
+    receives the same result or exception. Waiters await through
+    ``asyncio.shield`` so cancelling one caller does not cancel the fetch
+    for the others.
+    """
+    task = state._inflight.get(url_hash)
+    if task is None:
+        # The task inherits this call's phase timer, so the fetch's phases
+        # are reported by the call that started it.
+        task = asyncio.create_task(_fetch_and_cache(url, url_hash, state))
+        state._inflight[url_hash] = task
+        task.add_done_callback(lambda done: _finish_inflight(url_hash, done, state))
+        return await asyncio.shield(task)
+    log.debug("fetch_coalesced", url=url)
+    with phase("coalesced_wait"):
+        return await asyncio.shield(task)
+
+
+def _finish_inflight(url_hash: str, task: asyncio.Task[FetchResult], state: AppState) -> None:
+    """Unregister a completed in-flight fetch."""
+    if state._inflight.get(url_hash) is task:
+        del state._inflight[url_hash]
+    # Mark the exception as retrieved: if every waiter was cancelled, nobody
+    # else observes it and asyncio would log "exception was never retrieved".
+    if not task.cancelled():
+        task.exception()
 
 
 async def _fetch_and_cache(url: str, url_hash: str, state: AppState) -> FetchResult:
@@ -188,36 +532,52 @@ async def _fetch_and_cache(url: str, url_hash: str, state: AppState) -> FetchRes
     if state.cache is None:
         raise RuntimeError("Cache must be initialized before fetching pages")
 
-    content = await _fetch_page_content(url, state)
-    outline = parse_outline(content)
+    with state.cache_metrics.timed("fetch"):
+        try:
+            fetched = await _fetch_page(url, state)
+        except ProContextError as exc:
+            await _remember_failure(url, url_hash, exc, state)
+            raise
+        content = fetched.content or ""  # unconditional fetches always carry content
+        # Reports its own parse_outline, index and allowlist_expansion phases.
+        processed = await _page_processor(state).process(content)
 
-    log.info("fetch_complete", url=url, content_length=len(content))
+        log.info("fetch_complete", url=url, content_length=len(content))
 
-    discovered_domains = expand_allowlist_from_content(content, state)
+        discovered_domains = expand_allowlist(processed.discovered_domains, state)
 
-    await state.cache.set_page(
-        url=url,
-        url_hash=url_hash,
-        content=content,
-        outline=outline,
-        ttl_hours=state.settings.cache.ttl_hours,
-        discovered_domains=discovered_domains,
-    )
+        with phase("cache_write"):
+            await state.cache.set_page(
+                url=url,
+                url_hash=url_hash,
+                content=content,
+                outline=processed.outline,
+                ttl_hours=base_ttl_hours(url, state.settings.cache),
+                discovered_domains=discovered_domains,
+                line_index=processed.line_index,
+                outline_index=processed.outline_index,
+                etag=fetched.validators.etag,
+                last_modified=fetched.validators.last_modified,
+                content_hash=processed.content_hash,
+            )
 
     return FetchResult(
         url=url,
-        content=content,
-        outline=outline,
-        content_hash=_content_hash(content),
+        text=InlineText(content=content, line_index=processed.line_index),
+        outline=processed.outline,
+        outline_index=processed.outline_index,
+        content_hash=_short_hash(processed.content_hash),
         cached=False,
         cached_at=None,
         stale=False,
     )
 
 
-async def _fetch_page_content(url: str, state: AppState) -> str:
-    """Fetch page content for the requested URL."""
+async def _fetch_page(
+    url: str, state: AppState, validators: CacheValidators | None = None
+) -> ConditionalFetch:
+    """Fetch the requested URL, conditionally when *validators* are given."""
     if state.fetcher is None:
         raise RuntimeError("Fetcher must be initialized before fetching pages")
     log.info("cache_miss_fetching", url=url)
-    return await state.fetcher.fetch(url, state.allowlist)
+    return await state.fetcher.fetch_conditional(url, state.allowlist, validators)
@@ -0,0 +1,116 @@
+"""Line-addressed access to a page's content, whether loaded or chunked.
+
+``FetchResult.text`` is one of two readers with the same interface:
+
+- ``InlineText`` wraps content already in memory (cache misses, and pages
+  small enough to be stored inline) and slices it with the page's
+  ``LineIndex``.
+- ``ChunkedText`` stands in for a page stored as line-range chunks
+  (``cache/chunks.py``). ``window`` loads only the chunks that overlap the
+  requested lines and ``iter_lines`` streams the page a few chunks at a time,
+  so a 20 MB page is never held as one string.
+
+Both number lines like ``str.splitlines()``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from procontext.cache.chunks import chunk_span
+from procontext.errors import ErrorCode, ProContextError
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from procontext.lines import LineIndex
+    from procontext.protocols import CacheProtocol
+
+# Chunks fetched per query while streaming a chunked page.
+_STREAM_CHUNKS = 4
+
+
+@dataclass(frozen=True)
+class InlineText:
+    """Page content held in memory."""
+
+    content: str
+    line_index: LineIndex
+
+    @property
+    def total_lines(self) -> int:
+        return self.line_index.total_lines
+
+    async def window(self, start: int, end: int) -> str:
+        """Return lines *start*..*end* (1-based, inclusive) joined with ``"\\n"``."""
+        return self.line_index.window(self.content, start, end)
+
+    async def iter_lines(self, start: int = 1) -> AsyncIterator[tuple[int, list[str]]]:
+        """Yield ``(first line number, lines)`` runs from line *start* to the end."""
+        if start <= self.total_lines:
+            yield max(start, 1), self.line_index.suffix(self.content, start).splitlines()
+
+    async def read(self) -> str:
+        """Return the whole content."""
+        return self.content
+
+
+@dataclass(frozen=True)
+class ChunkedText:
+    """Page content stored in ``page_chunks``, read on demand through the cache."""
+
+    cache: CacheProtocol
+    url_hash: str
+    content_hash: str
+    chunk_lines: int
+    total_lines: int
+
+    async def window(self, start: int, end: int) -> str:
+        """Return lines *start*..*end* (1-based, inclusive) joined with ``"\\n"``."""
+        start = max(start, 1)
+        end = min(end, self.total_lines)
+        if start > end:
+            return ""
+        first, last = chunk_span(start, end, self.chunk_lines)
+        lines = "".join(await self._chunks(first, last)).splitlines()
+        base = first * self.chunk_lines + 1
+        return "\n".join(lines[start - base : end - base + 1])
+
+    async def iter_lines(self, start: int = 1) -> AsyncIterator[tuple[int, list[str]]]:
+        """Yield ``(first line number, lines)`` runs from line *start*, a few chunks at a time."""
+        if start > self.total_lines:
+            return
+        first, final = chunk_span(start, self.total_lines, self.chunk_lines)
+        while first <= final:
+            last = min(first + _STREAM_CHUNKS - 1, final)
+            yield (
+                first * self.chunk_lines + 1,
+                "".join(await self._chunks(first, last)).splitlines(),
+            )
+            first = last + 1
+
+    async def read(self) -> str:
+        """Return the whole content, loading every chunk."""
+        if self.total_lines == 0:
+            return ""
+        _, last = chunk_span(1, self.total_lines, self.chunk_lines)
+        return "".join(await self._chunks(0, last))
+
+    async def _chunks(self, first: int, last: int) -> list[str]:
+        chunks = await self.cache.get_chunks(
+            self.url_hash, first, last, content_hash=self.content_hash
+        )
+        if chunks is None:
+            # The page was refreshed or evicted between the lookup and this
+            # read, or the read failed; the caller's next attempt starts over.
+            raise ProContextError(
+                code=ErrorCode.PAGE_FETCH_FAILED,
+                message="The cached page changed while it was being read",
+                suggestion="Retry the request; if content_hash changed, restart from offset=1.",
+                recoverable=True,
+            )
+        return chunks
+
+
+PageText = InlineText | ChunkedText
@@ -0,0 +1,60 @@
+"""Per-page cache TTLs: domain overrides and adaptation to change frequency.
+
+A page starts with the TTL of its domain (``cache.domain_ttl_hours``, falling
+back to ``cache.ttl_hours``). With ``cache.adaptive_ttl`` enabled, every
+background refresh then doubles the page's TTL when the content came back
+unchanged and halves it when the content changed, within
+``cache.min_ttl_hours`` and ``cache.max_ttl_hours``. A frozen API reference
+settles at the maximum; a page that changes on most refreshes settles at the
+minimum.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    from procontext.config import CacheSettings
+
+_GROWTH_FACTOR = 2.0
+
+
+def base_ttl_hours(url: str, settings: CacheSettings) -> float:
+    """Return the starting TTL for *url*.
+
+    A ``domain_ttl_hours`` key matches its host and every subdomain of it;
+    the most specific matching key wins.
+    """
+    if settings.domain_ttl_hours:
+        host = (urlparse(url).hostname or "").rstrip(".")
+        while host:
+            hours = settings.domain_ttl_hours.get(host)
+            if hours is not None:
+                return float(hours)
+            _, _, host = host.partition(".")
+    return float(settings.ttl_hours)
+
+
+def next_ttl_hours(
+    url: str,
+    settings: CacheSettings,
+    *,
+    previous: float | None,
+    changed: bool,
+) -> float:
+    """Return the TTL to store after a refresh of *url*.
+
+    *previous* is the TTL the page was stored with (``None`` for rows written
+    before TTLs were recorded) and *changed* whether the refresh returned
+    different content. The bounds widen to include the page's base TTL, so
+    a domain override outside them is never pulled toward the default.
+    """
+    base = base_ttl_hours(url, settings)
+    if not settings.adaptive_ttl:
+        return base
+    current = previous if previous is not None else base
+    adapted = current / _GROWTH_FACTOR if changed else current * _GROWTH_FACTOR
+    low = min(float(settings.min_ttl_hours), base)
+    high = max(float(settings.max_ttl_hours), base)
+    return min(max(adapted, low), high)
@@ -11,7 +11,13 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Protocol
 
 if TYPE_CHECKING:
-    from procontext.models.cache import PageCacheEntry
+    from datetime import datetime
+
+    from procontext.errors import ErrorCode
+    from procontext.fetch.models import CacheValidators, ConditionalFetch
+    from procontext.lines import LineIndex
+    from procontext.models.cache import NegativeCacheEntry, PageCacheEntry, PageMetadata
+    from procontext.outline import OutlineIndex
 
 
 class CacheProtocol(Protocol):
@@ -19,27 +25,77 @@ class CacheProtocol(Protocol):
 
     async def get_page(self, url_hash: str) -> PageCacheEntry | None: ...
 
+    async def get_page_metadata(self, url_hash: str) -> PageMetadata | None: ...
+
+    async def get_chunks(
+        self, url_hash: str, first: int, last: int, *, content_hash: str
+    ) -> list[str] | None: ...
+
     async def set_page(
         self,
         url: str,
         url_hash: str,
         content: str,
         outline: str,
-        ttl_hours: int,
+        ttl_hours: float,
         *,
         discovered_domains: frozenset[str] = frozenset(),
+        line_index: LineIndex | None = None,
+        outline_index: OutlineIndex | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        content_hash: str | None = None,
     ) -> None: ...
 
+    async def revalidate_page(
+        self,
+        url_hash: str,
+        ttl_hours: float,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None: ...
+
+    async def get_negative(self, url_hash: str) -> NegativeCacheEntry | None: ...
+
+    async def set_negative(
+        self,
+        url_hash: str,
+        *,
+        code: ErrorCode,
+        message: str,
+        suggestion: str,
+        ttl_minutes: int,
+    ) -> None: ...
+
+    async def get_refresh_candidates(
+        self,
+        *,
+        expires_before: datetime,
+        accessed_since: datetime,
+        checked_before: datetime,
+        limit: int,
+    ) -> list[PageMetadata]: ...
+
     async def load_discovered_domains(self) -> frozenset[str]: ...
 
     async def update_last_checked(self, url_hash: str) -> None: ...
 
-    async def cleanup_if_due(self, interval_hours: int) -> None: ...
+    async def cleanup_if_due(self, interval_hours: int) -> bool: ...
 
     async def cleanup_expired(self) -> None: ...
 
+    async def run_maintenance(self) -> None: ...
+
 
 class FetcherProtocol(Protocol):
     """Interface for the HTTP documentation fetcher."""
 
     async def fetch(self, url: str, allowlist: frozenset[str]) -> str: ...
+
+    async def fetch_conditional(
+        self,
+        url: str,
+        allowlist: frozenset[str],
+        validators: CacheValidators | None = None,
+    ) -> ConditionalFetch: ...
@@ -1,4 +1,4 @@
-"""Background scheduler coroutines for registry updates and cache cleanup."""
+"""Background scheduler coroutines for registry updates, cache cleanup and refresh-ahead."""
 
 from __future__ import annotations
 
@@ -8,6 +8,7 @@ from typing import TYPE_CHECKING
 import anyio
 import structlog
 
+from procontext.page.service import queue_refresh_ahead
 from procontext.registry import (
     REGISTRY_INITIAL_BACKOFF_SECONDS,
     REGISTRY_MAX_BACKOFF_SECONDS,
@@ -21,26 +22,72 @@ if TYPE_CHECKING:
 
 log = structlog.get_logger()
 
+# How often the refresh-ahead scheduler looks for pages about to expire, and
+# how often while its refreshes are in flight, so freed slots are refilled.
+_REFRESH_AHEAD_INTERVAL_SECONDS = 60.0
+_REFRESH_AHEAD_BUSY_INTERVAL_SECONDS = 5.0
+
 
 def _jittered_delay(base_seconds: int) -> float:
     return base_seconds * random.uniform(0.8, 1.2)
 
 
+async def _cleanup_cache_if_due(state: AppState) -> None:
+    """Run a cleanup pass if one is due, followed by the maintenance passes."""
+    if state.cache is None:
+        return
+    if await state.cache.cleanup_if_due(state.settings.cache.cleanup_interval_hours):
+        await state.cache.run_maintenance()
+
+
 async def run_cache_startup_cleanup(state: AppState) -> None:
     """stdio mode: run a single cache cleanup pass at startup if one is due."""
-    if state.cache is not None:
-        await state.cache.cleanup_if_due(state.settings.cache.cleanup_interval_hours)
+    await _cleanup_cache_if_due(state)
 
 
 async def run_cache_cleanup_scheduler(state: AppState) -> None:
-    """HTTP mode: run cache cleanup at startup then on a recurring interval."""
+    """HTTP mode: run cache cleanup at startup then on a recurring interval.
+
+    Each cleanup is followed by ``Cache.run_maintenance`` (incremental vacuum,
+    ``PRAGMA optimize``, then the WAL checkpoint).
+    """
     interval_hours = state.settings.cache.cleanup_interval_hours
-    if state.cache is not None:
-        await state.cache.cleanup_if_due(interval_hours)
+    await _cleanup_cache_if_due(state)
     while True:
         await anyio.sleep(interval_hours * 3600)
-        if state.cache is not None:
-            await state.cache.cleanup_if_due(interval_hours)
+        await _cleanup_cache_if_due(state)
+
+
+async def run_refresh_ahead_scheduler(state: AppState) -> None:
+    """HTTP mode: refresh recently read pages shortly before they expire.
+
+    Every minute, queues background refreshes for pages expiring within
+    ``cache.refresh_ahead_minutes`` that were read in the last
+    ``cache.refresh_ahead_accessed_hours``, keeping at most
+    ``cache.refresh_ahead_concurrency`` of them queued or running at once.
+    While any are in flight it checks every few seconds, so a slot freed by
+    a finished refresh is refilled promptly.
+    Returns immediately when ``cache.refresh_ahead_minutes`` is ``0``.
+    """
+    settings = state.settings.cache
+    if settings.refresh_ahead_minutes <= 0:
+        return
+    in_flight: set[str] = set()
+    while True:
+        # A refresh leaves ``_refreshing`` when it finishes, successful or not.
+        in_flight &= state._refreshing
+        slots = settings.refresh_ahead_concurrency - len(in_flight)
+        queued: list[str] = []
+        try:
+            queued = await queue_refresh_ahead(state, limit=slots)
+        except Exception:
+            log.warning("refresh_ahead_scheduler_error", exc_info=True)
+        in_flight.update(queued)
+        if queued:
+            log.info("refresh_ahead_queued", pages=len(queued), in_flight=len(in_flight))
+        await anyio.sleep(
+            _REFRESH_AHEAD_BUSY_INTERVAL_SECONDS if in_flight else _REFRESH_AHEAD_INTERVAL_SECONDS
+        )
 
 
 async def run_registry_startup_check(state: AppState) -> None:
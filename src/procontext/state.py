@@ -9,13 +9,19 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
+from procontext.cache.metrics import CacheMetrics
+
 if TYPE_CHECKING:
+    import asyncio
     from pathlib import Path
 
     import httpx
 
     from procontext.config import Settings
     from procontext.models.registry import RegistryIndexes
+    from procontext.page.processing import PageProcessor
+    from procontext.page.refresh import RefreshQueue
+    from procontext.page.service import FetchResult
     from procontext.protocols import CacheProtocol, FetcherProtocol
 
 
@@ -36,4 +42,8 @@ class AppState:
     fetcher: FetcherProtocol | None = None
     allowlist: frozenset[str] = field(default_factory=frozenset)
     md_probe_base_urls: frozenset[str] = field(default_factory=frozenset)
+    cache_metrics: CacheMetrics = field(default_factory=CacheMetrics)
+    refresh_queue: RefreshQueue | None = None
+    page_processor: PageProcessor | None = None
     _refreshing: set[str] = field(default_factory=set)
+    _inflight: dict[str, asyncio.Task[FetchResult]] = field(default_factory=dict)
@@ -0,0 +1,132 @@
+"""Per-call phase timing for tool calls.
+
+With ``logging.tool_timing`` set to ``log`` or ``response``, each tool
+handler runs inside ``tool_timing``, which installs a ``PhaseTimer`` in a
+context variable. Code along the request path wraps its phases in
+``phase("cache_read")`` and similar; the durations add up per phase name, so
+a phase entered twice (an SSRF check per redirect hop, say) reports its total.
+When the call ends, one ``tool_timing`` log event records the call's total
+and every phase in milliseconds, and in ``response`` mode the same figures
+are added to the tool response as ``timing``.
+
+With ``tool_timing`` off (the default) no timer is installed and ``phase``
+is a context-variable lookup and nothing else. Tasks started during a call
+inherit its timer, so a cache miss fetched in its own task still reports to
+the caller that started it; long-lived background work (the refresh queue's
+workers) runs in a fresh context instead.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Literal
+
+import structlog
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+log = structlog.get_logger()
+
+ToolTimingMode = Literal["off", "log", "response"]
+
+_current: ContextVar[PhaseTimer | None] = ContextVar("procontext_phase_timer", default=None)
+
+
+class PhaseTimer:
+    """Accumulated phase durations of one tool call."""
+
+    def __init__(self, *, include_in_response: bool = False) -> None:
+        self.phases: dict[str, float] = {}
+        self.include_in_response = include_in_response
+        self._started = time.perf_counter()
+        self._total_ms: float | None = None
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + duration_ms
+
+    @property
+    def total_ms(self) -> float:
+        """Time since the call started, frozen once it has finished."""
+        if self._total_ms is not None:
+            return self._total_ms
+        return (time.perf_counter() - self._started) * 1000
+
+    def finish(self) -> None:
+        self._total_ms = (time.perf_counter() - self._started) * 1000
+
+    def summary(self) -> dict[str, float]:
+        """Return every phase and the ``total``, in milliseconds rounded to 0.01."""
+        summary = {name: round(duration, 2) for name, duration in self.phases.items()}
+        summary["total"] = round(self.total_ms, 2)
+        return summary
+
+    def attach(self, output: dict[str, Any]) -> dict[str, Any]:
+        """Add the summary to a tool's output dict as ``timing`` in ``response`` mode."""
+        if self.include_in_response:
+            output["timing"] = self.summary()
+        return output
+
+
+class _NoTimer:
+    """Stand-in yielded by ``tool_timing`` when timing is off."""
+
+    def attach(self, output: dict[str, Any]) -> dict[str, Any]:
+        return output
+
+
+_NO_TIMER = _NoTimer()
+
+
+@contextmanager
+def tool_timing(tool: str, mode: ToolTimingMode, **fields: Any) -> Iterator[PhaseTimer | _NoTimer]:
+    """Time one call of *tool* and log a ``tool_timing`` event when it ends.
+
+    *fields* (the URL or query) are added to the log event. The event is
+    logged whether the call succeeds or raises.
+    """
+    if mode == "off":
+        yield _NO_TIMER
+        return
+    timer = PhaseTimer(include_in_response=mode == "response")
+    token = _current.set(timer)
+    ok = False
+    try:
+        yield timer
+        ok = True
+    finally:
+        _current.reset(token)
+        timer.finish()
+        log.info(
+            "tool_timing",
+            tool=tool,
+            ok=ok,
+            total_ms=round(timer.total_ms, 2),
+            phases={name: round(duration, 2) for name, duration in timer.phases.items()},
+            **fields,
+        )
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to phase *name* of the current call, if timed."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, (time.perf_counter() - started) * 1000)
+
+
+def record(phases: dict[str, float]) -> None:
+    """Add phase durations measured elsewhere (in a worker) to the current call, if timed."""
+    timer = _current.get()
+    if timer is None:
+        return
+    for name, duration_ms in phases.items():
+        timer.add(name, duration_ms)
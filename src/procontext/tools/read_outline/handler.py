@@ -1,7 +1,7 @@
 """Tool handler for read_outline.
 
-Validates input, delegates fetching to the shared helper, strips empty fences,
-filters outline entries by entry count from offset, and returns the formatted result.
+Validates input, delegates fetching to the shared helper, locates *offset* in
+the page's outline index by bisection, and formats only the returned window.
 """
 
 from __future__ import annotations
@@ -12,8 +12,9 @@ import structlog
 
 from procontext.errors import ErrorCode, ProContextError
 from procontext.models.tools import ReadOutlineInput, ReadOutlineOutput
-from procontext.outline import format_outline, parse_outline_entries, strip_empty_fences
+from procontext.outline import format_outline
 from procontext.page import fetch_or_cached_page
+from procontext.timing import phase, tool_timing
 
 if TYPE_CHECKING:
     from procontext.state import AppState
@@ -28,6 +29,12 @@ async def handle(
     before: int = 0,
 ) -> dict:
     """Handle a read_outline tool call."""
+    with tool_timing("read_outline", state.settings.logging.tool_timing, url=url) as timing:
+        output = await _handle(url, offset, limit, state, before=before)
+    return timing.attach(output)
+
+
+async def _handle(url: str, offset: int, limit: int, state: AppState, *, before: int) -> dict:
     log = structlog.get_logger().bind(tool="read_outline", url=url)
     log.info("handler_called")
 
@@ -46,24 +53,21 @@ async def handle(
 
     result = await fetch_or_cached_page(validated.url, state)
 
-    entries = parse_outline_entries(result.outline)
-    entries = strip_empty_fences(entries)
-    total_entries = len(entries)
-
-    forward = [e for e in entries if e.line_number >= validated.offset]
-    limited = forward[: validated.limit]
-
-    backward = [e for e in entries if e.line_number < validated.offset]
-    before_entries = backward[-validated.before :] if validated.before > 0 else []
+    index = result.outline_index
+    total_entries = len(index)
 
-    page = before_entries + limited
+    with phase("outline_window"):
+        start = index.position(validated.offset)
+        stop = start + validated.limit
+        page = index.entries(result.outline, max(start - validated.before, 0), stop)
+        outline = format_outline(page)
 
-    has_more = len(forward) > validated.limit
-    next_offset = forward[validated.limit].line_number if has_more else None
+    has_more = total_entries > stop
+    next_offset = index.line_numbers[stop] if has_more else None
 
     output = ReadOutlineOutput(
         url=result.url,
-        outline=format_outline(page),
+        outline=outline,
         total_entries=total_entries,
         has_more=has_more,
         next_offset=next_offset,
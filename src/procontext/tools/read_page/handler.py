@@ -12,16 +12,13 @@ import structlog
 
 from procontext.errors import ErrorCode, ProContextError
 from procontext.models.tools import OutlineSummary, ReadPageInput, ReadPageOutput
-from procontext.outline import (
-    build_compaction_note,
-    compact_outline,
-    format_outline,
-    parse_outline_entries,
-    strip_empty_fences,
-)
+from procontext.outline import build_compaction_note, compact_outline, format_outline
 from procontext.page import fetch_or_cached_page
+from procontext.timing import phase, tool_timing
 
 if TYPE_CHECKING:
+    from procontext.outline import OutlineEntry
+    from procontext.page.text import PageText
     from procontext.state import AppState
 
 
@@ -35,6 +32,22 @@ async def handle(
     include_outline: bool = True,
 ) -> dict:
     """Handle a read_page tool call."""
+    with tool_timing("read_page", state.settings.logging.tool_timing, url=url) as timing:
+        output = await _handle(
+            url, offset, limit, state, before=before, include_outline=include_outline
+        )
+    return timing.attach(output)
+
+
+async def _handle(
+    url: str,
+    offset: int,
+    limit: int,
+    state: AppState,
+    *,
+    before: int,
+    include_outline: bool,
+) -> dict:
     log = structlog.get_logger().bind(tool="read_page", url=url)
     log.info("handler_called")
 
@@ -60,16 +73,17 @@ async def handle(
     result = await fetch_or_cached_page(validated.url, state)
     outline_summary: OutlineSummary | None = None
     if validated.include_outline:
-        text, total_entries = _compact_page_outline(
-            result.outline,
-            max_entries=state.settings.outline.max_entries,
-            max_chars=state.settings.outline.read_page_max_chars,
-        )
+        with phase("outline_compaction"):
+            text, total_entries = _compact_page_outline(
+                result.outline_index.entries(result.outline),
+                max_entries=state.settings.outline.max_entries,
+                max_chars=state.settings.outline.read_page_max_chars,
+            )
         outline_summary = OutlineSummary(text=text, total_entries=total_entries)
 
-    return _build_output(
+    return await _build_output(
         url=result.url,
-        content=result.content,
+        text=result.text,
         outline=outline_summary,
         offset=validated.offset,
         limit=validated.limit,
@@ -79,15 +93,13 @@ async def handle(
 
 
 def _compact_page_outline(
-    raw_outline: str, *, max_entries: int = 50, max_chars: int = 4000
+    entries: list[OutlineEntry], *, max_entries: int = 50, max_chars: int = 4000
 ) -> tuple[str, int]:
-    """Parse, strip empty fences, and compact an outline for read_page output.
+    """Compact fence-stripped outline entries for read_page output.
 
     Returns:
         A ``(text, total_entries)`` tuple.
     """
-    entries = parse_outline_entries(raw_outline)
-    entries = strip_empty_fences(entries)
     total_entries = len(entries)
 
     if total_entries <= max_entries and len(format_outline(entries)) <= max_chars:
@@ -103,25 +115,28 @@ def _compact_page_outline(
     return note + "\n" + format_outline(compacted), total_entries
 
 
-def _build_output(
+async def _build_output(
     *,
     url: str,
-    content: str,
+    text: PageText,
     outline: OutlineSummary | None,
     offset: int,
     limit: int,
     before: int,
     content_hash: str,
 ) -> dict:
-    """Apply line windowing and build the output dict."""
-    all_lines = content.splitlines()
-    total_lines = len(all_lines)
+    """Apply line windowing and build the output dict.
+
+    Only the requested window is read from *text*: sliced out with the page's
+    precomputed line index, or loaded from the chunks it overlaps.
+    """
+    total_lines = text.total_lines
 
     start = max(1, offset - before)
     end = min(total_lines, offset + limit - 1)
 
-    windowed = all_lines[start - 1 : end]
-    windowed_content = "\n".join(windowed)
+    with phase("window"):
+        windowed_content = await text.window(start, end)
 
     has_more = end < total_lines
     next_offset = end + 1 if has_more else None
@@ -14,6 +14,7 @@ import structlog
 from procontext.errors import ErrorCode, ProContextError
 from procontext.models.tools import ResolveHint, ResolveLibraryInput, ResolveLibraryOutput
 from procontext.normalization import is_unsupported_resolve_query
+from procontext.timing import phase, tool_timing
 from procontext.tools.resolve_library.resolver import resolve_library
 
 if TYPE_CHECKING:
@@ -28,6 +29,12 @@ async def handle(
     language: str | None = None,
 ) -> dict:
     """Handle a resolve_library tool call."""
+    with tool_timing("resolve_library", state.settings.logging.tool_timing, query=query) as timing:
+        output = await _handle(query, state, language=language)
+    return timing.attach(output)
+
+
+async def _handle(query: str, state: AppState, *, language: str | None) -> dict:
     log = structlog.get_logger().bind(tool="resolve_library", query=query)
     log.info("handler_called")
 
@@ -43,12 +50,13 @@ async def handle(
             recoverable=False,
         ) from exc
 
-    matches = resolve_library(
-        validated.query,
-        state.indexes,
-        fuzzy_score_cutoff=state.settings.resolver.fuzzy_score_cutoff,
-        fuzzy_max_results=state.settings.resolver.fuzzy_max_results,
-    )
+    with phase("resolve"):
+        matches = resolve_library(
+            validated.query,
+            state.indexes,
+            fuzzy_score_cutoff=state.settings.resolver.fuzzy_score_cutoff,
+            fuzzy_max_results=state.settings.resolver.fuzzy_max_results,
+        )
 
     if validated.language:
         matches = _sort_by_language(matches, validated.language)
@@ -13,22 +13,19 @@ import structlog
 
 from procontext.errors import ErrorCode, ProContextError
 from procontext.models.tools import OutlineSummary, SearchPageInput, SearchPageOutput
-from procontext.outline import (
-    build_compaction_note,
-    format_outline,
-    parse_outline_entries,
-    strip_empty_fences,
-)
+from procontext.outline import build_compaction_note, format_outline
 from procontext.page import fetch_or_cached_page
+from procontext.timing import phase, tool_timing
 from procontext.tools.search_page.outline_context import select_search_outline_entries
 from procontext.tools.search_page.search import (
     LineMatch,
+    LineScanner,
     SearchResult,
     build_matcher,
-    search_lines,
 )
 
 if TYPE_CHECKING:
+    from procontext.outline import OutlineEntry
     from procontext.state import AppState
 
 
@@ -45,6 +42,35 @@ async def handle(
     max_results: int = 20,
 ) -> dict:
     """Handle a search_page tool call."""
+    with tool_timing(
+        "search_page", state.settings.logging.tool_timing, url=url, query=query
+    ) as timing:
+        output = await _handle(
+            url,
+            query,
+            state,
+            target=target,
+            mode=mode,
+            case_mode=case_mode,
+            whole_word=whole_word,
+            offset=offset,
+            max_results=max_results,
+        )
+    return timing.attach(output)
+
+
+async def _handle(
+    url: str,
+    query: str,
+    state: AppState,
+    *,
+    target: str,
+    mode: str,
+    case_mode: str,
+    whole_word: bool,
+    offset: int,
+    max_results: int,
+) -> dict:
     log = structlog.get_logger().bind(tool="search_page", url=url, query=query)
     log.info("handler_called")
 
@@ -86,35 +112,40 @@ async def handle(
             recoverable=False,
         ) from exc
 
-    total_lines = len(result.content.splitlines())
-    if validated.target == "outline":
-        search_result = _search_outline_lines(
-            result.outline,
-            matcher,
-            offset=validated.offset,
-            max_results=validated.max_results,
-        )
-        raw_matches = search_result.matches
-        matches_str = "\n".join(f"{m.line_number}:{m.content}" for m in raw_matches)
-    else:
-        search_result = search_lines(
-            result.content,
-            matcher,
-            offset=validated.offset,
-            max_results=validated.max_results,
-        )
-        raw_matches = search_result.matches
-        matches_str = "\n".join(f"{m.line_number}:{m.content}" for m in raw_matches)
+    total_lines = result.text.total_lines
+    with phase("search"):
+        if validated.target == "outline":
+            search_result = _search_outline_lines(
+                result.outline,
+                matcher,
+                offset=validated.offset,
+                max_results=validated.max_results,
+            )
+            raw_matches = search_result.matches
+            matches_str = "\n".join(f"{m.line_number}:{m.content}" for m in raw_matches)
+        else:
+            # Streamed run by run, so a chunked page is read only as far as the
+            # matches reach.
+            scanner = LineScanner(
+                matcher, offset=validated.offset, max_results=validated.max_results
+            )
+            async for run_start, lines in result.text.iter_lines(validated.offset):
+                if scanner.feed(run_start, lines):
+                    break
+            search_result = scanner.result()
+            raw_matches = search_result.matches
+            matches_str = "\n".join(f"{m.line_number}:{m.content}" for m in raw_matches)
 
     first_line = raw_matches[0].line_number if raw_matches else None
     last_line = raw_matches[-1].line_number if raw_matches else None
-    text, total_entries = _compact_search_outline(
-        result.outline,
-        first_line,
-        last_line,
-        max_entries=state.settings.outline.max_entries,
-        max_chars=state.settings.outline.search_page_max_chars,
-    )
+    with phase("outline_context"):
+        text, total_entries = _compact_search_outline(
+            result.outline_index.entries(result.outline),
+            first_line,
+            last_line,
+            max_entries=state.settings.outline.max_entries,
+            max_chars=state.settings.outline.search_page_max_chars,
+        )
     outline_summary = OutlineSummary(text=text, total_entries=total_entries)
 
     output = SearchPageOutput(
@@ -180,7 +211,7 @@ def _outline_line_matches(raw_line: str, *, matcher: re.Pattern[str], offset: in
 
 
 def _compact_search_outline(
-    raw_outline: str,
+    entries: list[OutlineEntry],
     first_line: int | None,
     last_line: int | None,
     *,
@@ -192,8 +223,6 @@ def _compact_search_outline(
     Returns:
         A ``(text, total_entries)`` tuple.
     """
-    entries = parse_outline_entries(raw_outline)
-    entries = strip_empty_fences(entries)
     total_entries = len(entries)
     selection = select_search_outline_entries(
         entries,
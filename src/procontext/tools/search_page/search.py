@@ -1,14 +1,18 @@
 """In-memory line search for documentation pages.
 
 Pure functions — no I/O, no AppState, no cache. Content is passed in as a
-string, split into lines, and scanned with ``re.search()``.
+string (or, through ``LineScanner``, as successive runs of lines), split into
+lines, and scanned with ``re.search()``.
 """
 
 from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from procontext.lines import LineIndex
 
 
 @dataclass(frozen=True)
@@ -48,38 +52,63 @@ def build_matcher(
     return re.compile(pattern, flags)
 
 
+class LineScanner:
+    """Incremental line search for content that arrives in pieces.
+
+    Feed consecutive runs of lines in order; ``feed`` returns ``True`` once
+    the result is decided (a match beyond *max_results* was seen), after
+    which the remaining content need not be read. ``search_lines`` is the
+    single-string form.
+    """
+
+    def __init__(self, matcher: re.Pattern[str], *, offset: int = 1, max_results: int = 20) -> None:
+        self._matcher = matcher
+        self._offset = offset
+        self._max_results = max_results
+        self._matches: list[LineMatch] = []
+        self._has_more = False
+
+    def feed(self, first_line: int, lines: list[str]) -> bool:
+        """Scan *lines*, numbered from *first_line*; return whether the result is decided."""
+        if self._has_more:
+            return True
+        search = self._matcher.search
+        skip = max(0, self._offset - first_line)
+        for idx, line in enumerate(lines[skip:], start=first_line + skip):
+            if search(line):
+                if len(self._matches) == self._max_results:
+                    self._has_more = True
+                    return True
+                self._matches.append(LineMatch(line_number=idx, content=line))
+        return False
+
+    def result(self) -> SearchResult:
+        if self._has_more:
+            return SearchResult(
+                matches=self._matches,
+                has_more=True,
+                next_offset=self._matches[-1].line_number + 1,
+            )
+        return SearchResult(matches=self._matches, has_more=False, next_offset=None)
+
+
 def search_lines(
     content: str,
     matcher: re.Pattern[str],
     *,
     offset: int = 1,
     max_results: int = 20,
+    line_index: LineIndex | None = None,
 ) -> SearchResult:
-    """Scan *content* line-by-line and return matching lines."""
-    lines = content.splitlines()
-    matches: list[LineMatch] = []
-
-    for idx, line in enumerate(lines, start=1):
-        if idx < offset:
-            continue
-        if matcher.search(line):
-            matches.append(LineMatch(line_number=idx, content=line))
-            if len(matches) == max_results:
-                for remaining_idx in range(idx + 1, len(lines) + 1):
-                    if matcher.search(lines[remaining_idx - 1]):
-                        return SearchResult(
-                            matches=matches,
-                            has_more=True,
-                            next_offset=idx + 1,
-                        )
-                return SearchResult(
-                    matches=matches,
-                    has_more=False,
-                    next_offset=None,
-                )
-
-    return SearchResult(
-        matches=matches,
-        has_more=False,
-        next_offset=None,
-    )
+    """Scan *content* line-by-line and return matching lines.
+
+    When *line_index* is given, lines before *offset* are skipped without
+    being split out of *content*.
+    """
+    first_line = 1
+    if line_index is not None and offset > 1:
+        content = line_index.suffix(content, offset)
+        first_line = offset
+    scanner = LineScanner(matcher, offset=offset, max_results=max_results)
+    scanner.feed(first_line, content.splitlines())
+    return scanner.result()
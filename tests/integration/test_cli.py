@@ -57,6 +57,11 @@ class TestHelpOutput:
         result = _run_cli(["db", "--help"], subprocess_env)
         assert result.returncode == 0
 
+    def test_cache_warm_requires_a_selection(self, subprocess_env: dict[str, str]) -> None:
+        result = _run_cli(["cache", "warm"], subprocess_env)
+        assert result.returncode == 2
+        assert "exactly one" in result.stderr
+
 
 class TestDoctorCommand:
     """End-to-end doctor command tests."""
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import sqlite3
@@ -11,6 +12,11 @@ from contextlib import closing
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
 
+import aiosqlite
+
+from procontext.cache import Cache
+from procontext.errors import ErrorCode
+
 if TYPE_CHECKING:
     from pathlib import Path
 
@@ -301,6 +307,24 @@ def test_resolve_library_wire_unsupported_input_hint(subprocess_env: dict[str, s
     }
 
 
+def _seed_negative_cache(tmp_path: Path, *, url: str, message: str) -> None:
+    url_hash = hashlib.sha256(url.encode()).hexdigest()
+
+    async def _seed() -> None:
+        async with aiosqlite.connect(tmp_path / "cache.db") as db:
+            cache = Cache(db)
+            await cache.init_db()
+            await cache.set_negative(
+                url_hash,
+                code=ErrorCode.PAGE_NOT_FOUND,
+                message=message,
+                suggestion="Check the URL.",
+                ttl_minutes=60,
+            )
+
+    asyncio.run(_seed())
+
+
 def test_read_page_wire_success_from_cache(tmp_path: Path, subprocess_env: dict[str, str]) -> None:
     url = "https://python.langchain.com/docs/concepts/cached.md"
     content = "# Title\n\n## Section\nLine A\nLine B"
@@ -561,6 +585,45 @@ def test_read_page_wire_error_envelope(subprocess_env: dict[str, str]) -> None:
     assert "URL_NOT_ALLOWED" in text
 
 
+def test_read_page_wire_replays_negative_cache_from_previous_session(
+    tmp_path: Path, subprocess_env: dict[str, str]
+) -> None:
+    # The server must load the persisted negative-cache filter at startup, so a
+    # failure recorded by an earlier session is replayed without a fetch.
+    url = "https://python.langchain.com/docs/concepts/gone.md"
+    _seed_negative_cache(tmp_path, url=url, message="Recorded by an earlier session")
+
+    responses = _run_mcp_exchange(
+        subprocess_env,
+        [
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2025-11-25",
+                    "capabilities": {},
+                    "clientInfo": {"name": "pytest", "version": "0"},
+                },
+            },
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            {
+                "jsonrpc": "2.0",
+                "id": 2,
+                "method": "tools/call",
+                "params": {"name": "read_page", "arguments": {"url": url}},
+            },
+        ],
+    )
+
+    tool_response = next(response for response in responses if response.get("id") == 2)
+    assert tool_response["result"]["isError"] is True
+
+    text = tool_response["result"]["content"][0]["text"]
+    assert "PAGE_NOT_FOUND" in text
+    assert "Recorded by an earlier session" in text
+
+
 def test_server_exits_cleanly_when_registry_missing(tmp_path: Path) -> None:
     """Server must exit with code 1 and a clean error message when the registry is
     absent. Before the fix, sys.exit(1) inside the async lifespan was wrapped in
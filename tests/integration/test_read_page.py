@@ -19,8 +19,11 @@ from tests.integration.tool_test_support import (
     SAMPLE_URL,
     SETEXT_PAGE,
     SETEXT_URL,
+    build_chunked_page,
     expire_cached_page,
+    hashed_url,
     update_cached_page_content,
+    use_chunked_cache,
 )
 
 if TYPE_CHECKING:
@@ -43,6 +46,20 @@ class TestReadPageHandler:
         assert result["outline"]["total_entries"] > 0
         assert "# Streaming" in result["content"]
 
+    @respx.mock
+    async def test_chunked_cache_hit_reads_window(self, app_state: AppState) -> None:
+        page = build_chunked_page()
+        use_chunked_cache(app_state)
+        respx.get(SAMPLE_URL).mock(return_value=httpx.Response(200, text=page))
+
+        miss = await read_page_handle(SAMPLE_URL, 995, 10, app_state)
+        hit = await read_page_handle(SAMPLE_URL, 995, 10, app_state)
+
+        assert respx.calls.call_count == 1
+        assert hit == miss
+        assert hit["total_lines"] == 2500
+        assert hit["content"] == "\n".join(page.splitlines()[994:1004])
+
     @respx.mock
     async def test_extensionless_url_is_fetched_as_is(self, app_state: AppState) -> None:
         url = "https://python.langchain.com/docs/concepts/streaming"
@@ -93,6 +110,58 @@ class TestReadPageHandler:
 
         assert result["content"] == html
 
+    @respx.mock
+    async def test_response_timing_breaks_down_miss_and_hit(self, app_state: AppState) -> None:
+        url = "https://python.langchain.com/docs/concepts/html-page"
+        respx.get(url).mock(
+            return_value=httpx.Response(
+                200,
+                text="<html><body><h1>Title</h1></body></html>",
+                headers={"content-type": "text/html; charset=utf-8"},
+            )
+        )
+        app_state.settings.logging.tool_timing = "response"
+
+        miss = await read_page_handle(url, 1, 500, app_state)
+        hit = await read_page_handle(url, 1, 500, app_state)
+
+        assert set(miss["timing"]) == {
+            "ssrf_check",
+            "cache_read",
+            "negative_cache_read",
+            "network",
+            "decode",
+            "process_markitdown",
+            "parse_outline",
+            "index",
+            "allowlist_expansion",
+            "cache_write",
+            "outline_compaction",
+            "window",
+            "total",
+        }
+        assert set(hit["timing"]) == {
+            "ssrf_check",
+            "cache_read",
+            "outline_compaction",
+            "window",
+            "total",
+        }
+        assert hit["timing"]["total"] >= hit["timing"]["cache_read"]
+        assert hit["content"] == miss["content"] == "# Title"
+
+    @respx.mock
+    async def test_timing_is_omitted_unless_requested(self, app_state: AppState) -> None:
+        respx.get(SAMPLE_URL).mock(return_value=httpx.Response(200, text=SAMPLE_PAGE))
+
+        app_state.settings.logging.tool_timing = "log"
+        logged = await read_page_handle(SAMPLE_URL, 1, 500, app_state)
+        app_state.settings.logging.tool_timing = "off"
+        off = await read_page_handle(SAMPLE_URL, 1, 500, app_state)
+
+        assert "timing" not in logged
+        assert logged == off
+
     @respx.mock
     async def test_cache_hit_returns_cached(self, app_state: AppState) -> None:
         respx.get(SAMPLE_URL).mock(return_value=httpx.Response(200, text=SAMPLE_PAGE))
@@ -172,6 +241,33 @@ class TestReadPageHandler:
                     break
                 await anyio.sleep(0)
 
+    @respx.mock
+    async def test_stale_refresh_revalidates_with_etag(self, app_state: AppState) -> None:
+        """A 304 from the origin extends the cached page without re-downloading it."""
+        route = respx.get(SAMPLE_URL).mock(
+            return_value=httpx.Response(200, text=SAMPLE_PAGE, headers={"etag": '"v1"'})
+        )
+
+        await read_page_handle(SAMPLE_URL, 1, 500, app_state)
+        await expire_cached_page(app_state)
+
+        route.mock(return_value=httpx.Response(304, headers={"etag": '"v1"'}))
+        stale = await read_page_handle(SAMPLE_URL, 1, 500, app_state)
+
+        with anyio.fail_after(5):
+            while hashed_url() in app_state._refreshing:
+                await anyio.sleep(0)
+
+        assert route.calls.last.request.headers["if-none-match"] == '"v1"'
+        assert app_state.cache is not None
+        entry = await app_state.cache.get_page(hashed_url())
+        assert entry is not None
+        assert entry.stale is False
+        assert entry.etag == '"v1"'
+        refreshed = await read_page_handle(SAMPLE_URL, 1, 500, app_state)
+        assert refreshed["content"] == stale["content"]
+        assert app_state.cache_metrics.counters["refreshes_not_modified"] == 1
+
     @respx.mock
     async def test_content_hash_present_and_stable(self, app_state: AppState) -> None:
         """content_hash is a 12-char hex string, consistent across calls."""
@@ -229,7 +325,7 @@ class TestReadPageHandler:
         respx.get(SAMPLE_URL).mock(return_value=httpx.Response(200, text=SAMPLE_PAGE))
 
         await read_page_handle(SAMPLE_URL, 1, 500, app_state)
-        await expire_cached_page(app_state, last_checked_at=datetime.now(UTC).isoformat())
+        await expire_cached_page(app_state, last_checked_at=datetime.now(UTC))
 
         result = await read_page_handle(SAMPLE_URL, 1, 500, app_state)
         assert "# Streaming" in result["content"]
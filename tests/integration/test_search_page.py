@@ -16,10 +16,12 @@ from tests.integration.tool_test_support import (
     SAMPLE_URL,
     SETEXT_PAGE,
     SETEXT_URL,
+    build_chunked_page,
     build_compactable_page_no_match,
     build_dense_match_page,
     build_large_page_no_match,
     build_large_setext_page,
+    use_chunked_cache,
 )
 
 if TYPE_CHECKING:
@@ -58,6 +60,21 @@ class TestSearchPageHandler:
         assert result["matches"] != ""
         assert respx.calls.call_count == 1
 
+    @respx.mock
+    async def test_search_streams_chunked_cache_hit(self, app_state: AppState) -> None:
+        use_chunked_cache(app_state)
+        respx.get(SAMPLE_URL).mock(return_value=httpx.Response(200, text=build_chunked_page()))
+        await read_page_handle(SAMPLE_URL, 1, 10, app_state)
+
+        result = await search_page_handle(
+            SAMPLE_URL, "needle", app_state, offset=600, max_results=2
+        )
+
+        assert respx.calls.call_count == 1
+        assert result["matches"] == "1000:needle 1000\n1500:needle 1500"
+        assert result["has_more"] is True
+        assert result["next_offset"] == 1501
+
     async def test_invalid_target_raises_invalid_input(self, app_state: AppState) -> None:
         with pytest.raises(ProContextError) as exc_info:
             await search_page_handle(SAMPLE_URL, "test", app_state, target="bad")
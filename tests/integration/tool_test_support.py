@@ -7,6 +7,7 @@ from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
 
 from procontext.cache import Cache
+from procontext.cache.schema import to_epoch_ms
 
 if TYPE_CHECKING:
     from procontext.state import AppState
@@ -112,14 +113,15 @@ async def expire_cached_page(
     app_state: AppState,
     *,
     url: str = SAMPLE_URL,
-    last_checked_at: str | None = None,
+    last_checked_at: datetime | None = None,
 ) -> None:
     """Mark a cached page stale, optionally preserving last_checked_at."""
-    stale_time = (datetime.now(UTC) - timedelta(hours=1)).isoformat()
+    stale_time = to_epoch_ms(datetime.now(UTC) - timedelta(hours=1))
+    checked_time = to_epoch_ms(last_checked_at) if last_checked_at is not None else None
     assert isinstance(app_state.cache, Cache)
     await app_state.cache._db.execute(  # pyright: ignore[reportPrivateUsage]
         "UPDATE page_cache SET expires_at = ?, last_checked_at = ? WHERE url = ?",
-        (stale_time, last_checked_at, url),
+        (stale_time, checked_time, url),
     )
     await app_state.cache._db.commit()  # pyright: ignore[reportPrivateUsage]
 
@@ -135,10 +137,30 @@ async def update_cached_page_content(
     *,
     url: str = SAMPLE_URL,
 ) -> None:
-    """Overwrite cached content for a page."""
+    """Overwrite cached content for a page, dropping its stored index and figures."""
     assert isinstance(app_state.cache, Cache)
     await app_state.cache._db.execute(  # pyright: ignore[reportPrivateUsage]
-        "UPDATE page_cache SET content = ? WHERE url = ?",
+        "UPDATE page_cache SET content = ?, line_index = NULL, content_hash = NULL, "
+        "line_count = NULL, char_count = NULL, token_estimate = NULL, chunk_lines = NULL "
+        "WHERE url = ?",
         (content, url),
     )
     await app_state.cache._db.commit()  # pyright: ignore[reportPrivateUsage]
+
+
+def use_chunked_cache(app_state: AppState, chunk_threshold_chars: int = 1) -> None:
+    """Store pages of at least *chunk_threshold_chars* characters as line-range chunks."""
+    assert isinstance(app_state.cache, Cache)
+    app_state.cache = Cache(
+        app_state.cache._db,  # pyright: ignore[reportPrivateUsage]
+        chunk_threshold_chars=chunk_threshold_chars,
+    )
+
+
+def build_chunked_page(lines: int = 2500) -> str:
+    """Build a page spanning several chunks, with a needle every 500 lines."""
+    body = [
+        f"needle {number}" if number % 500 == 0 else f"line {number}"
+        for number in range(2, lines + 1)
+    ]
+    return "\n".join(["# Large", *body])
@@ -2,13 +2,36 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+from contextlib import suppress
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING
 
 import aiosqlite
+import pytest
+
+from procontext.cache import Cache
+from procontext.cache.chunks import CHUNK_LINES
+from procontext.cache.schema import to_epoch_ms
+from procontext.content_stats import hash_content
+from procontext.errors import ErrorCode
+from procontext.lines import LineIndex
+from procontext.outline import OutlineIndex
 
 if TYPE_CHECKING:
-    from procontext.cache import Cache
+    from collections.abc import AsyncGenerator
+    from pathlib import Path
+
+
+def _h(name: str) -> str:
+    """Return a valid hex ``url_hash`` for a readable test name."""
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+def _key(name: str) -> bytes:
+    """Return the stored ``page_cache`` key for a readable test name."""
+    return bytes.fromhex(_h(name))
 
 
 # ---------------------------------------------------------------------------
@@ -20,53 +43,53 @@ class TestPageCache:
     async def test_set_and_get_fresh(self, cache: Cache) -> None:
         await cache.set_page(
             url="https://example.com/docs/page1",
-            url_hash="abc123",
+            url_hash=_h("abc123"),
             content="# Page 1",
             outline="1:# Page 1",
             ttl_hours=24,
         )
-        entry = await cache.get_page("abc123")
+        entry = await cache.get_page(_h("abc123"))
         assert entry is not None
         assert entry.url == "https://example.com/docs/page1"
-        assert entry.url_hash == "abc123"
+        assert entry.url_hash == _h("abc123")
         assert entry.content == "# Page 1"
         assert entry.outline == "1:# Page 1"
         assert entry.stale is False
 
     async def test_get_nonexistent_returns_none(self, cache: Cache) -> None:
-        entry = await cache.get_page("nonexistent-hash")
+        entry = await cache.get_page(_h("nonexistent-hash"))
         assert entry is None
 
     async def test_corrupted_fetched_at_returns_none(self, cache: Cache) -> None:
-        """A non-ISO timestamp in fetched_at raises ValueError — must be caught, not crash."""
-        future = (datetime.now(UTC) + timedelta(hours=24)).isoformat()
+        """A non-integer timestamp in fetched_at must be caught, not crash."""
+        future = to_epoch_ms(datetime.now(UTC) + timedelta(hours=24))
         await cache._db.execute(
             "INSERT INTO page_cache "
             "(url_hash, url, content, outline, discovered_domains, fetched_at, expires_at) "
             "VALUES (?, ?, ?, ?, ?, ?, ?)",
-            ("bad-hash", "https://example.com/page", "Content", "", "", "not-a-date", future),
+            (_key("bad-hash"), "https://example.com/page", "Content", "", "", "not-a-date", future),
         )
         await cache._db.commit()
 
-        entry = await cache.get_page("bad-hash")
+        entry = await cache.get_page(_h("bad-hash"))
         assert entry is None
 
     async def test_expired_entry_returns_stale(self, cache: Cache) -> None:
         await cache.set_page(
             url="https://example.com/docs/old",
-            url_hash="old-hash",
+            url_hash=_h("old-hash"),
             content="Old content",
             outline="",
             ttl_hours=0,
         )
-        past = (datetime.now(UTC) - timedelta(hours=1)).isoformat()
+        past = to_epoch_ms(datetime.now(UTC) - timedelta(hours=1))
         await cache._db.execute(
             "UPDATE page_cache SET expires_at = ? WHERE url_hash = ?",
-            (past, "old-hash"),
+            (past, _key("old-hash")),
         )
         await cache._db.commit()
 
-        entry = await cache.get_page("old-hash")
+        entry = await cache.get_page(_h("old-hash"))
         assert entry is not None
         assert entry.stale is True
 
@@ -74,44 +97,44 @@ class TestPageCache:
         domains = frozenset({"foo.com", "bar.io"})
         await cache.set_page(
             url="https://example.com/docs/page1",
-            url_hash="h1",
+            url_hash=_h("h1"),
             content="# Page",
             outline="1:# Page",
             ttl_hours=24,
             discovered_domains=domains,
         )
-        entry = await cache.get_page("h1")
+        entry = await cache.get_page(_h("h1"))
         assert entry is not None
         assert entry.discovered_domains == domains
 
     async def test_discovered_domains_defaults_empty(self, cache: Cache) -> None:
         await cache.set_page(
             url="https://example.com/docs/page2",
-            url_hash="h2",
+            url_hash=_h("h2"),
             content="# Page",
             outline="",
             ttl_hours=24,
         )
-        entry = await cache.get_page("h2")
+        entry = await cache.get_page(_h("h2"))
         assert entry is not None
         assert entry.discovered_domains == frozenset()
 
     async def test_upsert_overwrites(self, cache: Cache) -> None:
         await cache.set_page(
             url="https://example.com/docs/page",
-            url_hash="h1",
+            url_hash=_h("h1"),
             content="Version 1",
             outline="",
             ttl_hours=24,
         )
         await cache.set_page(
             url="https://example.com/docs/page",
-            url_hash="h1",
+            url_hash=_h("h1"),
             content="Version 2",
             outline="",
             ttl_hours=24,
         )
-        entry = await cache.get_page("h1")
+        entry = await cache.get_page(_h("h1"))
         assert entry is not None
         assert entry.content == "Version 2"
 
@@ -123,7 +146,7 @@ class TestPageCache:
             raise aiosqlite.OperationalError("disk I/O error")
 
         cache._db.execute = failing_execute  # type: ignore[assignment]
-        entry = await cache.get_page("some-hash")
+        entry = await cache.get_page(_h("some-hash"))
         assert entry is None
         cache._db.execute = original_execute  # type: ignore[assignment]
 
@@ -137,13 +160,846 @@ class TestPageCache:
         cache._db.execute = failing_execute  # type: ignore[assignment]
         await cache.set_page(
             url="https://example.com/page",
-            url_hash="h1",
+            url_hash=_h("h1"),
             content="Content",
             outline="",
             ttl_hours=24,
         )
         cache._db.execute = original_execute  # type: ignore[assignment]
 
+    async def test_ttl_is_stored_with_page(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="",
+            ttl_hours=1.5,
+        )
+
+        entry = await Cache(cache._db).get_page(_h("h1"))
+        assert entry is not None
+        assert entry.ttl_hours == 1.5
+        assert entry.expires_at - entry.fetched_at == timedelta(hours=1.5)
+
+    async def test_jitter_spreads_expiry_within_bounds(self) -> None:
+        async with aiosqlite.connect(":memory:") as db:
+            cache = Cache(db, ttl_jitter=0.25)
+            await cache.init_db()
+            lifetimes: set[timedelta] = set()
+            for index in range(20):
+                await cache.set_page(
+                    url=f"https://example.com/{index}",
+                    url_hash=_h(f"p{index}"),
+                    content="# Page",
+                    outline="",
+                    ttl_hours=24,
+                )
+                entry = await cache.get_page(_h(f"p{index}"))
+                assert entry is not None and entry.ttl_hours == 24
+                lifetimes.add(entry.expires_at - entry.fetched_at)
+
+        assert len(lifetimes) > 1
+        assert all(timedelta(hours=18) <= life <= timedelta(hours=30) for life in lifetimes)
+
+
+# ---------------------------------------------------------------------------
+# Page metadata
+# ---------------------------------------------------------------------------
+
+_PAGE = "# Title\n\nSome text.\nMore text."
+
+
+class TestPageMetadata:
+    async def test_figures_are_stored_at_write_time(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content=_PAGE,
+            outline="",
+            ttl_hours=24,
+        )
+
+        cursor = await cache._db.execute(
+            "SELECT content_hash, line_count, char_count, token_estimate FROM page_cache"
+        )
+        assert await cursor.fetchone() == (hash_content(_PAGE), 4, 30, 8)
+        entry = await cache.get_page(_h("h1"))
+        assert entry is not None and entry.content_hash == hash_content(_PAGE)
+
+    async def test_metadata_is_read_without_content(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content=_PAGE,
+            outline="",
+            ttl_hours=24,
+        )
+        # Undecodable content proves the figures come from their own columns.
+        await cache._db.execute("UPDATE page_cache SET content = 'corrupt', codec = 'unknown'")
+        await cache._db.commit()
+
+        metadata = await cache.get_page_metadata(_h("h1"))
+
+        assert metadata is not None
+        assert metadata.url == "https://example.com/page"
+        assert (metadata.line_count, metadata.char_count, metadata.token_estimate) == (4, 30, 8)
+        assert metadata.content_hash == hash_content(_PAGE)
+        assert metadata.ttl_hours == 24 and metadata.stale is False
+        assert await cache.get_page_metadata(_h("missing")) is None
+
+    async def test_supplied_content_hash_is_stored(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content=_PAGE,
+            outline="",
+            ttl_hours=24,
+            content_hash="precomputed",
+        )
+
+        metadata = await cache.get_page_metadata(_h("h1"))
+        assert metadata is not None and metadata.content_hash == "precomputed"
+
+    async def test_rows_without_figures_fall_back_to_content(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content=_PAGE,
+            outline="",
+            ttl_hours=24,
+        )
+        await cache._db.execute(
+            "UPDATE page_cache SET content_hash = NULL, line_count = NULL, "
+            "char_count = NULL, token_estimate = NULL"
+        )
+        await cache._db.commit()
+
+        metadata = await cache.get_page_metadata(_h("h1"))
+        entry = await cache.get_page(_h("h1"))
+
+        assert metadata is not None and metadata.content_hash == hash_content(_PAGE)
+        assert metadata.line_count == 4
+        assert entry is not None and entry.content_hash == hash_content(_PAGE)
+
+    async def test_pending_and_memory_entries_skip_sqlite(
+        self, write_behind_cache: Cache, tiered_cache: Cache
+    ) -> None:
+        for cache in (write_behind_cache, tiered_cache):
+            await cache.set_page(
+                url="https://example.com/page",
+                url_hash=_h("h1"),
+                content=_PAGE,
+                outline="",
+                ttl_hours=24,
+            )
+
+            async def failing_execute(*args, **kwargs):
+                raise aiosqlite.OperationalError("disk I/O error")
+
+            original_execute = cache._db.execute
+            cache._db.execute = failing_execute  # type: ignore[assignment]
+            metadata = await cache.get_page_metadata(_h("h1"))
+            cache._db.execute = original_execute  # type: ignore[assignment]
+
+            assert metadata is not None and metadata.char_count == 30
+
+
+# ---------------------------------------------------------------------------
+# Refresh-ahead candidates
+# ---------------------------------------------------------------------------
+
+
+class TestRefreshCandidates:
+    async def _seed(self, cache: Cache, name: str, ttl_hours: float, *, read: bool) -> None:
+        await cache.set_page(
+            url=f"https://example.com/{name}",
+            url_hash=_h(name),
+            content=_PAGE,
+            outline="",
+            ttl_hours=ttl_hours,
+            etag=f'"{name}"',
+        )
+        await cache.flush_writes()
+        # Backdate the write so a read is later and the page is out of cooldown.
+        await cache._db.execute(
+            "UPDATE page_cache SET fetched_at = fetched_at - 3600000, "
+            "last_accessed_at = last_accessed_at - 3600000, "
+            "last_checked_at = last_checked_at - 3600000 WHERE url_hash = ?",
+            (_key(name),),
+        )
+        await cache._db.commit()
+        if read:
+            await cache.get_page(_h(name))
+
+    async def _candidates(self, cache: Cache, limit: int = 10) -> list[str]:
+        now = datetime.now(UTC)
+        pages = await cache.get_refresh_candidates(
+            expires_before=now + timedelta(minutes=30),
+            accessed_since=now - timedelta(hours=1),
+            checked_before=now - timedelta(minutes=15),
+            limit=limit,
+        )
+        return [page.url.rsplit("/", 1)[1] for page in pages]
+
+    async def test_selects_read_pages_about_to_expire(self, cache: Cache) -> None:
+        await self._seed(cache, "soon", 0.2, read=True)
+        await self._seed(cache, "sooner", 0.1, read=True)
+        await self._seed(cache, "unread", 0.1, read=False)
+        await self._seed(cache, "later", 24, read=True)
+        await self._seed(cache, "checked", 0.1, read=True)
+        await cache.update_last_checked(_h("checked"))
+        await self._seed(cache, "expired", 0.1, read=True)
+        await cache._db.execute(
+            "UPDATE page_cache SET expires_at = 0 WHERE url_hash = ?", (_key("expired"),)
+        )
+        await cache._db.commit()
+
+        assert await self._candidates(cache) == ["sooner", "soon"]
+        assert await self._candidates(cache, limit=1) == ["sooner"]
+
+    async def test_candidates_carry_validators(self, cache: Cache) -> None:
+        await self._seed(cache, "soon", 0.1, read=True)
+
+        now = datetime.now(UTC)
+        (page,) = await cache.get_refresh_candidates(
+            expires_before=now + timedelta(minutes=30),
+            accessed_since=now - timedelta(hours=1),
+            checked_before=now - timedelta(minutes=15),
+            limit=10,
+        )
+        assert page.etag == '"soon"'
+        assert page.content_hash == hash_content(_PAGE)
+        assert page.ttl_hours == pytest.approx(0.1)
+
+    async def test_pending_check_keeps_page_in_cooldown(self, write_behind_cache: Cache) -> None:
+        await self._seed(write_behind_cache, "soon", 0.1, read=True)
+        await write_behind_cache.update_last_checked(_h("soon"))
+
+        assert await self._candidates(write_behind_cache) == []
+
+
+# ---------------------------------------------------------------------------
+# Conditional revalidation
+# ---------------------------------------------------------------------------
+
+
+class TestRevalidatePage:
+    async def test_set_page_stores_validators(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="",
+            ttl_hours=24,
+            etag='"v1"',
+            last_modified="Wed, 01 Jan 2026 00:00:00 GMT",
+        )
+        entry = await cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.etag == '"v1"'
+        assert entry.last_modified == "Wed, 01 Jan 2026 00:00:00 GMT"
+
+    async def test_revalidate_extends_expiry_and_keeps_content(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="1:# Page",
+            ttl_hours=0,
+            etag='"v1"',
+            last_modified="Wed, 01 Jan 2026 00:00:00 GMT",
+        )
+        past = to_epoch_ms(datetime.now(UTC) - timedelta(hours=1))
+        await cache._db.execute(
+            "UPDATE page_cache SET expires_at = ? WHERE url_hash = ?", (past, _key("h1"))
+        )
+        await cache._db.commit()
+        stale = await cache.get_page(_h("h1"))
+        assert stale is not None and stale.stale
+
+        await cache.revalidate_page(_h("h1"), 48, etag='"v2"')
+
+        entry = await cache.get_page(_h("h1"))
+        assert entry is not None
+        assert not entry.stale
+        assert entry.ttl_hours == 48
+        assert entry.content == "# Page"
+        assert entry.fetched_at == stale.fetched_at
+        assert entry.etag == '"v2"'
+        assert entry.last_modified == "Wed, 01 Jan 2026 00:00:00 GMT"
+
+    async def test_revalidate_updates_pending_write(self, write_behind_cache: Cache) -> None:
+        await write_behind_cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="",
+            ttl_hours=0,
+        )
+
+        await write_behind_cache.revalidate_page(_h("h1"), 24, etag='"v1"')
+        await write_behind_cache.flush_writes()
+
+        entry = await Cache(write_behind_cache._db).get_page(_h("h1"))
+        assert entry is not None
+        assert not entry.stale
+        assert entry.etag == '"v1"'
+
+    async def test_revalidate_supersedes_pending_check(self, write_behind_cache: Cache) -> None:
+        await write_behind_cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="",
+            ttl_hours=0,
+        )
+        await write_behind_cache.flush_writes()
+        await write_behind_cache.update_last_checked(_h("h1"))
+        await asyncio.sleep(0.01)
+        before = datetime.now(UTC)
+
+        await write_behind_cache.revalidate_page(_h("h1"), 24)
+        await write_behind_cache.flush_writes()
+
+        entry = await Cache(write_behind_cache._db).get_page(_h("h1"))
+        assert entry is not None
+        assert entry.last_checked_at is not None
+        assert entry.last_checked_at >= before.replace(
+            microsecond=before.microsecond // 1000 * 1000
+        )
+
+
+# ---------------------------------------------------------------------------
+# Write-behind
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+async def write_behind_cache() -> AsyncGenerator[Cache, None]:
+    """In-memory SQLite cache with write-behind enabled (no flusher running)."""
+    async with aiosqlite.connect(":memory:") as db:
+        c = Cache(db, write_flush_interval_ms=50, write_flush_max_pending=3)
+        await c.init_db()
+        yield c
+
+
+async def _row_count(cache: Cache) -> int:
+    cursor = await cache._db.execute("SELECT COUNT(*) FROM page_cache")
+    row = await cursor.fetchone()
+    assert row is not None
+    return row[0]
+
+
+class TestWriteBehind:
+    async def test_set_page_visible_before_flush(self, write_behind_cache: Cache) -> None:
+        await write_behind_cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="1:# Page",
+            ttl_hours=24,
+        )
+
+        assert await _row_count(write_behind_cache) == 0
+        entry = await write_behind_cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.content == "# Page"
+
+        stats = write_behind_cache.write_queue_stats
+        assert stats is not None
+        assert stats.depth == 1
+
+    async def test_flush_records_queue_depth_in_metrics(self, write_behind_cache: Cache) -> None:
+        for i in range(3):
+            await write_behind_cache.set_page(
+                url=f"https://example.com/docs/{i}",
+                url_hash=_h(f"h{i}"),
+                content=f"# Page {i}",
+                outline="",
+                ttl_hours=24,
+            )
+
+        await write_behind_cache.flush_writes()
+
+        gauges = write_behind_cache.metrics.gauges
+        assert (gauges["write_queue_depth"], gauges["write_queue_max_depth"]) == (0, 3)
+        stats = write_behind_cache.write_queue_stats
+        assert stats is not None
+        assert stats.max_depth == 3
+
+    async def test_flush_persists_batch_in_one_commit(self, write_behind_cache: Cache) -> None:
+        for i in range(3):
+            await write_behind_cache.set_page(
+                url=f"https://example.com/docs/{i}",
+                url_hash=_h(f"h{i}"),
+                content=f"# Page {i}",
+                outline="",
+                ttl_hours=24,
+            )
+
+        commits = 0
+        original_commit = write_behind_cache._db.commit
+
+        async def counting_commit() -> None:
+            nonlocal commits
+            commits += 1
+            await original_commit()
+
+        write_behind_cache._db.commit = counting_commit  # type: ignore[assignment]
+        await write_behind_cache.flush_writes()
+        write_behind_cache._db.commit = original_commit  # type: ignore[assignment]
+
+        assert commits == 1
+        assert await _row_count(write_behind_cache) == 3
+        stats = write_behind_cache.write_queue_stats
+        assert stats is not None
+        assert stats.depth == 0
+        assert stats.flushes == 1
+        assert stats.rows_flushed == 3
+
+    async def test_repeat_writes_coalesce(self, write_behind_cache: Cache) -> None:
+        for version in ("Version 1", "Version 2"):
+            await write_behind_cache.set_page(
+                url="https://example.com/docs/page",
+                url_hash=_h("h1"),
+                content=version,
+                outline="",
+                ttl_hours=24,
+            )
+        await write_behind_cache.flush_writes()
+
+        stats = write_behind_cache.write_queue_stats
+        assert stats is not None
+        assert stats.rows_flushed == 1
+        entry = await write_behind_cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.content == "Version 2"
+
+    async def test_last_checked_update_queued(self, write_behind_cache: Cache) -> None:
+        await _insert_expired_page(write_behind_cache, "h1", days_ago=1)
+
+        await write_behind_cache.update_last_checked(_h("h1"))
+        entry = await write_behind_cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.last_checked_at is not None
+
+        await write_behind_cache.flush_writes()
+        cursor = await write_behind_cache._db.execute(
+            "SELECT last_checked_at FROM page_cache WHERE url_hash = ?", (_key("h1"),)
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+        assert row[0] is not None
+
+    async def test_flusher_drains_queue_when_full(self, write_behind_cache: Cache) -> None:
+        flusher = asyncio.create_task(write_behind_cache.run_write_flusher())
+        try:
+            for i in range(3):
+                await write_behind_cache.set_page(
+                    url=f"https://example.com/docs/{i}",
+                    url_hash=_h(f"h{i}"),
+                    content="# Page",
+                    outline="",
+                    ttl_hours=24,
+                )
+            for _ in range(100):
+                if await _row_count(write_behind_cache) == 3:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            flusher.cancel()
+            with suppress(asyncio.CancelledError):
+                await flusher
+
+        assert await _row_count(write_behind_cache) == 3
+
+    async def test_flush_failure_is_non_fatal(self, write_behind_cache: Cache) -> None:
+        await write_behind_cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="",
+            ttl_hours=24,
+        )
+
+        async def failing_executemany(*args, **kwargs):
+            raise aiosqlite.OperationalError("disk I/O error")
+
+        write_behind_cache._db.executemany = failing_executemany  # type: ignore[assignment]
+        await write_behind_cache.flush_writes()  # must not raise
+
+        stats = write_behind_cache.write_queue_stats
+        assert stats is not None
+        assert stats.failed_flushes == 1
+        assert stats.depth == 0
+
+    async def test_write_through_cache_has_no_queue(self, cache: Cache) -> None:
+        assert cache.write_queue_stats is None
+        await cache.flush_writes()
+
+
+# ---------------------------------------------------------------------------
+# In-memory hot tier
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+async def tiered_cache() -> AsyncGenerator[Cache, None]:
+    """In-memory SQLite cache with the memory hot tier enabled."""
+    async with aiosqlite.connect(":memory:") as db:
+        c = Cache(db, memory_max_bytes=1024 * 1024)
+        await c.init_db()
+        yield c
+
+
+class TestMemoryTier:
+    async def test_hit_served_without_sqlite(self, tiered_cache: Cache) -> None:
+        await tiered_cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="1:# Page",
+            ttl_hours=24,
+        )
+
+        async def failing_execute(*args, **kwargs):
+            raise aiosqlite.OperationalError("disk I/O error")
+
+        original_execute = tiered_cache._db.execute
+        tiered_cache._db.execute = failing_execute  # type: ignore[assignment]
+        entry = await tiered_cache.get_page(_h("h1"))
+        tiered_cache._db.execute = original_execute  # type: ignore[assignment]
+
+        assert entry is not None
+        assert entry.content == "# Page"
+
+    async def test_sqlite_hit_populates_memory(self, tiered_cache: Cache) -> None:
+        await _insert_expired_page(tiered_cache, "h1", days_ago=1)
+
+        first = await tiered_cache.get_page(_h("h1"))
+        await tiered_cache._db.execute("DELETE FROM page_cache")
+        await tiered_cache._db.commit()
+        second = await tiered_cache.get_page(_h("h1"))
+
+        assert first is not None
+        assert second is not None
+        assert second.stale is True
+
+    async def test_write_through_replaces_memory_copy(self, tiered_cache: Cache) -> None:
+        for version in ("Version 1", "Version 2"):
+            await tiered_cache.set_page(
+                url="https://example.com/docs/page",
+                url_hash=_h("h1"),
+                content=version,
+                outline="",
+                ttl_hours=24,
+            )
+        entry = await tiered_cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.content == "Version 2"
+
+    async def test_update_last_checked_invalidates_memory(self, tiered_cache: Cache) -> None:
+        await tiered_cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="",
+            ttl_hours=24,
+        )
+        before = await tiered_cache.get_page(_h("h1"))
+        await asyncio.sleep(0.005)  # stored timestamps have millisecond precision
+        await tiered_cache.update_last_checked(_h("h1"))
+        after = await tiered_cache.get_page(_h("h1"))
+
+        assert before is not None and after is not None
+        assert before.last_checked_at is not None and after.last_checked_at is not None
+        assert after.last_checked_at > before.last_checked_at
+
+    async def test_cleanup_clears_memory(self, tiered_cache: Cache) -> None:
+        await _insert_expired_page(tiered_cache, "old-hash")
+        assert await tiered_cache.get_page(_h("old-hash")) is not None
+        # Remove the row behind the tier's back; only clearing memory hides it.
+        await tiered_cache._db.execute("DELETE FROM page_cache")
+        await tiered_cache._db.commit()
+
+        await tiered_cache.cleanup_expired()
+
+        assert await tiered_cache.get_page(_h("old-hash")) is None
+
+    async def test_failed_write_drops_memory_copy(self, tiered_cache: Cache) -> None:
+        await tiered_cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="Version 1",
+            outline="",
+            ttl_hours=24,
+        )
+        original_execute = tiered_cache._db.execute
+
+        async def failing_execute(*args, **kwargs):
+            raise aiosqlite.OperationalError("disk I/O error")
+
+        tiered_cache._db.execute = failing_execute  # type: ignore[assignment]
+        await tiered_cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="Version 2",
+            outline="",
+            ttl_hours=24,
+        )
+        tiered_cache._db.execute = original_execute  # type: ignore[assignment]
+
+        entry = await tiered_cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.content == "Version 1"
+
+
+# ---------------------------------------------------------------------------
+# Compressed storage
+# ---------------------------------------------------------------------------
+
+
+class TestCompressedStorage:
+    async def test_zlib_rows_round_trip(self, cache: Cache) -> None:
+        compressed = Cache(cache._db, codec="zlib")
+        await compressed.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="# Page\n\nBody",
+            outline="1:# Page",
+            ttl_hours=24,
+        )
+
+        cursor = await cache._db.execute(
+            "SELECT codec, typeof(content) FROM page_cache WHERE url_hash = ?", (_key("h1"),)
+        )
+        assert await cursor.fetchone() == ("zlib", "blob")
+
+        entry = await compressed.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.content == "# Page\n\nBody"
+        assert entry.outline == "1:# Page"
+
+    async def test_rows_with_different_codecs_coexist(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/plain",
+            url_hash=_h("plain"),
+            content="Plain",
+            outline="",
+            ttl_hours=24,
+        )
+        compressed = Cache(cache._db, codec="zlib")
+        await compressed.set_page(
+            url="https://example.com/packed",
+            url_hash=_h("packed"),
+            content="Packed",
+            outline="",
+            ttl_hours=24,
+        )
+
+        for reader in (cache, compressed):
+            plain = await reader.get_page(_h("plain"))
+            packed = await reader.get_page(_h("packed"))
+            assert plain is not None and plain.content == "Plain"
+            assert packed is not None and packed.content == "Packed"
+
+    async def test_corrupt_payload_treated_as_miss(self, cache: Cache) -> None:
+        future = to_epoch_ms(datetime.now(UTC) + timedelta(hours=24))
+        await cache._db.execute(
+            "INSERT INTO page_cache "
+            "(url_hash, url, content, outline, discovered_domains, fetched_at, expires_at, codec) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (_key("bad"), "https://example.com/bad", b"garbage", b"", "", future, future, "zlib"),
+        )
+        await cache._db.commit()
+
+        assert await cache.get_page(_h("bad")) is None
+
+
+class TestLineIndexStorage:
+    async def test_line_index_persisted_with_page(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="one\ntwo\nthree",
+            outline="",
+            ttl_hours=24,
+        )
+
+        cursor = await cache._db.execute(
+            "SELECT line_index FROM page_cache WHERE url_hash = ?", (_key("h1"),)
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+        assert LineIndex.from_bytes(row[0]).total_lines == 3
+
+        entry = await cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.line_index == LineIndex.build("one\ntwo\nthree")
+
+    async def test_missing_line_index_rebuilt_on_read(self, cache: Cache) -> None:
+        await cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="one\ntwo",
+            outline="",
+            ttl_hours=24,
+        )
+        await cache._db.execute("UPDATE page_cache SET line_index = NULL")
+        await cache._db.commit()
+
+        entry = await cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.line_index is not None
+        assert entry.line_index.total_lines == 2
+
+    async def test_outline_index_persisted_with_page(self, cache: Cache) -> None:
+        outline = "1:# Title\n3:```\n4:```\n6:## Usage"
+        await cache.set_page(
+            url="https://example.com/docs/page",
+            url_hash=_h("h1"),
+            content="# Title\n\n```\n```\n\n## Usage",
+            outline=outline,
+            ttl_hours=24,
+        )
+
+        cursor = await cache._db.execute(
+            "SELECT outline_index FROM page_cache WHERE url_hash = ?", (_key("h1"),)
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+        assert len(OutlineIndex.from_bytes(row[0])) == 2
+
+        entry = await cache.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.outline_index == OutlineIndex.build(outline)
+
+
+# ---------------------------------------------------------------------------
+# Chunked storage
+# ---------------------------------------------------------------------------
+
+# Three chunks of CHUNK_LINES lines: two full ones and a partial last one.
+_LARGE = "".join(f"line {number}\n" for number in range(1, 2 * CHUNK_LINES + 501))
+
+
+async def _chunk_count(cache: Cache) -> int:
+    cursor = await cache._db.execute("SELECT COUNT(*) FROM page_chunks")
+    row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+class TestChunkedStorage:
+    async def test_large_page_stored_as_chunks(self, cache: Cache) -> None:
+        chunked = Cache(cache._db, codec="zlib", chunk_threshold_chars=1000)
+        await chunked.set_page(
+            url="https://example.com/llms-full.txt",
+            url_hash=_h("h1"),
+            content=_LARGE,
+            outline="",
+            ttl_hours=24,
+        )
+
+        cursor = await cache._db.execute(
+            "SELECT length(content), line_index, chunk_lines, line_count FROM page_cache"
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+        assert row[1] is None and row[2] == CHUNK_LINES and row[3] == 2 * CHUNK_LINES + 500
+        assert await _chunk_count(cache) == 3
+
+        entry = await chunked.get_page(_h("h1"))
+        assert entry is not None
+        assert entry.content == "" and entry.line_index is None
+        assert entry.chunk_lines == CHUNK_LINES and entry.line_count == 2 * CHUNK_LINES + 500
+        assert entry.content_hash == hash_content(_LARGE)
+
+        chunks = await chunked.get_chunks(_h("h1"), 0, 2, content_hash=hash_content(_LARGE))
+        assert chunks is not None and "".join(chunks) == _LARGE
+        middle = await chunked.get_chunks(_h("h1"), 1, 1, content_hash=hash_content(_LARGE))
+        assert middle is not None
+        assert middle[0].startswith(f"line {CHUNK_LINES + 1}\n")
+
+    async def test_small_page_stays_inline(self, cache: Cache) -> None:
+        chunked = Cache(cache._db, chunk_threshold_chars=1000)
+        await chunked.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="",
+            ttl_hours=24,
+        )
+
+        entry = await chunked.get_page(_h("h1"))
+        assert entry is not None and entry.content == "# Page" and entry.chunk_lines is None
+        assert await _chunk_count(cache) == 0
+
+    async def test_stale_hash_or_range_returns_none(self, cache: Cache) -> None:
+        chunked = Cache(cache._db, chunk_threshold_chars=1000)
+        await chunked.set_page(
+            url="https://example.com/llms-full.txt",
+            url_hash=_h("h1"),
+            content=_LARGE,
+            outline="",
+            ttl_hours=24,
+        )
+
+        assert await chunked.get_chunks(_h("h1"), 0, 0, content_hash="old") is None
+        assert await chunked.get_chunks(_h("h1"), 2, 3, content_hash=hash_content(_LARGE)) is None
+
+    async def test_rewrite_and_delete_remove_chunks(self, cache: Cache) -> None:
+        chunked = Cache(cache._db, chunk_threshold_chars=1000)
+        await chunked.set_page(
+            url="https://example.com/llms-full.txt",
+            url_hash=_h("h1"),
+            content=_LARGE,
+            outline="",
+            ttl_hours=24,
+        )
+        await chunked.set_page(
+            url="https://example.com/llms-full.txt",
+            url_hash=_h("h1"),
+            content="# Now small",
+            outline="",
+            ttl_hours=24,
+        )
+        assert await _chunk_count(cache) == 0
+
+        await chunked.set_page(
+            url="https://example.com/llms-full.txt",
+            url_hash=_h("h1"),
+            content=_LARGE,
+            outline="",
+            ttl_hours=24,
+        )
+        await cache._db.execute("DELETE FROM page_cache")
+        await cache._db.commit()
+        assert await _chunk_count(cache) == 0
+
+    async def test_chunked_page_skips_memory_tier_and_flushes_chunks(self) -> None:
+        async with aiosqlite.connect(":memory:") as db:
+            chunked = Cache(
+                db,
+                memory_max_bytes=64 * 1024 * 1024,
+                write_flush_interval_ms=60_000,
+                chunk_threshold_chars=1000,
+            )
+            await chunked.init_db()
+            await chunked.set_page(
+                url="https://example.com/llms-full.txt",
+                url_hash=_h("h1"),
+                content=_LARGE,
+                outline="",
+                ttl_hours=24,
+            )
+            await chunked.flush_writes()
+
+            entry = await chunked.get_page(_h("h1"))
+            assert entry is not None and entry.chunk_lines == CHUNK_LINES
+            assert chunked._memory is not None and len(chunked._memory) == 0
+            chunks = await chunked.get_chunks(_h("h1"), 0, 2, content_hash=hash_content(_LARGE))
+            assert chunks is not None and "".join(chunks) == _LARGE
+
 
 # ---------------------------------------------------------------------------
 # cleanup_expired
@@ -152,13 +1008,13 @@ class TestPageCache:
 
 async def _insert_expired_page(cache: Cache, url_hash: str, days_ago: int = 8) -> None:
     """Helper: insert a page_cache entry whose expires_at is days_ago days in the past."""
-    expiry = (datetime.now(UTC) - timedelta(days=days_ago)).isoformat()
-    now = datetime.now(UTC).isoformat()
+    expiry = to_epoch_ms(datetime.now(UTC) - timedelta(days=days_ago))
+    now = to_epoch_ms(datetime.now(UTC))
     await cache._db.execute(
         "INSERT INTO page_cache "
         "(url_hash, url, content, outline, discovered_domains, fetched_at, expires_at) "
         "VALUES (?, ?, ?, ?, ?, ?, ?)",
-        (url_hash, f"https://example.com/{url_hash}", "Content", "", "", now, expiry),
+        (_key(url_hash), f"https://example.com/{url_hash}", "Content", "", "", now, expiry),
     )
     await cache._db.commit()
 
@@ -170,7 +1026,7 @@ class TestCleanupExpired:
 
         await cache.cleanup_expired()
 
-        entry = await cache.get_page("old-hash")
+        entry = await cache.get_page(_h("old-hash"))
         assert entry is None
 
     async def test_cleanup_preserves_recent_expired(self, cache: Cache) -> None:
@@ -179,9 +1035,32 @@ class TestCleanupExpired:
 
         await cache.cleanup_expired()
 
-        entry = await cache.get_page("recent-hash")
+        entry = await cache.get_page(_h("recent-hash"))
         assert entry is not None
 
+    async def test_cleanup_deletes_in_bounded_batches(
+        self, cache: Cache, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr("procontext.cache.store._CLEANUP_BATCH_SIZE", 2)
+        for index in range(5):
+            await _insert_expired_page(cache, f"old-{index}")
+        await _insert_expired_page(cache, "recent", days_ago=1)
+        statements: list[str] = []
+        original_execute = cache._db.execute
+
+        async def recording_execute(sql: str, *args, **kwargs):
+            statements.append(sql)
+            return await original_execute(sql, *args, **kwargs)
+
+        cache._db.execute = recording_execute  # type: ignore[assignment]
+        try:
+            await cache.cleanup_expired()
+        finally:
+            cache._db.execute = original_execute  # type: ignore[assignment]
+
+        assert sum(sql.startswith("DELETE FROM page_cache") for sql in statements) == 3
+        assert await _cached_hashes(cache) == {_h("recent")}
+
     async def test_cleanup_failure_does_not_raise(self, cache: Cache) -> None:
         """Simulate a database error during cleanup — should not raise."""
         original_execute = cache._db.execute
@@ -195,6 +1074,249 @@ class TestCleanupExpired:
         cache._db.execute = original_execute  # type: ignore[assignment]
 
 
+# ---------------------------------------------------------------------------
+# Size budget
+# ---------------------------------------------------------------------------
+
+
+async def _set_pages(cache: Cache, count: int, content: str = "# Page") -> None:
+    for i in range(count):
+        await cache.set_page(
+            url=f"https://example.com/docs/{i}",
+            url_hash=_h(f"h{i}"),
+            content=content,
+            outline="",
+            ttl_hours=24,
+        )
+
+
+async def _age_access(cache: Cache, days: int) -> None:
+    """Pretend every row was last accessed *days* days ago."""
+    accessed = to_epoch_ms(datetime.now(UTC) - timedelta(days=days))
+    await cache._db.execute("UPDATE page_cache SET last_accessed_at = ?", (accessed,))
+    await cache._db.commit()
+
+
+async def _cached_hashes(cache: Cache) -> set[str]:
+    cursor = await cache._db.execute("SELECT url_hash FROM page_cache")
+    return {row[0].hex() for row in await cursor.fetchall()}
+
+
+class TestSizeBudget:
+    async def test_set_page_records_stored_size(self, cache: Cache) -> None:
+        await _set_pages(cache, 1, content="é" * 10)
+
+        cursor = await cache._db.execute(
+            "SELECT size_bytes, last_accessed_at FROM page_cache WHERE url_hash = ?", (_key("h0"),)
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+        # 20 bytes of UTF-8 content plus one 4-byte line offset.
+        assert row[0] == 24
+        assert row[1] is not None
+
+    async def test_max_entries_evicts_least_recently_accessed(self, cache: Cache) -> None:
+        budgeted = Cache(cache._db, max_entries=2)
+        await _set_pages(budgeted, 4)
+        await _age_access(budgeted, days=1)
+
+        await budgeted.get_page(_h("h0"))
+        await budgeted.get_page(_h("h2"))
+        await budgeted.cleanup_expired()
+
+        assert await _cached_hashes(budgeted) == {_h("h0"), _h("h2")}
+
+    async def test_max_bytes_evicts_until_under_budget(self, cache: Cache) -> None:
+        await _set_pages(cache, 10, content="x" * 1000)
+        budgeted = Cache(cache._db, max_bytes=4500)
+
+        await budgeted.cleanup_expired()
+
+        cursor = await cache._db.execute("SELECT COUNT(*), SUM(size_bytes) FROM page_cache")
+        row = await cursor.fetchone()
+        assert row is not None
+        assert row[0] == 4
+        assert row[1] <= 4500
+
+    async def test_unbounded_cache_evicts_nothing(self, cache: Cache) -> None:
+        await _set_pages(cache, 5)
+        await cache.cleanup_expired()
+        assert len(await _cached_hashes(cache)) == 5
+
+    async def test_recently_read_expired_page_survives_cleanup(self, cache: Cache) -> None:
+        await _insert_expired_page(cache, "in-use")
+        await _insert_expired_page(cache, "abandoned")
+        await _age_access(cache, days=8)
+
+        assert await cache.get_page(_h("in-use")) is not None
+        await cache.cleanup_expired()
+
+        assert await _cached_hashes(cache) == {_h("in-use")}
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+
+class TestMaintenance:
+    async def test_new_database_uses_incremental_auto_vacuum(self, cache: Cache) -> None:
+        cursor = await cache._db.execute("PRAGMA auto_vacuum")
+        assert await cursor.fetchone() == (2,)
+
+    async def test_run_maintenance_returns_free_pages(self, tmp_path: Path) -> None:
+        async with aiosqlite.connect(str(tmp_path / "cache.db")) as db:
+            cache = Cache(db)
+            await cache.init_db()
+            await _set_pages(cache, 20, content="x" * 20_000)
+            await db.execute("DELETE FROM page_cache")
+            await db.commit()
+            cursor = await db.execute("PRAGMA freelist_count")
+            row = await cursor.fetchone()
+            assert row is not None and row[0] > 0
+
+            await cache.run_maintenance()
+
+            cursor = await db.execute("PRAGMA freelist_count")
+            assert await cursor.fetchone() == (0,)
+            assert (tmp_path / "cache.db-wal").stat().st_size == 0
+
+    async def test_run_maintenance_skips_vacuum_without_incremental_mode(
+        self, cache: Cache
+    ) -> None:
+        await cache._db.execute("PRAGMA auto_vacuum = NONE")
+        await cache._db.execute("VACUUM")
+        await _set_pages(cache, 5, content="x" * 20_000)
+        await cache._db.execute("DELETE FROM page_cache")
+        await cache._db.commit()
+
+        await cache.run_maintenance()
+
+        cursor = await cache._db.execute("PRAGMA freelist_count")
+        row = await cursor.fetchone()
+        assert row is not None and row[0] > 0
+
+    async def test_run_maintenance_failure_does_not_raise(self, cache: Cache) -> None:
+        async def failing_execute(*args, **kwargs):
+            raise aiosqlite.OperationalError("disk I/O error")
+
+        original_execute = cache._db.execute
+        cache._db.execute = failing_execute  # type: ignore[assignment]
+        try:
+            await cache.run_maintenance()
+        finally:
+            cache._db.execute = original_execute  # type: ignore[assignment]
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+
+class TestMetrics:
+    async def test_records_latency_and_bytes(self, cache: Cache) -> None:
+        await _set_pages(cache, 1, content="x" * 100)
+        cache._memory = None
+        await cache.get_page(_h("h0"))
+
+        metrics = cache.metrics
+        assert metrics.latency["set_page"].count == 1
+        assert metrics.latency["get_page"].count == 1
+        # 100 content bytes plus one 4-byte line offset, written and read back.
+        assert metrics.counters["bytes_written"] == 104
+        assert metrics.counters["bytes_read"] == 104
+
+    async def test_write_behind_bytes_counted_on_flush(self, write_behind_cache: Cache) -> None:
+        await _set_pages(write_behind_cache, 2)
+        assert write_behind_cache.metrics.counters["bytes_written"] == 0
+
+        await write_behind_cache.flush_writes()
+
+        assert write_behind_cache.metrics.counters["bytes_written"] > 0
+        assert write_behind_cache.metrics.latency["flush"].count == 1
+
+    async def test_save_and_load_snapshot(self, cache: Cache) -> None:
+        cache.metrics.increment("hits", 7)
+        await cache.save_metrics()
+
+        saved = await Cache(cache._db).load_saved_metrics()
+
+        assert saved is not None
+        metrics, saved_at = saved
+        assert metrics.counters["hits"] == 7
+        assert saved_at >= metrics.started_at
+
+    async def test_missing_or_corrupt_snapshot_loads_as_none(self, cache: Cache) -> None:
+        assert await cache.load_saved_metrics() is None
+
+        await cache._db.execute(
+            "INSERT INTO server_metadata (key, value) VALUES ('cache_metrics', '{\"counters\": 1}')"
+        )
+        await cache._db.commit()
+        assert await cache.load_saved_metrics() is None
+
+
+# ---------------------------------------------------------------------------
+# Negative cache
+# ---------------------------------------------------------------------------
+
+
+class TestNegativeCache:
+    async def _record(self, cache: Cache, name: str) -> None:
+        await cache.set_negative(
+            _h(name),
+            code=ErrorCode.PAGE_NOT_FOUND,
+            message=f"HTTP 404 fetching {name}",
+            suggestion="The page does not exist.",
+            ttl_minutes=10,
+        )
+
+    async def test_recorded_failure_is_returned(self, cache: Cache) -> None:
+        await self._record(cache, "gone")
+
+        entry = await cache.get_negative(_h("gone"))
+
+        assert entry is not None
+        assert (entry.code, entry.message) == (ErrorCode.PAGE_NOT_FOUND, "HTTP 404 fetching gone")
+        assert await cache.get_negative(_h("other")) is None
+
+    async def test_unrecorded_url_skips_the_database(self, cache: Cache) -> None:
+        await self._record(cache, "gone")
+        statements: list[str] = []
+        original_execute = cache._db.execute
+
+        async def recording_execute(sql: str, *args, **kwargs):
+            statements.append(sql)
+            return await original_execute(sql, *args, **kwargs)
+
+        cache._db.execute = recording_execute  # type: ignore[assignment]
+        try:
+            for index in range(50):
+                assert await cache.get_negative(_h(f"page-{index}")) is None
+        finally:
+            cache._db.execute = original_execute  # type: ignore[assignment]
+
+        assert len(statements) < 5  # only Bloom-filter false positives reach SQLite
+
+    async def test_expired_failure_is_ignored_and_cleaned_up(self, cache: Cache) -> None:
+        await self._record(cache, "gone")
+        await cache._db.execute("UPDATE negative_cache SET expires_at = expires_at - 3600000")
+        await cache._db.commit()
+
+        assert await cache.get_negative(_h("gone")) is None
+        await cache.cleanup_expired()
+        cursor = await cache._db.execute("SELECT COUNT(*) FROM negative_cache")
+        assert await cursor.fetchone() == (0,)
+
+    async def test_filter_is_restored_on_init(self, cache: Cache) -> None:
+        await self._record(cache, "gone")
+
+        restarted = Cache(cache._db)
+        await restarted.init_db()
+
+        assert await restarted.get_negative(_h("gone")) is not None
+
+
 # ---------------------------------------------------------------------------
 # load_discovered_domains
 # ---------------------------------------------------------------------------
@@ -204,7 +1326,7 @@ class TestLoadDiscoveredDomains:
     async def test_loads_page_domains(self, cache: Cache) -> None:
         await cache.set_page(
             url="https://example.com/page",
-            url_hash="h1",
+            url_hash=_h("h1"),
             content="# Page",
             outline="",
             ttl_hours=24,
@@ -216,7 +1338,7 @@ class TestLoadDiscoveredDomains:
     async def test_merges_domains_from_multiple_pages(self, cache: Cache) -> None:
         await cache.set_page(
             url="https://example.com/page1",
-            url_hash="h1",
+            url_hash=_h("h1"),
             content="# Page 1",
             outline="",
             ttl_hours=24,
@@ -224,7 +1346,7 @@ class TestLoadDiscoveredDomains:
         )
         await cache.set_page(
             url="https://example.com/page2",
-            url_hash="h2",
+            url_hash=_h("h2"),
             content="# Page 2",
             outline="",
             ttl_hours=24,
@@ -241,7 +1363,7 @@ class TestLoadDiscoveredDomains:
     async def test_skips_entries_with_no_domains(self, cache: Cache) -> None:
         await cache.set_page(
             url="https://example.com/page",
-            url_hash="h1",
+            url_hash=_h("h1"),
             content="# Page",
             outline="",
             ttl_hours=24,
@@ -249,6 +1371,46 @@ class TestLoadDiscoveredDomains:
         result = await cache.load_discovered_domains()
         assert result == frozenset()
 
+    async def test_rewritten_page_replaces_its_domains(self, cache: Cache) -> None:
+        for domains in ({"old.com", "kept.com"}, {"kept.com", "new.com"}):
+            await cache.set_page(
+                url="https://example.com/page",
+                url_hash=_h("h1"),
+                content="# Page",
+                outline="",
+                ttl_hours=24,
+                discovered_domains=frozenset(domains),
+            )
+        assert await cache.load_discovered_domains() == frozenset({"kept.com", "new.com"})
+
+    async def test_deleted_page_drops_its_domains(self, cache: Cache) -> None:
+        for name, domain in (("h1", "gone.com"), ("h2", "stays.com")):
+            await cache.set_page(
+                url=f"https://example.com/{name}",
+                url_hash=_h(name),
+                content="# Page",
+                outline="",
+                ttl_hours=24,
+                discovered_domains=frozenset({domain}),
+            )
+        await cache._db.execute("DELETE FROM page_cache WHERE url_hash = ?", (_key("h1"),))
+        await cache._db.commit()
+
+        assert await cache.load_discovered_domains() == frozenset({"stays.com"})
+
+    async def test_write_behind_flush_records_domains(self, write_behind_cache: Cache) -> None:
+        await write_behind_cache.set_page(
+            url="https://example.com/page",
+            url_hash=_h("h1"),
+            content="# Page",
+            outline="",
+            ttl_hours=24,
+            discovered_domains=frozenset({"queued.com"}),
+        )
+        await write_behind_cache.flush_writes()
+
+        assert await write_behind_cache.load_discovered_domains() == frozenset({"queued.com"})
+
     async def test_failure_returns_empty(self, cache: Cache) -> None:
         """Database errors during load should return empty frozenset, not raise."""
         original_execute = cache._db.execute
@@ -274,7 +1436,7 @@ class TestCleanupIfDue:
 
         await cache.cleanup_if_due(24)
 
-        entry = await cache.get_page("old-hash")
+        entry = await cache.get_page(_h("old-hash"))
         assert entry is None
         cursor = await cache._db.execute(
             "SELECT value FROM server_metadata WHERE key = 'last_cleanup_at'"
@@ -293,7 +1455,7 @@ class TestCleanupIfDue:
         await cache.cleanup_if_due(24)
 
         # Expired entry should still be there — cleanup was skipped.
-        entry = await cache.get_page("old-hash")
+        entry = await cache.get_page(_h("old-hash"))
         assert entry is not None
 
     async def test_runs_when_interval_elapsed(self, cache: Cache) -> None:
@@ -308,7 +1470,7 @@ class TestCleanupIfDue:
 
         await cache.cleanup_if_due(24)
 
-        entry = await cache.get_page("old-hash")
+        entry = await cache.get_page(_h("old-hash"))
         assert entry is None
         cursor = await cache._db.execute(
             "SELECT value FROM server_metadata WHERE key = 'last_cleanup_at'"
@@ -329,7 +1491,7 @@ class TestCleanupIfDue:
 
         # Should not raise, and should still run cleanup
         await cache.cleanup_if_due(24)
-        entry = await cache.get_page("old-hash")
+        entry = await cache.get_page(_h("old-hash"))
         assert entry is None
 
     async def test_metadata_read_error_falls_through_to_cleanup(self, cache: Cache) -> None:
@@ -350,5 +1512,5 @@ class TestCleanupIfDue:
         await cache.cleanup_if_due(24)
         cache._db.execute = original_execute  # type: ignore[assignment]
 
-        entry = await cache.get_page("old-hash")
+        entry = await cache.get_page(_h("old-hash"))
         assert entry is None
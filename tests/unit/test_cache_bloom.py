@@ -0,0 +1,29 @@
+"""Unit tests for procontext.cache.bloom."""
+
+from __future__ import annotations
+
+import hashlib
+
+from procontext.cache.bloom import BloomFilter
+
+
+def _key(index: int) -> bytes:
+    return hashlib.sha256(f"https://example.com/{index}".encode()).digest()
+
+
+class TestBloomFilter:
+    def test_added_keys_are_always_found(self) -> None:
+        bloom = BloomFilter(1000)
+        for index in range(1000):
+            bloom.add(_key(index))
+        assert all(_key(index) in bloom for index in range(1000))
+
+    def test_false_positive_rate_stays_near_target(self) -> None:
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(_key(index))
+        false_positives = sum(_key(index) in bloom for index in range(1000, 11000))
+        assert false_positives < 300  # 1% target of 10,000 probes, with slack
+
+    def test_empty_filter_contains_nothing(self) -> None:
+        assert _key(0) not in BloomFilter(10)
@@ -0,0 +1,42 @@
+"""Unit tests for procontext.cache.codec."""
+
+from __future__ import annotations
+
+import pytest
+
+from procontext.cache.codec import decode_text, encode_text, is_codec_available
+
+_TEXT = "# Title\n\nBody with unicode — ✓\n" * 200
+
+
+class TestCodecs:
+    @pytest.mark.parametrize("codec", ["none", "zlib"])
+    def test_round_trip(self, codec: str) -> None:
+        assert decode_text(encode_text(_TEXT, codec), codec) == _TEXT
+
+    def test_none_stores_text(self) -> None:
+        assert encode_text(_TEXT, "none") == _TEXT
+
+    def test_zlib_stores_smaller_bytes(self) -> None:
+        encoded = encode_text(_TEXT, "zlib")
+        assert isinstance(encoded, bytes)
+        assert len(encoded) < len(_TEXT.encode("utf-8"))
+
+    @pytest.mark.skipif(not is_codec_available("zstd"), reason="zstd binding not installed")
+    def test_zstd_round_trip(self) -> None:
+        assert decode_text(encode_text(_TEXT, "zstd"), "zstd") == _TEXT
+
+    def test_unknown_codec_rejected(self) -> None:
+        assert is_codec_available("brotli") is False
+        with pytest.raises(ValueError):
+            encode_text(_TEXT, "brotli")
+        with pytest.raises(ValueError):
+            decode_text(b"payload", "brotli")
+
+    def test_corrupt_payload_raises_value_error(self) -> None:
+        with pytest.raises(ValueError):
+            decode_text(b"not zlib data", "zlib")
+
+    def test_text_payload_for_binary_codec_raises_value_error(self) -> None:
+        with pytest.raises(ValueError):
+            decode_text("plain text", "zlib")
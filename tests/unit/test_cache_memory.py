@@ -0,0 +1,82 @@
+"""Unit tests for procontext.cache.memory."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from procontext.cache.memory import MemoryPageTier
+from procontext.models.cache import PageCacheEntry
+
+
+def _entry(url_hash: str, content: str = "# Page", *, expired: bool = False) -> PageCacheEntry:
+    now = datetime.now(UTC)
+    expires_at = now - timedelta(hours=1) if expired else now + timedelta(hours=1)
+    return PageCacheEntry(
+        url=f"https://example.com/{url_hash}",
+        url_hash=url_hash,
+        content=content,
+        outline="",
+        fetched_at=now,
+        expires_at=expires_at,
+    )
+
+
+class TestMemoryPageTier:
+    def test_get_returns_stored_entry(self) -> None:
+        tier = MemoryPageTier(1024 * 1024)
+        tier.put(_entry("h1"))
+
+        entry = tier.get("h1")
+        assert entry is not None
+        assert entry.content == "# Page"
+        assert len(tier) == 1
+
+    def test_get_missing_returns_none(self) -> None:
+        tier = MemoryPageTier(1024 * 1024)
+        assert tier.get("missing") is None
+
+    def test_stale_flag_recomputed_on_read(self) -> None:
+        tier = MemoryPageTier(1024 * 1024)
+        tier.put(_entry("h1", expired=True))
+
+        entry = tier.get("h1")
+        assert entry is not None
+        assert entry.stale is True
+
+    def test_evicts_least_recently_used_when_over_budget(self) -> None:
+        content = "x" * 1000
+        one_entry = MemoryPageTier(10**9)
+        one_entry.put(_entry("probe", content))
+        budget = one_entry.size_bytes * 2
+
+        tier = MemoryPageTier(budget)
+        tier.put(_entry("h1", content))
+        tier.put(_entry("h2", content))
+        tier.get("h1")  # h1 becomes most recently used
+        tier.put(_entry("h3", content))
+
+        assert tier.get("h1") is not None
+        assert tier.get("h2") is None
+        assert tier.get("h3") is not None
+        assert tier.size_bytes <= budget
+
+    def test_oversized_entry_not_admitted_and_drops_previous_version(self) -> None:
+        tier = MemoryPageTier(2000)
+        tier.put(_entry("h1", "small"))
+        tier.put(_entry("h1", "x" * 10_000))
+
+        assert tier.get("h1") is None
+        assert tier.size_bytes == 0
+
+    def test_discard_and_clear(self) -> None:
+        tier = MemoryPageTier(1024 * 1024)
+        tier.put(_entry("h1"))
+        tier.put(_entry("h2"))
+
+        tier.discard("h1")
+        assert tier.get("h1") is None
+        assert len(tier) == 1
+
+        tier.clear()
+        assert len(tier) == 0
+        assert tier.size_bytes == 0
@@ -0,0 +1,83 @@
+"""Unit tests for procontext.cache.metrics."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from procontext.cache.metrics import LATENCY_BUCKETS_MS, CacheMetrics, LatencyHistogram
+
+
+class TestLatencyHistogram:
+    def test_observe_buckets_by_upper_bound(self) -> None:
+        histogram = LatencyHistogram()
+        histogram.observe(0.1)
+        histogram.observe(0.2)
+        histogram.observe(10_000)
+
+        assert histogram.counts[0] == 1
+        assert histogram.counts[1] == 1
+        assert histogram.counts[len(LATENCY_BUCKETS_MS)] == 1
+        assert histogram.count == 3
+        assert histogram.max_ms == 10_000
+
+    def test_quantiles(self) -> None:
+        histogram = LatencyHistogram()
+        for _ in range(98):
+            histogram.observe(0.8)
+        histogram.observe(40)
+        histogram.observe(7_000)
+
+        assert histogram.quantile(0.5) == 1
+        assert histogram.quantile(0.99) == 50
+        assert histogram.quantile(1.0) == 7_000
+
+    def test_quantile_never_exceeds_max(self) -> None:
+        histogram = LatencyHistogram()
+        histogram.observe(3)
+        assert histogram.quantile(0.5) == 3
+
+    def test_empty_quantile_is_zero(self) -> None:
+        assert LatencyHistogram().quantile(0.99) == 0.0
+
+
+class TestCacheMetrics:
+    def test_timed_records_operation(self) -> None:
+        metrics = CacheMetrics()
+        with metrics.timed("get_page"):
+            pass
+        assert metrics.latency["get_page"].count == 1
+
+    def test_timed_records_on_exception(self) -> None:
+        metrics = CacheMetrics()
+        with pytest.raises(ValueError), metrics.timed("fetch"):
+            raise ValueError
+        assert metrics.latency["fetch"].count == 1
+
+    def test_snapshot_round_trips_through_json(self) -> None:
+        metrics = CacheMetrics()
+        metrics.increment("hits", 3)
+        metrics.increment("bytes_read", 1024)
+        metrics.observe("get_page", 0.4)
+        metrics.track_depth("refresh_queue", 5)
+        metrics.track_depth("refresh_queue", 2)
+
+        restored = CacheMetrics.from_dict(json.loads(json.dumps(metrics.to_dict())))
+
+        assert restored.counters == metrics.counters
+        assert restored.gauges == metrics.gauges
+        assert restored.gauges["refresh_queue_max_depth"] == 5
+        assert restored.latency == metrics.latency
+        assert restored.started_at == metrics.started_at
+
+    def test_snapshot_without_gauges_loads(self) -> None:
+        data = CacheMetrics().to_dict()
+        del data["gauges"]
+        assert CacheMetrics.from_dict(data).gauges["refresh_queue_max_depth"] == 0
+
+    def test_snapshot_with_wrong_bucket_count_is_rejected(self) -> None:
+        data = CacheMetrics().to_dict()
+        data["latency"] = {"get_page": {"counts": [1], "total_ms": 1.0, "max_ms": 1.0}}
+        with pytest.raises(ValueError, match="buckets"):
+            CacheMetrics.from_dict(data)
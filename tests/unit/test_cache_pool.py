@@ -0,0 +1,107 @@
+"""Unit tests for procontext.cache.pool."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from typing import TYPE_CHECKING
+
+import aiosqlite
+import pytest
+
+from procontext.cache import Cache, ReadPool
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from pathlib import Path
+
+
+def _h(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+@pytest.fixture()
+async def writer(tmp_path: Path) -> AsyncGenerator[aiosqlite.Connection, None]:
+    """File-backed writer connection with the cache schema in place."""
+    async with aiosqlite.connect(str(tmp_path / "cache.db")) as db:
+        await Cache(db).init_db()
+        yield db
+
+
+class TestReadPool:
+    async def test_rejects_non_positive_size(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError):
+            await ReadPool.open(tmp_path / "cache.db", 0)
+
+    async def test_connections_are_read_only(
+        self, writer: aiosqlite.Connection, tmp_path: Path
+    ) -> None:
+        pool = await ReadPool.open(tmp_path / "cache.db", 1)
+        try:
+            async with pool.connection() as reader:
+                with pytest.raises(aiosqlite.OperationalError):
+                    await reader.execute("DELETE FROM page_cache")
+        finally:
+            await pool.close()
+
+    async def test_connection_checked_out_exclusively(
+        self, writer: aiosqlite.Connection, tmp_path: Path
+    ) -> None:
+        pool = await ReadPool.open(tmp_path / "cache.db", 1)
+        try:
+            async with pool.connection():
+                assert pool.idle == 0
+                waiter = asyncio.create_task(pool.connection().__aenter__())
+                await asyncio.sleep(0.01)
+                assert not waiter.done()
+            await asyncio.wait_for(waiter, timeout=1)
+        finally:
+            await pool.close()
+
+
+class TestCacheWithReadPool:
+    async def test_reads_use_pool_and_see_committed_writes(
+        self, writer: aiosqlite.Connection, tmp_path: Path
+    ) -> None:
+        pool = await ReadPool.open(tmp_path / "cache.db", 2)
+        cache = Cache(writer, read_pool=pool)
+        try:
+            await cache.set_page(
+                url="https://example.com/docs/page",
+                url_hash=_h("h1"),
+                content="# Page",
+                outline="1:# Page",
+                ttl_hours=24,
+            )
+
+            async def failing_execute(*args, **kwargs):
+                raise aiosqlite.OperationalError("writer busy")
+
+            writer.execute = failing_execute  # type: ignore[assignment]
+            entry = await cache.get_page(_h("h1"))
+        finally:
+            await pool.close()
+
+        assert entry is not None
+        assert entry.content == "# Page"
+
+    async def test_concurrent_reads(self, writer: aiosqlite.Connection, tmp_path: Path) -> None:
+        pool = await ReadPool.open(tmp_path / "cache.db", 3)
+        cache = Cache(writer, read_pool=pool)
+        try:
+            for i in range(10):
+                await cache.set_page(
+                    url=f"https://example.com/docs/{i}",
+                    url_hash=_h(f"h{i}"),
+                    content=f"# Page {i}",
+                    outline="",
+                    ttl_hours=24,
+                )
+            entries = await asyncio.gather(*(cache.get_page(_h(f"h{i % 10}")) for i in range(50)))
+        finally:
+            await pool.close()
+
+        assert [e.content if e else None for e in entries] == [
+            f"# Page {i % 10}" for i in range(50)
+        ]
+        assert pool.idle == 3
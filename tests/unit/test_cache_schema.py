@@ -0,0 +1,275 @@
+"""Unit tests for procontext.cache.schema."""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import aiosqlite
+import pytest
+
+from procontext.cache import Cache
+from procontext.cache.schema import (
+    SCHEMA_VERSION,
+    from_epoch_ms,
+    migrate,
+    read_schema_version,
+    to_epoch_ms,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from pathlib import Path
+
+
+def _h(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+@pytest.fixture()
+async def db() -> AsyncGenerator[aiosqlite.Connection, None]:
+    async with aiosqlite.connect(":memory:") as connection:
+        yield connection
+
+
+async def _create_v1(db: aiosqlite.Connection) -> None:
+    """Create the pre-versioning schema as shipped before ``codec`` existed."""
+    await db.execute(
+        """
+        CREATE TABLE page_cache (
+            url_hash           TEXT PRIMARY KEY,
+            url                TEXT NOT NULL UNIQUE,
+            content            TEXT NOT NULL,
+            outline            TEXT NOT NULL DEFAULT '',
+            discovered_domains TEXT NOT NULL DEFAULT '',
+            fetched_at         TEXT NOT NULL,
+            expires_at         TEXT NOT NULL,
+            last_checked_at    TEXT
+        )
+        """
+    )
+    await db.execute("CREATE TABLE server_metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+
+async def _insert_v1(
+    db: aiosqlite.Connection, url_hash: str, fetched_at: str = "2026-01-01T00:00:00+00:00"
+) -> None:
+    await db.execute(
+        "INSERT INTO page_cache (url_hash, url, content, fetched_at, expires_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (url_hash, f"https://example.com/{url_hash}", "# Title", fetched_at, "2099-01-01T00:00"),
+    )
+
+
+class TestEpochConversion:
+    def test_round_trip_keeps_millisecond_precision(self) -> None:
+        value = datetime(2026, 3, 1, 12, 30, 15, 123000, tzinfo=UTC)
+        assert from_epoch_ms(to_epoch_ms(value)) == value
+
+
+class TestMigrate:
+    async def test_fresh_database_gets_current_schema(self, db: aiosqlite.Connection) -> None:
+        assert await migrate(db) == 0
+
+        assert await read_schema_version(db) == SCHEMA_VERSION
+        cursor = await db.execute("SELECT sql FROM sqlite_master WHERE name = 'page_cache'")
+        row = await cursor.fetchone()
+        assert row is not None
+        assert "WITHOUT ROWID" in row[0]
+        assert "UNIQUE" not in row[0]
+
+    async def test_current_database_is_left_alone(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        assert await migrate(db) == SCHEMA_VERSION
+
+    async def test_v1_rows_are_converted(self, db: aiosqlite.Connection) -> None:
+        await _create_v1(db)
+        await _insert_v1(db, _h("page"))
+        await db.commit()
+
+        assert await read_schema_version(db) == 1
+        assert await migrate(db) == 1
+        assert await read_schema_version(db) == SCHEMA_VERSION
+
+        cursor = await db.execute(
+            "SELECT url_hash, fetched_at, last_accessed_at, size_bytes, codec FROM page_cache"
+        )
+        row = await cursor.fetchone()
+        assert row is not None
+        fetched_ms = to_epoch_ms(datetime(2026, 1, 1, tzinfo=UTC))
+        assert row == (bytes.fromhex(_h("page")), fetched_ms, fetched_ms, 7, "none")
+
+        entry = await Cache(db).get_page(_h("page"))
+        assert entry is not None
+        assert entry.content == "# Title"
+        assert entry.fetched_at == datetime(2026, 1, 1, tzinfo=UTC)
+        assert not entry.stale
+
+    async def test_v1_rows_with_invalid_keys_or_timestamps_are_dropped(
+        self, db: aiosqlite.Connection
+    ) -> None:
+        await _create_v1(db)
+        await _insert_v1(db, _h("good"))
+        await _insert_v1(db, "not-hex")
+        await _insert_v1(db, "abcd")
+        await _insert_v1(db, _h("bad-date"), fetched_at="yesterday")
+        await db.commit()
+
+        await migrate(db)
+
+        cursor = await db.execute("SELECT url_hash FROM page_cache")
+        assert await cursor.fetchall() == [(bytes.fromhex(_h("good")),)]
+
+    async def test_newer_schema_is_rejected(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        await db.execute("UPDATE server_metadata SET value = '99' WHERE key = 'schema_version'")
+        await db.commit()
+
+        with pytest.raises(RuntimeError, match="v99 is newer"):
+            await migrate(db)
+
+    async def test_versionless_blob_table_is_not_rebuilt(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        await Cache(db).set_page(
+            url="https://example.com/page",
+            url_hash=_h("page"),
+            content="# Title",
+            outline="",
+            ttl_hours=24,
+        )
+        await db.execute("DELETE FROM server_metadata WHERE key = 'schema_version'")
+        await db.commit()
+
+        # A BLOB key means at least v2; later steps tolerate columns already present.
+        assert await read_schema_version(db) == 2
+        await migrate(db)
+
+        assert await read_schema_version(db) == SCHEMA_VERSION
+        assert await Cache(db).get_page(_h("page")) is not None
+
+    async def test_v2_gains_validator_columns(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        await db.execute("ALTER TABLE page_cache DROP COLUMN etag")
+        await db.execute("ALTER TABLE page_cache DROP COLUMN last_modified")
+        await db.execute("UPDATE server_metadata SET value = '2' WHERE key = 'schema_version'")
+        await db.commit()
+
+        assert await migrate(db) == 2
+
+        cursor = await db.execute("PRAGMA table_info(page_cache)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        assert {"etag", "last_modified"} <= columns
+
+    async def test_v3_gains_backfilled_page_domains(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        await Cache(db).set_page(
+            url="https://example.com/page",
+            url_hash=_h("page"),
+            content="# Title",
+            outline="",
+            ttl_hours=24,
+            discovered_domains=frozenset({"alpha.dev", "beta.dev"}),
+        )
+        await db.execute("DROP TABLE page_domains")
+        await db.execute("UPDATE server_metadata SET value = '3' WHERE key = 'schema_version'")
+        await db.commit()
+
+        assert await migrate(db) == 3
+
+        assert await Cache(db).load_discovered_domains() == frozenset({"alpha.dev", "beta.dev"})
+
+    async def test_v4_rows_gain_outline_index_on_read(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        await db.execute("ALTER TABLE page_cache DROP COLUMN outline_index")
+        await db.execute(
+            "INSERT INTO page_cache (url_hash, url, content, outline, fetched_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                bytes.fromhex(_h("page")),
+                "https://example.com/page",
+                "# T\n## S",
+                "1:# T\n2:## S",
+                0,
+                0,
+            ),
+        )
+        await db.execute("UPDATE server_metadata SET value = '4' WHERE key = 'schema_version'")
+        await db.commit()
+
+        assert await migrate(db) == 4
+
+        entry = await Cache(db).get_page(_h("page"))
+        assert entry is not None and entry.outline_index is not None
+        assert [e.text for e in entry.outline_index.entries(entry.outline)] == ["# T", "## S"]
+
+    async def test_v6_rows_have_no_recorded_ttl(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        await db.execute("ALTER TABLE page_cache DROP COLUMN ttl_ms")
+        await db.execute(
+            "INSERT INTO page_cache (url_hash, url, content, fetched_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (bytes.fromhex(_h("page")), "https://example.com/page", "# T", 0, 0),
+        )
+        await db.execute("UPDATE server_metadata SET value = '6' WHERE key = 'schema_version'")
+        await db.commit()
+
+        assert await migrate(db) == 6
+
+        entry = await Cache(db).get_page(_h("page"))
+        assert entry is not None and entry.ttl_hours is None
+
+    async def test_v7_rows_gain_figures_on_read(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        for column in ("content_hash", "line_count", "char_count", "token_estimate"):
+            await db.execute(f"ALTER TABLE page_cache DROP COLUMN {column}")
+        await db.execute(
+            "INSERT INTO page_cache (url_hash, url, content, fetched_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (bytes.fromhex(_h("page")), "https://example.com/page", "# T\nbody", 0, 0),
+        )
+        await db.execute("UPDATE server_metadata SET value = '7' WHERE key = 'schema_version'")
+        await db.commit()
+
+        assert await migrate(db) == 7
+
+        metadata = await Cache(db).get_page_metadata(_h("page"))
+        assert metadata is not None
+        assert (metadata.line_count, metadata.char_count) == (2, 8)
+        assert metadata.content_hash == hashlib.sha256(b"# T\nbody").hexdigest()
+
+    async def test_v8_database_gains_page_chunks(self, db: aiosqlite.Connection) -> None:
+        await migrate(db)
+        await db.execute("DROP TRIGGER page_cache_delete_chunks")
+        await db.execute("DROP TABLE page_chunks")
+        await db.execute("ALTER TABLE page_cache DROP COLUMN chunk_lines")
+        key = bytes.fromhex(_h("page"))
+        await db.execute(
+            "INSERT INTO page_cache (url_hash, url, content, fetched_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, "https://example.com/page", "# T\nbody", 0, 0),
+        )
+        await db.execute("UPDATE server_metadata SET value = '8' WHERE key = 'schema_version'")
+        await db.commit()
+
+        assert await migrate(db) == 8
+
+        cursor = await db.execute("SELECT chunk_lines FROM page_cache")
+        assert await cursor.fetchone() == (None,)
+        await db.execute("INSERT INTO page_chunks VALUES (?, 0, 'chunk')", (key,))
+        await db.execute("DELETE FROM page_cache")
+        cursor = await db.execute("SELECT COUNT(*) FROM page_chunks")
+        assert await cursor.fetchone() == (0,)
+
+
+class TestConnectionPragmas:
+    async def test_init_db_applies_tuning_pragmas(self, tmp_path: Path) -> None:
+        async with aiosqlite.connect(str(tmp_path / "cache.db")) as db:
+            await Cache(db).init_db()
+            cursor = await db.execute("PRAGMA synchronous")
+            synchronous = await cursor.fetchone()
+            cursor = await db.execute("PRAGMA cache_size")
+            cache_size = await cursor.fetchone()
+
+        assert synchronous == (1,)  # NORMAL
+        assert cache_size == (-16384,)
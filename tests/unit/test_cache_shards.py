@@ -0,0 +1,161 @@
+"""Unit tests for procontext.cache.shards."""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import aiosqlite
+import pytest
+
+from procontext.cache import Cache, ShardedCache
+from procontext.cache.shards import shard_index, shard_paths
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from pathlib import Path
+
+
+def _h(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+async def _rows(path: Path, sql: str) -> list[tuple[object, ...]]:
+    async with aiosqlite.connect(str(path)) as db:
+        cursor = await db.execute(sql)
+        return list(await cursor.fetchall())
+
+
+@pytest.fixture()
+async def sharded(tmp_path: Path) -> AsyncGenerator[ShardedCache, None]:
+    cache = await ShardedCache.open(tmp_path / "cache.db", 4)
+    try:
+        yield cache
+    finally:
+        await cache.close()
+
+
+class TestShardLayout:
+    def test_primary_keeps_configured_path(self, tmp_path: Path) -> None:
+        paths = shard_paths(tmp_path / "cache.db", 3)
+
+        assert [path.name for path in paths] == ["cache.db", "cache-shard1.db", "cache-shard2.db"]
+
+    def test_index_comes_from_hash_prefix(self) -> None:
+        assert shard_index("00000005" + "0" * 56, 4) == 1
+        assert shard_index(_h("page"), 1) == 0
+        assert shard_index("not-hex", 4) == 0
+
+
+class TestShardedCache:
+    async def test_pages_are_routed_to_their_shard(
+        self, sharded: ShardedCache, tmp_path: Path
+    ) -> None:
+        for index in range(40):
+            await sharded.set_page(
+                url=f"https://example.com/{index}",
+                url_hash=_h(f"page{index}"),
+                content=f"# Page {index}",
+                outline="",
+                ttl_hours=24,
+                discovered_domains=frozenset({f"docs{index % 3}.dev"}),
+            )
+
+        counts = [
+            (await _rows(path, "SELECT COUNT(*) FROM page_cache"))[0][0]
+            for path in shard_paths(tmp_path / "cache.db", 4)
+        ]
+        assert sum(counts) == 40  # type: ignore[arg-type]
+        assert all(counts)
+        entry = await sharded.get_page(_h("page7"))
+        assert entry is not None and entry.content == "# Page 7"
+        assert await sharded.shard_for(_h("page7")).get_page(_h("page7")) is not None
+        metadata = await sharded.get_page_metadata(_h("page7"))
+        assert metadata is not None and metadata.char_count == len("# Page 7")
+        assert await sharded.load_discovered_domains() == frozenset(
+            {"docs0.dev", "docs1.dev", "docs2.dev"}
+        )
+
+    async def test_metadata_stays_in_primary(self, sharded: ShardedCache, tmp_path: Path) -> None:
+        sharded.metrics.increment("hits")
+
+        assert await sharded.cleanup_if_due(6)
+        assert not await sharded.cleanup_if_due(6)
+        await sharded.save_metrics()
+        await sharded.flush_writes()
+
+        keys_sql = "SELECT key FROM server_metadata ORDER BY key"
+        primary, *others = shard_paths(tmp_path / "cache.db", 4)
+        assert await _rows(primary, keys_sql) == [
+            ("cache_metrics",),
+            ("last_cleanup_at",),
+            ("schema_version",),
+        ]
+        for path in others:
+            assert await _rows(path, keys_sql) == [("schema_version",)]
+
+    async def test_shards_share_metrics(self, sharded: ShardedCache) -> None:
+        for index in range(8):
+            await sharded.get_page(_h(f"missing{index}"))
+
+        assert sharded.metrics.latency["get_page"].count == 8
+        assert all(shard.metrics is sharded.metrics for shard in sharded.shards)
+
+    async def test_refresh_candidates_merge_by_expiry(self, sharded: ShardedCache) -> None:
+        for index in range(12):
+            url_hash = _h(f"page{index}")
+            await sharded.set_page(
+                url=f"https://example.com/{index}",
+                url_hash=url_hash,
+                content=f"# Page {index}",
+                outline="",
+                ttl_hours=0.1 + index / 100,
+            )
+        for shard in sharded.shards:
+            await shard._db.execute(
+                "UPDATE page_cache SET fetched_at = fetched_at - 3600000, "
+                "last_checked_at = last_checked_at - 3600000"
+            )
+            await shard._db.commit()
+        for index in range(12):
+            await sharded.get_page(_h(f"page{index}"))
+
+        now = datetime.now(UTC)
+        pages = await sharded.get_refresh_candidates(
+            expires_before=now + timedelta(hours=1),
+            accessed_since=now - timedelta(hours=1),
+            checked_before=now - timedelta(minutes=15),
+            limit=5,
+        )
+
+        assert [page.url for page in pages] == [f"https://example.com/{i}" for i in range(5)]
+        assert len({sharded.shard_for(page.url_hash) for page in pages}) > 1
+
+    async def test_open_runs_init_db_once_per_shard(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        calls: list[Cache] = []
+        original = Cache.init_db
+
+        async def counting_init_db(self: Cache) -> None:
+            calls.append(self)
+            await original(self)
+
+        monkeypatch.setattr(Cache, "init_db", counting_init_db)
+        sharded = await ShardedCache.open(tmp_path / "cache.db", 3, read_pool_size=2)
+        try:
+            await sharded.set_page(
+                url="https://example.com/a",
+                url_hash=_h("a"),
+                content="# A",
+                outline="",
+                ttl_hours=1,
+            )
+            cached = await sharded.get_page(_h("a"))
+        finally:
+            await sharded.close()
+
+        assert calls == list(sharded.shards)
+        assert cached is not None
+        assert cached.content == "# A"
@@ -0,0 +1,218 @@
+"""Unit tests for procontext.cache.snapshot."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import aiosqlite
+import pytest
+
+from procontext.cache import Cache
+from procontext.cache.snapshot import (
+    SnapshotError,
+    export_snapshot,
+    import_snapshot,
+    verify_snapshot,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from pathlib import Path
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+async def _set(
+    cache: Cache, url: str, content: str, *, fetched_at: datetime, ttl_hours: float = 24
+) -> None:
+    await cache.set_page(
+        url=url,
+        url_hash=_url_hash(url),
+        content=content,
+        outline="1:# Title",
+        ttl_hours=ttl_hours,
+        discovered_domains=frozenset({"example.com"}),
+        etag='"v1"',
+    )
+    await cache._db.execute(
+        "UPDATE page_cache SET fetched_at = ? WHERE url_hash = ?",
+        (int(fetched_at.timestamp() * 1000), bytes.fromhex(_url_hash(url))),
+    )
+    await cache._db.commit()
+
+
+@pytest.fixture()
+async def source() -> AsyncGenerator[Cache, None]:
+    async with aiosqlite.connect(":memory:") as db:
+        cache = Cache(db, codec="zlib")
+        await cache.init_db()
+        yield cache
+
+
+@pytest.fixture()
+async def target() -> AsyncGenerator[Cache, None]:
+    async with aiosqlite.connect(":memory:") as db:
+        cache = Cache(db)
+        await cache.init_db()
+        yield cache
+
+
+class TestExportImport:
+    async def test_round_trip_re_encodes_with_target_codec(
+        self, source: Cache, target: Cache, tmp_path: Path
+    ) -> None:
+        now = datetime.now(UTC)
+        for index in range(3):
+            await _set(source, f"https://example.com/{index}", f"# Page {index}", fetched_at=now)
+        path = tmp_path / "cache.ndjson.gz"
+
+        exported = await export_snapshot(source._db, path)
+        assert exported.rows == 3
+        assert verify_snapshot(path) == 3
+
+        result = await import_snapshot(target._db, path, codec="none")
+        assert (result.rows, result.inserted, result.replaced, result.kept_local) == (3, 3, 0, 0)
+
+        entry = await target.get_page(_url_hash("https://example.com/1"))
+        assert entry is not None
+        assert entry.content == "# Page 1"
+        assert entry.outline == "1:# Title"
+        assert entry.discovered_domains == frozenset({"example.com"})
+        assert entry.etag == '"v1"'
+        assert entry.line_index is not None
+        assert await target.load_discovered_domains() == frozenset({"example.com"})
+        cursor = await target._db.execute("SELECT DISTINCT codec FROM page_cache")
+        assert await cursor.fetchall() == [("none",)]
+
+    async def test_merge_keeps_newer_local_rows(
+        self, source: Cache, target: Cache, tmp_path: Path
+    ) -> None:
+        now = datetime.now(UTC)
+        await _set(source, "https://example.com/old", "remote old", fetched_at=now)
+        await _set(source, "https://example.com/new", "remote new", fetched_at=now)
+        await _set(target, "https://example.com/old", "local old", fetched_at=now - timedelta(1))
+        await _set(target, "https://example.com/new", "local new", fetched_at=now + timedelta(1))
+        path = tmp_path / "cache.ndjson.gz"
+        await export_snapshot(source._db, path)
+
+        result = await import_snapshot(target._db, path, codec="none")
+
+        assert (result.inserted, result.replaced, result.kept_local) == (0, 1, 1)
+        old = await target.get_page(_url_hash("https://example.com/old"))
+        new = await target.get_page(_url_hash("https://example.com/new"))
+        assert old is not None and old.content == "remote old"
+        assert new is not None and new.content == "local new"
+
+    async def test_stored_ttl_survives_round_trip(
+        self, source: Cache, target: Cache, tmp_path: Path
+    ) -> None:
+        now = datetime.now(UTC)
+        await _set(source, "https://example.com/new", "remote", fetched_at=now, ttl_hours=96)
+        await _set(source, "https://example.com/old", "remote", fetched_at=now, ttl_hours=96)
+        await _set(
+            target, "https://example.com/old", "local", fetched_at=now - timedelta(1), ttl_hours=6
+        )
+        path = tmp_path / "cache.ndjson.gz"
+        await export_snapshot(source._db, path)
+
+        result = await import_snapshot(target._db, path, codec="none")
+
+        assert (result.inserted, result.replaced) == (1, 1)
+        for url in ("https://example.com/new", "https://example.com/old"):
+            entry = await target.get_page(_url_hash(url))
+            assert entry is not None
+            assert entry.ttl_hours == 96
+
+    async def test_rows_with_mismatched_hash_are_skipped(
+        self, target: Cache, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "forged.ndjson.gz"
+        header = {"format": "procontext-cache-snapshot", "version": 1}
+        row = {
+            "url_hash": _url_hash("https://example.com/other"),
+            "url": "https://example.com/page",
+            "content": "forged",
+            "outline": "",
+            "discovered_domains": [],
+            "fetched_at": 0,
+            "expires_at": 0,
+            "last_checked_at": None,
+            "etag": None,
+            "last_modified": None,
+        }
+        lines = [json.dumps(header).encode() + b"\n", json.dumps(row).encode() + b"\n"]
+        trailer = {"rows": 1, "sha256": hashlib.sha256(b"".join(lines)).hexdigest()}
+        path.write_bytes(gzip.compress(b"".join(lines) + json.dumps(trailer).encode() + b"\n"))
+
+        result = await import_snapshot(target._db, path, codec="none")
+
+        assert (result.rows, result.inserted, result.invalid) == (1, 0, 1)
+
+    async def test_chunked_pages_round_trip(
+        self, source: Cache, target: Cache, tmp_path: Path
+    ) -> None:
+        large = "".join(f"line {number}\n" for number in range(1, 2501))
+        chunked_source = Cache(source._db, codec="zlib", chunk_threshold_chars=1000)
+        await _set(chunked_source, "https://example.com/full", large, fetched_at=datetime.now(UTC))
+        # A smaller local copy that the snapshot replaces.
+        await _set(target, "https://example.com/full", "# Old", fetched_at=datetime(2020, 1, 1))
+        path = tmp_path / "cache.ndjson.gz"
+        await export_snapshot(source._db, path)
+
+        result = await import_snapshot(target._db, path, codec="none", chunk_threshold_chars=1000)
+
+        assert result.replaced == 1
+        entry = await target.get_page(_url_hash("https://example.com/full"))
+        assert entry is not None and entry.chunk_lines is not None
+        chunks = await target.get_chunks(
+            entry.url_hash, 0, 2, content_hash=hashlib.sha256(large.encode()).hexdigest()
+        )
+        assert chunks is not None and "".join(chunks) == large
+
+        inline_path = tmp_path / "inline.ndjson.gz"
+        await export_snapshot(target._db, inline_path)
+        async with aiosqlite.connect(":memory:") as db:
+            inline = Cache(db)
+            await inline.init_db()
+            await import_snapshot(db, inline_path, codec="none")
+            entry = await inline.get_page(_url_hash("https://example.com/full"))
+            assert entry is not None and entry.chunk_lines is None and entry.content == large
+
+
+class TestVerifySnapshot:
+    async def test_tampered_snapshot_is_rejected_before_writing(
+        self, source: Cache, target: Cache, tmp_path: Path
+    ) -> None:
+        await _set(source, "https://example.com/page", "# Page", fetched_at=datetime.now(UTC))
+        path = tmp_path / "cache.ndjson.gz"
+        await export_snapshot(source._db, path)
+        raw = gzip.decompress(path.read_bytes()).replace(b"# Page", b"# Evil")
+        path.write_bytes(gzip.compress(raw))
+
+        with pytest.raises(SnapshotError, match="checksum"):
+            await import_snapshot(target._db, path, codec="none")
+        cursor = await target._db.execute("SELECT COUNT(*) FROM page_cache")
+        assert await cursor.fetchone() == (0,)
+
+    async def test_truncated_snapshot_is_rejected(self, source: Cache, tmp_path: Path) -> None:
+        await _set(source, "https://example.com/page", "# Page", fetched_at=datetime.now(UTC))
+        path = tmp_path / "cache.ndjson.gz"
+        await export_snapshot(source._db, path)
+        lines = gzip.decompress(path.read_bytes()).splitlines(keepends=True)
+        path.write_bytes(gzip.compress(b"".join(lines[:-1])))
+
+        with pytest.raises(SnapshotError, match="trailer"):
+            verify_snapshot(path)
+
+    def test_non_snapshot_file_is_rejected(self, tmp_path: Path) -> None:
+        path = tmp_path / "notes.txt"
+        path.write_text("hello")
+
+        with pytest.raises(SnapshotError):
+            verify_snapshot(path)
@@ -0,0 +1,94 @@
+"""Unit tests for procontext.cache.writer."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from procontext.cache.writer import WriteBehindQueue
+from procontext.models.cache import PageCacheEntry
+
+
+def _entry(url_hash: str, content: str = "# Page", *, expired: bool = False) -> PageCacheEntry:
+    now = datetime.now(UTC)
+    expires_at = now - timedelta(hours=1) if expired else now + timedelta(hours=1)
+    return PageCacheEntry(
+        url=f"https://example.com/{url_hash}",
+        url_hash=url_hash,
+        content=content,
+        outline="",
+        fetched_at=now,
+        expires_at=expires_at,
+    )
+
+
+def _queue(max_pending: int = 10) -> WriteBehindQueue:
+    return WriteBehindQueue(flush_interval_seconds=0.05, max_pending=max_pending)
+
+
+class TestWriteBehindQueue:
+    def test_later_write_supersedes_earlier(self) -> None:
+        queue = _queue()
+        queue.put_page(_entry("h1", "old"))
+        queue.put_page(_entry("h1", "new"))
+
+        entry = queue.get_page("h1")
+        assert entry is not None
+        assert entry.content == "new"
+        assert len(queue) == 1
+
+    def test_stale_flag_recomputed_on_read(self) -> None:
+        queue = _queue()
+        queue.put_page(_entry("h1", expired=True))
+
+        entry = queue.get_page("h1")
+        assert entry is not None
+        assert entry.stale is True
+
+    def test_mark_checked_folds_into_pending_page(self) -> None:
+        queue = _queue()
+        queue.put_page(_entry("h1"))
+        checked_at = datetime.now(UTC)
+        queue.mark_checked("h1", checked_at)
+
+        entry = queue.get_page("h1")
+        assert entry is not None
+        assert entry.last_checked_at == checked_at
+        assert queue.pending_check("h1") is None
+        assert len(queue) == 1
+
+    def test_complete_keeps_writes_that_arrived_during_flush(self) -> None:
+        queue = _queue()
+        queue.put_page(_entry("h1", "v1"))
+        batch = queue.snapshot()
+        queue.put_page(_entry("h1", "v2"))
+
+        queue.complete(batch, duration_ms=1.0, ok=True)
+
+        entry = queue.get_page("h1")
+        assert entry is not None
+        assert entry.content == "v2"
+
+    def test_stats_track_flush_latency(self) -> None:
+        queue = _queue()
+        queue.put_page(_entry("h1"))
+        queue.mark_checked("h2", datetime.now(UTC))
+        assert queue.stats.depth == 2
+
+        queue.complete(queue.snapshot(), duration_ms=4.0, ok=True)
+        queue.put_page(_entry("h3"))
+        queue.complete(queue.snapshot(), duration_ms=2.0, ok=False)
+
+        stats = queue.stats
+        assert stats.depth == 0
+        assert stats.flushes == 2
+        assert stats.failed_flushes == 1
+        assert stats.rows_flushed == 2
+        assert stats.last_flush_ms == 2.0
+        assert stats.max_flush_ms == 4.0
+
+    async def test_wait_until_due_returns_early_when_full(self) -> None:
+        queue = WriteBehindQueue(flush_interval_seconds=60, max_pending=2)
+        queue.put_page(_entry("h1"))
+        queue.put_page(_entry("h2"))
+
+        await queue.wait_until_due()  # would take 60s if the size trigger failed
@@ -0,0 +1,194 @@
+"""Unit tests for the `procontext cache` commands."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from typing import TYPE_CHECKING
+
+import aiosqlite
+import httpx
+import pytest
+import respx
+
+from procontext.cache import Cache
+from procontext.cli.cmd_cache import (
+    WarmReport,
+    format_warm_report,
+    run_cache_warm,
+    select_warm_urls,
+)
+from procontext.config import Settings, registry_paths
+from procontext.models.registry import RegistryEntry
+from procontext.registry import save_registry_to_disk
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+_ENTRIES = [
+    {
+        "id": "alpha",
+        "name": "Alpha",
+        "llms_txt_url": "https://docs.alpha.dev/llms.txt",
+        "llms_full_txt_url": "https://docs.alpha.dev/llms-full.txt",
+    },
+    {"id": "beta", "name": "Beta", "llms_txt_url": "https://docs.beta.dev/llms.txt"},
+    {"id": "gamma", "name": "Gamma", "llms_txt_url": "https://docs.gamma.dev/llms.txt"},
+]
+
+
+def _settings(tmp_path: Path) -> Settings:
+    settings = Settings(
+        data_dir=str(tmp_path),
+        cache={"db_path": str(tmp_path / "cache.db")},  # type: ignore[arg-type]
+    )
+    registry_bytes = json.dumps(_ENTRIES).encode("utf-8")
+    registry_path, state_path = registry_paths(settings)
+    save_registry_to_disk(
+        registry_bytes=registry_bytes,
+        version="test",
+        checksum="sha256:" + hashlib.sha256(registry_bytes).hexdigest(),
+        registry_path=registry_path,
+        state_path=state_path,
+    )
+    return settings
+
+
+async def _cached_urls(settings: Settings) -> set[str]:
+    async with aiosqlite.connect(settings.cache.db_path) as db:
+        cursor = await db.execute("SELECT url FROM page_cache")
+        return {row[0] for row in await cursor.fetchall()}
+
+
+class TestSelectWarmUrls:
+    def _entries(self) -> list[RegistryEntry]:
+        return [RegistryEntry.model_validate(entry) for entry in _ENTRIES]
+
+    def test_library_ids_select_in_given_order(self) -> None:
+        urls = select_warm_urls(self._entries(), library_ids=["gamma", "alpha"])
+        assert urls == ["https://docs.gamma.dev/llms.txt", "https://docs.alpha.dev/llms.txt"]
+
+    def test_top_with_full_adds_llms_full_txt(self) -> None:
+        urls = select_warm_urls(self._entries(), top=2, include_full=True)
+        assert urls == [
+            "https://docs.alpha.dev/llms.txt",
+            "https://docs.alpha.dev/llms-full.txt",
+            "https://docs.beta.dev/llms.txt",
+        ]
+
+    def test_unknown_library_id_raises(self) -> None:
+        with pytest.raises(ValueError, match="missing"):
+            select_warm_urls(self._entries(), library_ids=["alpha", "missing"])
+
+
+class TestFormatWarmReport:
+    def test_reports_throughput_in_characters(self, tmp_path: Path) -> None:
+        report = WarmReport(targets=2, fetched=2, chars_fetched=2_500_000, elapsed_seconds=4.0)
+        output = format_warm_report(report, tmp_path / "cache.db")
+        assert "0.50 pages/s, 2.5M characters fetched" in output
+
+
+class TestRunCacheWarm:
+    async def test_warm_fetches_and_caches_pages(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        settings = _settings(tmp_path)
+        with respx.mock:
+            respx.get("https://docs.alpha.dev/llms.txt").mock(
+                return_value=httpx.Response(
+                    200, text="# Alpha\n\n- [Guide](https://docs.alpha.dev/g)"
+                )
+            )
+            respx.get("https://docs.beta.dev/llms.txt").mock(
+                return_value=httpx.Response(200, text="# Beta")
+            )
+            respx.get("https://docs.gamma.dev/llms.txt").mock(return_value=httpx.Response(500))
+
+            await run_cache_warm(settings, concurrency=2, per_host=1)
+
+        output = capsys.readouterr().out
+        assert "2 fetched, 0 already cached, 1 failed (3 pages)" in output
+        assert "https://docs.gamma.dev/llms.txt: PAGE_FETCH_FAILED" in output
+        assert await _cached_urls(settings) == {
+            "https://docs.alpha.dev/llms.txt",
+            "https://docs.beta.dev/llms.txt",
+        }
+
+        async with aiosqlite.connect(settings.cache.db_path) as db:
+            entry = await Cache(db).get_page(
+                hashlib.sha256(b"https://docs.alpha.dev/llms.txt").hexdigest()
+            )
+        assert entry is not None
+        assert entry.outline == "1:# Alpha"
+
+    async def test_busy_host_does_not_hold_a_worker(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        # Two workers, one request per host: while alpha's first page is in
+        # flight, the second worker must move on to beta instead of waiting
+        # for alpha's slot. The alpha fetch only completes once beta started.
+        settings = _settings(tmp_path)
+        beta_started = asyncio.Event()
+
+        async def slow_alpha(request: httpx.Request) -> httpx.Response:
+            await asyncio.wait_for(beta_started.wait(), timeout=5)
+            return httpx.Response(200, text="# Alpha")
+
+        def beta(request: httpx.Request) -> httpx.Response:
+            beta_started.set()
+            return httpx.Response(200, text="# Beta")
+
+        with respx.mock:
+            respx.get("https://docs.alpha.dev/llms.txt").mock(side_effect=slow_alpha)
+            respx.get("https://docs.alpha.dev/llms-full.txt").mock(
+                return_value=httpx.Response(200, text="# Alpha full")
+            )
+            respx.get("https://docs.beta.dev/llms.txt").mock(side_effect=beta)
+
+            await run_cache_warm(
+                settings,
+                library_ids=["alpha", "beta"],
+                include_full=True,
+                concurrency=2,
+                per_host=1,
+            )
+
+        assert "3 fetched, 0 already cached, 0 failed (3 pages)" in capsys.readouterr().out
+
+    async def test_fresh_pages_are_skipped_unless_forced(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        settings = _settings(tmp_path)
+        with respx.mock:
+            route = respx.get("https://docs.beta.dev/llms.txt").mock(
+                return_value=httpx.Response(200, text="# Beta")
+            )
+            await run_cache_warm(settings, library_ids=["beta"])
+            await run_cache_warm(settings, library_ids=["beta"])
+            assert route.call_count == 1
+
+            await run_cache_warm(settings, library_ids=["beta"], force=True)
+            assert route.call_count == 2
+
+        assert "0 fetched, 1 already cached, 0 failed" in capsys.readouterr().out
+
+    async def test_every_page_failing_exits_non_zero(self, tmp_path: Path) -> None:
+        settings = _settings(tmp_path)
+        with respx.mock:
+            respx.get("https://docs.beta.dev/llms.txt").mock(return_value=httpx.Response(404))
+            with pytest.raises(SystemExit):
+                await run_cache_warm(settings, library_ids=["beta"])
+
+    async def test_unknown_library_exits(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        with pytest.raises(SystemExit):
+            await run_cache_warm(_settings(tmp_path), library_ids=["missing"])
+        assert "Unknown library ID(s): missing" in capsys.readouterr().err
+
+    async def test_missing_registry_exits(self, tmp_path: Path) -> None:
+        settings = Settings(data_dir=str(tmp_path))
+        with pytest.raises(SystemExit):
+            await run_cache_warm(settings, top=1)
@@ -2,17 +2,27 @@
 
 from __future__ import annotations
 
+import hashlib
 from typing import TYPE_CHECKING
 
-from procontext.cli.cmd_db import run_db_recreate
+import aiosqlite
+import pytest
+
+from procontext.cache import Cache, ShardedCache
+from procontext.cli.cmd_db import (
+    run_db_compress,
+    run_db_export,
+    run_db_import,
+    run_db_recreate,
+    run_db_stats,
+    run_db_vacuum,
+)
 from procontext.cli.cmd_doctor import check_cache
 from procontext.config import Settings
 
 if TYPE_CHECKING:
     from pathlib import Path
 
-    import pytest
-
 
 class TestRunDbRecreate:
     async def test_recreate_replaces_corrupt_cache(
@@ -31,3 +41,266 @@ class TestRunDbRecreate:
 
         result = await check_cache(settings)
         assert result.status == "ok"
+
+    async def test_recreate_removes_shards_beyond_configured_count(self, tmp_path: Path) -> None:
+        db_path = tmp_path / "cache.db"
+        cache = await ShardedCache.open(db_path, 4)
+        await cache.close()
+
+        settings = Settings(cache={"db_path": str(db_path), "shards": 2})  # type: ignore[arg-type]
+        await run_db_recreate(settings)
+
+        assert sorted(path.name for path in tmp_path.glob("*.db")) == [
+            "cache-shard1.db",
+            "cache.db",
+        ]
+
+
+class TestRunDbCompress:
+    async def test_compress_migrates_rows_and_reports(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        db_path = tmp_path / "cache.db"
+        async with aiosqlite.connect(str(db_path)) as db:
+            cache = Cache(db)
+            await cache.init_db()
+            for index in range(3):
+                await cache.set_page(
+                    url=f"https://example.com/page{index}",
+                    url_hash=hashlib.sha256(f"h{index}".encode()).hexdigest(),
+                    content="# Heading\n\nRepeated body text.\n" * 200,
+                    outline="1:# Heading",
+                    ttl_hours=24,
+                )
+
+        settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
+        await run_db_compress(settings, codec="zlib")
+
+        captured = capsys.readouterr()
+        assert "Re-encoded 3 of 3 cached pages as 'zlib'" in captured.out
+        assert "Stored size:" in captured.out
+        assert "Read latency:" in captured.out
+
+        async with aiosqlite.connect(str(db_path)) as db:
+            cursor = await db.execute("SELECT DISTINCT codec FROM page_cache")
+            assert await cursor.fetchall() == [("zlib",)]
+            entry = await Cache(db).get_page(hashlib.sha256(b"h0").hexdigest())
+            assert entry is not None
+            assert entry.content.startswith("# Heading")
+
+    async def test_compress_re_encodes_chunks(self, tmp_path: Path) -> None:
+        db_path = tmp_path / "cache.db"
+        content = "Repeated body text.\n" * 2500
+        url_hash = hashlib.sha256(b"full").hexdigest()
+        async with aiosqlite.connect(str(db_path)) as db:
+            cache = Cache(db, chunk_threshold_chars=1000)
+            await cache.init_db()
+            await cache.set_page(
+                url="https://example.com/llms-full.txt",
+                url_hash=url_hash,
+                content=content,
+                outline="",
+                ttl_hours=24,
+            )
+
+        settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
+        await run_db_compress(settings, codec="zlib")
+
+        async with aiosqlite.connect(str(db_path)) as db:
+            cursor = await db.execute("SELECT DISTINCT typeof(content) FROM page_chunks")
+            assert await cursor.fetchall() == [("blob",)]
+            chunks = await Cache(db).get_chunks(
+                url_hash, 0, 2, content_hash=hashlib.sha256(content.encode()).hexdigest()
+            )
+            assert chunks is not None and "".join(chunks) == content
+
+    async def test_compress_missing_database_exits(self, tmp_path: Path) -> None:
+        settings = Settings(cache={"db_path": str(tmp_path / "missing.db")})  # type: ignore[arg-type]
+        with pytest.raises(SystemExit):
+            await run_db_compress(settings, codec="zlib")
+
+
+class TestRunDbVacuum:
+    async def test_vacuum_converts_database_to_incremental(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        db_path = tmp_path / "cache.db"
+        async with aiosqlite.connect(str(db_path)) as db:
+            await db.execute("PRAGMA auto_vacuum = NONE")
+            await Cache(db).init_db()
+            await db.execute("PRAGMA auto_vacuum = NONE")
+            await db.execute("VACUUM")
+
+        await run_db_vacuum(Settings(cache={"db_path": str(db_path)}))  # type: ignore[arg-type]
+
+        assert "Vacuumed" in capsys.readouterr().out
+        async with aiosqlite.connect(str(db_path)) as db:
+            cursor = await db.execute("PRAGMA auto_vacuum")
+            assert await cursor.fetchone() == (2,)
+
+    async def test_vacuum_missing_database_exits(self, tmp_path: Path) -> None:
+        settings = Settings(cache={"db_path": str(tmp_path / "missing.db")})  # type: ignore[arg-type]
+        with pytest.raises(SystemExit):
+            await run_db_vacuum(settings)
+
+
+class TestRunDbStats:
+    async def test_stats_reports_disk_summary_and_saved_metrics(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        db_path = tmp_path / "cache.db"
+        async with aiosqlite.connect(str(db_path)) as db:
+            cache = Cache(db)
+            await cache.init_db()
+            for index, host in enumerate(["docs.a.dev", "docs.a.dev", "b.io"]):
+                await cache.set_page(
+                    url=f"https://{host}/page{index}",
+                    url_hash=hashlib.sha256(f"h{index}".encode()).hexdigest(),
+                    content="x" * (100 * (index + 1)),
+                    outline="",
+                    ttl_hours=0 if host == "b.io" else 24,
+                )
+            cache.metrics.increment("hits", 3)
+            cache.metrics.increment("misses", 1)
+            cache.metrics.increment("refreshes_deferred", 2)
+            cache.metrics.track_depth("write_queue", 12)
+            cache.metrics.track_depth("write_queue", 0)
+            cache.metrics.track_depth("refresh_queue", 7)
+            cache.metrics.track_depth("refresh_queue", 4)
+            await cache.save_metrics()
+
+        settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
+        await run_db_stats(settings)
+
+        out = capsys.readouterr().out
+        assert "Pages:      3" in out
+        assert "Expired:    1 retained past expiry" in out
+        assert "docs.a.dev" in out and "2 pages" in out
+        assert out.index("https://b.io/page2") < out.index("https://docs.a.dev/page1")
+        assert "hit ratio 75.0%" in out
+        assert "write-behind 0 pending (max 12); refresh 4 waiting (max 7)" in out
+        assert "2 budget waits" in out
+        assert "set_page" in out
+
+    async def test_stats_without_saved_metrics(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        db_path = tmp_path / "cache.db"
+        async with aiosqlite.connect(str(db_path)) as db:
+            await Cache(db).init_db()
+
+        settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
+        await run_db_stats(settings)
+
+        out = capsys.readouterr().out
+        assert "Pages:      0" in out
+        assert "No server metrics saved yet" in out
+
+    async def test_stats_reads_older_schema_without_migrating(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        db_path = tmp_path / "cache.db"
+        async with aiosqlite.connect(str(db_path)) as db:
+            await db.execute(
+                "CREATE TABLE page_cache (url_hash TEXT PRIMARY KEY, url TEXT NOT NULL, "
+                "content TEXT NOT NULL, fetched_at TEXT NOT NULL, expires_at TEXT NOT NULL)"
+            )
+            await db.execute(
+                "INSERT INTO page_cache VALUES ('h1', 'https://example.com/a', '# A', "
+                "'2026-01-01T00:00:00+00:00', '2099-01-01T00:00:00+00:00')"
+            )
+            await db.commit()
+        before = db_path.read_bytes()
+
+        settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
+        await run_db_stats(settings)
+
+        out = capsys.readouterr().out
+        assert "Schema:     v1, migrates on next start" in out
+        assert "Pages:      1" in out
+        assert db_path.read_bytes() == before
+
+    async def test_stats_missing_database_exits(self, tmp_path: Path) -> None:
+        settings = Settings(cache={"db_path": str(tmp_path / "missing.db")})  # type: ignore[arg-type]
+        with pytest.raises(SystemExit):
+            await run_db_stats(settings)
+
+
+class TestRunDbExportImport:
+    async def test_export_then_import_into_fresh_database(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        source_path = tmp_path / "source.db"
+        async with aiosqlite.connect(str(source_path)) as db:
+            cache = Cache(db)
+            await cache.init_db()
+            await cache.set_page(
+                url="https://example.com/page",
+                url_hash=hashlib.sha256(b"https://example.com/page").hexdigest(),
+                content="# Page",
+                outline="1:# Page",
+                ttl_hours=24,
+            )
+        snapshot = tmp_path / "cache.ndjson.gz"
+
+        await run_db_export(Settings(cache={"db_path": str(source_path)}), snapshot)  # type: ignore[arg-type]
+        assert "Exported 1 cached pages" in capsys.readouterr().out
+
+        target_settings = Settings(cache={"db_path": str(tmp_path / "target.db")})  # type: ignore[arg-type]
+        await run_db_import(target_settings, snapshot)
+        assert "1 pages, 1 new, 0 replaced, 0 kept" in capsys.readouterr().out
+
+        async with aiosqlite.connect(str(tmp_path / "target.db")) as db:
+            entry = await Cache(db).get_page(
+                hashlib.sha256(b"https://example.com/page").hexdigest()
+            )
+        assert entry is not None
+        assert entry.content == "# Page"
+
+    async def test_import_rejects_corrupt_snapshot(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        snapshot = tmp_path / "cache.ndjson.gz"
+        snapshot.write_bytes(b"not gzip")
+        settings = Settings(cache={"db_path": str(tmp_path / "cache.db")})  # type: ignore[arg-type]
+
+        with pytest.raises(SystemExit):
+            await run_db_import(settings, snapshot)
+        assert "snapshot is unreadable" in capsys.readouterr().err
+
+    async def test_sharded_round_trip_into_different_shard_count(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        urls = [f"https://example.com/{index}" for index in range(12)]
+        hashes = [hashlib.sha256(url.encode()).hexdigest() for url in urls]
+        source = await ShardedCache.open(tmp_path / "source.db", 3)
+        try:
+            for index, (url, url_hash) in enumerate(zip(urls, hashes, strict=True)):
+                await source.set_page(
+                    url=url,
+                    url_hash=url_hash,
+                    content=f"# Page {index}",
+                    outline="",
+                    ttl_hours=24,
+                )
+        finally:
+            await source.close()
+        snapshot = tmp_path / "cache.ndjson.gz"
+
+        source_settings = Settings(cache={"db_path": str(tmp_path / "source.db"), "shards": 3})  # type: ignore[arg-type]
+        await run_db_stats(source_settings)
+        assert "(3 shards)" in capsys.readouterr().out
+        await run_db_export(source_settings, snapshot)
+        assert "Exported 12 cached pages" in capsys.readouterr().out
+
+        target_settings = Settings(cache={"db_path": str(tmp_path / "target.db"), "shards": 2})  # type: ignore[arg-type]
+        await run_db_import(target_settings, snapshot)
+        assert "12 pages, 12 new" in capsys.readouterr().out
+
+        target = await ShardedCache.open(tmp_path / "target.db", 2)
+        try:
+            for index, url_hash in enumerate(hashes):
+                entry = await target.get_page(url_hash)
+                assert entry is not None and entry.content == f"# Page {index}"
+        finally:
+            await target.close()
@@ -11,7 +11,8 @@ from unittest.mock import patch
 import aiosqlite
 import pytest
 
-from procontext.cache import Cache
+from procontext.cache import Cache, ShardedCache
+from procontext.cache.schema import SCHEMA_VERSION
 from procontext.cli.cmd_doctor import (
     check_cache,
     check_data_dir,
@@ -304,6 +305,21 @@ class TestCheckCache:
         assert result.status == "ok"
         assert "schema valid" in result.detail
 
+    async def test_sharded_db_checks_every_shard(self, tmp_path: Path) -> None:
+        db_path = tmp_path / "cache.db"
+        cache = await ShardedCache.open(db_path, 3)
+        await cache.close()
+        settings = Settings(cache={"db_path": str(db_path), "shards": 3})  # type: ignore[arg-type]
+
+        result = await check_cache(settings)
+        assert result.status == "ok"
+        assert "3 shards" in result.detail
+
+        (tmp_path / "cache-shard2.db").write_text("this is not a database")
+        result = await check_cache(settings)
+        assert result.status == "fail"
+        assert "cache-shard2.db" in result.detail
+
     async def test_db_not_yet_created_warns(self, tmp_path: Path) -> None:
         db_path = tmp_path / "nonexistent.db"
         settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
@@ -343,7 +359,7 @@ class TestCheckCache:
         assert result.status == "fail"
         assert "Missing table" in result.detail
 
-    async def test_db_schema_mismatch_missing_column(self, tmp_path: Path) -> None:
+    async def test_db_old_schema_version_warns(self, tmp_path: Path) -> None:
         db_path = tmp_path / "old.db"
         async with aiosqlite.connect(str(db_path)) as db:
             await db.execute("PRAGMA journal_mode = WAL")
@@ -363,9 +379,34 @@ class TestCheckCache:
             await db.commit()
         settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
         result = await check_cache(settings)
+        assert result.status == "warn"
+        assert f"schema v1 will be migrated to v{SCHEMA_VERSION}" in result.detail
+        assert "doctor --fix" in result.fix_hint
+
+    async def test_db_schema_mismatch_missing_column(self, tmp_path: Path) -> None:
+        db_path = tmp_path / "cache.db"
+        async with aiosqlite.connect(str(db_path)) as db:
+            await Cache(db).init_db()
+            await db.execute("ALTER TABLE page_cache DROP COLUMN line_index")
+            await db.commit()
+        settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
+        result = await check_cache(settings)
         assert result.status == "fail"
         assert "missing columns" in result.detail.lower()
-        assert "outline" in result.detail
+        assert "line_index" in result.detail
+
+    async def test_db_newer_schema_version_fails(self, tmp_path: Path) -> None:
+        db_path = tmp_path / "cache.db"
+        async with aiosqlite.connect(str(db_path)) as db:
+            await Cache(db).init_db()
+            await db.execute("UPDATE server_metadata SET value = '99' WHERE key = 'schema_version'")
+            await db.commit()
+        settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
+        result = await check_cache(settings, fix=True)
+        assert result.status == "fail"
+        assert result.fixed is False
+        assert "v99 is newer" in result.detail
+        assert "upgrade ProContext" in result.fix_hint
 
     async def test_db_schema_mismatch_fix_migrates_in_place(self, tmp_path: Path) -> None:
         db_path = tmp_path / "old.db"
@@ -390,15 +431,15 @@ class TestCheckCache:
             await db.execute(
                 """
                 INSERT INTO page_cache (url_hash, url, content, fetched_at, expires_at)
-                VALUES ('abc', ?, ?, '2026-01-01T00:00:00+00:00', '2026-01-02T00:00:00+00:00')
+                VALUES (?, ?, ?, '2026-01-01T00:00:00+00:00', '2026-01-02T00:00:00+00:00')
                 """,
-                (url, content),
+                (hashlib.sha256(url.encode()).hexdigest(), url, content),
             )
             await db.commit()
         settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
         result = await check_cache(settings, fix=True)
         assert result.fixed is True
-        assert "added columns to page_cache" in result.detail
+        assert f"migrated schema v1 to v{SCHEMA_VERSION}" in result.detail
         result2 = await check_cache(settings)
         assert result2.status == "ok"
         async with aiosqlite.connect(str(db_path)) as db:
@@ -420,7 +461,9 @@ class TestCheckCache:
         settings = Settings(cache={"db_path": str(db_path)})  # type: ignore[arg-type]
         result = await check_cache(settings, fix=True)
         assert result.fixed is True
-        assert "created tables: page_cache" in result.detail
+        assert (
+            "created tables: negative_cache, page_cache, page_chunks, page_domains" in result.detail
+        )
         result2 = await check_cache(settings)
         assert result2.status == "ok"
 
@@ -13,6 +13,7 @@ from procontext.config import (
     FetcherSettings,
     LoggingSettings,
     OutlineSettings,
+    ProcessingSettings,
     RegistrySettings,
     ResolverSettings,
     ServerSettings,
@@ -89,6 +90,8 @@ class TestConfigValidation:
             (CacheSettings, "ttl_hours", -1),
             (CacheSettings, "cleanup_interval_hours", 0),
             (CacheSettings, "cleanup_interval_hours", -1),
+            (CacheSettings, "min_ttl_hours", 0),
+            (CacheSettings, "ttl_jitter", 1),
             (FetcherSettings, "connect_timeout_seconds", 0),
             (FetcherSettings, "connect_timeout_seconds", -0.5),
             (FetcherSettings, "request_timeout_seconds", 0),
@@ -99,6 +102,10 @@ class TestConfigValidation:
             (OutlineSettings, "max_entries", 0),
             (OutlineSettings, "read_page_max_chars", 0),
             (OutlineSettings, "search_page_max_chars", 0),
+            (ProcessingSettings, "offload_threshold_chars", -1),
+            (ProcessingSettings, "process_workers", 0),
+            (ProcessingSettings, "html_process_workers", 0),
+            (ProcessingSettings, "html_timeout_seconds", 0),
         ],
     )
     def test_invalid_numeric_bounds_raise_validation_error(
@@ -138,6 +145,18 @@ class TestConfigValidation:
         assert outline.read_page_max_chars == 1234
         assert outline.search_page_max_chars == 1234
 
+    def test_domain_ttl_hours_keys_are_normalized(self) -> None:
+        cache = CacheSettings(domain_ttl_hours={" Docs.Python.org. ": 72})
+        assert cache.domain_ttl_hours == {"docs.python.org": 72}
+
+    def test_non_positive_domain_ttl_raises_validation_error(self) -> None:
+        with pytest.raises(ValidationError, match="domain_ttl_hours"):
+            CacheSettings(domain_ttl_hours={"docs.python.org": 0})
+
+    def test_min_ttl_above_max_ttl_raises_validation_error(self) -> None:
+        with pytest.raises(ValidationError, match="min_ttl_hours"):
+            CacheSettings(min_ttl_hours=48, max_ttl_hours=24)
+
     def test_html_processors_can_be_empty(self) -> None:
         fetcher = FetcherSettings(html_processors=[])
         assert fetcher.html_processors == []
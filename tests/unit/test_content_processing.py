@@ -6,11 +6,14 @@ from dataclasses import replace
 
 import pytest
 
+from procontext.config import FetcherSettings, ProcessingSettings, Settings
 from procontext.fetch.models import FetchedContent
 from procontext.fetch.processors import (
     HtmlProcessorPipeline,
     build_html_processor,
+    build_markitdown_pool,
 )
+from procontext.fetch.processors.markitdown import MarkItDownHtmlProcessor, MarkItDownPool
 
 
 class _PrefixProcessor:
@@ -83,3 +86,63 @@ def test_build_html_processor_instantiates_markitdown() -> None:
 def test_build_html_processor_unknown_name_raises() -> None:
     with pytest.raises(ValueError, match="Unsupported HTML processor"):
         build_html_processor("unknown")
+
+
+def test_markitdown_pool_is_only_built_for_the_process_executor() -> None:
+    assert build_markitdown_pool(Settings()) is None
+    assert build_markitdown_pool(Settings(processing=ProcessingSettings(html_executor="process")))
+    assert (
+        build_markitdown_pool(
+            Settings(
+                processing=ProcessingSettings(html_executor="process"),
+                fetcher=FetcherSettings(html_processors=[]),
+            )
+        )
+        is None
+    )
+
+
+class TestMarkItDownPool:
+    async def test_converts_like_the_thread_processor_and_reuses_its_worker(self) -> None:
+        pool = MarkItDownPool(workers=1)
+        try:
+            pooled = MarkItDownHtmlProcessor(pool)
+            first = await pooled.transform(_html_payload())
+            second = await pooled.transform(_html_payload("<h2>Again</h2>"))
+            workers = len(pool._idle)
+        finally:
+            await pool.close()
+
+        threaded = await MarkItDownHtmlProcessor().transform(_html_payload())
+        assert first.text_content == threaded.text_content == "# Title\n\nHello **world**."
+        assert second.text_content == "## Again"
+        assert workers == 1
+
+    async def test_timeout_kills_the_worker_and_the_next_conversion_gets_a_new_one(self) -> None:
+        pool = MarkItDownPool(workers=1, timeout_seconds=1e-6)
+        try:
+            with pytest.raises(TimeoutError):
+                await pool.convert(_html_payload())
+            assert pool._idle == []
+
+            pool._timeout = 30.0
+            assert await pool.convert(_html_payload()) == "# Title\n\nHello **world**."
+        finally:
+            await pool.close()
+
+        with pytest.raises(RuntimeError, match="closed"):
+            await pool.convert(_html_payload())
+
+
+def _html_payload(
+    body: str = "<h1>Title</h1><p>Hello <strong>world</strong>.</p>",
+) -> FetchedContent:
+    html = f"<html><body>{body}</body></html>"
+    return FetchedContent(
+        original_url="https://example.com/page",
+        final_url="https://example.com/page",
+        body=html.encode(),
+        text_content=html,
+        content_type="text/html",
+        charset="utf-8",
+    )
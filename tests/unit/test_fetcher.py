@@ -12,6 +12,7 @@ import respx
 from procontext.config import FetcherSettings, Settings
 from procontext.errors import ErrorCode, ProContextError
 from procontext.fetch.client import build_http_client
+from procontext.fetch.models import CacheValidators
 from procontext.fetch.processors import HtmlProcessorPipeline
 from procontext.fetch.security import (
     _base_domain,
@@ -499,6 +500,85 @@ class TestFetcher:
                 assert result == "Relative redirect content"
 
 
+class TestConditionalFetch:
+    async def test_returns_response_validators(self) -> None:
+        with respx.mock:
+            respx.get("https://example.com/llms.txt").mock(
+                return_value=httpx.Response(
+                    200,
+                    text="# Docs",
+                    headers={"etag": '"v1"', "last-modified": "Wed, 01 Jan 2026 00:00:00 GMT"},
+                )
+            )
+            async with httpx.AsyncClient() as client:
+                result = await Fetcher(client).fetch_conditional(
+                    "https://example.com/llms.txt", ALLOWLIST
+                )
+
+        assert result.content == "# Docs"
+        assert result.validators == CacheValidators(
+            etag='"v1"', last_modified="Wed, 01 Jan 2026 00:00:00 GMT"
+        )
+
+    async def test_not_modified_skips_processing(self) -> None:
+        processor = _FailingProcessor()
+        with respx.mock:
+            route = respx.get("https://example.com/page").mock(
+                return_value=httpx.Response(304, headers={"etag": '"v2"'})
+            )
+            async with httpx.AsyncClient() as client:
+                fetcher = Fetcher(
+                    client, html_processor_pipeline=HtmlProcessorPipeline([processor])
+                )
+                result = await fetcher.fetch_conditional(
+                    "https://example.com/page",
+                    ALLOWLIST,
+                    CacheValidators(etag='"v1"', last_modified="Wed, 01 Jan 2026 00:00:00 GMT"),
+                )
+
+        request = route.calls.last.request
+        assert request.headers["if-none-match"] == '"v1"'
+        assert request.headers["if-modified-since"] == "Wed, 01 Jan 2026 00:00:00 GMT"
+        assert result.not_modified
+        # Validators the 304 omits are carried over from the request.
+        assert result.validators == CacheValidators(
+            etag='"v2"', last_modified="Wed, 01 Jan 2026 00:00:00 GMT"
+        )
+
+    async def test_validators_are_not_sent_to_another_host(self) -> None:
+        with respx.mock:
+            first = respx.get("https://example.com/page").mock(
+                return_value=httpx.Response(
+                    301, headers={"location": "https://docs.example.org/page"}
+                )
+            )
+            second = respx.get("https://docs.example.org/page").mock(
+                return_value=httpx.Response(200, text="# Moved", headers={"etag": '"other"'})
+            )
+            async with httpx.AsyncClient() as client:
+                result = await Fetcher(client).fetch_conditional(
+                    "https://example.com/page",
+                    ALLOWLIST | {"example.org"},
+                    CacheValidators(etag='"v1"', last_modified="Wed, 01 Jan 2026 00:00:00 GMT"),
+                )
+
+        assert first.calls.last.request.headers["if-none-match"] == '"v1"'
+        redirected = second.calls.last.request.headers
+        assert "if-none-match" not in redirected
+        assert "if-modified-since" not in redirected
+        assert result.content == "# Moved"
+
+    async def test_unconditional_304_is_an_error(self) -> None:
+        with respx.mock:
+            route = respx.get("https://example.com/page").mock(return_value=httpx.Response(304))
+            async with httpx.AsyncClient() as client:
+                with pytest.raises(ProContextError) as exc_info:
+                    await Fetcher(client).fetch_conditional("https://example.com/page", ALLOWLIST)
+
+        assert "if-none-match" not in route.calls.last.request.headers
+        assert exc_info.value.code == ErrorCode.PAGE_FETCH_FAILED
+
+
 # ---------------------------------------------------------------------------
 # expand_allowlist_from_content
 # ---------------------------------------------------------------------------
@@ -0,0 +1,47 @@
+"""Unit tests for procontext.lines."""
+
+from __future__ import annotations
+
+import pytest
+
+from procontext.lines import LineIndex
+
+SAMPLES = [
+    "",
+    "single",
+    "trailing\n",
+    "a\nb\nc",
+    "\n\nblank\n\n",
+    "crlf\r\nline\r\n",
+    "lone\rcarriage",
+    "mixed\r\n\r\x0bvt\x0cff ls ps\x85nel",
+]
+
+
+class TestLineIndex:
+    @pytest.mark.parametrize("content", SAMPLES)
+    def test_total_lines_matches_splitlines(self, content: str) -> None:
+        assert LineIndex.build(content).total_lines == len(content.splitlines())
+
+    @pytest.mark.parametrize("content", SAMPLES)
+    def test_window_matches_splitlines_slice(self, content: str) -> None:
+        index = LineIndex.build(content)
+        lines = content.splitlines()
+        for start in range(1, len(lines) + 2):
+            for end in range(start, len(lines) + 2):
+                assert index.window(content, start, end) == "\n".join(lines[start - 1 : end])
+
+    @pytest.mark.parametrize("content", SAMPLES)
+    def test_suffix_starts_at_line(self, content: str) -> None:
+        index = LineIndex.build(content)
+        lines = content.splitlines()
+        for start in range(1, len(lines) + 2):
+            assert index.suffix(content, start).splitlines() == lines[start - 1 :]
+
+    def test_bytes_round_trip(self) -> None:
+        index = LineIndex.build("a\nbb\nccc\n")
+        assert LineIndex.from_bytes(index.to_bytes()) == index
+
+    def test_partial_payload_rejected(self) -> None:
+        with pytest.raises(ValueError):
+            LineIndex.from_bytes(b"\x00\x00\x00")
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import pytest
+
 from procontext.outline import (
     OutlineEntry,
+    OutlineIndex,
     build_compaction_note,
     compact_outline,
     format_outline,
@@ -204,6 +207,45 @@ class TestStripEmptyFences:
         assert len(result) == 3  # Nothing removed
 
 
+# ---------------------------------------------------------------------------
+# OutlineIndex
+# ---------------------------------------------------------------------------
+
+_INDEX_SAMPLES = [
+    "",
+    "1:# Title\n5:## Section",
+    "1:# Title\n3:```\n5:```\n7:```python\n8:## Code heading\n9:```\n11:## After",
+    "1:# Title\n3:~~~\n4:# not a closer ```\n5:~~~\n6:###### Deep",
+    "1:# Título\n\nbad line\n4:> ## Quoted",
+]
+
+
+class TestOutlineIndex:
+    @pytest.mark.parametrize("outline", _INDEX_SAMPLES)
+    def test_entries_match_parse_and_strip(self, outline: str) -> None:
+        index = OutlineIndex.build(outline)
+        assert index.entries(outline) == strip_empty_fences(parse_outline_entries(outline))
+
+    def test_entries_slice_by_position(self) -> None:
+        outline = "1:# A\n3:## B\n5:## C\n7:## D"
+        index = OutlineIndex.build(outline)
+        assert [e.text for e in index.entries(outline, 1, 3)] == ["## B", "## C"]
+        assert index.entries(outline, 3, 10) == index.entries(outline)[3:]
+
+    def test_position_bisects_line_numbers(self) -> None:
+        index = OutlineIndex.build("1:# A\n3:## B\n5:## C")
+        assert [index.position(line) for line in (0, 1, 2, 3, 5, 6)] == [0, 0, 1, 1, 2, 3]
+
+    @pytest.mark.parametrize("outline", _INDEX_SAMPLES)
+    def test_bytes_round_trip(self, outline: str) -> None:
+        index = OutlineIndex.build(outline)
+        assert OutlineIndex.from_bytes(index.to_bytes()) == index
+
+    def test_partial_payload_rejected(self) -> None:
+        with pytest.raises(ValueError):
+            OutlineIndex.from_bytes(b"\x00" * 14)
+
+
 # ---------------------------------------------------------------------------
 # compact_outline
 # ---------------------------------------------------------------------------
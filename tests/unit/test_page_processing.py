@@ -0,0 +1,72 @@
+"""Unit tests for procontext.page.processing."""
+
+from __future__ import annotations
+
+import threading
+from unittest.mock import patch
+
+from procontext.content_stats import hash_content
+from procontext.lines import LineIndex
+from procontext.outline import OutlineIndex
+from procontext.page import processing
+from procontext.page.processing import PageProcessor, process_page
+from procontext.parser import parse_outline
+from procontext.timing import tool_timing
+
+_CONTENT = (
+    "# Guide\n\nSee https://docs.example.com/api and https://cdn.example.org/x.\n"
+    "## Install\n\n```\n# not a heading\n```\n## Usage\n\nText.\n"
+)
+
+
+class TestProcessPage:
+    def test_matches_the_individual_steps(self) -> None:
+        processed = process_page(_CONTENT)
+
+        outline = parse_outline(_CONTENT)
+        assert processed.outline == outline
+        assert processed.line_index == LineIndex.build(_CONTENT)
+        assert processed.outline_index == OutlineIndex.build(outline)
+        assert processed.content_hash == hash_content(_CONTENT)
+        assert processed.discovered_domains == frozenset({"example.com", "example.org"})
+        assert set(processed.phases) == {"parse_outline", "index", "allowlist_expansion"}
+
+
+class TestPageProcessor:
+    async def test_small_pages_stay_on_the_loop_and_large_ones_go_to_a_thread(self) -> None:
+        processor = PageProcessor(offload_threshold_chars=len(_CONTENT))
+        threads: list[int] = []
+
+        def traced(text: str) -> processing.ProcessedPage:
+            threads.append(threading.get_ident())
+            return process_page(text)
+
+        with patch.object(processing, "process_page", traced):
+            await processor.process(_CONTENT[:-1])
+            await processor.process(_CONTENT)
+
+        loop_thread = threading.get_ident()
+        assert threads[0] == loop_thread
+        assert threads[1] != loop_thread
+
+    async def test_process_pool_returns_the_same_page(self) -> None:
+        processor = PageProcessor(executor="process", offload_threshold_chars=0, process_workers=1)
+        try:
+            processed = await processor.process(_CONTENT)
+        finally:
+            processor.close()
+
+        expected = process_page(_CONTENT)
+        assert processed.outline == expected.outline
+        assert processed.line_index == expected.line_index
+        assert processed.outline_index.line_numbers == expected.outline_index.line_numbers
+        assert processed.content_hash == expected.content_hash
+        assert processed.discovered_domains == expected.discovered_domains
+
+    async def test_worker_phases_are_reported_to_the_calling_tool(self) -> None:
+        processor = PageProcessor(offload_threshold_chars=0)
+        with tool_timing("read_page", "response") as timing:
+            await processor.process(_CONTENT)
+
+        phases = timing.attach({})["timing"]
+        assert {"parse_outline", "index", "allowlist_expansion"} <= set(phases)
@@ -0,0 +1,160 @@
+"""Unit tests for procontext.page.refresh."""
+
+from __future__ import annotations
+
+import asyncio
+
+import anyio
+
+from procontext.cache.metrics import CacheMetrics
+from procontext.page.refresh import RefreshQueue
+
+
+class _Jobs:
+    """Refresh jobs that record their order and block until released."""
+
+    def __init__(self, *, size: int = 0) -> None:
+        self.started: list[str] = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+        self._size = size
+
+    def job(self, name: str):
+        async def run() -> int:
+            self.started.append(name)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            try:
+                await self.release.wait()
+            finally:
+                self.running -= 1
+            return self._size
+
+        return run
+
+    async def wait_started(self, count: int) -> None:
+        with anyio.fail_after(5):
+            while len(self.started) < count:
+                await asyncio.sleep(0)
+
+
+async def _wait_idle(queue: RefreshQueue) -> None:
+    with anyio.fail_after(5):
+        while len(queue) or queue.stats.running:
+            await asyncio.sleep(0)
+
+
+class TestRefreshQueue:
+    async def test_runs_at_most_workers_at_once(self) -> None:
+        jobs = _Jobs()
+        queue = RefreshQueue(workers=2)
+        for index in range(6):
+            assert queue.submit(f"page{index}", jobs.job(f"page{index}"))
+
+        await jobs.wait_started(2)
+        await asyncio.sleep(0.01)
+        assert (jobs.running, len(queue)) == (2, 4)
+
+        jobs.release.set()
+        await _wait_idle(queue)
+        assert jobs.peak == 2 and len(jobs.started) == 6
+        assert queue.stats.max_depth == 6
+
+    async def test_hotter_pages_run_first(self) -> None:
+        jobs = _Jobs()
+        queue = RefreshQueue(workers=1)
+        queue.submit("blocker", jobs.job("blocker"))
+        await jobs.wait_started(1)
+        for name in ("cold", "warm", "hot"):
+            queue.submit(name, jobs.job(name))
+        queue.bump("warm")
+        for _ in range(3):
+            queue.bump("hot")
+
+        jobs.release.set()
+        await _wait_idle(queue)
+        assert jobs.started == ["blocker", "hot", "warm", "cold"]
+
+    async def test_full_queue_rejects_new_pages(self) -> None:
+        jobs = _Jobs()
+        queue = RefreshQueue(workers=1, max_pending=1)
+        queue.submit("running", jobs.job("running"))
+        await jobs.wait_started(1)
+
+        assert queue.submit("waiting", jobs.job("waiting")) is True
+        assert queue.submit("extra", jobs.job("extra")) is False
+        assert queue.submit("waiting", jobs.job("waiting")) is True  # bumped, not added
+        assert (len(queue), queue.stats.dropped) == (1, 1)
+        await queue.close(0)
+
+    async def test_depth_and_budget_waits_are_recorded_in_metrics(self) -> None:
+        jobs = _Jobs()
+        metrics = CacheMetrics()
+        queue = RefreshQueue(workers=1, max_requests_per_hour=1, metrics=metrics)
+        for index in range(3):
+            queue.submit(f"page{index}", jobs.job(f"page{index}"))
+        jobs.release.set()
+        await jobs.wait_started(1)
+        await asyncio.sleep(0.05)
+
+        assert metrics.gauges["refresh_queue_depth"] == 2
+        assert metrics.gauges["refresh_queue_max_depth"] == 3
+        assert metrics.counters["refreshes_deferred"] == 1
+
+        await queue.close(0)
+        assert metrics.gauges["refresh_queue_depth"] == 0
+        assert metrics.gauges["refresh_queue_max_depth"] == 3
+
+    async def test_request_budget_defers_until_next_window(self) -> None:
+        jobs = _Jobs()
+        jobs.release.set()
+        queue = RefreshQueue(workers=1, max_requests_per_hour=2, window_seconds=0.2)
+        for index in range(3):
+            queue.submit(f"page{index}", jobs.job(f"page{index}"))
+
+        await jobs.wait_started(2)
+        await asyncio.sleep(0.05)
+        assert len(jobs.started) == 2 and queue.stats.deferred == 1
+
+        await jobs.wait_started(3)
+        await queue.close(1)
+
+    async def test_byte_budget_counts_downloaded_content(self) -> None:
+        jobs = _Jobs(size=600)
+        jobs.release.set()
+        queue = RefreshQueue(workers=1, max_bytes_per_hour=1000)
+        for index in range(3):
+            queue.submit(f"page{index}", jobs.job(f"page{index}"))
+
+        await jobs.wait_started(2)
+        await asyncio.sleep(0.05)
+        assert len(jobs.started) == 2
+        assert queue.stats.bytes_this_window == 1200
+        await queue.close(0)
+        assert len(queue) == 0
+
+    async def test_close_waits_for_running_and_drops_waiting(self) -> None:
+        jobs = _Jobs()
+        metrics = CacheMetrics()
+        queue = RefreshQueue(workers=1, metrics=metrics)
+        queue.submit("running", jobs.job("running"))
+        queue.submit("waiting", jobs.job("waiting"))
+        await jobs.wait_started(1)
+
+        asyncio.get_running_loop().call_later(0.05, jobs.release.set)
+        assert await queue.close(5) == ["waiting"]
+
+        assert jobs.started == ["running"] and jobs.running == 0
+        assert queue.submit("late", jobs.job("late")) is False
+        assert metrics.latency["refresh_wait"].count == 1
+
+    async def test_close_cancels_refreshes_past_the_grace_period(self) -> None:
+        jobs = _Jobs()
+        queue = RefreshQueue(workers=1)
+        queue.submit("stuck", jobs.job("stuck"))
+        await jobs.wait_started(1)
+
+        await queue.close(0.01)
+
+        assert jobs.running == 0 and queue.stats.running == 0
@@ -6,15 +6,37 @@ tests can stay focused on externally visible behavior.
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import hashlib
 from datetime import UTC, datetime
+from typing import TYPE_CHECKING
 from unittest.mock import MagicMock, patch
 
+import anyio
+import pytest
+
 from procontext.config import Settings
+from procontext.content_stats import hash_content
+from procontext.errors import ErrorCode, ProContextError
+from procontext.fetch.models import CacheValidators, ConditionalFetch
 from procontext.models.cache import PageCacheEntry
 from procontext.models.registry import RegistryIndexes
-from procontext.page.service import _maybe_spawn_refresh
+from procontext.page.refresh import RefreshQueue
+from procontext.page.service import (
+    _background_refresh,
+    _maybe_spawn_refresh,
+    close_refresh_queue,
+    fetch_or_cached_page,
+    queue_refresh_ahead,
+)
 from procontext.state import AppState
 
+if TYPE_CHECKING:
+    from procontext.cache import Cache
+
+_URL = "https://example.com/docs/page.md"
+
 
 def _make_state() -> AppState:
     return AppState(
@@ -39,33 +61,40 @@ def _cache_entry(*, last_checked_at: datetime | None = None) -> PageCacheEntry:
 
 
 class TestMaybeSpawnRefresh:
-    def test_adds_url_to_refreshing_and_schedules_task(self) -> None:
+    async def test_adds_url_to_refreshing_and_queues_refresh(self) -> None:
         state = _make_state()
-        created_tasks: list[object] = []
 
-        def fake_create_task(coro: object) -> MagicMock:
-            created_tasks.append(coro)
-            close = getattr(coro, "close", None)
-            if callable(close):
-                close()
-            return MagicMock()
-
-        with patch("procontext.page.service.asyncio.create_task", side_effect=fake_create_task):
-            _maybe_spawn_refresh(
-                url="https://example.com/docs/page.md",
-                url_hash="hash",
-                state=state,
-                cached_entry=_cache_entry(),
-            )
+        _maybe_spawn_refresh(
+            url="https://example.com/docs/page.md",
+            url_hash="hash",
+            state=state,
+            cached_entry=_cache_entry(),
+        )
 
         assert state._refreshing == {"hash"}
-        assert len(created_tasks) == 1
+        assert state.refresh_queue is not None and len(state.refresh_queue) == 1
+        assert state.cache_metrics.counters["refreshes_started"] == 1
+        await state.refresh_queue.close(0)
 
-    def test_skips_when_refresh_already_in_flight(self) -> None:
+    async def test_closing_the_queue_clears_dropped_refreshes(self) -> None:
         state = _make_state()
-        state._refreshing.add("hash")
+        _maybe_spawn_refresh(
+            url="https://example.com/docs/page.md",
+            url_hash="hash",
+            state=state,
+            cached_entry=_cache_entry(),
+        )
+        assert state._refreshing == {"hash"}
+
+        await close_refresh_queue(state, 0)
 
-        with patch("procontext.page.service.asyncio.create_task") as mock_create_task:
+        assert state._refreshing == set()
+
+    async def test_repeat_stale_hit_bumps_waiting_refresh(self) -> None:
+        state = _make_state()
+        state.refresh_queue = RefreshQueue(workers=1)
+        state.refresh_queue.submit("other", _no_op_refresh)
+        for _ in range(2):
             _maybe_spawn_refresh(
                 url="https://example.com/docs/page.md",
                 url_hash="hash",
@@ -73,19 +102,346 @@ class TestMaybeSpawnRefresh:
                 cached_entry=_cache_entry(),
             )
 
-        mock_create_task.assert_not_called()
-        assert state._refreshing == {"hash"}
+        assert len(state.refresh_queue) == 2
+        assert state.cache_metrics.counters["refreshes_started"] == 1
+        assert state.cache_metrics.counters["refreshes_skipped"] == 1
+        # The bumped page now runs ahead of the one queued before it.
+        assert state.refresh_queue._pop() is not None
+        assert set(state.refresh_queue._pending) == {"other"}
+        await state.refresh_queue.close(0)
 
     def test_skips_when_last_checked_is_within_cooldown(self) -> None:
         state = _make_state()
 
-        with patch("procontext.page.service.asyncio.create_task") as mock_create_task:
-            _maybe_spawn_refresh(
-                url="https://example.com/docs/page.md",
-                url_hash="hash",
-                state=state,
-                cached_entry=_cache_entry(last_checked_at=datetime.now(UTC)),
-            )
+        _maybe_spawn_refresh(
+            url="https://example.com/docs/page.md",
+            url_hash="hash",
+            state=state,
+            cached_entry=_cache_entry(last_checked_at=datetime.now(UTC)),
+        )
 
-        mock_create_task.assert_not_called()
         assert state._refreshing == set()
+        assert state.refresh_queue is not None and len(state.refresh_queue) == 0
+        assert state.cache_metrics.counters["refreshes_skipped"] == 1
+
+    async def test_full_queue_drops_refresh(self) -> None:
+        state = _make_state()
+        state.refresh_queue = RefreshQueue(workers=1, max_pending=1)
+        state.refresh_queue.submit("other", _no_op_refresh)
+
+        _maybe_spawn_refresh(
+            url="https://example.com/docs/page.md",
+            url_hash="hash",
+            state=state,
+            cached_entry=_cache_entry(),
+        )
+
+        assert state._refreshing == set()
+        assert state.cache_metrics.counters["refreshes_dropped"] == 1
+        await state.refresh_queue.close(0)
+
+
+async def _no_op_refresh() -> int:
+    return 0
+
+
+class _GatedFetcher:
+    """Fetcher double that blocks until released and counts calls."""
+
+    def __init__(self, *, error: Exception | None = None) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+        self._error = error
+
+    async def fetch(self, url: str, allowlist: frozenset[str]) -> str:
+        self.calls += 1
+        await self.release.wait()
+        if self._error is not None:
+            raise self._error
+        return "# Title\n\nBody"
+
+    async def fetch_conditional(
+        self,
+        url: str,
+        allowlist: frozenset[str],
+        validators: CacheValidators | None = None,
+    ) -> ConditionalFetch:
+        return ConditionalFetch(content=await self.fetch(url, allowlist))
+
+
+class _LookupCounter:
+    """Counts completed ``get_page`` calls so tests can wait for every waiter to miss."""
+
+    def __init__(self, cache: Cache) -> None:
+        self.completed = 0
+        self._get_page = cache.get_page
+        cache.get_page = self._counted_get_page  # type: ignore[method-assign]
+
+    async def _counted_get_page(self, url_hash: str) -> PageCacheEntry | None:
+        try:
+            return await self._get_page(url_hash)
+        finally:
+            self.completed += 1
+
+    async def wait_for(self, count: int) -> None:
+        while self.completed < count:
+            await asyncio.sleep(0.001)
+
+
+class TestSingleFlight:
+    def _state(self, cache: Cache, fetcher: _GatedFetcher) -> AppState:
+        state = _make_state()
+        state.cache = cache
+        state.fetcher = fetcher
+        state.allowlist = frozenset({"example.com"})
+        return state
+
+    async def test_concurrent_misses_share_one_fetch(self, cache: Cache) -> None:
+        fetcher = _GatedFetcher()
+        state = self._state(cache, fetcher)
+
+        lookups = _LookupCounter(cache)
+        waiters = [asyncio.create_task(fetch_or_cached_page(_URL, state)) for _ in range(5)]
+        await lookups.wait_for(5)
+        fetcher.release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert fetcher.calls == 1
+        assert {await r.text.read() for r in results} == {"# Title\n\nBody"}
+        assert state._inflight == {}
+
+    async def test_failure_is_delivered_to_every_waiter(self, cache: Cache) -> None:
+        error = ProContextError(
+            code=ErrorCode.PAGE_NOT_FOUND,
+            message="HTTP 404",
+            suggestion="",
+        )
+        fetcher = _GatedFetcher(error=error)
+        state = self._state(cache, fetcher)
+
+        lookups = _LookupCounter(cache)
+        waiters = [asyncio.create_task(fetch_or_cached_page(_URL, state)) for _ in range(3)]
+        await lookups.wait_for(3)
+        fetcher.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert fetcher.calls == 1
+        assert all(result is error for result in results)
+        assert state._inflight == {}
+
+    async def test_cancelling_one_waiter_keeps_shared_fetch(self, cache: Cache) -> None:
+        fetcher = _GatedFetcher()
+        state = self._state(cache, fetcher)
+
+        lookups = _LookupCounter(cache)
+        first = asyncio.create_task(fetch_or_cached_page(_URL, state))
+        second = asyncio.create_task(fetch_or_cached_page(_URL, state))
+        await lookups.wait_for(2)
+        first.cancel()
+        await asyncio.sleep(0)
+        fetcher.release.set()
+
+        result = await second
+        assert await result.text.read() == "# Title\n\nBody"
+        assert first.cancelled()
+        assert fetcher.calls == 1
+
+
+class TestMetrics:
+    def _state(self, cache: Cache, fetcher: _GatedFetcher) -> AppState:
+        state = _make_state()
+        state.cache = cache
+        state.fetcher = fetcher
+        state.allowlist = frozenset({"example.com"})
+        return state
+
+    async def test_counts_misses_and_hits(self, cache: Cache) -> None:
+        fetcher = _GatedFetcher()
+        fetcher.release.set()
+        state = self._state(cache, fetcher)
+
+        await fetch_or_cached_page(_URL, state)
+        await fetch_or_cached_page(_URL, state)
+        await fetch_or_cached_page(_URL, state)
+
+        counters = state.cache_metrics.counters
+        assert (counters["misses"], counters["hits"], counters["stale_hits"]) == (1, 2, 0)
+        assert state.cache_metrics.latency["fetch"].count == 1
+
+    async def test_failed_refresh_is_counted(self, cache: Cache) -> None:
+        fetcher = _GatedFetcher(error=RuntimeError("network down"))
+        fetcher.release.set()
+        state = self._state(cache, fetcher)
+        url_hash = hashlib.sha256(_URL.encode()).hexdigest()
+        state._refreshing.add(url_hash)
+
+        await _background_refresh(url=_URL, url_hash=url_hash, state=state)
+
+        counters = state.cache_metrics.counters
+        assert (counters["refreshes_completed"], counters["refreshes_failed"]) == (0, 1)
+        assert state.cache_metrics.latency["refresh"].count == 1
+
+
+class TestRefreshAhead:
+    async def _state_with_expiring_page(self, cache: Cache) -> tuple[AppState, _GatedFetcher]:
+        fetcher = _GatedFetcher()
+        fetcher.release.set()
+        state = _make_state()
+        state.cache = cache
+        state.fetcher = fetcher
+        state.allowlist = frozenset({"example.com"})
+        await fetch_or_cached_page(_URL, state)
+        # Fetched an hour ago and expiring in ten minutes.
+        now_ms = int(datetime.now(UTC).timestamp() * 1000)
+        await cache._db.execute(
+            "UPDATE page_cache SET fetched_at = ?, last_accessed_at = ?, last_checked_at = ?, "
+            "expires_at = ?",
+            (now_ms - 3_600_000, now_ms - 3_600_000, now_ms - 3_600_000, now_ms + 600_000),
+        )
+        await cache._db.commit()
+        return state, fetcher
+
+    async def test_read_page_is_refreshed_before_it_expires(self, cache: Cache) -> None:
+        state, fetcher = await self._state_with_expiring_page(cache)
+        url_hash = hashlib.sha256(_URL.encode()).hexdigest()
+        await fetch_or_cached_page(_URL, state)
+
+        assert await queue_refresh_ahead(state, limit=2) == [url_hash]
+        with anyio.fail_after(5):
+            while state._refreshing:
+                await asyncio.sleep(0.01)
+
+        entry = await cache.get_page(url_hash)
+        assert entry is not None and entry.ttl_hours == 48  # unchanged content
+        assert fetcher.calls == 2
+        assert state.cache_metrics.counters["refreshes_ahead"] == 1
+
+    async def test_skips_unread_and_already_refreshing_pages(self, cache: Cache) -> None:
+        state, _ = await self._state_with_expiring_page(cache)
+        url_hash = hashlib.sha256(_URL.encode()).hexdigest()
+
+        assert await queue_refresh_ahead(state, limit=2) == []
+
+        await fetch_or_cached_page(_URL, state)
+        state._refreshing.add(url_hash)
+        assert await queue_refresh_ahead(state, limit=2) == []
+        assert await queue_refresh_ahead(state, limit=0) == []
+
+
+class TestStoredContentHash:
+    async def test_hits_reuse_the_hash_computed_at_write_time(self, cache: Cache) -> None:
+        fetcher = _GatedFetcher()
+        fetcher.release.set()
+        state = _make_state()
+        state.cache = cache
+        state.fetcher = fetcher
+        state.allowlist = frozenset({"example.com"})
+
+        hashed = MagicMock(side_effect=hash_content)
+        with (
+            patch("procontext.page.processing.hash_content", hashed),
+            patch("procontext.page.service.hash_content", hashed),
+        ):
+            miss = await fetch_or_cached_page(_URL, state)
+            hit = await fetch_or_cached_page(_URL, state)
+
+        assert hashed.call_count == 1
+        assert miss.content_hash == hit.content_hash == hash_content("# Title\n\nBody")[:12]
+
+
+class TestAdaptiveTtl:
+    async def _refresh(
+        self, cache: Cache, *, previous_content: str
+    ) -> tuple[PageCacheEntry, AppState]:
+        fetcher = _GatedFetcher()
+        fetcher.release.set()
+        state = _make_state()
+        state.cache = cache
+        state.fetcher = fetcher
+        state.allowlist = frozenset({"example.com"})
+        url_hash = hashlib.sha256(_URL.encode()).hexdigest()
+
+        await _background_refresh(
+            url=_URL,
+            url_hash=url_hash,
+            state=state,
+            previous_hash=hash_content(previous_content),
+            previous_ttl_hours=24,
+        )
+
+        entry = await cache.get_page(url_hash)
+        assert entry is not None
+        return entry, state
+
+    async def test_unchanged_refresh_lengthens_ttl(self, cache: Cache) -> None:
+        entry, state = await self._refresh(cache, previous_content="# Title\n\nBody")
+
+        assert entry.ttl_hours == 48
+        assert state.cache_metrics.counters["refreshes_unchanged"] == 1
+
+    async def test_changed_refresh_shortens_ttl(self, cache: Cache) -> None:
+        entry, state = await self._refresh(cache, previous_content="# Old title")
+
+        assert entry.ttl_hours == 12
+        assert state.cache_metrics.counters["refreshes_unchanged"] == 0
+
+
+class TestNegativeCache:
+    def _state(self, cache: Cache, fetcher: _GatedFetcher) -> AppState:
+        state = _make_state()
+        state.cache = cache
+        state.fetcher = fetcher
+        state.allowlist = frozenset({"example.com"})
+        return state
+
+    async def test_not_found_is_replayed_without_fetching(self, cache: Cache) -> None:
+        error = ProContextError(
+            code=ErrorCode.PAGE_NOT_FOUND,
+            message="HTTP 404 fetching page",
+            suggestion="The page does not exist.",
+        )
+        fetcher = _GatedFetcher(error=error)
+        fetcher.release.set()
+        state = self._state(cache, fetcher)
+
+        for _ in range(3):
+            with pytest.raises(ProContextError) as excinfo:
+                await fetch_or_cached_page(_URL, state)
+            assert (excinfo.value.code, excinfo.value.message) == (error.code, error.message)
+
+        assert fetcher.calls == 1
+        counters = state.cache_metrics.counters
+        assert (counters["misses"], counters["negative_hits"]) == (1, 2)
+        assert counters["negatives_stored"] == 1
+
+    async def test_recoverable_failures_are_not_recorded(self, cache: Cache) -> None:
+        error = ProContextError(
+            code=ErrorCode.PAGE_FETCH_FAILED,
+            message="HTTP 503",
+            suggestion="",
+            recoverable=True,
+        )
+        fetcher = _GatedFetcher(error=error)
+        fetcher.release.set()
+        state = self._state(cache, fetcher)
+
+        for _ in range(2):
+            with contextlib.suppress(ProContextError):
+                await fetch_or_cached_page(_URL, state)
+
+        assert fetcher.calls == 2
+        assert state.cache_metrics.counters["negative_hits"] == 0
+
+    async def test_zero_ttl_disables_recording(self, cache: Cache) -> None:
+        fetcher = _GatedFetcher(
+            error=ProContextError(code=ErrorCode.TOO_MANY_REDIRECTS, message="loop", suggestion="")
+        )
+        fetcher.release.set()
+        state = self._state(cache, fetcher)
+        state.settings.cache.failure_ttl_minutes = 0
+
+        for _ in range(2):
+            with contextlib.suppress(ProContextError):
+                await fetch_or_cached_page(_URL, state)
+
+        assert fetcher.calls == 2
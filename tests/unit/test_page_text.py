@@ -0,0 +1,89 @@
+"""Unit tests for procontext.page.text."""
+
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+
+from procontext.cache import Cache
+from procontext.cache.chunks import CHUNK_LINES
+from procontext.content_stats import hash_content
+from procontext.errors import ErrorCode, ProContextError
+from procontext.lines import LineIndex
+from procontext.page.text import ChunkedText, InlineText
+
+# Three chunks, with a CRLF line ending at the first chunk boundary.
+_LINES = [f"line {number}" for number in range(1, 2 * CHUNK_LINES + 501)]
+_CONTENT = "\n".join(_LINES[: CHUNK_LINES - 1]) + "\n" + "\r\n".join(_LINES[CHUNK_LINES - 1 :])
+_URL_HASH = hashlib.sha256(b"https://example.com/llms-full.txt").hexdigest()
+
+
+async def _chunked(cache: Cache) -> ChunkedText:
+    store = Cache(cache._db, chunk_threshold_chars=1000)
+    await store.set_page(
+        url="https://example.com/llms-full.txt",
+        url_hash=_URL_HASH,
+        content=_CONTENT,
+        outline="",
+        ttl_hours=24,
+    )
+    return ChunkedText(
+        cache=store,
+        url_hash=_URL_HASH,
+        content_hash=hash_content(_CONTENT),
+        chunk_lines=CHUNK_LINES,
+        total_lines=len(_LINES),
+    )
+
+
+def _inline() -> InlineText:
+    return InlineText(content=_CONTENT, line_index=LineIndex.build(_CONTENT))
+
+
+async def _collect(text: InlineText | ChunkedText, start: int) -> list[str]:
+    lines: list[str] = []
+    async for first_line, run in text.iter_lines(start):
+        assert first_line <= max(start, 1) + len(lines)
+        skip = max(start, 1) + len(lines) - first_line
+        lines.extend(run[skip:])
+    return lines
+
+
+class TestChunkedText:
+    @pytest.mark.parametrize(
+        ("start", "end"),
+        [(1, 10), (995, 1005), (CHUNK_LINES, CHUNK_LINES + 1), (1990, 2600), (2499, 9999)],
+    )
+    async def test_window_matches_inline(self, cache: Cache, start: int, end: int) -> None:
+        chunked = await _chunked(cache)
+
+        assert await chunked.window(start, end) == await _inline().window(start, end)
+
+    @pytest.mark.parametrize("start", [1, 999, 2001, 2500, 2501])
+    async def test_iter_lines_matches_splitlines(self, cache: Cache, start: int) -> None:
+        chunked = await _chunked(cache)
+
+        assert await _collect(chunked, start) == _LINES[start - 1 :]
+        assert await _collect(_inline(), start) == _LINES[start - 1 :]
+
+    async def test_read_returns_whole_content(self, cache: Cache) -> None:
+        chunked = await _chunked(cache)
+
+        assert chunked.total_lines == _inline().total_lines
+        assert await chunked.read() == _CONTENT
+
+    async def test_changed_page_raises_recoverable_error(self, cache: Cache) -> None:
+        chunked = await _chunked(cache)
+        await chunked.cache.set_page(
+            url="https://example.com/llms-full.txt",
+            url_hash=_URL_HASH,
+            content=_CONTENT + "\nnew line",
+            outline="",
+            ttl_hours=24,
+        )
+
+        with pytest.raises(ProContextError) as exc_info:
+            await chunked.window(1, 10)
+        assert exc_info.value.code == ErrorCode.PAGE_FETCH_FAILED
+        assert exc_info.value.recoverable is True
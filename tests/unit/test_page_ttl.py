@@ -0,0 +1,55 @@
+"""Unit tests for procontext.page.ttl."""
+
+from __future__ import annotations
+
+from procontext.config import CacheSettings
+from procontext.page.ttl import base_ttl_hours, next_ttl_hours
+
+_URL = "https://docs.example.com/api/v1.md"
+
+
+class TestBaseTtlHours:
+    def test_defaults_to_global_ttl(self) -> None:
+        assert base_ttl_hours(_URL, CacheSettings(ttl_hours=12)) == 12
+
+    def test_most_specific_domain_override_wins(self) -> None:
+        settings = CacheSettings(
+            domain_ttl_hours={"example.com": 48, "docs.example.com": 168},
+        )
+
+        assert base_ttl_hours(_URL, settings) == 168
+        assert base_ttl_hours("https://blog.example.com/post", settings) == 48
+        assert base_ttl_hours("https://example.org/page", settings) == 24
+
+    def test_override_does_not_match_partial_labels(self) -> None:
+        settings = CacheSettings(domain_ttl_hours={"example.com": 48})
+
+        assert base_ttl_hours("https://notexample.com/page", settings) == 24
+
+
+class TestNextTtlHours:
+    def test_unchanged_refresh_doubles_up_to_max(self) -> None:
+        settings = CacheSettings(ttl_hours=24, max_ttl_hours=72)
+
+        ttl = next_ttl_hours(_URL, settings, previous=None, changed=False)
+        assert ttl == 48
+        ttl = next_ttl_hours(_URL, settings, previous=ttl, changed=False)
+        assert ttl == 72
+
+    def test_changed_refresh_halves_down_to_min(self) -> None:
+        settings = CacheSettings(ttl_hours=24, min_ttl_hours=8)
+
+        ttl = next_ttl_hours(_URL, settings, previous=24, changed=True)
+        assert ttl == 12
+        ttl = next_ttl_hours(_URL, settings, previous=ttl, changed=True)
+        assert ttl == 8
+
+    def test_bounds_widen_to_domain_override(self) -> None:
+        settings = CacheSettings(max_ttl_hours=168, domain_ttl_hours={"example.com": 720})
+
+        assert next_ttl_hours(_URL, settings, previous=None, changed=False) == 720
+
+    def test_disabled_adaptation_always_returns_base(self) -> None:
+        settings = CacheSettings(ttl_hours=24, adaptive_ttl=False)
+
+        assert next_ttl_hours(_URL, settings, previous=96, changed=False) == 24
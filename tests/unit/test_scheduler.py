@@ -23,6 +23,7 @@ from procontext.schedulers import (
     _jittered_delay,
     run_cache_cleanup_scheduler,
     run_cache_startup_cleanup,
+    run_refresh_ahead_scheduler,
     run_registry_startup_check,
     run_registry_update_scheduler,
 )
@@ -321,6 +322,19 @@ class TestCacheCleanupScheduler:
             state.settings.cache.cleanup_interval_hours
         )
 
+    async def test_maintenance_runs_only_after_a_cleanup(self) -> None:
+        state = _make_state(transport="stdio")
+        mock_cache = AsyncMock()
+        state.cache = mock_cache
+
+        mock_cache.cleanup_if_due.return_value = False
+        await run_cache_startup_cleanup(state)
+        mock_cache.run_maintenance.assert_not_awaited()
+
+        mock_cache.cleanup_if_due.return_value = True
+        await run_cache_startup_cleanup(state)
+        mock_cache.run_maintenance.assert_awaited_once()
+
     async def test_none_cache_skips_cleanup(self) -> None:
         """When cache is None, no cleanup call is made and the coroutine returns cleanly."""
         state = _make_state(transport="stdio")
@@ -370,6 +384,67 @@ class TestCacheCleanupScheduler:
         assert sleep_durations[0] == state.settings.cache.cleanup_interval_hours * 3600
 
 
+class TestRefreshAheadScheduler:
+    async def test_disabled_returns_immediately(self) -> None:
+        state = _make_state()
+        state.settings.cache.refresh_ahead_minutes = 0
+        mock_queue = AsyncMock(return_value=[])
+
+        with patch("procontext.schedulers.queue_refresh_ahead", mock_queue):
+            await run_refresh_ahead_scheduler(state)
+
+        mock_queue.assert_not_awaited()
+
+    async def test_fills_free_slots_and_polls_faster_while_busy(self) -> None:
+        state = _make_state()
+        state.settings.cache.refresh_ahead_concurrency = 2
+        limits: list[int] = []
+        sleep_durations: list[float] = []
+
+        async def fake_queue(state: AppState, *, limit: int) -> list[str]:
+            limits.append(limit)
+            queued = ["a", "b"][:limit] if len(limits) == 1 else []
+            state._refreshing.update(queued)
+            return queued
+
+        async def fake_sleep(duration: float) -> None:
+            sleep_durations.append(duration)
+            if len(sleep_durations) == 2:
+                state._refreshing.discard("a")  # one refresh finished
+            if len(sleep_durations) == 4:
+                raise asyncio.CancelledError
+
+        with (
+            patch("procontext.schedulers.queue_refresh_ahead", side_effect=fake_queue),
+            patch("anyio.sleep", side_effect=fake_sleep),
+            pytest.raises(asyncio.CancelledError),
+        ):
+            await run_refresh_ahead_scheduler(state)
+
+        assert limits == [2, 0, 1, 1]
+        assert sleep_durations == [5.0, 5.0, 5.0, 5.0]
+
+    async def test_errors_are_logged_and_polling_continues(self) -> None:
+        state = _make_state()
+        sleep_durations: list[float] = []
+
+        async def fake_sleep(duration: float) -> None:
+            sleep_durations.append(duration)
+            raise asyncio.CancelledError
+
+        with (
+            patch(
+                "procontext.schedulers.queue_refresh_ahead",
+                AsyncMock(side_effect=RuntimeError("db locked")),
+            ),
+            patch("anyio.sleep", side_effect=fake_sleep),
+            pytest.raises(asyncio.CancelledError),
+        ):
+            await run_refresh_ahead_scheduler(state)
+
+        assert sleep_durations == [60.0]
+
+
 # ---------------------------------------------------------------------------
 # _jittered_delay
 # ---------------------------------------------------------------------------
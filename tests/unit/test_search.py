@@ -1,4 +1,4 @@
-"""Unit tests for procontext.search — build_matcher and search_lines."""
+"""Unit tests for procontext.search — build_matcher, search_lines and LineScanner."""
 
 from __future__ import annotations
 
@@ -6,7 +6,8 @@ import re
 
 import pytest
 
-from procontext.tools.search_page.search import build_matcher, search_lines
+from procontext.lines import LineIndex
+from procontext.tools.search_page.search import LineScanner, build_matcher, search_lines
 
 # Sample content used across tests
 _CONTENT = """\
@@ -184,6 +185,19 @@ class TestSearchLinesPagination:
         result = search_lines(_CONTENT, matcher)
         assert result.matches[0].line_number == 1
 
+    @pytest.mark.parametrize("offset", [1, 6, 12, 9999])
+    def test_line_index_gives_identical_results(self, offset: int) -> None:
+        matcher = build_matcher("stream")
+        expected = search_lines(_CONTENT, matcher, offset=offset, max_results=2)
+        indexed = search_lines(
+            _CONTENT,
+            matcher,
+            offset=offset,
+            max_results=2,
+            line_index=LineIndex.build(_CONTENT),
+        )
+        assert indexed == expected
+
     def test_pagination_continues_correctly(self) -> None:
         """Two paginated calls should cover all matches without overlap."""
         matcher = build_matcher("stream")
@@ -195,3 +209,29 @@ class TestSearchLinesPagination:
         first_line_numbers = {m.line_number for m in first.matches}
         second_line_numbers = {m.line_number for m in second.matches}
         assert first_line_numbers.isdisjoint(second_line_numbers)
+
+
+# ---------------------------------------------------------------------------
+# LineScanner — streamed runs
+# ---------------------------------------------------------------------------
+
+
+class TestLineScanner:
+    @pytest.mark.parametrize(("offset", "max_results"), [(1, 2), (1, 100), (6, 3), (9999, 5)])
+    def test_runs_give_identical_results(self, offset: int, max_results: int) -> None:
+        matcher = build_matcher("stream")
+        expected = search_lines(_CONTENT, matcher, offset=offset, max_results=max_results)
+
+        lines = _CONTENT.splitlines()
+        scanner = LineScanner(matcher, offset=offset, max_results=max_results)
+        for first in range(offset, len(lines) + 1, 4):
+            if scanner.feed(first, lines[first - 1 : first + 3]):
+                break
+
+        assert scanner.result() == expected
+
+    def test_feed_reports_when_done(self) -> None:
+        scanner = LineScanner(build_matcher("stream"), offset=1, max_results=1)
+        assert scanner.feed(1, ["no match", "a stream"]) is False
+        assert scanner.feed(3, ["streaming"]) is True
+        assert scanner.result().next_offset == 3
@@ -0,0 +1,86 @@
+"""Unit tests for procontext.timing."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from unittest.mock import patch
+
+import pytest
+
+from procontext.timing import PhaseTimer, phase, tool_timing
+
+
+class TestPhase:
+    def test_is_a_no_op_outside_a_timed_call(self) -> None:
+        with phase("cache_read"):
+            pass
+
+        with tool_timing("read_page", "off") as timing:
+            with phase("cache_read"):
+                pass
+            assert timing.attach({"url": "u"}) == {"url": "u"}
+
+    def test_repeated_phases_accumulate(self) -> None:
+        with tool_timing("read_page", "response") as timing:
+            for _ in range(3):
+                with phase("ssrf_check"):
+                    pass
+            with phase("network"):
+                pass
+
+        assert isinstance(timing, PhaseTimer)
+        summary = timing.attach({})["timing"]
+        assert set(summary) == {"ssrf_check", "network", "total"}
+        assert summary["total"] >= summary["ssrf_check"] + summary["network"] - 0.02
+
+    async def test_tasks_inherit_the_timer_unless_given_a_fresh_context(self) -> None:
+        async def fetch() -> None:
+            with phase("network"):
+                await asyncio.sleep(0)
+
+        with tool_timing("read_page", "response") as timing:
+            await asyncio.create_task(fetch())
+            await asyncio.create_task(_detached_refresh(), context=contextvars.Context())
+
+        assert set(timing.attach({})["timing"]) == {"network", "total"}
+
+
+async def _detached_refresh() -> None:
+    with phase("refresh"):
+        await asyncio.sleep(0)
+
+
+class TestToolTiming:
+    def test_logs_one_event_per_call(self) -> None:
+        with (
+            patch("procontext.timing.log") as log,
+            tool_timing("search_page", "log", url="https://example.com") as timing,
+            phase("search"),
+        ):
+            pass
+
+        assert timing.attach({}) == {}
+        log.info.assert_called_once()
+        args, fields = log.info.call_args
+        assert args == ("tool_timing",)
+        assert fields["tool"] == "search_page"
+        assert fields["ok"] is True
+        assert fields["url"] == "https://example.com"
+        assert set(fields["phases"]) == {"search"}
+
+    def test_failed_call_is_logged(self) -> None:
+        with (
+            patch("procontext.timing.log") as log,
+            pytest.raises(RuntimeError),
+            tool_timing("read_page", "log"),
+        ):
+            raise RuntimeError("boom")
+
+        assert log.info.call_args.kwargs["ok"] is False
+
+    def test_off_logs_nothing(self) -> None:
+        with patch("procontext.timing.log") as log, tool_timing("read_page", "off"):
+            pass
+
+        log.info.assert_not_called()